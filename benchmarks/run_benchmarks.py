@@ -0,0 +1,170 @@
+"""Run the canonical benchmark scenarios and track their history.
+
+Usage, from the repository root::
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scenarios single_train heavy_demand
+
+Every scenario runs in a fresh process. The results are appended to
+``benchmarks/results/history.jsonl`` together with the commit and machine
+they were measured on, and compared with the previous runs on the same
+machine.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.scenarios import CANONICAL_SCENARIOS, BenchmarkScenario, run_scenario
+from transit_lab_simmetro.utils import project_root
+
+HISTORY_FILE = project_root / "benchmarks" / "results" / "history.jsonl"
+
+# Metrics compared against the history, and whether higher values are better.
+TRACKED_METRICS = {
+    "ticks_per_second": True,
+    "replications_per_minute": True,
+    "peak_rss_bytes": False,
+    "log_bytes": False,
+}
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=project_root, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_in_fresh_process(scenario: BenchmarkScenario, work_dir: str, **kwargs) -> Dict:
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return executor.submit(run_scenario, scenario, work_dir, **kwargs).result()
+
+
+def load_history(history_file: Path) -> List[Dict[str, Any]]:
+    if not history_file.exists():
+        return []
+
+    with open(history_file) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(
+    result: Dict[str, Any],
+    history: List[Dict[str, Any]],
+    tolerance: float,
+    window: int = 5,
+) -> Dict[str, float]:
+    """Relative change of every tracked metric that is worse than the median
+    of the last ``window`` runs of the same scenario on the same machine by
+    more than ``tolerance``."""
+    previous_results = [
+        entry
+        for entry in history
+        if entry["name"] == result["name"] and entry["machine"] == result["machine"]
+    ][-window:]
+    if not previous_results:
+        return {}
+
+    regressions = {}
+    for metric, higher_is_better in TRACKED_METRICS.items():
+        baseline = statistics.median(entry[metric] for entry in previous_results)
+        if not baseline:
+            continue
+
+        change = (result[metric] - baseline) / baseline
+        if (-change if higher_is_better else change) > tolerance:
+            regressions[metric] = change
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="*",
+        choices=[scenario.name for scenario in CANONICAL_SCENARIOS],
+        help="Scenarios to run, all of them by default",
+    )
+    parser.add_argument("--demand-file", default=None)
+    parser.add_argument("--schedule-file", default=None)
+    parser.add_argument("--history-file", type=Path, default=HISTORY_FILE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative change against the history reported as a regression",
+    )
+    parser.add_argument("--no-record", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    scenarios = [
+        scenario
+        for scenario in CANONICAL_SCENARIOS
+        if not args.scenarios or scenario.name in args.scenarios
+    ]
+    history = load_history(args.history_file)
+    commit = get_commit()
+    machine = f"{platform.node()}-{platform.machine()}"
+
+    found_regressions = False
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scenario in scenarios:
+            print(f"Running {scenario.name}...", flush=True)
+            metrics = run_in_fresh_process(
+                scenario,
+                work_dir,
+                demand_file=args.demand_file,
+                schedule_file=args.schedule_file,
+            )
+            result = {
+                "name": scenario.name,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": commit,
+                "machine": machine,
+                "python": platform.python_version(),
+                **metrics,
+            }
+            results.append(result)
+
+            regressions = find_regressions(result, history, args.tolerance)
+            found_regressions = found_regressions or bool(regressions)
+
+            print(
+                f"  {result['ticks_per_second']:10.1f} ticks/s"
+                f"  {result['replications_per_minute']:8.2f} replications/min"
+                f"  {result['peak_rss_bytes'] / 2**20:8.1f} MiB peak RSS"
+                f"  {result['log_bytes'] / 2**20:8.2f} MiB logs"
+            )
+            for metric, change in regressions.items():
+                print(f"  REGRESSION {metric}: {change:+.1%} against the history")
+
+    if not args.no_record:
+        args.history_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history_file, "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    return 1 if found_regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Measure how the simulation scales on synthetic lines.
+
+Usage, from the repository root::
+
+    python -m benchmarks.scaling
+    python -m benchmarks.scaling --blocks 100 400 1600 --headways 300 --demand 10
+
+Each sweep varies one of the number of blocks, the dispatch headway (and so
+the number of trains on the line) and the demand per origin-destination pair,
+keeping the others at their base value. Every point runs in a fresh process.
+The ticks per second and the peak memory of every point are written to
+``scaling.csv`` and plotted to ``scaling.png`` in the output folder.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from benchmarks.run_benchmarks import run_in_fresh_process
+from benchmarks.scenarios import BENCHMARK_SEED, PM_PEAK_START_HOUR, BenchmarkScenario
+from transit_lab_simmetro.simulation_runner.synthetic_inputs import SyntheticLine
+from transit_lab_simmetro.utils import project_root
+
+OUTPUT_FOLDER = project_root / "benchmarks" / "results" / "scaling"
+
+BASE_BLOCKS = 200
+BASE_HEADWAY = 300
+BASE_DEMAND = 10
+BLOCKS_PER_STATION = 6
+
+SWEEP_LABELS = {
+    "blocks": "Blocks per direction",
+    "trains": "Trains dispatched per hour",
+    "demand": "Passengers per hour per OD pair",
+}
+
+
+def run_point(
+    work_dir: str,
+    num_blocks: int,
+    headway: float,
+    demand: float,
+    duration: float,
+    speed_code_fan_out: int,
+) -> Dict:
+    name = f"blocks{num_blocks}_headway{headway:g}_demand{demand:g}"
+    start_time_of_day = PM_PEAK_START_HOUR * 3600
+
+    line = SyntheticLine(
+        num_blocks,
+        max(num_blocks // BLOCKS_PER_STATION, 2),
+        speed_code_fan_out=speed_code_fan_out,
+        seed=BENCHMARK_SEED,
+    )
+    file_paths = line.write(
+        os.path.join(work_dir, f"{name}_inputs"),
+        headway=headway,
+        start_time_of_day=start_time_of_day,
+        end_time_of_day=start_time_of_day + duration,
+        arrival_rate_per_pair=demand,
+        seed=BENCHMARK_SEED,
+    )
+    metrics = run_in_fresh_process(
+        BenchmarkScenario(name, duration=duration),
+        work_dir,
+        demand_file=file_paths["demand"],
+        schedule_file=file_paths["schedule"],
+        infra_file=file_paths["infra"],
+        path_config_file=file_paths["path_config"],
+        station_names=line.station_names,
+    )
+
+    return {
+        "blocks": num_blocks,
+        "stations": line.num_stations,
+        "trains": 2 * 3600 / headway,
+        "demand": demand,
+        "ticks_per_second": metrics["ticks_per_second"],
+        "peak_rss_mib": metrics["peak_rss_bytes"] / 2**20,
+        "wall_time": metrics["wall_time"],
+    }
+
+
+def plot(results: Dict[str, List[Dict]], file_path: str) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, len(results), figsize=(4 * len(results), 6))
+    for column, (sweep, rows) in enumerate(results.items()):
+        x = [row[sweep] for row in rows]
+        for row_index, (metric, label) in enumerate(
+            [
+                ("ticks_per_second", "Ticks per second"),
+                ("peak_rss_mib", "Peak RSS (MiB)"),
+            ]
+        ):
+            ax = axes[row_index][column] if len(results) > 1 else axes[row_index]
+            ax.plot(x, [row[metric] for row in rows], marker="o")
+            ax.set_xscale("log")
+            ax.set_xlabel(SWEEP_LABELS[sweep])
+            ax.set_ylabel(label)
+            ax.grid(True, alpha=0.3)
+
+    fig.tight_layout()
+    fig.savefig(file_path, dpi=120)
+    plt.close(fig)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blocks", type=int, nargs="*", default=[50, 200, 800])
+    parser.add_argument("--headways", type=float, nargs="*", default=[600, 300, 150])
+    parser.add_argument("--demand", type=float, nargs="*", default=[2, 10, 50])
+    parser.add_argument("--duration", type=float, default=3600)
+    parser.add_argument("--speed-code-fan-out", type=int, default=3)
+    parser.add_argument("--output-folder", default=str(OUTPUT_FOLDER))
+    args = parser.parse_args(argv)
+
+    sweeps = {
+        "blocks": [
+            (num_blocks, BASE_HEADWAY, BASE_DEMAND) for num_blocks in args.blocks
+        ],
+        "trains": [(BASE_BLOCKS, headway, BASE_DEMAND) for headway in args.headways],
+        "demand": [(BASE_BLOCKS, BASE_HEADWAY, demand) for demand in args.demand],
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for sweep, points in sweeps.items():
+            results[sweep] = []
+            for num_blocks, headway, demand in points:
+                print(
+                    f"Running {num_blocks} blocks, {headway:g}s headway, "
+                    f"{demand:g} pax/h per pair...",
+                    flush=True,
+                )
+                row = run_point(
+                    work_dir,
+                    num_blocks,
+                    headway,
+                    demand,
+                    args.duration,
+                    args.speed_code_fan_out,
+                )
+                print(
+                    f"  {row['ticks_per_second']:10.1f} ticks/s"
+                    f"  {row['peak_rss_mib']:8.1f} MiB peak RSS"
+                )
+                results[sweep].append({"sweep": sweep, **row})
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    rows = [row for sweep_rows in results.values() for row in sweep_rows]
+    with open(os.path.join(args.output_folder, "scaling.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    plot(results, os.path.join(args.output_folder, "scaling.png"))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
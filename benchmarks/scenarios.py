@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+from omegaconf import OmegaConf
+
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_engine.passenger.arrival_rate import STATION_NAMES
+from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
+    OHareEmpiricalSchedule,
+)
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    HoldingStrategyFactory,
+)
+from transit_lab_simmetro.simulation_engine.utils import LoggerContext
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    BlockActivationLogger,
+    NullTrainLogger,
+    OHareTerminalHoldingLogger,
+    PassengerLogger,
+    SimulationLogger,
+    StationLogger,
+)
+from transit_lab_simmetro.simulation_engine.utils.profiling import (
+    PROFILED_SUBSYSTEMS,
+    SubsystemProfiler,
+)
+from transit_lab_simmetro.simulation_runner.loaders import (
+    PathConfigLoader,
+    create_moving_block_path_from_data,
+    create_path_from_data_with_offscan_symptom,
+    load_data,
+    read_slow_zones_from_json,
+)
+from transit_lab_simmetro.simulation_runner.synthetic_inputs import (
+    write_uniform_demand,
+)
+from transit_lab_simmetro.utils import project_root
+
+BENCHMARK_SEED = 20240401
+PM_PEAK_START_HOUR = 14
+
+# Uniform demand per origin-destination pair, in passengers per hour, used
+# when no demand file is given.
+SYNTHETIC_DEMAND_RATE = 10
+
+
+@dataclass
+class BenchmarkScenario:
+    name: str
+    duration: float
+    start_hour: float = PM_PEAK_START_HOUR
+    replications: int = 1
+    holding_strategy: str = "no_holding"
+    demand_level: float = 1
+    moving_block: bool = False
+    single_train: bool = False
+    config_overrides: Dict[str, Any] = field(default_factory=dict)
+
+
+CANONICAL_SCENARIOS: List[BenchmarkScenario] = [
+    BenchmarkScenario("single_train", duration=2 * 3600, single_train=True),
+    BenchmarkScenario("pm_peak_empirical", duration=4 * 3600),
+    *[
+        BenchmarkScenario(
+            f"holding_{holding_strategy}",
+            duration=2 * 3600,
+            holding_strategy=holding_strategy,
+            config_overrides=(
+                {"lookahead": {"horizon": 600, "num_rollouts": 2, "num_candidates": 3}}
+                if holding_strategy == "lookahead"
+                else {}
+            ),
+        )
+        for holding_strategy in HoldingStrategyFactory.strategies
+    ],
+    BenchmarkScenario("moving_block", duration=2 * 3600, moving_block=True),
+    BenchmarkScenario("heavy_demand", duration=2 * 3600, demand_level=2),
+]
+
+
+class SingleTrainSchedule(OHareEmpiricalSchedule):
+    """Only the first northbound dispatch of the empirical schedule."""
+
+    def generate_random_dispatch_info(self):
+        dispatch_info = super().generate_random_dispatch_info()
+        self.dispatch_info = [
+            next(dispatch for dispatch in dispatch_info if dispatch[2] == "Northbound")
+        ]
+        return self.dispatch_info
+
+
+def peak_rss_in_bytes() -> int:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def run_scenario(
+    scenario: BenchmarkScenario,
+    work_dir: str,
+    demand_file: Optional[str] = None,
+    schedule_file: Optional[str] = None,
+    infra_file: Optional[str] = None,
+    path_config_file: Optional[str] = None,
+    station_names: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Run one scenario with fixed seeds and return its performance metrics.
+
+    Runs on the Blue Line inputs unless other input files are given, with
+    ``station_names`` listing the stations of another line in southbound
+    order. Meant to run in a fresh process, so that the peak RSS belongs to
+    the scenario alone.
+    """
+    config_handler.set_config(
+        OmegaConf.create(
+            {
+                "short_turning": "UIC",
+                "inspection_time": "High",
+                "headway_management": False,
+                "station": "UIC-Halsted",
+                "critical_station": "Grand",
+                "schd": "PM",
+                "passenger": {"probability_of_boarding_any_train": 0.5},
+                "holding_strategy": scenario.holding_strategy,
+                "max_holding": 180,
+                "min_holding": 60,
+                **scenario.config_overrides,
+            }
+        )
+    )
+
+    log_folder_path = os.path.join(work_dir, scenario.name)
+    os.makedirs(log_folder_path, exist_ok=True)
+
+    station_names = STATION_NAMES if station_names is None else station_names
+    if demand_file is None:
+        demand_file = os.path.join(work_dir, "synthetic_demand.csv")
+        if not os.path.exists(demand_file):
+            write_uniform_demand(demand_file, station_names, SYNTHETIC_DEMAND_RATE)
+    arrival_rates = ArrivalRate(
+        demand_file, demand_factor=scenario.demand_level, station_names=station_names
+    )
+
+    path_initializer_function = partial(
+        (
+            create_moving_block_path_from_data
+            if scenario.moving_block
+            else create_path_from_data_with_offscan_symptom
+        ),
+        arrival_rates=arrival_rates,
+        path_config_loader=PathConfigLoader(
+            path_config_file or project_root / "inputs" / "path_config.json"
+        ),
+    )
+    schedule = (
+        SingleTrainSchedule if scenario.single_train else OHareEmpiricalSchedule
+    )(
+        schedule_file
+        or project_root / "inputs" / "schedules" / "empirical_schedule_81.json",
+        scenario.start_hour * 3600,
+        scenario.start_hour * 3600 + scenario.duration,
+    )
+
+    logger_context = LoggerContext(
+        train_logger=NullTrainLogger(),
+        passenger_logger=PassengerLogger(f"{log_folder_path}/passenger_test.csv"),
+        station_logger=StationLogger(f"{log_folder_path}/station_test.csv"),
+        simulation_logger=SimulationLogger(f"{log_folder_path}/simulation_test.json"),
+        block_logger=BlockActivationLogger(f"{log_folder_path}/block_test.csv"),
+        ohare_terminal_holding_logger=OHareTerminalHoldingLogger(
+            f"{log_folder_path}/ohare_terminal_holding_test.csv"
+        ),
+        warmup_time=0,
+        start_hour_of_day=scenario.start_hour,
+    )
+    replication_manager = ReplicationManager(scenario.replications, logger_context)
+    seed_numbers = [BENCHMARK_SEED + i for i in range(scenario.replications)]
+
+    profiler = SubsystemProfiler(
+        subsystems={
+            subsystem: PROFILED_SUBSYSTEMS[subsystem] for subsystem in ["run", "tick"]
+        }
+    )
+    start_time = time.perf_counter()
+    with profiler:
+        replication_manager.run_replications(
+            schedule=schedule,
+            path_initializer_function=path_initializer_function,
+            data=load_data(infra_file or project_root / "inputs" / "infra.json"),
+            # The Blue Line slow zones do not apply to other alignments.
+            slow_zones=(
+                read_slow_zones_from_json(project_root / "inputs" / "slow_zones.json")
+                if infra_file is None
+                else []
+            ),
+            total_time=scenario.duration,
+            start_hour=scenario.start_hour,
+            seed_numbers=seed_numbers,
+        )
+    wall_time = time.perf_counter() - start_time
+
+    return {
+        "scenario": asdict(scenario),
+        "wall_time": wall_time,
+        "ticks_per_second": profiler.report()["ticks_per_second"],
+        "replications_per_minute": len(seed_numbers) / wall_time * 60,
+        "peak_rss_bytes": peak_rss_in_bytes(),
+        "log_bytes": sum(
+            os.path.getsize(os.path.join(log_folder_path, file_name))
+            for file_name in os.listdir(log_folder_path)
+        ),
+        "unsuccessful_replications": len(logger_context.unsuccessful_replications),
+    }
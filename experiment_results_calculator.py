@@ -1,7 +1,24 @@
 import os
+from pathlib import Path
 
 import pandas as pd
 
+from hydra_experiment_results_extractor import extract_results
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import (
+    find_log_file,
+    read_log,
+)
+
+# Cache of the summaries of the station logs below the walked directory
+DATABASE_NAME = "calculated_results.sqlite"
+STATION_LOG_COLUMNS = [
+    "replication_id",
+    "train_id",
+    "station_name",
+    "time_in_seconds",
+    "headway",
+]
+
 
 class TravelTimeCalculator:
     def __init__(self, parameters):
@@ -42,9 +59,9 @@ class TravelTimeCalculator:
         # Return mean and Coefficient of Variation of headways
         return mean_headway, std_headway / mean_headway if mean_headway != 0 else 0
 
-    def process_csv(self, csv_file, parameters):
-        # Read CSV file
-        df = pd.read_csv(csv_file)
+    def summarize_csv(self, csv_file):
+        # Read the station log, compressed or not
+        df = read_log(csv_file, usecols=STATION_LOG_COLUMNS)
 
         # Specify your origin and destination stations
         origin_station = "Forest Park"
@@ -81,21 +98,34 @@ class TravelTimeCalculator:
                 f"cv_headway_{station.replace('-', '_').replace(' ', '_')}"
             ] = cv_headway
 
+        return {
+            "avg_travel_time": avg_travel_time,
+            "cv_travel_time": cv_travel_time,
+            **headway_stats,
+        }
+
+    def process_csv(self, csv_file, parameters):
         # Add the results to the output
-        self.output.append(
-            {
-                **parameters,
-                "avg_travel_time": avg_travel_time,
-                "cv_travel_time": cv_travel_time,
-                **headway_stats,
-            }
-        )
+        self.output.append({**parameters, **self.summarize_csv(csv_file)})
 
-    def walk_directory(self, dir):
-        for root, dirs, files in os.walk(dir):
-            if "station_test.csv" in files:
-                parameters = self.parse_parameters_from_path(root)
-                self.process_csv(os.path.join(root, "station_test.csv"), parameters)
+    def walk_directory(self, dir, workers=None):
+        experiment_dirs = [
+            Path(root) for root, _, _ in os.walk(dir) if has_station_log(root)
+        ]
+        # Only the new or changed station logs are summarized, in parallel
+        summaries = extract_results(
+            dir,
+            database_path=Path(dir) / DATABASE_NAME,
+            workers=workers,
+            summarize=summarize_directory,
+            experiment_dirs=experiment_dirs,
+        ).drop(columns="experiment_dir")
+
+        for experiment_dir, summary in zip(
+            experiment_dirs, summaries.to_dict("records")
+        ):
+            parameters = self.parse_parameters_from_path(str(experiment_dir))
+            self.output.append({**parameters, **summary})
 
     def parse_parameters_from_path(self, path):
         # Split the path by "/" to get the individual directories
@@ -120,6 +150,20 @@ class TravelTimeCalculator:
         df.to_csv(output_file, index=False)
 
 
+def has_station_log(directory):
+    try:
+        find_log_file(os.path.join(directory, "station_test.csv"))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def summarize_directory(directory):
+    return TravelTimeCalculator([]).summarize_csv(
+        os.path.join(directory, "station_test.csv")
+    )
+
+
 if __name__ == "__main__":
     # Define the parameters we are interested in
     parameters = ["signal_system", "slow_zones", "mean_headway", "cv_headway"]
@@ -1,30 +1,58 @@
+"""Summary statistics of the experiments of a hydra multirun directory.
+
+Experiments are processed in a process pool. The summary of every experiment
+is cached in ``extracted_results.sqlite`` in the multirun directory, keyed by
+a fingerprint of its station log and its config, so a re-run only processes
+the experiments that are new or changed since the last one. The summaries of
+all experiments are written to the ``results`` table of the same database::
+
+    python hydra_experiment_results_extractor.py MULTIRUN_DIR --output results.csv
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
 
 import pandas as pd
 import yaml
 
+from transit_lab_simmetro.dash_app.helpers.od_travel_times import ODTravelTimes
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import (
+    find_log_file,
+    read_log,
+)
+from transit_lab_simmetro.simulation_runner.results_store import flatten_config
 from transit_lab_simmetro.utils import project_root
 
+# Apart from the results.sqlite the jobs of a sweep log to.
+DATABASE_NAME = "extracted_results.sqlite"
+CACHE_TABLE = "experiment_cache"
+RESULTS_TABLE = "results"
+
+# Part of every fingerprint: changing the summary statistics invalidates the
+# cached summaries.
+EXTRACTOR_VERSION = 1
+
 
 class TravelTimeCalculator:
     def __init__(self):
         self.output = []
 
     def calculate_sim_travel_times(self, sim_data, origin_station, destination_station):
-        sim_data_filtered = sim_data[
-            sim_data["station_name"].isin([origin_station, destination_station])
-        ]
-
+        od_travel_times = ODTravelTimes(
+            sim_data,
+            ["replication_id", "train_id"],
+            [origin_station, destination_station],
+            split_column="direction",
+        )
         sim_travel_times = (
-            sim_data_filtered.groupby(["replication_id", "train_id"])
-            .apply(
-                lambda x: (
-                    x[x["station_name"] == destination_station]["time_in_seconds"].min()
-                    - x[x["station_name"] == origin_station]["time_in_seconds"].max()
-                )
-                / 60
-            )
-            .dropna()
+            pd.Series(od_travel_times.travel_times(origin_station, destination_station))
+            / 60
         )
 
         return sim_travel_times.mean(), sim_travel_times.std()
@@ -36,7 +64,7 @@ class TravelTimeCalculator:
 
         return mean_headway, std_headway / mean_headway if mean_headway != 0 else 0
 
-    def process_experiment(self, experiment_dir):
+    def summarize_experiment(self, experiment_dir):
         # Extract parameters from the config file
         with open(
             os.path.join(experiment_dir, ".hydra", "config.yaml"), "r"
@@ -44,7 +72,17 @@ class TravelTimeCalculator:
             parameters = yaml.safe_load(config_file)
 
         # Process the station_test.csv file
-        df = pd.read_csv(os.path.join(experiment_dir, "station_test.csv"))
+        df = read_log(
+            os.path.join(experiment_dir, "station_test.csv"),
+            usecols=[
+                "replication_id",
+                "train_id",
+                "station_name",
+                "direction",
+                "time_in_seconds",
+                "headway",
+            ],
+        )
 
         origin_station = "Forest Park"
         destination_station = "O-Hare"
@@ -74,29 +112,200 @@ class TravelTimeCalculator:
                 f"cv_headway_{station.replace('-', '_').replace(' ', '_')}"
             ] = cv_headway
 
-        result = {
-            **parameters,
+        return {
+            **flatten_config(parameters or {}),
             "avg_travel_time": avg_travel_time,
             "cv_travel_time": cv_travel_time,
             **headway_stats,
         }
-        self.output.append(result)
+
+    def process_experiment(self, experiment_dir):
+        self.output.append(self.summarize_experiment(experiment_dir))
 
     def save_output(self, output_filename):
         df = pd.DataFrame(self.output)
         df.to_csv(output_filename, index=False)
 
 
-if __name__ == "__main__":
-    calculator = TravelTimeCalculator()
+def summarize_experiment(experiment_dir: str) -> Dict:
+    return TravelTimeCalculator().summarize_experiment(experiment_dir)
+
+
+def find_experiment_directories(experiments_root: Union[str, Path]) -> List[Path]:
+    """The directories below the root with a hydra config and a station log."""
+    experiment_directories = []
+    for config_path in sorted(Path(experiments_root).glob("**/.hydra/config.yaml")):
+        experiment_dir = config_path.parent.parent
+        try:
+            find_log_file(experiment_dir / "station_test.csv")
+        except FileNotFoundError:
+            continue
+        experiment_directories.append(experiment_dir)
+
+    return experiment_directories
+
+
+def fingerprint(experiment_dir: Union[str, Path], content_hash: bool = False) -> str:
+    """Hash of the config, if any, and of the size and modification time, or
+    with ``content_hash`` the content, of the station log of an experiment."""
+    experiment_dir = Path(experiment_dir)
+    digest = hashlib.sha256(f"{EXTRACTOR_VERSION}".encode())
+    config_path = experiment_dir / ".hydra" / "config.yaml"
+    if config_path.exists():
+        digest.update(config_path.read_bytes())
+
+    log_path = find_log_file(experiment_dir / "station_test.csv")
+    if content_hash:
+        with open(log_path, "rb") as f:
+            for chunk in iter(lambda: f.read(2**20), b""):
+                digest.update(chunk)
+    else:
+        stat = log_path.stat()
+        digest.update(f"{log_path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Summaries of the experiments of a multirun directory, by directory
+    relative to it, with the fingerprint they were computed for."""
+
+    def __init__(self, database_path: Union[str, Path]):
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {CACHE_TABLE} ("
+            "experiment_dir TEXT PRIMARY KEY, "
+            "fingerprint TEXT NOT NULL, "
+            "summary TEXT NOT NULL)"
+        )
+        self.connection.commit()
 
-    experiments_root = project_root / "multirun" / "2023-08-15" / "11-30-08"
-    experiment_directories = [
-        os.path.join(experiments_root, d)
-        for d in os.listdir(experiments_root)
-        if os.path.isdir(os.path.join(experiments_root, d))
+    def fingerprints(self) -> Dict[str, str]:
+        return dict(
+            self.connection.execute(
+                f"SELECT experiment_dir, fingerprint FROM {CACHE_TABLE}"
+            )
+        )
+
+    def save(self, experiment_dir: str, fingerprint: str, summary: Dict) -> None:
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {CACHE_TABLE} VALUES (?, ?, ?)",
+            (experiment_dir, fingerprint, json.dumps(summary, default=str)),
+        )
+        self.connection.commit()
+
+    def summaries(self, experiment_dirs: List[str]) -> pd.DataFrame:
+        summaries = {
+            experiment_dir: json.loads(summary)
+            for experiment_dir, summary in self.connection.execute(
+                f"SELECT experiment_dir, summary FROM {CACHE_TABLE}"
+            )
+        }
+        return pd.DataFrame(
+            [
+                {"experiment_dir": experiment_dir, **summaries[experiment_dir]}
+                for experiment_dir in experiment_dirs
+            ]
+        )
+
+    def write_results(self, results: pd.DataFrame) -> None:
+        results.to_sql(RESULTS_TABLE, self.connection, if_exists="replace", index=False)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def stale_experiments(
+    fingerprints: Dict[str, str], cached_fingerprints: Dict[str, str]
+) -> List[str]:
+    return [
+        experiment_dir
+        for experiment_dir, experiment_fingerprint in fingerprints.items()
+        if cached_fingerprints.get(experiment_dir) != experiment_fingerprint
     ]
-    for experiment_dir in experiment_directories:
-        calculator.process_experiment(experiment_dir)
 
-    calculator.save_output("output_slow_zones.csv")
+
+def extract_results(
+    experiments_root: Union[str, Path],
+    database_path: Optional[Union[str, Path]] = None,
+    workers: Optional[int] = None,
+    content_hash: bool = False,
+    summarize: Callable[[str], Dict] = summarize_experiment,
+    experiment_dirs: Optional[List[Path]] = None,
+) -> pd.DataFrame:
+    """Summaries of all experiments of a multirun directory, computing only
+    those of the new or changed experiments.
+
+    ``summarize`` must be picklable, and ``experiment_dirs`` below the root
+    replace the directories with a hydra config.
+    """
+    experiments_root = Path(experiments_root)
+    cache = ExtractionCache(database_path or experiments_root / DATABASE_NAME)
+    if experiment_dirs is None:
+        experiment_dirs = find_experiment_directories(experiments_root)
+
+    fingerprints = {
+        str(Path(experiment_dir).relative_to(experiments_root)): fingerprint(
+            experiment_dir, content_hash
+        )
+        for experiment_dir in experiment_dirs
+    }
+    stale = stale_experiments(fingerprints, cache.fingerprints())
+    print(f"{len(stale)} of {len(fingerprints)} experiments to process")
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    summarize, str(experiments_root / experiment_dir)
+                ): experiment_dir
+                for experiment_dir in stale
+            }
+            # Saved as they complete, so an interrupted run keeps its progress
+            for future in as_completed(futures):
+                experiment_dir = futures[future]
+                cache.save(
+                    experiment_dir, fingerprints[experiment_dir], future.result()
+                )
+
+    results = cache.summaries(list(fingerprints))
+    cache.write_results(results)
+    cache.close()
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "experiments_root",
+        nargs="?",
+        default=project_root / "multirun" / "2023-08-15" / "11-30-08",
+    )
+    parser.add_argument(
+        "--database",
+        default=None,
+        help=f"Cache and results database, {DATABASE_NAME} in the multirun "
+        "directory by default",
+    )
+    parser.add_argument("--output", default=None, help="Also write the results to CSV")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--content-hash",
+        action="store_true",
+        help="Detect changed station logs by their content rather than their "
+        "size and modification time",
+    )
+    args = parser.parse_args(argv)
+
+    results = extract_results(
+        args.experiments_root,
+        database_path=args.database,
+        workers=args.workers,
+        content_hash=args.content_hash,
+    )
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 
-import json
-
 import click
 import pandas as pd
 import plotly.graph_objects as go
 
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import read_log
 from transit_lab_simmetro.utils import project_root
+from transit_lab_simmetro.validation.string_chart_raster import (
+    add_run_traces,
+    load_track_distances,
+    raster_figure,
+)
 
 # pio.templates.default = "simple_white"
 
@@ -27,39 +31,7 @@ color_mapping = {
 
 
 # Loading static data
-with open(project_root / "inputs" / "infra.json", "r") as f:
-    data = json.load(f)
-    track_dist = {}
-    station_dict = {}
-    distance = 0
-    for block in data["Northbound"]:
-        distance += block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
-        if "STATION" in block:
-            station_dict[block["STATION"]["STATION_NAME"]] = (
-                distance - block["DISTANCE"] / 2
-            )
-
-    for block in data["Southbound"]:
-        distance -= block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
-
-with open(project_root / "inputs" / "infra.json", "r") as f:
-    data = json.load(f)
-    track_dist = {}
-    station_dict = {}
-    distance = 0
-    for block in data["Northbound"]:
-        distance += block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
-        if "STATION" in block:
-            station_dict[block["STATION"]["STATION_NAME"]] = (
-                distance - block["DISTANCE"] / 2
-            )
-
-    for block in data["Southbound"]:
-        distance -= block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
+track_dist, station_dict = load_track_distances()
 
 
 def update_figure(block_data, station_data):
@@ -243,6 +215,22 @@ def get_available_replication_ids(train_data):
     return train_data["replication_id"].unique()
 
 
+def raster_update_figure(block_data, overlay_train_ids=()):
+    block_data["track_dist"] = block_data["block_id"].map(track_dist)
+
+    fig = raster_figure(
+        block_data, ["replication_id", "train_id", "direction"], station_dict
+    )
+    if overlay_train_ids:
+        # Overlays are drawn from the first replication only
+        first_replication = block_data[
+            block_data["replication_id"] == block_data["replication_id"].iloc[0]
+        ]
+        add_run_traces(fig, first_replication, "train_id", overlay_train_ids)
+
+    return fig
+
+
 @click.command()
 @click.argument(
     "results_dir",
@@ -260,8 +248,36 @@ def get_available_replication_ids(train_data):
     default=None,
     help="Replication ID to display. If not provided, will prompt user to select from available IDs.",
 )
-def main(results_dir, replication_id):
-    block_data = pd.read_csv(str(results_dir) + "/block_test.csv")
+@click.option(
+    "--raster",
+    is_flag=True,
+    help="Draw the density of the lines of all replications (or of --replication_id) as an image.",
+)
+@click.option(
+    "-o",
+    "--overlay",
+    "overlay_train_ids",
+    multiple=True,
+    help="Train ID to draw as a line over the raster string chart. Can be repeated.",
+)
+def main(results_dir, replication_id, raster, overlay_train_ids):
+    if raster:
+        block_data = read_log(
+            str(results_dir) + "/block_test.csv",
+            replication_ids=None if replication_id is None else [replication_id],
+            usecols=[
+                "replication_id",
+                "time_in_seconds",
+                "train_id",
+                "block_id",
+                "direction",
+            ],
+        )
+        fig = raster_update_figure(block_data, overlay_train_ids)
+        fig.show(renderer="browser", config=config)
+        return
+
+    block_data = read_log(str(results_dir) + "/block_test.csv")
 
     available_ids = get_available_replication_ids(block_data)
 
@@ -278,9 +294,9 @@ def main(results_dir, replication_id):
 
     block_data = block_data[block_data["replication_id"] == replication_id]
 
-    station_data = pd.read_csv(str(results_dir) + "/station_test.csv")
-
-    station_data = station_data[station_data["replication_id"] == replication_id]
+    station_data = read_log(
+        str(results_dir) + "/station_test.csv", replication_ids=[replication_id]
+    )
 
     fig = update_figure(block_data, station_data)
     fig.show(renderer="browser", config=config)
@@ -1,10 +1,11 @@
 # %%
 import os
 
-import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from sqlalchemy import create_engine, text
 
+from transit_lab_simmetro.utils.query_cache import QueryCache
+
 load_dotenv(find_dotenv())
 
 USERNAME = os.getenv("USERNAME")
@@ -16,9 +17,7 @@ DATABASE = os.getenv("DATABASE")
 start_date = os.getenv("start_date")
 end_date = os.getenv("end_date")
 
-engine = create_engine(
-    f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
-).connect()
+engine = create_engine(f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}")
 
 query_text1 = text(
     """
@@ -41,7 +40,7 @@ query_text1 = text(
     FROM
         avas_spectrum.qt2_trainevent
     WHERE
-        event_time::date = '2024-02-23' AND
+        event_time >= :start_date AND event_time < :end_date AND
         action = 'MOVE' AND
         scada IN ('nwc720t', 'nwd720t', 'wd452t', 'wc452t', 'wd005t', 'wd013t', 'wd008t', 'wc005t')
     ORDER BY
@@ -49,8 +48,8 @@ query_text1 = text(
    """
 )
 
-pd.read_sql(
-    query_text1, engine, params={"start_date": start_date, "end_date": end_date}
+QueryCache(engine).read(
+    query_text1, "2024-02-23", "2024-02-24", date_column="event_time"
 ).to_csv(
     "./02-23-2024.csv",
     index=False,
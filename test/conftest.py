@@ -0,0 +1,11 @@
+import pytest
+
+from test.simulation_helpers import create_simulation_inputs
+from transit_lab_simmetro import config_handler
+
+
+@pytest.fixture
+def simulation_inputs(tmp_path):
+    yield create_simulation_inputs(tmp_path)
+
+    config_handler.set_config(None)
@@ -1,3 +1,5 @@
+import numpy as np
+
 from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
     OHareEmpiricalSchedule,
     OHareEmpiricalDispatchStrategy,
@@ -38,3 +40,58 @@ def test_ohare_empirical_schedule_initialization():
     assert schedule.start_time_of_day == START_TIME_OF_DAY
     assert schedule.end_time_of_day == END_TIME_OF_DAY
     assert isinstance(schedule.dispatch_strategy, OHareEmpiricalDispatchStrategy)
+
+
+def window_headways_without_outliers(data, current_time):
+    window = data[
+        (data["time_in_sec"] >= current_time)
+        & (data["time_in_sec"] < current_time + 900)
+    ]
+    q1 = window["headway"].quantile(0.25)
+    q3 = window["headway"].quantile(0.75)
+    iqr = q3 - q1
+    window = window[
+        (window["headway"] >= q1 - 3.0 * iqr) & (window["headway"] <= q3 + 3.0 * iqr)
+    ]
+    return sorted(window["headway"].tolist())
+
+
+def test_headway_index_pools_match_the_filtered_windows():
+    schedule = OHareEmpiricalSchedule(FILE_PATH, START_TIME_OF_DAY, END_TIME_OF_DAY)
+    strategy = schedule.dispatch_strategy
+
+    for direction in strategy.directions:
+        data = strategy.empirical_schedule_data[
+            strategy.empirical_schedule_data["direction"] == direction
+        ]
+        headway_index = strategy.headway_indices[direction]
+        dispatch_times = data["time_in_sec"].to_numpy(dtype=float)[::20]
+
+        for current_time in np.concatenate(
+            [dispatch_times, dispatch_times - 900, dispatch_times + 0.5]
+        ):
+            window = headway_index.interval_windows[
+                np.searchsorted(headway_index.breakpoints, current_time)
+            ]
+            offset = headway_index.pool_offsets[window]
+            pool = headway_index.pool[
+                offset : offset + headway_index.pool_sizes[window]
+            ]
+
+            assert sorted(
+                headway_index.headways[pool].tolist()
+            ) == window_headways_without_outliers(data, current_time)
+
+
+def test_dispatches_are_reproducible_per_replication():
+    schedule = OHareEmpiricalSchedule(FILE_PATH, START_TIME_OF_DAY, END_TIME_OF_DAY)
+
+    schedule.set_replication_id(7)
+    first_run = schedule.generate_random_dispatch_info()
+    schedule.set_replication_id(8)
+    other_replication = schedule.generate_random_dispatch_info()
+    schedule.set_replication_id(7)
+
+    assert schedule.generate_random_dispatch_info() == first_run
+    assert other_replication != first_run
+    assert first_run == sorted(first_run, key=lambda dispatch: dispatch[0])
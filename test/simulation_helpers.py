@@ -0,0 +1,106 @@
+import csv
+from functools import partial
+
+from omegaconf import OmegaConf
+
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
+    OHareEmpiricalSchedule,
+)
+from transit_lab_simmetro.simulation_engine.utils import LoggerContext
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    BlockActivationLogger,
+    NullTrainLogger,
+    OHareTerminalHoldingLogger,
+    PassengerLogger,
+    SimulationLogger,
+    StationLogger,
+)
+from transit_lab_simmetro.simulation_runner.loaders import (
+    PathConfigLoader,
+    create_path_from_data_with_offscan_symptom,
+    load_data,
+    read_slow_zones_from_json,
+)
+from transit_lab_simmetro.utils import project_root
+
+START_HOUR = 14
+SNAPSHOT_TIME = START_HOUR * 3600 + 900
+TOTAL_TIME = 1800
+SEED = 7
+
+
+def create_simulation_inputs(tmp_path):
+    config_handler.set_config(
+        OmegaConf.create(
+            {
+                "short_turning": "UIC",
+                "inspection_time": "High",
+                "headway_management": False,
+                "station": "UIC-Halsted",
+                "schd": "PM",
+                "passenger": {"probability_of_boarding_any_train": 0.5},
+                "holding_strategy": "no_holding",
+            }
+        )
+    )
+
+    station_names = [
+        "O-Hare",
+        "Clark/Lake",
+        "UIC-Halsted",
+        "Forest Park",
+    ]
+    demand_file = tmp_path / "demand.csv"
+    with open(demand_file, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Origin", "Destination", "time_bin", "weekday", "arrival_rate"]
+        )
+        for time_bin in [13.75, 14.0, 14.25, 14.5, 14.75, 15.0]:
+            for origin in station_names:
+                for destination in station_names:
+                    if origin != destination:
+                        writer.writerow([origin, destination, time_bin, True, 60])
+    arrival_rate = ArrivalRate(demand_file)
+
+    path_initializer_function = partial(
+        create_path_from_data_with_offscan_symptom,
+        arrival_rates=arrival_rate,
+        path_config_loader=PathConfigLoader(
+            project_root / "inputs" / "path_config.json"
+        ),
+    )
+    schedule = OHareEmpiricalSchedule(
+        project_root / "inputs" / "schedules" / "empirical_schedule_81.json",
+        START_HOUR * 3600,
+        START_HOUR * 3600 + TOTAL_TIME,
+    )
+
+    return {
+        "schedule": schedule,
+        "path_initializer_function": path_initializer_function,
+        "data": load_data(project_root / "inputs" / "infra.json"),
+        "slow_zones": read_slow_zones_from_json(
+            project_root / "inputs" / "slow_zones.json"
+        ),
+        "total_time": TOTAL_TIME,
+        "start_hour": START_HOUR,
+    }
+
+
+def create_logger_context(log_folder_path, **kwargs):
+    return LoggerContext(
+        train_logger=NullTrainLogger(),
+        passenger_logger=PassengerLogger(f"{log_folder_path}/passenger_test.csv"),
+        station_logger=StationLogger(f"{log_folder_path}/station_test.csv"),
+        simulation_logger=SimulationLogger(f"{log_folder_path}/simulation_test.json"),
+        block_logger=BlockActivationLogger(f"{log_folder_path}/block_test.csv"),
+        ohare_terminal_holding_logger=OHareTerminalHoldingLogger(
+            f"{log_folder_path}/ohare_terminal_holding_test.csv"
+        ),
+        warmup_time=SNAPSHOT_TIME - START_HOUR * 3600,
+        start_hour_of_day=START_HOUR,
+        **kwargs,
+    )
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.dash_app.animation.preprocessing import (
+    LineLookup,
+    add_coordinates,
+    bin_frames,
+    iter_frames,
+    write_frame_file,
+)
+
+
+def test_positions_are_located_along_the_line():
+    line_lookup = LineLookup([(0, 0), (3, 0), (3, 4)])
+
+    longitudes, latitudes = line_lookup.locate(np.array([0, 0.3, 0.5, 1, 1.2]))
+
+    np.testing.assert_allclose(longitudes, [0, 2.1, 3, 3, 3])
+    np.testing.assert_allclose(latitudes, [0, 0, 0.5, 4, 4])
+
+
+def test_frames_keep_the_first_row_of_every_train():
+    df = pd.DataFrame(
+        {
+            "replication_id": [1] * 6 + [2] * 2,
+            "train_id": ["b", "b", "b", "a", "a", "a", "a", "a"],
+            "time_in_seconds": [0.0, 5, 12, 3, 8, 9, 3, 11],
+            "location_from_terminal": [0.0, 1, 2, 3, 4, 5, 6, 7],
+        }
+    )
+
+    frames = bin_frames(df, frame_seconds=10)
+
+    assert frames["replication_id"].tolist() == [1, 1, 1, 2, 2]
+    assert frames["train_id"].tolist() == ["a", "b", "b", "a", "a"]
+    assert frames["time_in_seconds"].tolist() == [0, 0, 10, 0, 10]
+    assert frames["location_from_terminal"].tolist() == [3, 0, 2, 6, 7]
+
+
+def test_frame_file_is_read_frame_by_frame(tmp_path):
+    df = pd.DataFrame(
+        {
+            "replication_id": 1,
+            "train_id": ["a", "b", "a", "b", "a"],
+            "time_in_seconds": [0.0, 0, 10, 10, 20],
+            "location_from_terminal": [0.0, 5, 2, 7, 10],
+            "number_of_passengers_on_board": [0, 10, 20, 30, 40],
+        }
+    )
+    df = add_coordinates(df, LineLookup([(0, 0), (10, 0)]))
+
+    write_frame_file(tmp_path / "frames.bin", df)
+    frames = list(iter_frames(tmp_path / "frames.bin"))
+
+    assert [time for time, _ in frames] == [0, 10, 20]
+    assert [records["train"].tolist() for _, records in frames] == [
+        [0, 1],
+        [0, 1],
+        [0],
+    ]
+    np.testing.assert_allclose(frames[1][1]["longitude"], [2, 7])
+    assert frames[2][1]["passengers"].tolist() == [40]
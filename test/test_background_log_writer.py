@@ -0,0 +1,50 @@
+import csv
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    BackgroundLoggerStrategy,
+    BackgroundLogWriter,
+    CSVLoggerStrategy,
+)
+
+LOG_FILES = ["station_test.csv", "block_test.csv"]
+
+
+def read_rows(file_path):
+    with open(file_path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_background_writer_writes_the_same_logs(simulation_inputs, tmp_path):
+    for folder, background_writer in [
+        ("foreground", None),
+        ("background", BackgroundLogWriter(max_queued_rows=16, batch_size=4)),
+    ]:
+        replication_manager = ReplicationManager(
+            1,
+            create_logger_context(
+                tmp_path / folder, background_writer=background_writer
+            ),
+        )
+        replication_manager.seed_numbers = [SEED]
+        replication_manager.run_replications(**simulation_inputs)
+
+    for file_name in LOG_FILES:
+        foreground_rows = read_rows(tmp_path / "foreground" / file_name)
+        assert len(foreground_rows) > 1
+        assert read_rows(tmp_path / "background" / file_name) == foreground_rows
+
+
+def test_flush_waits_for_queued_rows(tmp_path):
+    log_file_path = str(tmp_path / "log.csv")
+    writer = BackgroundLogWriter(max_queued_rows=2)
+    strategy = BackgroundLoggerStrategy(CSVLoggerStrategy({"a": None}), writer)
+
+    strategy.write_header(log_file_path)
+    for a in range(100):
+        strategy.write_row(log_file_path, {"a": a})
+    strategy.flush()
+
+    assert read_rows(log_file_path) == [["a"]] + [[str(a)] for a in range(100)]
+    writer.close()
@@ -0,0 +1,43 @@
+from benchmarks.run_benchmarks import find_regressions
+from benchmarks.scenarios import BenchmarkScenario, run_scenario
+from transit_lab_simmetro import config_handler
+
+
+def make_result(ticks_per_second, peak_rss_bytes=100, machine="bench"):
+    return {
+        "name": "pm_peak_empirical",
+        "machine": machine,
+        "ticks_per_second": ticks_per_second,
+        "replications_per_minute": 1.0,
+        "peak_rss_bytes": peak_rss_bytes,
+        "log_bytes": 10,
+    }
+
+
+def test_regressions_are_relative_to_the_same_machine_history():
+    history = [make_result(1000), make_result(1100), make_result(50, machine="other")]
+
+    assert find_regressions(make_result(1020), history, tolerance=0.1) == {}
+    assert set(find_regressions(make_result(800), history, tolerance=0.1)) == {
+        "ticks_per_second"
+    }
+    assert set(
+        find_regressions(make_result(1050, peak_rss_bytes=200), history, 0.1)
+    ) == {"peak_rss_bytes"}
+    assert find_regressions(make_result(10, machine="new"), history, 0.1) == {}
+
+
+def test_single_train_scenario_reports_metrics(tmp_path):
+    try:
+        metrics = run_scenario(
+            BenchmarkScenario("single_train", duration=600, single_train=True),
+            str(tmp_path),
+        )
+    finally:
+        config_handler.set_config(None)
+
+    assert metrics["ticks_per_second"] > 0
+    assert metrics["replications_per_minute"] > 0
+    assert metrics["peak_rss_bytes"] > 0
+    assert metrics["log_bytes"] > 0
+    assert metrics["unsuccessful_replications"] == 0
@@ -0,0 +1,90 @@
+import gzip
+
+import pandas as pd
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import (
+    create_log_file,
+    index_path,
+    load_index,
+    read_log,
+)
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    CompressedCSVLoggerStrategy,
+    StationLogger,
+)
+
+SEEDS = [SEED, SEED + 1]
+
+
+def run_replications(simulation_inputs, logger_context):
+    replication_manager = ReplicationManager(len(SEEDS), logger_context)
+    replication_manager.seed_numbers = SEEDS
+    replication_manager.run_replications(**simulation_inputs)
+
+
+def test_compressed_log_matches_the_csv_log(simulation_inputs, tmp_path):
+    run_replications(simulation_inputs, create_logger_context(tmp_path / "csv"))
+
+    logger_context = create_logger_context(tmp_path / "gzip")
+    (tmp_path / "gzip" / "station_test.csv").unlink()
+    logger_context.station_logger = StationLogger(
+        str(tmp_path / "gzip" / "station_test.csv"),
+        logger_strategy=CompressedCSVLoggerStrategy(),
+    ).set_warmup_time(logger_context.station_logger.warmup_time)
+    run_replications(simulation_inputs, logger_context)
+
+    expected = pd.read_csv(tmp_path / "csv" / "station_test.csv")
+    compressed_file = tmp_path / "gzip" / "station_test.csv.gz"
+    assert set(expected["replication_id"]) == set(SEEDS)
+
+    # The frames concatenate to a plain gzip file.
+    with gzip.open(compressed_file) as f:
+        pd.testing.assert_frame_equal(pd.read_csv(f), expected)
+    pd.testing.assert_frame_equal(
+        read_log(tmp_path / "gzip" / "station_test.csv"), expected
+    )
+
+    frames = load_index(compressed_file)["frames"]
+    assert [frame["replication_id"] for frame in frames] == [None] + SEEDS
+
+    one_replication = read_log(
+        tmp_path / "gzip" / "station_test.csv", replication_ids=[SEEDS[1]]
+    )
+    pd.testing.assert_frame_equal(
+        one_replication,
+        expected[expected["replication_id"] == SEEDS[1]].reset_index(drop=True),
+    )
+
+
+def test_filtering_drops_the_frames_of_a_replication(tmp_path):
+    log_file_path = str(tmp_path / "log.csv")
+    strategy = CompressedCSVLoggerStrategy({"replication_id": None, "value": None})
+
+    strategy.write_header(log_file_path)
+    for replication_id in [1, 2, 3]:
+        strategy.write_rows(
+            log_file_path,
+            [{"replication_id": replication_id, "value": v} for v in range(5)],
+        )
+    strategy.filter_out_replications(log_file_path, [2])
+
+    log = read_log(log_file_path)
+    assert log["replication_id"].tolist() == [1] * 5 + [3] * 5
+    assert log["value"].tolist() == list(range(5)) * 2
+
+
+def test_interleaved_replications_make_one_frame_each(tmp_path):
+    path = tmp_path / "log.csv.gz"
+    log_file = create_log_file(path, ["replication_id", "value"], "gzip")
+    for value in range(5):
+        for replication_id in [1, 2, 3]:
+            log_file.write_row([replication_id, value], replication_id)
+    assert not index_path(path).exists()
+    log_file.close()
+
+    frames = load_index(path)["frames"]
+    assert [frame["replication_id"] for frame in frames] == [None, 1, 2, 3]
+    log = read_log(tmp_path / "log.csv", replication_ids=[2])
+    assert log["value"].tolist() == list(range(5))
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_runner.demand_builder import (
+    DemandBuilder,
+    impute_within_groups,
+)
+from transit_lab_simmetro.simulation_runner.input_cache import InputCache
+
+STATIONS = pd.DataFrame(
+    {
+        "MAP_ID": [40890, 40820, 40230],
+        "STOP_ID": [30171, 30159, 30045],
+        "STATION_NAME_IN_SIM": ["O-Hare", "Rosemont", "Cumberland"],
+    }
+)
+
+
+def make_journeys(n=3000, missing_share=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    platforms = rng.choice([30171, 30159, 30045, 99999], n, p=[0.3, 0.3, 0.3, 0.1])
+    journeys = pd.DataFrame(
+        {
+            # Two weeks, with the Martin Luther King Jr. Day holiday
+            "transaction_dtm": pd.Timestamp("2024-01-08")
+            + pd.to_timedelta(rng.integers(0, 14 * 24 * 3600, n), unit="s"),
+            "boarding_stop": rng.choice([40890, 40820, 40230, 12345], n),
+            "route_sequence": "|Blue",
+            "direction_sequence": "|South",
+            "boarding_platform_sequence": "|30171",
+            "alighting_platform_sequence": [f"|{platform}" for platform in platforms],
+        }
+    )
+    journeys.loc[rng.random(n) < missing_share, "direction_sequence"] = "|"
+    journeys.loc[journeys["direction_sequence"] == "|", "direction_sequence"] = None
+    return journeys
+
+
+def expected_rates(journeys):
+    # The rates as computed by the original script, without imputation
+    df = journeys.copy()
+    df["Origin"] = df["boarding_stop"].map(
+        dict(zip(STATIONS["MAP_ID"], STATIONS["STATION_NAME_IN_SIM"]))
+    )
+    df["Destination"] = (
+        df["alighting_platform_sequence"]
+        .str.split("|")
+        .str[1]
+        .map(
+            dict(zip(STATIONS["STOP_ID"].astype(str), STATIONS["STATION_NAME_IN_SIM"]))
+        )
+    )
+    df["time_bin"] = df["transaction_dtm"].dt.hour + (
+        df["transaction_dtm"].dt.minute // 15 / 4
+    )
+    df["weekday"] = (df["transaction_dtm"].dt.weekday < 5) & (
+        df["transaction_dtm"].dt.normalize() != pd.Timestamp("2024-01-15")
+    )
+    rates = df.groupby(["time_bin", "weekday", "Origin", "Destination"]).apply(
+        lambda group: len(group) / group["transaction_dtm"].dt.date.nunique() * 4
+    )
+    return rates.rename("arrival_rate").reset_index()
+
+
+def test_rates_match_the_row_wise_computation():
+    journeys = make_journeys()
+    builder = DemandBuilder(STATIONS)
+    for chunk in np.array_split(journeys.index, 3):
+        builder.add(journeys.loc[chunk])
+
+    rates = builder.rates()
+    expected = expected_rates(journeys)
+    pd.testing.assert_frame_equal(
+        rates.sort_values(["time_bin", "weekday", "Origin", "Destination"]).reset_index(
+            drop=True
+        ),
+        expected,
+        check_dtype=False,
+    )
+
+
+def test_incomplete_journeys_are_imputed_within_their_group():
+    journeys = make_journeys(missing_share=0.3)
+    builder = DemandBuilder(STATIONS, seed=1)
+    builder.add(journeys)
+    counts = builder.counts()
+
+    mapped = journeys["boarding_stop"].isin(STATIONS["MAP_ID"])
+    complete = journeys["direction_sequence"].notna()
+    to_stations = (
+        journeys["alighting_platform_sequence"]
+        .str[1:]
+        .astype(int)
+        .isin(STATIONS["STOP_ID"])
+    )
+    # All journeys to stations are counted, and about the same share of the
+    # imputed ones as of the complete ones
+    assert counts["count"].sum() >= (mapped & complete & to_stations).sum()
+    assert counts["count"].sum() == pytest.approx(
+        (mapped & to_stations).sum(), rel=0.05
+    )
+
+
+def test_compiled_demand_matches_the_csv(tmp_path):
+    builder = DemandBuilder(STATIONS)
+    builder.add(make_journeys(500))
+    demand_file = tmp_path / "demand.csv"
+    builder.write(demand_file, input_cache_dir=tmp_path / "cache")
+
+    cached = InputCache(tmp_path / "cache").demand_rates(demand_file)
+    parsed = ArrivalRate(demand_file)._rates
+    assert set(cached) == set(parsed)
+    for hour in parsed:
+        assert cached[hour] == parsed[hour]
+
+
+def test_impute_within_groups():
+    df = pd.DataFrame(
+        {
+            "stop": [1, 1, 1, 2, 2, 3],
+            "platform": ["a", None, None, "b", None, None],
+            "route": ["x", "y", None, "z", None, None],
+        }
+    )
+    imputed = impute_within_groups(df, ["stop"], ["platform", "route"], seed=0)
+
+    # Row 1 is incomplete too, and stop 3 has no complete row to impute from
+    assert imputed["platform"].fillna("-").tolist() == ["a", "a", "a", "b", "b", "-"]
+    assert imputed["route"].fillna("-").tolist() == ["x", "x", "x", "z", "z", "-"]
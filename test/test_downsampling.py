@@ -0,0 +1,54 @@
+import numpy as np
+
+from transit_lab_simmetro.dash_app.helpers.downsampling import (
+    MIN_MAX_RATIO,
+    get_x_range,
+    lttb,
+    min_max,
+    select_points,
+)
+
+
+def test_lttb_keeps_the_endpoints_and_the_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 10.0
+
+    selected = lttb(x, y, 50)
+
+    assert len(selected) == 50
+    assert selected[0] == 0 and selected[-1] == 999
+    assert 500 in selected
+    assert (np.diff(selected) > 0).all()
+
+
+def test_min_max_keeps_the_extremes_of_every_bucket():
+    y = np.sin(np.linspace(0, 20, 10_001))
+
+    selected = min_max(y, 100)
+
+    assert len(selected) <= 102
+    assert selected[0] == 0 and selected[-1] == len(y) - 1
+    assert y[selected].max() == y.max()
+    assert y[selected].min() == y.min()
+
+
+def test_points_are_selected_within_the_zoom_window():
+    x = np.arange(100_000, dtype=float)
+    y = np.cos(x / 100)
+
+    overview = select_points(x, y, 500)
+    assert len(overview) <= 502
+    assert len(x) > MIN_MAX_RATIO * 500
+
+    window = select_points(x, y, 500, x_range=(1000.5, 1200.5))
+    # All the points of the window, with one point beyond each edge.
+    assert window.tolist() == list(range(1000, 1202))
+
+
+def test_x_range_of_relayout_events():
+    assert get_x_range(None) is None
+    assert get_x_range({"xaxis.autorange": True}) is None
+    assert get_x_range({"xaxis.range[0]": 10, "xaxis.range[1]": 20.5}) == (10, 20.5)
+    assert get_x_range({"xaxis.range": [1, 2]}) == (1.0, 2.0)
+    assert get_x_range({"yaxis.range[0]": 0, "yaxis.range[1]": 1}) is None
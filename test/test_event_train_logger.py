@@ -0,0 +1,55 @@
+import pandas as pd
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    EventTrainLogger,
+    TrainLogger,
+    read_event_trajectories,
+)
+
+
+def run_with_train_logger(simulation_inputs, log_folder_path, train_logger):
+    logger_context = create_logger_context(log_folder_path)
+    logger_context.train_logger = train_logger.set_warmup_time(
+        logger_context.passenger_logger.warmup_time
+    )
+
+    replication_manager = ReplicationManager(1, logger_context)
+    replication_manager.seed_numbers = [SEED]
+    replication_manager.run_replications(**simulation_inputs)
+
+
+def test_event_log_reconstructs_the_dense_trajectories(simulation_inputs, tmp_path):
+    dense_file = str(tmp_path / "dense" / "train_test.csv")
+    event_file = str(tmp_path / "events" / "train_test.csv")
+    run_with_train_logger(
+        simulation_inputs, tmp_path / "dense", TrainLogger(dense_file, 1)
+    )
+    run_with_train_logger(
+        simulation_inputs, tmp_path / "events", EventTrainLogger(event_file)
+    )
+
+    dense = pd.read_csv(dense_file)
+    events = pd.read_csv(event_file)
+    reconstructed = read_event_trajectories(event_file, time_step=0.5)
+
+    assert len(events) * 5 < len(dense)
+    assert list(reconstructed.columns) == list(dense.columns)
+
+    compared = dense.merge(
+        reconstructed,
+        on=["replication_id", "train_id", "time_in_seconds"],
+        suffixes=("", "_reconstructed"),
+    )
+    assert len(compared) > 0.95 * len(dense)
+    assert (
+        compared["current_block_id"] == compared["current_block_id_reconstructed"]
+    ).all()
+    for column, tolerance in [
+        ("speed", 0.5),
+        ("total_travelled_distance", 1),
+        ("location_from_terminal", 1),
+    ]:
+        errors = (compared[column] - compared[f"{column}_reconstructed"]).abs()
+        assert errors.max() < tolerance
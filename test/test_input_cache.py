@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
+    OHareEmpiricalSchedule,
+)
+from transit_lab_simmetro.simulation_runner.input_cache import InputCache
+from transit_lab_simmetro.utils.root_path import project_root
+
+SCHEDULE_FILE = project_root / "inputs" / "schedules" / "empirical_schedule_83.json"
+
+DEMAND_ROWS = [
+    "Origin,Destination,time_bin,weekday,arrival_rate",
+    "O-Hare,Rosemont,14,True,10",
+    "O-Hare,Cumberland,14,True,4",
+    "O-Hare,Rosemont,14.25,True,20",
+    "Rosemont,O-Hare,14.25,False,6",
+]
+
+
+@pytest.fixture
+def demand_file(tmp_path):
+    file_path = tmp_path / "demand.csv"
+    file_path.write_text("\n".join(DEMAND_ROWS) + "\n")
+    return file_path
+
+
+def test_cached_demand_matches_the_csv(tmp_path, demand_file):
+    rates = InputCache(tmp_path / "cache").demand_rates(demand_file)
+    cached = ArrivalRate(demand_file, rates=rates)
+    parsed = ArrivalRate(demand_file)
+
+    assert dict(rates) == parsed._rates
+    for hour in [14, 14.1, 14.25, 15]:
+        for weekday in [True, False]:
+            for origin, destination in [
+                ("O-Hare", "Rosemont"),
+                ("O-Hare", "Cumberland"),
+                ("Rosemont", "O-Hare"),
+            ]:
+                assert cached.get_smoothed_rate(
+                    hour, weekday, origin, destination
+                ) == parsed.get_smoothed_rate(hour, weekday, origin, destination)
+
+
+def test_edited_demand_file_gets_a_new_entry(tmp_path, demand_file):
+    cache = InputCache(tmp_path / "cache")
+    assert cache.demand_rates(demand_file)[14][True]["O-Hare"]["Rosemont"] == 10
+
+    demand_file.write_text(
+        "\n".join(DEMAND_ROWS).replace("Rosemont,14,True,10", "Rosemont,14,True,12")
+    )
+
+    assert cache.demand_rates(demand_file)[14][True]["O-Hare"]["Rosemont"] == 12
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+
+def test_cached_schedule_tables_match_the_json(tmp_path):
+    tables = InputCache(tmp_path / "cache").schedule_tables(SCHEDULE_FILE)
+    schedule = OHareEmpiricalSchedule(SCHEDULE_FILE, 14 * 3600, 18 * 3600)
+
+    for cached, parsed in zip(tables, schedule.tables):
+        pd.testing.assert_frame_equal(cached, parsed)
@@ -0,0 +1,225 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from test.simulation_helpers import SEED, START_HOUR, create_logger_context
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_engine.simulation import (
+    LockstepSimulation,
+    ReplicationManager,
+)
+from transit_lab_simmetro.simulation_engine.simulation.lockstep import (
+    DWELLING,
+    RUNNING,
+    TRAIN_LENGTH,
+)
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    NullOHareTerminalHoldingLogger,
+    NullPassengerLogger,
+    OHareTerminalHoldingLogger,
+    PassengerLogger,
+    TrainLogger,
+)
+
+
+def create_lockstep_logger_context(log_folder_path):
+    # Without the logs the lanes have no rows for
+    logger_context = create_logger_context(log_folder_path)
+    logger_context.passenger_logger = NullPassengerLogger()
+    logger_context.ohare_terminal_holding_logger = NullOHareTerminalHoldingLogger()
+    return logger_context
+
+
+@pytest.fixture
+def northbound_path(simulation_inputs):
+    paths, _ = simulation_inputs["path_initializer_function"](
+        simulation_inputs["data"], simulation_inputs["slow_zones"]
+    )
+    return paths["Northbound"]
+
+
+def test_lanes_keep_trains_apart_and_under_the_speed_codes(northbound_path):
+    start_time = START_HOUR * 3600
+    dispatches = [
+        [(start_time + headway * k, 0) for k in range(4)] for headway in [60, 120, 240]
+    ]
+    simulation = LockstepSimulation(
+        northbound_path,
+        dispatches,
+        start_hour=START_HOUR,
+        total_time=1800,
+        seeds=[SEED, SEED + 1, SEED + 2],
+    )
+    speed_limits = simulation.network.speed_limits
+
+    while not simulation.is_finished():
+        simulation.step()
+
+        active = (simulation.status == RUNNING) | (simulation.status == DWELLING)
+        assert np.all(
+            simulation.speed[active]
+            <= speed_limits[simulation.current_block[active]] + 1e-6
+        )
+        for lane in range(simulation.number_of_lanes):
+            positions = simulation.position[lane][active[lane]]
+            assert np.all(np.diff(positions) <= -TRAIN_LENGTH)
+
+    assert np.all(simulation.next_dispatch == 4)
+    assert simulation.station_visit_rows()
+
+
+def test_lockstep_replications_write_the_logger_files(simulation_inputs, tmp_path):
+    seed_numbers = [SEED, SEED + 1, SEED + 2]
+    replication_manager = ReplicationManager(
+        1, create_lockstep_logger_context(tmp_path)
+    )
+    replication_manager.run_lockstep_replications(
+        **simulation_inputs, seed_numbers=seed_numbers
+    )
+
+    station_visits = pd.read_csv(tmp_path / "station_test.csv")
+    block_activations = pd.read_csv(tmp_path / "block_test.csv")
+
+    assert set(station_visits["replication_id"]) == set(seed_numbers)
+    assert set(station_visits["direction"]) == {"Northbound", "Southbound"}
+    assert (station_visits["dwell_time"] >= 15).all()
+    assert not block_activations.empty
+
+
+def test_a_lane_does_not_depend_on_the_lanes_beside_it(northbound_path):
+    start_time = START_HOUR * 3600
+    dispatches = [
+        [(start_time + headway * k, 0) for k in range(4)] for headway in [120, 240]
+    ]
+
+    def station_visits(lanes):
+        simulation = LockstepSimulation(
+            northbound_path,
+            [dispatches[lane] for lane in lanes],
+            replication_ids=lanes,
+            start_hour=START_HOUR,
+            total_time=1800,
+            seeds=[SEED + lane for lane in lanes],
+        )
+        simulation.run()
+        return [
+            row for row in simulation.station_visit_rows() if row["replication_id"] == 1
+        ]
+
+    assert station_visits([0, 1]) == station_visits([1])
+
+
+def test_lockstep_replications_agree_with_the_object_engine(
+    simulation_inputs, tmp_path
+):
+    seed_numbers = [SEED, SEED + 1, SEED + 2]
+    station_visits = {}
+    for engine in ["object", "lockstep"]:
+        (tmp_path / engine).mkdir()
+        replication_manager = ReplicationManager(
+            1,
+            (
+                create_logger_context(tmp_path / engine)
+                if engine == "object"
+                else create_lockstep_logger_context(tmp_path / engine)
+            ),
+        )
+        run = (
+            replication_manager.run_replications
+            if engine == "object"
+            else replication_manager.run_lockstep_replications
+        )
+        run(**simulation_inputs, seed_numbers=seed_numbers)
+        station_visits[engine] = pd.read_csv(
+            tmp_path / engine / "station_test.csv"
+        ).sort_values("time_in_seconds")
+
+    def mean_headways_and_travel_times(visits):
+        trains = visits.groupby(["replication_id", "direction", "train_id"])
+        stations = visits.groupby(["replication_id", "direction", "station_name"])
+        return (
+            visits.assign(
+                headway=stations["time_in_seconds"].diff(),
+                travel_time=trains["time_in_seconds"].diff()
+                - trains["dwell_time"].shift(),
+            )
+            .groupby("direction")[["headway", "travel_time"]]
+            .mean()
+        )
+
+    pd.testing.assert_frame_equal(
+        mean_headways_and_travel_times(station_visits["lockstep"]),
+        mean_headways_and_travel_times(station_visits["object"]),
+        rtol=0.1,
+    )
+
+
+@pytest.mark.parametrize(
+    "option, value",
+    [
+        ("holding_strategy", "hold_all_trains"),
+        ("ohare_holding", True),
+        ("headway_management", True),
+    ],
+)
+def test_lockstep_replications_reject_what_they_do_not_reproduce(
+    simulation_inputs, tmp_path, option, value
+):
+    config_handler.get_config()[option] = value
+    replication_manager = ReplicationManager(
+        1, create_lockstep_logger_context(tmp_path)
+    )
+
+    with pytest.raises(ValueError, match="does not support"):
+        replication_manager.run_lockstep_replications(
+            **simulation_inputs, seed_numbers=[SEED]
+        )
+
+
+def test_lockstep_replications_reject_short_turning_trips(
+    simulation_inputs, tmp_path, monkeypatch
+):
+    schedule = simulation_inputs["schedule"]
+    generate_random_dispatch_info = schedule.generate_random_dispatch_info
+
+    def with_a_short_turning_trip():
+        generate_random_dispatch_info()
+        schedule.dispatch_info.append(
+            (START_HOUR * 3600 + 600, 0, "ShortTurning", "run")
+        )
+
+    monkeypatch.setattr(
+        schedule, "generate_random_dispatch_info", with_a_short_turning_trip
+    )
+    replication_manager = ReplicationManager(
+        1, create_lockstep_logger_context(tmp_path)
+    )
+
+    with pytest.raises(ValueError, match="ShortTurning"):
+        replication_manager.run_lockstep_replications(
+            **simulation_inputs, seed_numbers=[SEED]
+        )
+
+
+@pytest.mark.parametrize(
+    "logger_name, create_logger",
+    [
+        ("train_logger", lambda path: TrainLogger(f"{path}/train.csv", 10)),
+        ("passenger_logger", lambda path: PassengerLogger(f"{path}/passenger.csv")),
+        (
+            "ohare_terminal_holding_logger",
+            lambda path: OHareTerminalHoldingLogger(f"{path}/ohare.csv"),
+        ),
+    ],
+)
+def test_lockstep_replications_reject_the_logs_they_cannot_fill(
+    simulation_inputs, tmp_path, logger_name, create_logger
+):
+    logger_context = create_lockstep_logger_context(tmp_path)
+    setattr(logger_context, logger_name, create_logger(tmp_path))
+    replication_manager = ReplicationManager(1, logger_context)
+
+    with pytest.raises(ValueError, match="does not support the .* log"):
+        replication_manager.run_lockstep_replications(
+            **simulation_inputs, seed_numbers=[SEED]
+        )
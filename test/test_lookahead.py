@@ -0,0 +1,142 @@
+import random
+
+import pytest
+
+from test.simulation_helpers import SEED, SNAPSHOT_TIME, create_logger_context
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_engine.infrastructure import Station
+from transit_lab_simmetro.simulation_engine.simulation import (
+    ReplicationManager,
+    SimulationContext,
+)
+from transit_lab_simmetro.simulation_engine.simulation.lookahead import (
+    LookaheadEvaluator,
+    expected_waiting_time,
+)
+from transit_lab_simmetro.simulation_engine.train import Train
+from transit_lab_simmetro.simulation_engine.train.train_headway_regulator import (
+    TrainHeadwayRegulatorWithLookahead,
+)
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    AwaitingHoldingDecisionState,
+    DwellingAtStationState,
+)
+
+
+@pytest.fixture
+def warmed_up_simulation(simulation_inputs, tmp_path):
+    replication_manager = ReplicationManager(1, create_logger_context(tmp_path))
+    simulation = replication_manager._create_simulation(SEED, **simulation_inputs)
+
+    with replication_manager.logger_context:
+        with SimulationContext(simulation):
+            simulation.run(until=SNAPSHOT_TIME)
+            yield simulation
+
+
+def test_clone_shares_static_inputs_and_copies_state(warmed_up_simulation):
+    clone = warmed_up_simulation.clone()
+
+    original_blocks = warmed_up_simulation.paths["Northbound"].blocks
+    cloned_blocks = clone.paths["Northbound"].blocks
+    station_index = next(i for i, block in enumerate(original_blocks) if block.station)
+    signal_index = next(
+        i
+        for i, block in enumerate(original_blocks)
+        if getattr(block, "speed_codes_to_communicate", None)
+    )
+
+    assert cloned_blocks[0] is not original_blocks[0]
+    assert cloned_blocks[station_index].station is not (
+        original_blocks[station_index].station
+    )
+    assert cloned_blocks[station_index].station.passenger_generator is (
+        original_blocks[station_index].station.passenger_generator
+    )
+    assert cloned_blocks[signal_index].speed_codes_to_communicate is (
+        original_blocks[signal_index].speed_codes_to_communicate
+    )
+
+    positions = [train.location_from_terminal for train in warmed_up_simulation.trains]
+    for train in clone.trains:
+        train.distance_travelled_in_current_block += 1.0
+    assert positions == [
+        train.location_from_terminal for train in warmed_up_simulation.trains
+    ]
+
+
+def run_until_holding_decision(simulation):
+    config = config_handler.get_config()
+    config.holding_strategy = "lookahead"
+    config.max_holding = 60
+    config.min_holding = 30
+    config.lookahead = {"horizon": 120, "num_rollouts": 2, "num_candidates": 2}
+
+    while not simulation.holding_decisions:
+        assert not simulation.is_finished()
+        simulation.run(until=simulation.current_time)
+
+    return simulation.holding_decisions[0][0]
+
+
+def test_lookahead_evaluation_leaves_live_simulation_untouched(warmed_up_simulation):
+    simulation = warmed_up_simulation
+    train = run_until_holding_decision(simulation)
+    assert isinstance(train.state, AwaitingHoldingDecisionState)
+
+    random_state = random.getstate()
+    last_train_id = Train._last_id
+    current_time = simulation.current_time
+
+    evaluator = LookaheadEvaluator(horizon=120, num_rollouts=2, seed=1)
+    expected_kpis = evaluator.evaluate(
+        train, train.state.station, candidate_holdings=[0.0, 60.0]
+    )
+
+    assert set(expected_kpis) == {0.0, 60.0}
+    assert all(kpi >= 0 for kpi in expected_kpis.values())
+    assert random.getstate() == random_state
+    assert Train._last_id == last_train_id
+    assert Train.simulation is simulation
+    assert Station.simulation is simulation
+    assert simulation.current_time == current_time
+    assert not LookaheadEvaluator.in_rollout
+    assert isinstance(train.state, AwaitingHoldingDecisionState)
+
+
+def test_holding_is_decided_between_time_steps(warmed_up_simulation):
+    simulation = warmed_up_simulation
+    train = run_until_holding_decision(simulation)
+    station = train.state.station
+
+    # The decision is taken before any train moves in the next time step
+    simulation.run(until=simulation.current_time)
+
+    assert not simulation.holding_decisions
+    assert isinstance(train.state, DwellingAtStationState)
+    assert train.state.station is station
+    assert train.state.rec_holding in [0.0, 60.0]
+
+
+def test_rollout_budget_caps_the_rollouts():
+    evaluator = LookaheadEvaluator(horizon=1200, num_rollouts=4, rollout_budget=4800)
+
+    assert evaluator.rollouts_per_candidate(4) == 1
+    assert evaluator.rollouts_per_candidate(2) == 2
+    assert evaluator.rollouts_per_candidate(8) == 1
+    assert LookaheadEvaluator(num_rollouts=4).rollouts_per_candidate(4) == 4
+
+
+def test_expected_waiting_time_from_headways():
+    visits = [{"headway": 300}, {"headway": 300}, {"headway": float("inf")}]
+    assert expected_waiting_time(visits) == pytest.approx(150)
+
+    visits = [{"headway": 100}, {"headway": 500}]
+    assert expected_waiting_time(visits) == pytest.approx((100**2 + 500**2) / (2 * 600))
+
+
+def test_lookahead_regulator_candidates():
+    regulator = TrainHeadwayRegulatorWithLookahead(
+        max_holding=180, min_holding=60, num_candidates=4
+    )
+    assert regulator.candidate_holdings == [0.0, 60.0, 120.0, 180.0]
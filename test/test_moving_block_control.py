@@ -0,0 +1,150 @@
+from functools import partial
+
+import numpy as np
+import pytest
+from omegaconf import OmegaConf
+
+from test.simulation_helpers import create_logger_context
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_engine.infrastructure import MovingBlock
+from transit_lab_simmetro.simulation_engine.infrastructure.moving_control_center import (
+    braking_envelope,
+)
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
+    OHareEmpiricalSchedule,
+)
+from transit_lab_simmetro.simulation_engine.simulation import (
+    ReplicationManager,
+    SimulationContext,
+)
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    WaitingToBeDispatched,
+)
+from transit_lab_simmetro.simulation_runner.loaders import (
+    PathConfigLoader,
+    create_moving_block_path_from_data,
+    load_data,
+)
+from transit_lab_simmetro.simulation_runner.synthetic_inputs import SyntheticLine
+
+START_HOUR = 14
+TOTAL_TIME = 1800
+SEED = 3
+
+
+def position_on_path(train):
+    return train.distance_travelled_in_current_block + sum(
+        block.length for block in train.path.blocks[: train.current_block_index]
+    )
+
+
+def brute_force_distance_to_next_train(train, trains):
+    position = position_on_path(train)
+    rear_positions_ahead = [
+        position_on_path(other) - other.length
+        for other in trains
+        if other is not train
+        and other.path is train.path
+        and isinstance(other.current_block, MovingBlock)
+        and not isinstance(other.state, WaitingToBeDispatched)
+        and position_on_path(other) > position
+    ]
+    return min(rear_positions_ahead, default=float("inf")) - position
+
+
+@pytest.fixture
+def dense_moving_block_simulation(tmp_path):
+    config_handler.set_config(
+        OmegaConf.create(
+            {
+                "short_turning": "UIC",
+                "inspection_time": "High",
+                "headway_management": False,
+                "station": "Station 0",
+                "schd": "PM",
+                "passenger": {"probability_of_boarding_any_train": 0.5},
+                "holding_strategy": "no_holding",
+            }
+        )
+    )
+
+    line = SyntheticLine(num_blocks=40, num_stations=6, seed=SEED)
+    file_paths = line.write(
+        str(tmp_path / "inputs"),
+        headway=90,
+        start_time_of_day=START_HOUR * 3600,
+        end_time_of_day=START_HOUR * 3600 + TOTAL_TIME,
+        arrival_rate_per_pair=30,
+        seed=SEED,
+    )
+
+    replication_manager = ReplicationManager(1, create_logger_context(tmp_path))
+    simulation = replication_manager._create_simulation(
+        SEED,
+        schedule=OHareEmpiricalSchedule(
+            file_paths["schedule"],
+            START_HOUR * 3600,
+            START_HOUR * 3600 + TOTAL_TIME,
+        ),
+        path_initializer_function=partial(
+            create_moving_block_path_from_data,
+            arrival_rates=ArrivalRate(
+                file_paths["demand"], station_names=line.station_names
+            ),
+            path_config_loader=PathConfigLoader(file_paths["path_config"]),
+        ),
+        data=load_data(file_paths["infra"]),
+        slow_zones=[],
+        total_time=TOTAL_TIME,
+        start_hour=START_HOUR,
+    )
+
+    try:
+        yield replication_manager, simulation
+    finally:
+        config_handler.set_config(None)
+
+
+def test_indexed_gaps_match_a_scan_of_all_trains(dense_moving_block_simulation):
+    replication_manager, simulation = dense_moving_block_simulation
+    moving_block_control = simulation.signal_control_center
+
+    checked_gaps = 0
+    with replication_manager.logger_context:
+        with SimulationContext(simulation):
+            while not simulation.is_finished():
+                simulation.run(until=simulation.current_time + 15)
+
+                for train in simulation.trains:
+                    if isinstance(train.state, WaitingToBeDispatched):
+                        continue
+
+                    expected = brute_force_distance_to_next_train(
+                        train, simulation.trains
+                    )
+                    assert moving_block_control.get_distance_to_next_train(
+                        train
+                    ) == pytest.approx(expected)
+                    checked_gaps += expected < float("inf")
+
+    assert checked_gaps > 100
+
+
+def test_braking_envelope_limits_speeds_by_the_gap_to_the_leader():
+    gaps, braking_distances, permitted_speeds = braking_envelope(
+        positions=np.array([5000.0, 4000.0, 3300.0, 2800.0]),
+        lengths=np.full(4, 384.0),
+        speeds=np.array([55.0, 10.0, 45.0, 30.0]),
+        decelerations=np.full(4, 3.0),
+        safety_margin=200,
+    )
+
+    assert gaps.tolist() == [float("inf"), 616.0, 316.0, 116.0]
+    assert braking_distances[2] == pytest.approx((45 * 5280 / 3600) ** 2 / 6)
+    # Free running, stoppable within the gap, braking-limited and within the
+    # safety margin.
+    assert permitted_speeds[0] == float("inf")
+    assert permitted_speeds[1] == float("inf")
+    assert permitted_speeds[2] == pytest.approx((116 * 6) ** 0.5 * 3600 / 5280)
+    assert permitted_speeds[3] == 0
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.dash_app.helpers import ODTravelTimes, calculate_travel_times
+from transit_lab_simmetro.dash_app.helpers.od_travel_times import filter_outliers
+
+STATIONS = ["A", "B", "C"]
+
+
+def test_runs_are_split_where_they_turn_back():
+    # Arrival and departure events of a run going A -> C and back to A
+    events = pd.DataFrame(
+        {
+            "date": "2023-04-17",
+            "run_id": "101",
+            "station": ["A", "A", "B", "B", "C", "C", "B", "B", "A", "A"],
+            "event_time": pd.Timestamp("2023-04-17 07:00")
+            + pd.to_timedelta(np.arange(10) * 60, unit="s"),
+        }
+    )
+
+    od_travel_times = ODTravelTimes(
+        events,
+        ["date", "run_id"],
+        STATIONS,
+        station_column="station",
+        time_column="event_time",
+    )
+
+    # The turn at C belongs to both trips
+    assert len(od_travel_times.trips) == 2
+    assert od_travel_times.travel_times("A", "C").tolist() == [180]
+    assert od_travel_times.travel_times("C", "A").tolist() == [180]
+    assert od_travel_times.travel_times("B", "C").tolist() == [60]
+    assert od_travel_times.travel_times("A", "B", time_window=(0, 6 * 3600)).size == 0
+
+
+def test_quantiles_of_all_pairs():
+    rng = np.random.default_rng(0)
+    departures = np.arange(50) * 600.0
+    run_times = rng.uniform(100, 200, size=(50, 2))
+    visits = pd.DataFrame(
+        {
+            "replication_id": 1,
+            "train_id": np.repeat(np.arange(50), 3),
+            "station_name": STATIONS * 50,
+            "time_in_seconds": np.column_stack(
+                [departures, departures[:, np.newaxis] + np.cumsum(run_times, axis=1)]
+            ).ravel(),
+        }
+    )
+    visits["direction"] = "Northbound"
+
+    od_travel_times = ODTravelTimes(
+        visits, ["replication_id", "train_id"], STATIONS, split_column="direction"
+    )
+    medians = od_travel_times.quantiles(0.5)
+
+    assert np.isclose(medians.loc["A", "B"], np.median(run_times[:, 0]))
+    assert np.isclose(medians.loc["A", "C"], np.median(run_times.sum(axis=1)))
+    assert np.isnan(medians.loc["C", "A"])
+
+    all_pairs = od_travel_times.all_pairs()
+    assert len(all_pairs) == 150
+    assert set(all_pairs.columns) == {
+        "replication_id",
+        "train_id",
+        "origin",
+        "destination",
+        "travel_time",
+    }
+
+
+def test_fences_drop_the_outliers_of_every_column():
+    travel_times = np.array([[10.0, 1], [11, 2], [12, 3], [13, 4], [100, np.nan]])
+
+    fenced = filter_outliers(travel_times, iqr_fence=3)
+    assert np.isnan(fenced[4]).all()
+    assert np.isfinite(fenced[:4]).all()
+
+    trimmed = filter_outliers(travel_times, quantile_range=(0.25, 1))
+    assert np.isnan(trimmed[0]).all()
+
+
+def test_travel_times_of_every_train():
+    station_data = pd.DataFrame(
+        {
+            "replication_id": [1, 1, 1, 1, 2, 2],
+            "train_id": ["t1", "t1", "t2", "t2", "t1", "t1"],
+            "station_name": ["A", "B", "B", "A", "A", "C"],
+            "time_in_seconds": [0, 100, 50, 200, 10, 400],
+        }
+    )
+
+    travel_times = calculate_travel_times(station_data)
+
+    assert sorted(
+        travel_times.itertuples(index=False, name=None), key=lambda row: row[0]
+    ) == [
+        (1, "A", "B", "t1", 100),
+        (1, "B", "A", "t2", 150),
+        (2, "A", "C", "t1", 390),
+    ]
@@ -0,0 +1,28 @@
+import json
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.simulation.simulation import Simulation
+from transit_lab_simmetro.simulation_engine.utils.profiling import SubsystemProfiler
+
+
+def test_profiler_reports_subsystems_and_restores_methods(simulation_inputs, tmp_path):
+    dispatch_trains = Simulation.__dict__["_dispatch_trains"]
+    replication_manager = ReplicationManager(1, create_logger_context(tmp_path))
+
+    with SubsystemProfiler(dump="cprofile") as profiler:
+        assert Simulation._dispatch_trains is not dispatch_trains
+        replication_manager.run_replications(**simulation_inputs, seed_numbers=[SEED])
+    profiler.write_report(tmp_path)
+
+    assert Simulation.__dict__["_dispatch_trains"] is dispatch_trains
+
+    with open(tmp_path / "profile_report.json") as f:
+        report = json.load(f)
+
+    assert report["ticks"] == simulation_inputs["total_time"] / 0.5 + 1
+    assert report["ticks_per_second"] > 0
+    assert report["subsystems"]["dispatch"]["calls_per_tick"] == 1
+    assert report["subsystems"]["passenger_generation"]["calls"] > 0
+    assert report["subsystems"]["logger_io"]["calls"] > 0
+    assert (tmp_path / "profile.prof").exists()
@@ -0,0 +1,120 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from transit_lab_simmetro.utils.query_cache import QueryCache, day_runs
+
+EVENTS_QUERY = text(
+    "SELECT event_time, run_id, scada FROM events"
+    " WHERE event_time >= :start_date AND event_time < :end_date"
+    " AND run_id LIKE :run_prefix ORDER BY event_time"
+)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'avl.sqlite'}")
+    events = pd.DataFrame(
+        {
+            "event_time": [
+                f"2023-04-{day:02d} {hour:02d}:00:00"
+                for day in range(1, 11)
+                for hour in [6, 18]
+                if day != 4
+            ],
+            "run_id": "B101",
+            "scada": "wc452t",
+        }
+    )
+    events.loc[::3, "run_id"] = "X201"
+    events.to_sql("events", engine, index=False)
+
+    engine.queries = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: engine.queries.append(
+            parameters
+        ),
+    )
+    return engine
+
+
+def test_only_missing_days_are_queried(engine, tmp_path):
+    cache = QueryCache(engine, tmp_path / "cache", chunksize=3)
+    params = {"run_prefix": "B%"}
+
+    first = cache.read(EVENTS_QUERY, "2023-04-03", "2023-04-06", "event_time", params)
+    assert len(engine.queries) == 1
+    assert first["event_time"].str[:10].unique().tolist() == [
+        "2023-04-03",
+        "2023-04-05",
+    ]
+    assert (first["run_id"] == "B101").all()
+
+    # Extending the range queries the new days only, and the empty day is cached
+    engine.queries.clear()
+    extended = cache.read(
+        EVENTS_QUERY, "2023-04-01", "2023-04-08", "event_time", params
+    )
+    assert [query[:2] for query in engine.queries] == [
+        ("2023-04-01", "2023-04-03"),
+        ("2023-04-06", "2023-04-08"),
+    ]
+    with engine.connect() as connection:
+        expected = pd.read_sql(
+            EVENTS_QUERY,
+            connection,
+            params={**params, "start_date": "2023-04-01", "end_date": "2023-04-08"},
+        )
+    pd.testing.assert_frame_equal(extended, expected)
+
+    engine.queries.clear()
+    assert cache.read(
+        EVENTS_QUERY, "2023-04-04", "2023-04-05", "event_time", params
+    ).empty
+    assert engine.queries == []
+
+    # Other parameters are cached apart
+    others = cache.read(
+        EVENTS_QUERY, "2023-04-01", "2023-04-08", "event_time", {"run_prefix": "X%"}
+    )
+    assert (others["run_id"] == "X201").all()
+    assert len(engine.queries) == 1
+
+
+def test_queries_without_dates_and_days_from_today(engine, tmp_path):
+    cache = QueryCache(engine, tmp_path / "cache")
+    query = text("SELECT DISTINCT run_id FROM events WHERE run_id LIKE :run_prefix")
+
+    assert cache.read(query, params={"run_prefix": "B%"})["run_id"].tolist() == ["B101"]
+    cache.read(query, params={"run_prefix": "B%"})
+    assert len(engine.queries) == 1
+
+    today = datetime.date.today()
+    for _ in range(2):
+        cache.read(
+            EVENTS_QUERY,
+            today - datetime.timedelta(days=1),
+            today + datetime.timedelta(days=1),
+            "event_time",
+            {"run_prefix": "B%"},
+        )
+    assert [query[:2] for query in engine.queries[1:]] == [
+        (
+            (today - datetime.timedelta(days=1)).isoformat(),
+            (today + datetime.timedelta(days=1)).isoformat(),
+        ),
+        (today.isoformat(), (today + datetime.timedelta(days=1)).isoformat()),
+    ]
+
+
+def test_day_runs():
+    days = [datetime.date(2023, 4, day) for day in [7, 1, 2, 3, 5, 8]]
+    assert day_runs(days) == [
+        (datetime.date(2023, 4, 1), datetime.date(2023, 4, 3)),
+        (datetime.date(2023, 4, 5), datetime.date(2023, 4, 5)),
+        (datetime.date(2023, 4, 7), datetime.date(2023, 4, 8)),
+    ]
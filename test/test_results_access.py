@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.dash_app.helpers.figure_helpers import PlotCreator
+from transit_lab_simmetro.dash_app.helpers.results_access import ResultsAccess
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import index_path
+
+SEEDS = [SEED, SEED + 1]
+
+
+@pytest.fixture
+def results_dir(simulation_inputs, tmp_path):
+    replication_manager = ReplicationManager(
+        len(SEEDS), create_logger_context(tmp_path)
+    )
+    replication_manager.seed_numbers = SEEDS
+    replication_manager.run_replications(**simulation_inputs)
+    return tmp_path
+
+
+def test_replications_are_read_from_the_index(results_dir):
+    results = ResultsAccess(results_dir)
+    station_data = pd.read_csv(results_dir / "station_test.csv")
+
+    assert results.replication_ids() == SEEDS
+    assert index_path(results_dir / "station_test.csv").exists()
+
+    replication = results.replication("station", SEEDS[1], ["station_name", "headway"])
+    expected = station_data.loc[
+        station_data["replication_id"] == SEEDS[1],
+        ["replication_id", "station_name", "headway"],
+    ].reset_index(drop=True)
+    pd.testing.assert_frame_equal(replication, expected)
+
+    station_name = expected["station_name"].iloc[0]
+    station_rows = results.station_rows(SEEDS[1], station_name, ["headway"])
+    assert (station_rows["station_name"] == station_name).all()
+    assert station_rows["headway"].tolist() == (
+        expected.loc[expected["station_name"] == station_name, "headway"].tolist()
+    )
+
+
+def test_frames_are_cached_up_to_the_cache_size(results_dir):
+    results = ResultsAccess(results_dir, cache_size=1)
+
+    first = results.frame("station", SEEDS[0])
+    assert results.frame("station", SEEDS[0]) is first
+
+    results.frame("station", SEEDS[1])
+    assert results.frame("station", SEEDS[0]) is not first
+
+
+def test_stale_index_is_rebuilt(results_dir):
+    ResultsAccess(results_dir).replication_ids()
+
+    station_data = pd.read_csv(results_dir / "station_test.csv")
+    station_data[station_data["replication_id"] == SEEDS[0]].to_csv(
+        results_dir / "station_test.csv", index=False
+    )
+
+    assert ResultsAccess(results_dir).replication_ids() == [SEEDS[0]]
+
+
+def test_plot_creator_lists_the_trains_of_every_replication(results_dir):
+    station_data = pd.read_csv(results_dir / "station_test.csv")
+
+    plot_creator = PlotCreator(ResultsAccess(results_dir), stations_dict={})
+
+    assert plot_creator.train_ids == sorted(station_data["train_id"].unique())
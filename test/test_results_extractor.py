@@ -0,0 +1,121 @@
+import gzip
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+import yaml
+
+from experiment_results_calculator import DATABASE_NAME, TravelTimeCalculator
+from hydra_experiment_results_extractor import (
+    ExtractionCache,
+    extract_results,
+    find_experiment_directories,
+    fingerprint,
+    stale_experiments,
+)
+
+STATIONS = ["Forest Park", "Cicero", "UIC-Halsted", "O-Hare"]
+
+
+def write_experiment(experiment_dir, max_holding, travel_time):
+    (experiment_dir / ".hydra").mkdir(parents=True)
+    with open(experiment_dir / ".hydra" / "config.yaml", "w") as f:
+        yaml.safe_dump({"max_holding": max_holding, "passenger": {"p": 0.5}}, f)
+
+    rows = []
+    for replication_id in [1, 2]:
+        for train_id in ["T1", "T2"]:
+            start = 600 * replication_id + (60 if train_id == "T2" else 0)
+            for i, station in enumerate(STATIONS):
+                rows.append(
+                    {
+                        "replication_id": replication_id,
+                        "train_id": train_id,
+                        "station_name": station,
+                        "direction": "Northbound",
+                        "time_in_seconds": start + i * travel_time / 3,
+                        "headway": 300,
+                    }
+                )
+    pd.DataFrame(rows).to_csv(experiment_dir / "station_test.csv", index=False)
+
+
+def cached_fingerprints(database_path):
+    cache = ExtractionCache(database_path)
+    fingerprints = cache.fingerprints()
+    cache.close()
+    return fingerprints
+
+
+def test_results_are_extracted_once_per_experiment(tmp_path):
+    write_experiment(tmp_path / "0", max_holding=60, travel_time=1800)
+    write_experiment(tmp_path / "1", max_holding=120, travel_time=2400)
+    (tmp_path / "2" / ".hydra").mkdir(parents=True)
+    database_path = tmp_path / "extracted_results.sqlite"
+
+    assert find_experiment_directories(tmp_path) == [tmp_path / "0", tmp_path / "1"]
+
+    results = extract_results(tmp_path, workers=2)
+    assert list(results["experiment_dir"]) == ["0", "1"]
+    assert list(results["max_holding"]) == [60, 120]
+    assert list(results["passenger.p"]) == [0.5, 0.5]
+    assert list(results["avg_travel_time"]) == [30, 40]
+    assert list(results["avg_headway_Forest_Park"]) == [300, 300]
+
+    fingerprints = {
+        experiment_dir: fingerprint(tmp_path / experiment_dir)
+        for experiment_dir in ["0", "1"]
+    }
+    assert cached_fingerprints(database_path) == fingerprints
+    assert stale_experiments(fingerprints, cached_fingerprints(database_path)) == []
+
+    with open(tmp_path / "1" / ".hydra" / "config.yaml", "a") as f:
+        f.write("slow_zones: true\n")
+    fingerprints["1"] = fingerprint(tmp_path / "1")
+    assert stale_experiments(fingerprints, cached_fingerprints(database_path)) == ["1"]
+
+    results = extract_results(tmp_path, database_path=database_path, workers=1)
+    assert list(results["slow_zones"].isna()) == [True, False]
+    assert cached_fingerprints(database_path) == fingerprints
+    with sqlite3.connect(database_path) as connection:
+        stored = pd.read_sql("SELECT * FROM results", connection)
+    assert stored.shape == results.shape
+
+
+def test_content_fingerprint_ignores_the_modification_time(tmp_path):
+    write_experiment(tmp_path / "0", max_holding=60, travel_time=1800)
+    log_path = tmp_path / "0" / "station_test.csv"
+
+    before = fingerprint(tmp_path / "0"), fingerprint(tmp_path / "0", True)
+    stat = log_path.stat()
+    os.utime(log_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    after = fingerprint(tmp_path / "0"), fingerprint(tmp_path / "0", True)
+
+    assert before[0] != after[0]
+    assert before[1] == after[1]
+
+
+def test_calculator_reads_compressed_logs_once(tmp_path, capsys):
+    for slow_zones, travel_time in [("on", 1800), ("off", 2400)]:
+        experiment_dir = tmp_path / f"slow_zones_{slow_zones}"
+        write_experiment(experiment_dir, max_holding=60, travel_time=travel_time)
+        shutil.rmtree(experiment_dir / ".hydra")
+    log_path = tmp_path / "slow_zones_off" / "station_test.csv"
+    with open(log_path, "rb") as source, gzip.open(f"{log_path}.gz", "wb") as target:
+        shutil.copyfileobj(source, target)
+    os.remove(log_path)
+
+    calculator = TravelTimeCalculator(["slow_zones"])
+    calculator.walk_directory(str(tmp_path), workers=1)
+    output = pd.DataFrame(calculator.output).sort_values("slow_zones")
+    assert list(output["slow_zones"]) == ["off", "on"]
+    assert list(output["avg_travel_time"]) == [40, 30]
+
+    assert "2 of 2 experiments" in capsys.readouterr().out
+
+    calculator = TravelTimeCalculator(["slow_zones"])
+    calculator.walk_directory(str(tmp_path), workers=1)
+    assert "0 of 2 experiments" in capsys.readouterr().out
+    assert len(cached_fingerprints(tmp_path / DATABASE_NAME)) == 2
+    assert len(calculator.output) == 2
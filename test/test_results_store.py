@@ -0,0 +1,108 @@
+import pandas as pd
+
+from test.simulation_helpers import SEED, create_logger_context
+from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    BlockActivationLogger,
+    CompressedCSVLoggerStrategy,
+    StationLogger,
+)
+from transit_lab_simmetro.simulation_runner.results_store import ResultsStore
+
+STATION_COLUMNS = [
+    "replication_id",
+    "time_in_seconds",
+    "station_name",
+    "train_id",
+    "number_of_passengers_boarded",
+    "denied_boarding",
+]
+
+
+def run_replication(simulation_inputs, logger_context):
+    replication_manager = ReplicationManager(1, logger_context)
+    replication_manager.seed_numbers = [SEED]
+    replication_manager.run_replications(**simulation_inputs)
+
+
+def test_store_holds_the_logs_of_the_csv_files(simulation_inputs, tmp_path):
+    run_replication(simulation_inputs, create_logger_context(tmp_path / "csv"))
+    expected = pd.read_csv(tmp_path / "csv" / "station_test.csv")
+
+    store = ResultsStore(tmp_path / "results.sqlite")
+    job_id = store.register_job({"max_holding": 180, "passenger": {"p": 0.5}})
+
+    logger_context = create_logger_context(tmp_path / "store")
+    warmup_time = logger_context.station_logger.warmup_time
+    logger_context.station_logger = StationLogger(
+        str(tmp_path / "store" / "station_test.csv"),
+        logger_strategy=store.logger_strategy("station", job_id),
+    ).set_warmup_time(warmup_time)
+    logger_context.block_logger = BlockActivationLogger(
+        str(tmp_path / "store" / "block_test.csv"),
+        logger_strategy=store.logger_strategy("block", job_id),
+    ).set_warmup_time(warmup_time)
+    run_replication(simulation_inputs, logger_context)
+
+    stored = store.query(
+        "SELECT * FROM station WHERE job_id = ? ORDER BY rowid", [job_id]
+    )
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(
+        stored[STATION_COLUMNS], expected[STATION_COLUMNS], check_dtype=False
+    )
+
+    jobs = store.query("SELECT * FROM jobs")
+    assert jobs.loc[0, "passenger.p"] == 0.5
+
+    indexes = store.query("SELECT name FROM sqlite_master WHERE type = 'index'")
+    assert {"station_station_name", "block_train_id"} <= set(indexes["name"])
+    store.close()
+
+
+def test_import_job_folder(simulation_inputs, tmp_path):
+    store = ResultsStore(tmp_path / "results.sqlite")
+    for max_holding in [60, 180]:
+        job_folder = tmp_path / "sweep" / f"max_holding={max_holding}"
+        (job_folder / ".hydra").mkdir(parents=True)
+        (job_folder / ".hydra" / "config.yaml").write_text(
+            f"max_holding: {max_holding}\n"
+            "log_folder_path: ${hydra:runtime.output_dir}\n"
+        )
+        run_replication(simulation_inputs, create_logger_context(job_folder))
+        store.import_job_folder(job_folder)
+
+    denied_boardings = store.query("""
+        SELECT jobs.max_holding, COUNT(*) AS visits,
+               SUM(station.denied_boarding) AS denied_boarding
+        FROM station JOIN jobs USING (job_id)
+        GROUP BY jobs.max_holding
+        """)
+    visits = len(
+        pd.read_csv(tmp_path / "sweep" / "max_holding=60" / "station_test.csv")
+    )
+
+    assert denied_boardings["max_holding"].tolist() == [60, 180]
+    assert denied_boardings["visits"].tolist() == [visits, visits]
+    store.close()
+
+
+def test_import_job_folder_with_compressed_logs(simulation_inputs, tmp_path):
+    job_folder = tmp_path / "job"
+    (job_folder / ".hydra").mkdir(parents=True)
+    (job_folder / ".hydra" / "config.yaml").write_text("max_holding: 60\n")
+
+    logger_context = create_logger_context(job_folder)
+    (job_folder / "station_test.csv").unlink()
+    logger_context.station_logger = StationLogger(
+        str(job_folder / "station_test.csv"),
+        logger_strategy=CompressedCSVLoggerStrategy(),
+    ).set_warmup_time(logger_context.station_logger.warmup_time)
+    run_replication(simulation_inputs, logger_context)
+
+    store = ResultsStore(tmp_path / "results.sqlite")
+    job_id = store.import_job_folder(job_folder)
+
+    visits = store.query("SELECT COUNT(*) AS n FROM station WHERE job_id = ?", [job_id])
+    assert visits.loc[0, "n"] > 0
+    store.close()
@@ -0,0 +1,128 @@
+import csv
+
+import pytest
+from omegaconf import OmegaConf
+
+from test.simulation_helpers import (
+    SEED,
+    SNAPSHOT_TIME,
+    START_HOUR,
+    create_logger_context,
+)
+from transit_lab_simmetro.simulation_engine.simulation import (
+    ReplicationManager,
+    SimulationContext,
+    SimulationSnapshot,
+)
+from transit_lab_simmetro.simulation_runner.runner import (
+    get_snapshot_dir,
+    load_or_warm_up_snapshots,
+)
+
+
+def read_rows(file_path):
+    with open(file_path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_forked_simulation_continues_like_the_original(simulation_inputs, tmp_path):
+    replication_manager = ReplicationManager(
+        1, create_logger_context(tmp_path / "original")
+    )
+    simulation = replication_manager._create_simulation(SEED, **simulation_inputs)
+
+    with replication_manager.logger_context:
+        with SimulationContext(simulation):
+            simulation.run(until=SNAPSHOT_TIME)
+            snapshot = simulation.snapshot()
+            simulation.run()
+
+    assert snapshot.current_time == pytest.approx(SNAPSHOT_TIME, abs=1)
+    assert simulation.is_finished()
+
+    forked_manager = ReplicationManager(1, create_logger_context(tmp_path / "forked"))
+    forked_manager.run_replications_from_snapshots({SEED: snapshot})
+
+    assert len(read_rows(tmp_path / "original" / "station_test.csv")) > 1
+
+    for file_name in ["station_test.csv", "block_test.csv", "passenger_test.csv"]:
+        original_rows = read_rows(tmp_path / "original" / file_name)
+        forked_rows = read_rows(tmp_path / "forked" / file_name)
+        assert forked_rows == original_rows
+
+
+def test_snapshot_round_trip_through_file(simulation_inputs, tmp_path):
+    replication_manager = ReplicationManager(
+        1, create_logger_context(tmp_path / "warmup")
+    )
+    snapshots = replication_manager.warm_up_replications(
+        **simulation_inputs, snapshot_time=SNAPSHOT_TIME, seed_numbers=[SEED]
+    )
+
+    snapshots[SEED].save(tmp_path / f"{SEED}.pkl")
+    loaded_snapshot = SimulationSnapshot.load(tmp_path / f"{SEED}.pkl")
+
+    first_fork = loaded_snapshot.fork()
+    second_fork = loaded_snapshot.fork()
+
+    assert first_fork is not second_fork
+    assert first_fork.current_time == snapshots[SEED].current_time
+    assert first_fork.replication_id == SEED
+    assert [train.train_id for train in first_fork.trains] == [
+        train.train_id for train in second_fork.trains
+    ]
+    assert first_fork.paths["Northbound"].blocks[0] is not (
+        second_fork.paths["Northbound"].blocks[0]
+    )
+
+
+def snapshot_config(tmp_path, warmup_time=SNAPSHOT_TIME - START_HOUR * 3600):
+    return OmegaConf.create(
+        {
+            "ohare_holding": False,
+            "holding_strategy": "no_holding",
+            "simulation": {"start_time_of_day": START_HOUR},
+            "snapshot": {
+                "dir": str(tmp_path / "snapshots"),
+                "warmup_time": warmup_time,
+            },
+        }
+    )
+
+
+def test_warm_up_snapshots_are_published_once(simulation_inputs, tmp_path):
+    cfg = snapshot_config(tmp_path)
+    replication_manager = ReplicationManager(
+        1, create_logger_context(tmp_path / "first")
+    )
+    snapshots = load_or_warm_up_snapshots(cfg, replication_manager, simulation_inputs)
+
+    assert list(snapshots) == replication_manager.seed_numbers
+    assert [path.name for path in (tmp_path / "snapshots").iterdir()] == [
+        get_snapshot_dir(cfg).name
+    ]
+
+    # A later job of the sweep forks from the published snapshots, and would
+    # fail if it warmed them up again
+    other_manager = ReplicationManager(1, create_logger_context(tmp_path / "second"))
+    other_manager.warm_up_replications = None
+    assert list(
+        load_or_warm_up_snapshots(cfg, other_manager, simulation_inputs)
+    ) == list(snapshots)
+
+
+def test_incomplete_snapshot_sets_are_rejected(tmp_path):
+    cfg = snapshot_config(tmp_path)
+    get_snapshot_dir(cfg).mkdir(parents=True)
+    replication_manager = ReplicationManager(2, create_logger_context(tmp_path))
+
+    with pytest.raises(RuntimeError, match="holds 0 snapshots, expected 2"):
+        load_or_warm_up_snapshots(cfg, replication_manager, {})
+
+
+def test_snapshots_after_the_logger_warm_up_are_rejected(tmp_path):
+    cfg = snapshot_config(tmp_path, warmup_time=SNAPSHOT_TIME - START_HOUR * 3600 + 1)
+    replication_manager = ReplicationManager(1, create_logger_context(tmp_path))
+
+    with pytest.raises(ValueError, match="later than the logger warm-up"):
+        load_or_warm_up_snapshots(cfg, replication_manager, {})
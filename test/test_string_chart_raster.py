@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from transit_lab_simmetro.validation.string_chart_raster import (
+    TIME_GAP_THRESHOLD,
+    add_run_traces,
+    line_segments,
+    load_track_distances,
+    raster_figure,
+    rasterize_segments,
+)
+
+
+def test_segments_join_the_events_of_every_run():
+    events = pd.DataFrame(
+        {
+            "train_id": ["a", "b", "a", "b", "a"],
+            "time_in_seconds": [0, 0, 10, 10, 10 + TIME_GAP_THRESHOLD + 1],
+            "track_dist": [0, 100, 50, 150, 100],
+        }
+    )
+
+    x0, y0, x1, y1 = line_segments(events, ["train_id"])
+
+    # The last event of train a comes after a gap
+    assert sorted(zip(x0, y0, x1, y1)) == [(0, 0, 10, 50), (0, 100, 10, 150)]
+
+
+def test_run_traces_break_at_the_gaps():
+    events = pd.DataFrame(
+        {
+            "train_id": "a",
+            "direction": "Northbound",
+            "time_in_seconds": [
+                0,
+                10,
+                10 + TIME_GAP_THRESHOLD + 1,
+                20 + TIME_GAP_THRESHOLD,
+            ],
+            "track_dist": [0, 50, 100, 150],
+        }
+    )
+
+    fig = add_run_traces(go.Figure(), events, "train_id", ["a"])
+
+    # Every event is drawn, with a break ahead of the one after the gap
+    assert np.isnan(fig.data[0].x[2]) and np.isnan(fig.data[0].y[2])
+    assert np.delete(fig.data[0].y, 2).tolist() == [0, 50, 100, 150]
+
+
+def test_segments_are_counted_once_per_pixel():
+    x0, y0 = np.array([0.0, 0.0]), np.array([0.5, 0.0])
+    x1, y1 = np.array([10.0, 10.0]), np.array([0.5, 10.0])
+
+    counts = rasterize_segments(x0, y0, x1, y1, (0, 10), (0, 10), width=10, height=10)
+
+    assert counts.shape == (10, 10)
+    assert counts[0].tolist() == [2] + [1] * 9
+    assert np.diag(counts)[1:].tolist() == [1] * 9
+    assert counts.sum() == 20
+
+
+def test_segments_are_clipped_to_the_window():
+    counts = rasterize_segments(
+        np.array([-100.0]),
+        np.array([5.0]),
+        np.array([100.0]),
+        np.array([5.0]),
+        (0, 10),
+        (0, 10),
+        width=10,
+        height=10,
+    )
+
+    assert counts[5].tolist() == [1] * 10
+    assert counts.sum() == 10
+
+
+def test_raster_figure_of_the_block_events():
+    track_dist, station_dict = load_track_distances()
+    blocks = list(track_dist)[:20]
+    events = pd.DataFrame(
+        {
+            "replication_id": np.repeat([1, 2], 20),
+            "train_id": "train_0",
+            "direction": "Northbound",
+            "time_in_seconds": np.tile(np.arange(20) * 30.0, 2),
+            "block_id": blocks * 2,
+        }
+    )
+    events["track_dist"] = events["block_id"].map(track_dist)
+
+    fig = raster_figure(
+        events, ["replication_id", "train_id"], station_dict, width=50, height=40
+    )
+
+    counts = np.asarray(fig.data[0].customdata)
+    assert counts.shape == (40, 50)
+    # Both replications draw the same line
+    assert counts.any()
+    assert (counts % 2 == 0).all()
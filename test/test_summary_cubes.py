@@ -0,0 +1,100 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.validation.summary_cubes import (
+    BIN_WIDTH,
+    HistogramCube,
+    add_hour,
+    delay_cube,
+    pair_block_events,
+)
+
+
+def make_events(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "station": rng.choice(["Austin", "Cicero", "Pulaski"], n),
+            "date": rng.choice(
+                [datetime.date(2023, 4, day) for day in range(17, 22)], n
+            ),
+            "hour": rng.integers(5, 23, n),
+            "headway": rng.gamma(4, 2, n),
+        }
+    )
+
+
+def test_selections_match_the_filtered_events():
+    events = make_events()
+    cube = HistogramCube(events, ["station", "date", "hour"], "headway")
+
+    dates = [datetime.date(2023, 4, 18), datetime.date(2023, 4, 20)]
+    histogram = cube.select(station=["Cicero"], date=dates, hour=range(7, 11))
+    selected = events.loc[
+        (events["station"] == "Cicero")
+        & events["date"].isin(dates)
+        & events["hour"].between(7, 10),
+        "headway",
+    ]
+
+    assert histogram.count == len(selected)
+    assert np.isclose(histogram.mean(), selected.mean())
+    assert np.isclose(histogram.std(), selected.std())
+    assert np.isclose(histogram.std(ddof=0), np.std(selected))
+    for q in [0.05, 0.25, 0.5, 0.75, 0.95]:
+        assert abs(histogram.quantile(q) - selected.quantile(q)) <= BIN_WIDTH
+    assert np.isclose(histogram.percent().sum(), 100)
+
+    # Labels that are not in the cube select nothing
+    assert cube.select(station=["O-Hare"]).count == 0
+    assert cube.select().count == len(events)
+
+
+def test_fence_drops_the_outliers():
+    events = make_events()
+    events.loc[:9, "headway"] = 500
+    histogram = HistogramCube(events, ["station"], "headway").select()
+
+    headways = events["headway"]
+    q1, q3 = headways.quantile([0.25, 0.75])
+    kept = headways[headways.between(q1 - 3 * (q3 - q1), q3 + 3 * (q3 - q1))]
+
+    fenced = histogram.fence(3)
+    assert 500 not in kept.values
+    assert fenced.count == len(kept)
+    assert np.isclose(fenced.mean(), kept.mean())
+
+
+def test_block_pairs_and_delays():
+    events = pd.DataFrame(
+        {
+            "run_id": [1, 1, 1, 1, 2, 2],
+            "block": ["a", "b", "c", "d", "a", "b"],
+            "time_in_seconds": [0, 90, 150, 270, 3600, 3630],
+        }
+    )
+    pairs = pair_block_events(
+        add_hour(events, "time_in_seconds"),
+        {"A": ("a", "b"), "C": ("c", "d"), "O-Hare": (None, None)},
+        "block",
+        ["run_id"],
+        "time_in_seconds",
+    )
+    assert list(pairs["station"]) == ["A", "A", "C"]
+    assert list(pairs["minutes"]) == [1.5, 0.5, 2]
+    assert list(pairs["hour"]) == [0, 1, 0]
+
+    event_delay = pd.DataFrame(
+        {
+            "event_datetime": pd.to_datetime(
+                ["2023-04-17 07:10", "2023-04-17 07:50", "2023-04-17 08:05"]
+            ),
+            "drqbe": ["Police", "Police", "Signals"],
+            "delay": [2, 3, 4],
+        }
+    )
+    cube = delay_cube(event_delay)
+    assert list(cube["hour"]) == [7, 8]
+    assert list(cube["delay"]) == [5, 4]
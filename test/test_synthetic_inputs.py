@@ -0,0 +1,73 @@
+from benchmarks.scenarios import BenchmarkScenario, run_scenario
+from transit_lab_simmetro import config_handler
+from transit_lab_simmetro.simulation_runner.synthetic_inputs import (
+    SyntheticLine,
+    generate_schedule,
+)
+
+
+def test_synthetic_line_follows_infra_schema():
+    line = SyntheticLine(num_blocks=20, num_stations=5, speed_code_fan_out=2, seed=1)
+    infra = line.infra()
+
+    for direction in ["Northbound", "Southbound"]:
+        blocks = infra[direction]
+        assert len(blocks) == 20
+        assert blocks[5]["SPEED_CODES_TO_COMMUNICATE"] == {
+            blocks[4]["BLOCK"]: 0,
+            blocks[3]["BLOCK"]: 15,
+        }
+        assert all(
+            block["ENDSTN"] == next_block["STARTSTN"]
+            for block, next_block in zip(blocks, blocks[1:])
+        )
+
+    station_order = {
+        direction: [
+            block["STATION"]["STATION_NAME"]
+            for block in infra[direction]
+            if "STATION" in block
+        ]
+        for direction in ["Northbound", "Southbound"]
+    }
+    assert station_order["Southbound"] == line.station_names
+    assert station_order["Northbound"] == line.station_names[::-1]
+
+
+def test_synthetic_schedule_dispatches_both_terminals_at_the_headway():
+    schedule = generate_schedule(300, 0, 3600, seed=1)
+
+    assert len(schedule["empirical_schedule"]) == 24
+    assert {dispatch["terminal"] for dispatch in schedule["blue_line_schedule"]} == {
+        "O-Hare",
+        "Forest Park",
+    }
+
+
+def test_simulation_runs_on_a_synthetic_line(tmp_path):
+    line = SyntheticLine(num_blocks=24, num_stations=4, seed=1)
+    file_paths = line.write(
+        str(tmp_path / "inputs"),
+        headway=300,
+        start_time_of_day=14 * 3600,
+        end_time_of_day=14 * 3600 + 1200,
+        arrival_rate_per_pair=20,
+        seed=1,
+    )
+
+    try:
+        metrics = run_scenario(
+            BenchmarkScenario("synthetic", duration=1200),
+            str(tmp_path),
+            demand_file=file_paths["demand"],
+            schedule_file=file_paths["schedule"],
+            infra_file=file_paths["infra"],
+            path_config_file=file_paths["path_config"],
+            station_names=line.station_names,
+        )
+    finally:
+        config_handler.set_config(None)
+
+    assert metrics["ticks_per_second"] > 0
+    assert metrics["unsuccessful_replications"] == 0
+    assert (tmp_path / "synthetic" / "station_test.csv").stat().st_size > 0
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.validation.trip_matching import (
+    MilepostIndex,
+    match_trips,
+    near,
+    segment_trips,
+)
+
+DAY = pd.Timestamp("2023-04-01 06:00:00")
+
+
+def run_events(run_id, start_seconds, distances):
+    return pd.DataFrame(
+        {
+            "event_time": DAY
+            + pd.to_timedelta(start_seconds + 30 * np.arange(len(distances)), "s"),
+            "run_id": run_id,
+            "track_dist": distances,
+        }
+    )
+
+
+def is_start_valid(start_time, start_dist):
+    return near(start_dist, [1000], 500)
+
+
+def is_end_valid(end_time, end_dist):
+    return near(end_dist, [100000], 500)
+
+
+def test_runs_are_split_where_they_jump():
+    events = pd.concat(
+        [
+            run_events("B101", 0, [1000, 2000, 3000, 50000, 51000]),
+            run_events("B102", 15, [1000, 2000, 80000]),
+        ]
+    ).sample(frac=1, random_state=0)
+
+    trips = segment_trips(events)
+
+    assert trips.groupby("trip_id").size().to_dict() == {
+        "B101_0": 3,
+        "B101_1": 2,
+        "B102_0": 2,
+        "B102_1": 1,
+    }
+    assert trips.groupby("trip_id")["event_time"].is_monotonic_increasing.all()
+
+
+def test_fragments_are_joined_to_the_closest_predecessor():
+    events = pd.concat(
+        [
+            # A trip whose run id changes twice on the way
+            run_events("B101", 0, np.arange(1000, 40000, 1000)),
+            run_events("B205", 1200, np.arange(39500, 70000, 1000)),
+            run_events("B301", 2130, np.arange(70100, 100001, 1000)),
+            # A complete trip, and a fragment too far to join the others
+            run_events("B102", 300, np.arange(1000, 100001, 1000)),
+            run_events("B999", 3000, np.arange(20000, 30000, 1000)),
+        ]
+    )
+
+    trips = match_trips(events, is_start_valid, is_end_valid)
+
+    assert trips.groupby("trip_id")["run_id"].agg(
+        lambda runs: sorted(set(runs))
+    ).to_dict() == {
+        "B101_0": ["B101", "B205", "B301"],
+        "B102_0": ["B102"],
+        "B999_0": ["B999"],
+    }
+
+
+def test_a_predecessor_joins_a_single_successor():
+    events = pd.concat(
+        [
+            run_events("B101", 0, np.arange(1000, 40000, 1000)),
+            run_events("B205", 1200, np.arange(39500, 70000, 1000)),
+            run_events("B206", 1230, np.arange(39800, 70000, 1000)),
+        ]
+    )
+
+    trips = match_trips(events, is_start_valid, is_end_valid)
+
+    assert sorted(trips["trip_id"].unique()) == ["B101_0", "B206_0"]
+    assert set(trips.loc[trips["trip_id"] == "B101_0", "run_id"]) == {"B101", "B205"}
+
+
+def test_mileposts_map_back_to_their_blocks():
+    milepost_index = MilepostIndex(
+        [
+            {"BLOCK_ALT": "wc100", "DISTANCE": 500},
+            {"BLOCK_ALT": "wc200", "DISTANCE": 300},
+            {"BLOCK_ALT": "wc300", "DISTANCE": 200},
+        ]
+    )
+
+    mileposts = milepost_index.mileposts(pd.Series(["wc200", "unknown", "wc300"]))
+    assert mileposts.tolist()[::2] == [800, 1000]
+    assert np.isnan(mileposts[1])
+    assert milepost_index.blocks_at([0, 500, 501, 1000, 1001]).tolist() == [
+        "wc100",
+        "wc100",
+        "wc200",
+        "wc300",
+        None,
+    ]
@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from transit_lab_simmetro.simulation_engine.infrastructure.path import (
+    get_high_inspection_time,
+)
+from transit_lab_simmetro.simulation_engine.simulation.variates import VariatePools
+
+
+def test_pools_refill_and_are_reproducible_per_seed():
+    variates = VariatePools(seed=11, block_size=4)
+    draws = [variates.uniform("set_up_time", 120, 180) for _ in range(10)]
+
+    assert all(120 <= draw <= 180 for draw in draws)
+    assert len(set(draws)) == 10
+
+    variates = VariatePools(seed=11, block_size=3)
+    assert [variates.uniform("set_up_time", 120, 180) for _ in range(10)] == draws
+
+
+def test_named_pools_draw_from_separate_streams():
+    variates = VariatePools(seed=11)
+    other_variates = VariatePools(seed=11)
+
+    expected = [variates.uniform("set_up_time", 0, 1) for _ in range(5)]
+    other_variates.uniform("desired_speed_fraction", 0, 1)
+
+    assert [other_variates.uniform("set_up_time", 0, 1) for _ in range(5)] == expected
+
+
+def test_pickled_pools_continue_the_stream():
+    variates = VariatePools(seed=3, block_size=8)
+    for _ in range(5):
+        get_high_inspection_time(variates)
+
+    restored = pickle.loads(pickle.dumps(variates))
+
+    assert [get_high_inspection_time(restored) for _ in range(10)] == [
+        get_high_inspection_time(variates) for _ in range(10)
+    ]
+
+
+def test_inspection_times_follow_the_fitted_distribution():
+    variates = VariatePools(seed=5)
+    inspection_times = [get_high_inspection_time(variates) for _ in range(5000)]
+
+    # Gamma(6.98, loc=-1.64, scale=0.78) minutes.
+    mean = (6.980134210425548 * 0.7814155748676139 - 1.6353329561138936) * 60
+    assert sum(inspection_times) / len(inspection_times) == pytest.approx(
+        mean, rel=0.03
+    )
@@ -1,6 +1,7 @@
 import json
 
 from transit_lab_simmetro.utils.db_con import engine, text
+from transit_lab_simmetro.utils.query_cache import QueryCache
 from transit_lab_simmetro.utils.root_path import project_root
 
 start_date = "2024-04-07"  # Replace with your desired start date
@@ -28,18 +29,24 @@ with open(
 ) as file:
     blue_line_schedule_query = text(file.read())
 
-# Execute the empirical schedule query
-empirical_schedule_results = engine.execute(
-    empirical_schedule_query,
-    start_date=start_date,
-    end_date=end_date,
-).fetchall()
+# Execute the queries, or read their results from the local cache. Only the
+# days missing from the cache are queried; the query includes its end date.
+query_cache = QueryCache(engine)
+empirical_schedule_results = (
+    query_cache.read(
+        empirical_schedule_query,
+        start_date,
+        end_date,
+        date_column="event_time",
+        end_inclusive=True,
+    )
+    # The query orders the departures by time of day
+    .sort_values("time_in_sec", kind="stable").itertuples(index=False)
+)
 
-# Execute the blue line schedule query
-blue_line_schedule_results = engine.execute(
-    blue_line_schedule_query,
-    version=version,
-).fetchall()
+blue_line_schedule_results = query_cache.read(
+    blue_line_schedule_query, params={"version": version}
+).itertuples(index=False)
 
 # Convert the results to dictionaries
 empirical_schedule_data = [
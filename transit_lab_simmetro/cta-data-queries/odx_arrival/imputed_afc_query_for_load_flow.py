@@ -4,6 +4,7 @@ import pandas as pd
 from pandas.tseries.holiday import USFederalHolidayCalendar
 from sqlalchemy import text
 
+from transit_lab_simmetro.simulation_runner.demand_builder import impute_within_groups
 from transit_lab_simmetro.utils.db_con import engine
 from transit_lab_simmetro.utils.root_path import project_root
 
@@ -88,26 +89,9 @@ for period, (start_date, end_date) in period_dict.items():
         "first_alighting_platform",
     ]
 
-    # Function to impute missing data within each group
-    def impute_within_group(group):
-        non_nan_rows = group.dropna(subset=fill_columns)
-        if non_nan_rows.empty:
-            # If there are no rows to impute from, return the group as is
-            return group
-
-        # For rows with NaN in the current column, fill them with values from a randomly chosen row
-        nan_rows = group[fill_columns].isna().any(axis=1)
-        group.loc[nan_rows, fill_columns] = (
-            non_nan_rows[fill_columns].sample(n=nan_rows.sum(), replace=True).values
-        )
-
-        return group
-
-    # Apply the imputation function to each group
-    result_df = (
-        result_df.groupby(["boarding_stop", "time", "day_type"])
-        .apply(impute_within_group)
-        .reset_index(drop=True)
+    # Fill the incomplete rows from random complete rows of their group
+    result_df = impute_within_groups(
+        result_df, ["boarding_stop", "time", "day_type"], fill_columns
     )
 
     result_df["Destination"] = result_df["first_alighting_platform"].map(
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from transit_lab_simmetro.simulation_runner.demand_builder import impute_within_groups
+
 # Convert the CSV data into a DataFrame
 df = pd.read_csv("../data/cta_afc_data_for_load_flow_pre_rebuild.csv")
 
@@ -23,29 +25,8 @@ fill_columns = [
 ]
 
 
-# Function to impute missing data within each group
-def impute_within_group(group):
-    non_nan_rows = group.dropna(subset=fill_columns)
-    if non_nan_rows.empty:
-        # If there are no rows to impute from, return the group as is
-        return group
-
-    # for col in fill_columns:
-    # For rows with NaN in the current column, fill them with values from a randomly chosen row
-    nan_rows = group[fill_columns].isna().any(axis=1)
-    group.loc[nan_rows, fill_columns] = (
-        non_nan_rows[fill_columns].sample(n=nan_rows.sum(), replace=True).values
-    )
-
-    return group
-
-
-# Apply the imputation function to each group
-df = (
-    df.groupby(["boarding_stop", "time", "day_type"])
-    .apply(impute_within_group)
-    .reset_index(drop=True)
-)
+# Fill the incomplete rows from random complete rows of their group
+df = impute_within_groups(df, ["boarding_stop", "time", "day_type"], fill_columns)
 
 # Save the imputed data
 df.to_csv("../data/cta_afc_data_for_load_flow_imputed_pre_rebuild.csv", index=False)
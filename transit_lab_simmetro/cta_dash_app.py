@@ -1,4 +1,5 @@
 # Importing required libraries
+from functools import lru_cache
 from typing import List
 
 import dash
@@ -11,6 +12,9 @@ import plotly.graph_objs as go
 import plotly.io as pio
 from dash.dependencies import Input, Output
 
+from transit_lab_simmetro.dash_app.helpers.od_travel_times import ODTravelTimes
+from transit_lab_simmetro.dash_app.helpers.results_access import ResultsAccess
+
 # Defining the color template
 pio.templates["sophisticated"] = go.layout.Template(
     layout=go.Layout(colorway=["#91393D", "#DEDC83", "#DE6D72", "#57ADDE", "#407491"])
@@ -25,15 +29,21 @@ def get_color(index: int) -> str:
     return color_palette[index % len(color_palette)]
 
 
-# Read in and process train data
-train_log_file_path = "test/output_files/train_test.csv"
-train_data = pd.read_csv(train_log_file_path)
-train_ids = train_data["train_id"].unique().tolist()
+# Logs are read on demand, one replication at a time
+results = ResultsAccess("test/output_files")
+replication_ids = results.replication_ids("train")
+
+
+def list_train_ids(replication_id: int) -> List[str]:
+    # From the row positions of the frame the train callbacks read anyway
+    return list(results.frame("train", replication_id).positions["train_id"])
 
-# Read in and process station data
-station_log_file_path = "test/output_files/station_test.csv"
-station_data = pd.read_csv(station_log_file_path)
-station_names = station_data["station_name"].unique().tolist()
+
+train_ids = list_train_ids(replication_ids[0])
+station_names = list(
+    results.frame("station", replication_ids[0]).positions["station_name"]
+)
+STATION_VISIT_COLUMNS = ["train_id", "time_in_seconds", "station_name"]
 
 
 def visualize_time_profile_from_logs(
@@ -41,7 +51,7 @@ def visualize_time_profile_from_logs(
     train_ids: List[str],
     profile_column: str,
     title: str = "",
-    station_data: pd.DataFrame = station_data,  # Ensure this is not overwritten
+    station_data: pd.DataFrame = None,
 ):
     fig = go.Figure()
 
@@ -127,47 +137,43 @@ app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
 
 
 def calculate_travel_times(station_data: pd.DataFrame) -> pd.DataFrame:
-    travel_times = []
-    # create a list of unique station names
-    station_names = station_data["station_name"].unique()
-    for origin_name in station_names:
-        for destination_name in station_names:
-            # exclude cases where the origin and destination are the same
-            if origin_name != destination_name:
-                # filter station_data for the current origin/destination pair
-                origin_data = station_data[station_data["station_name"] == origin_name]
-                dest_data = station_data[
-                    station_data["station_name"] == destination_name
-                ]
-                # calculate the travel time for each train that passes through both stations
-                for train_id in set(origin_data["train_id"]).intersection(
-                    set(dest_data["train_id"])
-                ):
-                    origin = origin_data[origin_data["train_id"] == train_id].iloc[0]
-                    destination = dest_data[dest_data["train_id"] == train_id].iloc[0]
-                    travel_time = (
-                        destination["time_in_seconds"] - origin["time_in_seconds"]
-                    )
-
-                    if travel_time > 0:
-                        travel_times.append(
-                            {
-                                "origin": origin_name,
-                                "destination": destination_name,
-                                "train_id": train_id,
-                                "travel_time": travel_time,
-                            }
-                        )
-    return pd.DataFrame(travel_times)
-
-
-# station_data = pd.read_csv(station_log_file_path)
-travel_times_data = calculate_travel_times(station_data)
+    # From the first visit of the origin to the first visit of the destination
+    # by every train of a replication.
+    od_travel_times = ODTravelTimes(
+        station_data,
+        ["replication_id", "train_id"],
+        station_data["station_name"].unique(),
+        split_turns=False,
+    )
+    travel_times = od_travel_times.all_pairs(
+        origin_visit="first", destination_visit="first"
+    )
+    return travel_times[["origin", "destination", "train_id", "travel_time"]]
+
+
+@lru_cache(maxsize=1)
+def get_travel_times_data(replication_id: int) -> pd.DataFrame:
+    return calculate_travel_times(results.replication("station", replication_id))
+
 
 app.layout = html.Div(
     [
         dbc.Row(
             [
+                dbc.Col(
+                    [
+                        html.Label("Replication"),
+                        dcc.Dropdown(
+                            id="replication_dropdown",
+                            options=[
+                                {"label": replication_id, "value": replication_id}
+                                for replication_id in replication_ids
+                            ],
+                            value=replication_ids[0],
+                            clearable=False,
+                        ),
+                    ]
+                ),
                 dbc.Col(
                     [
                         html.Label("Train ID"),
@@ -206,9 +212,6 @@ app.layout = html.Div(
         dcc.Graph(id="distance_profile_graph"),
         html.H2("Distances Traveled Since Start"),
         dcc.Graph(id="distances_graph"),
-        dcc.Store(
-            id="dummy_input", storage_type="memory"
-        ),  # Add a dummy dcc.Store component
         dbc.Row(
             [
                 dbc.Col(
@@ -264,14 +267,27 @@ app.layout = html.Div(
 )
 
 
+@app.callback(
+    [
+        Output("train_id_dropdown", "options"),
+        Output("train_id_dropdown", "value"),
+    ],
+    [Input("replication_dropdown", "value")],
+)
+def update_train_id_dropdown(replication_id):
+    train_ids = list_train_ids(replication_id)
+    options = [{"label": train_id, "value": train_id} for train_id in train_ids]
+    return options, train_ids[0]
+
+
 @app.callback(
     Output("distances_graph", "figure"),
-    [Input("dummy_input", "data")],  # Use the dummy_input as a trigger
+    [Input("replication_dropdown", "value")],
 )
-def update_distances_graph(_):
+def update_distances_graph(replication_id):
     return visualize_time_profile_from_logs(
-        train_data,
-        train_ids,
+        results.replication("train", replication_id),
+        list_train_ids(replication_id),
         "total_travelled_distance",
         "Distances Traveled Since Start",
         station_data=None,
@@ -281,22 +297,27 @@ def update_distances_graph(_):
 @app.callback(
     Output("profile_graph", "figure"),
     [
+        Input("replication_dropdown", "value"),
         Input("train_id_dropdown", "value"),
         Input("profile_dropdown", "value"),
     ],
 )
-def update_graph(train_id, profile):
+def update_graph(replication_id, train_id, profile):
+    train_data = results.train_rows("train", replication_id, train_id)
+    station_data = results.frame("station", replication_id, STATION_VISIT_COLUMNS).rows(
+        "train_id", train_id
+    )
     if profile == "speed":
         return visualize_time_profile_from_logs(
-            train_data, [train_id], profile, "Speed"
+            train_data, [train_id], profile, "Speed", station_data
         )
     elif profile == "acceleration":
         return visualize_time_profile_from_logs(
-            train_data, [train_id], profile, "Acceleration"
+            train_data, [train_id], profile, "Acceleration", station_data
         )
     elif profile == "total_travelled_distance":
         return visualize_time_profile_from_logs(
-            train_data, [train_id], profile, "Distance"
+            train_data, [train_id], profile, "Distance", station_data
         )
 
 
@@ -343,10 +364,13 @@ def create_headway_scatter(data: pd.DataFrame, station_name: str) -> go.Figure:
 
 @app.callback(
     Output("headway_scatter_graph", "figure"),
-    [Input("station_dropdown", "value")],
+    [
+        Input("replication_dropdown", "value"),
+        Input("station_dropdown", "value"),
+    ],
 )
-def update_headway_scatter(station_name):
-    station_data = pd.read_csv(station_log_file_path)
+def update_headway_scatter(replication_id, station_name):
+    station_data = results.station_rows(replication_id, station_name)
     return create_headway_scatter(station_data, station_name)
 
 
@@ -364,21 +388,26 @@ def create_headway_histogram(data: pd.DataFrame, station_name: str) -> go.Figure
 
 @app.callback(
     Output("headway_histogram_graph", "figure"),
-    [Input("station_dropdown", "value")],
+    [
+        Input("replication_dropdown", "value"),
+        Input("station_dropdown", "value"),
+    ],
 )
-def update_headway_histogram(station_name):
-    station_data = pd.read_csv(station_log_file_path)
+def update_headway_histogram(replication_id, station_name):
+    station_data = results.station_rows(replication_id, station_name)
     return create_headway_histogram(station_data, station_name)
 
 
 @app.callback(
     Output("distance_profile_graph", "figure"),
     [
+        Input("replication_dropdown", "value"),
         Input("train_id_dropdown", "value"),
         Input("profile_dropdown", "value"),
     ],
 )
-def update_distance_profile_graph(train_id, profile):
+def update_distance_profile_graph(replication_id, train_id, profile):
+    train_data = results.train_rows("train", replication_id, train_id)
     if profile == "speed":
         return visualize_distance_profile_from_logs(
             train_data, [train_id], profile, "Speed vs Distance"
@@ -437,10 +466,16 @@ def create_travel_time_histogram(
 
 @app.callback(
     Output("travel_time_histogram", "figure"),
-    [Input("origin_dropdown", "value"), Input("destination_dropdown", "value")],
+    [
+        Input("replication_dropdown", "value"),
+        Input("origin_dropdown", "value"),
+        Input("destination_dropdown", "value"),
+    ],
 )
-def update_travel_time_histogram(origin, destination):
-    return create_travel_time_histogram(travel_times_data, origin, destination)
+def update_travel_time_histogram(replication_id, origin, destination):
+    return create_travel_time_histogram(
+        get_travel_times_data(replication_id), origin, destination
+    )
 
 
 if __name__ == "__main__":
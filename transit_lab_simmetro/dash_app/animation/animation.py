@@ -5,33 +5,28 @@ import pandas as pd
 import plotly.graph_objects as go
 from dotenv import load_dotenv
 
+from transit_lab_simmetro.dash_app.animation.preprocessing import (
+    LineLookup,
+    add_coordinates,
+    bin_frames,
+)
 from transit_lab_simmetro.utils import project_root
 
 
 # Function to create frame data for each time step
-def create_frame_data(time_step_group):
-    latitudes = []
-    longitudes = []
-    hover_texts = []
-    for idx, row in time_step_group.iterrows():
-        fraction = row["total_travelled_distance"] / max_travel_distance
-        point = north_bound_line.interpolate(fraction, normalized=True)
-        latitudes.append(point.y)
-        longitudes.append(point.x)
-        hover_texts.append(f"Train ID: {row['train_id']}")
-
+def create_frame_data(time_in_seconds, time_step_group):
     return go.Frame(
         data=[
             go.Scattermapbox(
-                lat=latitudes,
-                lon=longitudes,
+                lat=time_step_group["latitude"].to_numpy(),
+                lon=time_step_group["longitude"].to_numpy(),
                 mode="markers",
                 marker=dict(size=8, color="red"),
                 hoverinfo="text",
-                hovertext=hover_texts,
+                hovertext="Train ID: " + time_step_group["train_id"].astype(str),
             )
         ],
-        name=f"Time {time_step_group['time_in_seconds'].iloc[0]}",
+        name=f"Time {time_in_seconds}",
     )
 
 
@@ -44,21 +39,9 @@ MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
 
 # Data preprocessing
 csv_path = project_root / "transit_lab_simmetro" / "animation" / "train_test.csv"
-df = pd.read_csv(csv_path)
-origin_timestamp = pd.Timestamp("2023-04-01 00:00:00")
-df["time_in_seconds"] = pd.to_timedelta(df["time_in_seconds"], unit="s")
-df["adjusted_time"] = origin_timestamp + df["time_in_seconds"]
 
 # Group by and resample the data
-df = (
-    df.groupby(
-        ["replication_id", "train_id", pd.Grouper(key="adjusted_time", freq="10S")]
-    )
-    .first()
-    .reset_index()
-)
-df["time_in_seconds"] = (df["adjusted_time"] - origin_timestamp).dt.total_seconds()
-df.drop(columns=["adjusted_time"], inplace=True)
+df = bin_frames(pd.read_csv(csv_path), frame_seconds=10)
 
 # Visualization
 stations_gdf = gpd.read_file("./processed_data/stations.shp")
@@ -97,16 +80,22 @@ fig.update_layout(
 train_data_filtered = df[df["replication_id"] == df["replication_id"].iloc[0]]
 train_data_filtered.sort_values(by="time_in_seconds", inplace=True)
 
-# Calculate max_travel_distance
-max_travel_distance = train_data_filtered["total_travelled_distance"].max()
 north_bound_line = rail_lines_gdf[rail_lines_gdf["Name"] == "NorthBound"].geometry.iloc[
     0
 ]
+train_data_filtered = add_coordinates(
+    train_data_filtered,
+    LineLookup.from_geometry(north_bound_line),
+    distance_column="total_travelled_distance",
+)
 
 # Create frames
-frames = (
-    train_data_filtered.groupby("time_in_seconds").apply(create_frame_data).tolist()
-)
+frames = [
+    create_frame_data(time_in_seconds, time_step_group)
+    for time_in_seconds, time_step_group in train_data_filtered.groupby(
+        "time_in_seconds"
+    )
+]
 fig.frames = frames
 
 slider_steps = []
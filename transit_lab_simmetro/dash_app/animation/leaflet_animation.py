@@ -1,82 +1,79 @@
 import os
-from datetime import datetime, timedelta
 
 import folium
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 from folium import plugins
 
+from transit_lab_simmetro.dash_app.animation.preprocessing import (
+    LineLookup,
+    add_coordinates,
+    bin_frames,
+)
 from transit_lab_simmetro.utils import project_root
 
 os.chdir(project_root / "transit_lab_simmetro" / "dash_app" / "animation")
 
 
-def get_color(number_of_passengers, min_passengers=0, max_passengers=960):
-    # Normalize the passenger count to a value between 0 and 1
-    normalized_value = (number_of_passengers - min_passengers) / (
-        max_passengers - min_passengers
+def get_colors(number_of_passengers, min_passengers=0, max_passengers=960):
+    # Normalize the passenger counts to values between 0 and 1
+    normalized_values = np.clip(
+        (np.asarray(number_of_passengers, dtype=float) - min_passengers)
+        / (max_passengers - min_passengers),
+        0,
+        1,
     )
-    normalized_value = max(0, min(normalized_value, 1))  # Clamp between 0 and 1
 
     # Interpolate between green and red
-    red = normalized_value
-    green = 1 - normalized_value
-    blue = 0
-
-    # Convert to hex color code
-    return f"#{int(red * 255):02x}{int(green * 255):02x}{int(blue * 255):02x}"
-
-
-# Function to generate a GeoJSON feature for each row
-def generate_feature(row, north_bound_line, max_travel_distance):
-    fraction = row["location_from_terminal"] / max_travel_distance
-    point = north_bound_line.interpolate(fraction, normalized=True)
-
-    color = get_color(row["number_of_passengers_on_board"])
-
-    feature = {
-        "type": "Feature",
-        "geometry": {
-            "type": "Point",
-            "coordinates": [point.x, point.y],
-        },
-        "properties": {
-            "times": [
-                (
-                    datetime(2023, 12, 10) + timedelta(seconds=row["time_in_seconds"])
-                ).isoformat()
-            ],
-            "style": {"color": color, "weight": 5},
-            "icon": "circle",
-            "iconstyle": {
-                "fillColor": color,
-                "fillOpacity": 0.0,
-                "stroke": "false",
-                "radius": 4,
+    reds = (normalized_values * 255).astype(int)
+    greens = ((1 - normalized_values) * 255).astype(int)
+
+    # Convert to hex color codes
+    return [f"#{red:02x}{green:02x}00" for red, green in zip(reds, greens)]
+
+
+# Function to generate the GeoJSON features of all rows
+def generate_features(df):
+    colors = get_colors(df["number_of_passengers_on_board"])
+    times = (
+        pd.Timestamp("2023-12-10") + pd.to_timedelta(df["time_in_seconds"], unit="s")
+    ).dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    return [
+        {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [longitude, latitude],
             },
-        },
-    }
-
-    return feature
+            "properties": {
+                "times": [time],
+                "style": {"color": color, "weight": 5},
+                "icon": "circle",
+                "iconstyle": {
+                    "fillColor": color,
+                    "fillOpacity": 0.0,
+                    "stroke": "false",
+                    "radius": 4,
+                },
+            },
+        }
+        for longitude, latitude, time, color in zip(
+            df["longitude"].tolist(), df["latitude"].tolist(), times, colors
+        )
+    ]
 
 
 # Read and preprocess the CSV file into a DataFrame (from the second script)
 csv_path = project_root / "transit_lab_simmetro" / "animation" / "train_test.csv"
 
 df = pd.read_csv(csv_path)
-df["time_in_seconds"] = pd.to_timedelta(df["time_in_seconds"], unit="s")
-origin_timestamp = pd.Timestamp("2023-12-01 00:00:00")
-df["adjusted_time"] = origin_timestamp + df["time_in_seconds"]
-df = (
-    df.groupby(["train_id", pd.Grouper(key="adjusted_time", freq="20S")])
-    .first()
-    .reset_index()
-)
-df["time_in_seconds"] = (df["adjusted_time"] - origin_timestamp).dt.total_seconds()
-df.drop(columns=["adjusted_time"], inplace=True)
 
 # Choose the first replication
-df = df[df["replication_id"] == df["replication_id"].iloc[0]]
+df = bin_frames(
+    df[df["replication_id"] == df["replication_id"].iloc[0]], frame_seconds=20
+)
 
 
 # Read shapefiles
@@ -116,12 +113,10 @@ for idx, row in rail_lines_gdf.iterrows():
 df.sort_values(["train_id", "time_in_seconds"], inplace=True)
 
 
-max_travel_distance = df["location_from_terminal"].max()
+df = add_coordinates(df, LineLookup.from_geometry(north_bound_line))
 
-# Generate features using apply
-features = df.apply(
-    generate_feature, axis=1, args=(north_bound_line, max_travel_distance)
-).tolist()
+# Generate features from the coordinate arrays
+features = generate_features(df)
 
 train_geojson = {"type": "FeatureCollection", "features": features}
 
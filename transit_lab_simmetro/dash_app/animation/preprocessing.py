@@ -1,46 +1,189 @@
+"""Vectorised preprocessing of the train trajectories for the animations.
+
+Positions are mapped to map coordinates through the cumulative lengths of the
+line geometry, the rows are binned into frames with array operations, and the
+frames are written to a compact binary file which can be read one frame at a
+time.
+
+A frame file starts with ``MAGIC``, the length of a JSON header as a uint32
+and the header itself (frame period, train ids and record fields). Each frame
+follows as a ``FRAME_HEADER`` (time in seconds and number of trains) and its
+``RECORD`` rows, all little-endian.
+"""
+
+from __future__ import annotations
+
+import json
 import os
+import struct
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from transit_lab_simmetro.utils import project_root
 
-os.chdir(project_root / "transit_lab_simmetro" / "dash_app" / "animation")
-
-# Read the CSV file into a DataFrame
-csv_path = (
-    project_root
-    / "transit_lab_simmetro"
-    / "validation"
-    / "simulation_results"
-    / "train_test.csv"
+MAGIC = b"SMAF"
+FRAME_HEADER = struct.Struct("<dI")
+RECORD = np.dtype(
+    [
+        ("train", "<u2"),
+        ("longitude", "<f4"),
+        ("latitude", "<f4"),
+        ("passengers", "<u2"),
+    ]
 )
-df = pd.read_csv(csv_path)
 
-# Convert time_in_seconds to a Pandas Timedelta object for resampling
-df["time_in_seconds"] = pd.to_timedelta(df["time_in_seconds"], unit="s")
 
-# Define the origin timestamp: 7:00 AM of April first, 2023
-origin_timestamp = pd.Timestamp("2023-04-01 07:00:00")
+class LineLookup:
+    """Points along a line, located by the fraction of its length."""
+
+    def __init__(self, coordinates: Sequence[Sequence[float]]):
+        coordinates = np.asarray(coordinates, dtype=float)[:, :2]
+        self.x = coordinates[:, 0]
+        self.y = coordinates[:, 1]
+        self.cumulative_lengths = np.concatenate(
+            [[0.0], np.cumsum(np.hypot(np.diff(self.x), np.diff(self.y)))]
+        )
+
+    @classmethod
+    def from_geometry(cls, line) -> LineLookup:
+        return cls(line.coords)
+
+    def locate(self, fractions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Same points as shapely's line.interpolate(fraction, normalized=True)
+        distances = np.clip(fractions, 0, 1) * self.cumulative_lengths[-1]
+        return (
+            np.interp(distances, self.cumulative_lengths, self.x),
+            np.interp(distances, self.cumulative_lengths, self.y),
+        )
 
-# Adjust the time_in_seconds to reflect the seconds passed since 7:00 AM, April 1, 2023
-df["adjusted_time"] = origin_timestamp + df["time_in_seconds"]
 
-# Create an empty DataFrame to store the final results
+def add_coordinates(
+    df: pd.DataFrame,
+    line_lookup: LineLookup,
+    distance_column: str = "location_from_terminal",
+    max_travel_distance: Optional[float] = None,
+) -> pd.DataFrame:
+    if max_travel_distance is None:
+        max_travel_distance = df[distance_column].max()
 
-# Group by 'replication_id', 'train_id' and the 10-second intervals
-df = (
-    df.groupby(
-        ["replication_id", "train_id", pd.Grouper(key="adjusted_time", freq="10S")]
+    df = df.copy()
+    df["longitude"], df["latitude"] = line_lookup.locate(
+        df[distance_column].to_numpy(dtype=float) / max_travel_distance
     )
-    .first()
-    .reset_index()
-)
+    return df
+
+
+def bin_frames(df: pd.DataFrame, frame_seconds: float = 10) -> pd.DataFrame:
+    """The first row of every train in each frame_seconds interval, timed at
+    the start of the interval."""
+    df = df.sort_values(
+        ["replication_id", "train_id", "time_in_seconds"], kind="stable"
+    )
+    replication_ids = df["replication_id"].to_numpy()
+    train_ids = df["train_id"].to_numpy()
+    frames = np.floor(df["time_in_seconds"].to_numpy() / frame_seconds)
+
+    first = np.ones(len(df), dtype=bool)
+    first[1:] = (
+        (replication_ids[1:] != replication_ids[:-1])
+        | (train_ids[1:] != train_ids[:-1])
+        | (frames[1:] != frames[:-1])
+    )
+
+    df = df[first].copy()
+    df["time_in_seconds"] = frames[first] * frame_seconds
+    return df.reset_index(drop=True)
+
+
+def write_frame_file(
+    path: Union[str, Path], df: pd.DataFrame, frame_seconds: float = 10
+) -> None:
+    """Write the binned rows of one replication, with their coordinates, to a
+    frame file."""
+    train_ids, trains = np.unique(df["train_id"].to_numpy(), return_inverse=True)
+
+    order = np.argsort(df["time_in_seconds"].to_numpy(), kind="stable")
+    records = np.empty(len(df), dtype=RECORD)
+    records["train"] = trains[order]
+    records["longitude"] = df["longitude"].to_numpy()[order]
+    records["latitude"] = df["latitude"].to_numpy()[order]
+    if "number_of_passengers_on_board" in df.columns:
+        records["passengers"] = (
+            df["number_of_passengers_on_board"].fillna(0).to_numpy()[order]
+        )
+    else:
+        records["passengers"] = 0
+
+    times, starts, counts = np.unique(
+        df["time_in_seconds"].to_numpy()[order], return_index=True, return_counts=True
+    )
+    header = json.dumps(
+        {
+            "frame_seconds": frame_seconds,
+            "train_ids": [str(train_id) for train_id in train_ids],
+            "record": RECORD.names,
+        }
+    ).encode()
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for time, start, count in zip(times, starts, counts):
+            f.write(FRAME_HEADER.pack(time, count))
+            f.write(records[start : start + count].tobytes())
+
+
+def read_frame_header(f) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not an animation frame file")
+    (header_length,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(header_length))
+
+
+def iter_frames(path: Union[str, Path]) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield the time and the records of every frame, reading one frame at a
+    time."""
+    with open(path, "rb") as f:
+        read_frame_header(f)
+        while frame_header := f.read(FRAME_HEADER.size):
+            time, count = FRAME_HEADER.unpack(frame_header)
+            yield time, np.frombuffer(f.read(count * RECORD.itemsize), dtype=RECORD)
+
+
+def main():
+    import geopandas as gpd
+
+    os.chdir(project_root / "transit_lab_simmetro" / "dash_app" / "animation")
+
+    # Read the CSV file into a DataFrame
+    csv_path = (
+        project_root
+        / "transit_lab_simmetro"
+        / "validation"
+        / "simulation_results"
+        / "train_test.csv"
+    )
+    df = bin_frames(pd.read_csv(csv_path), frame_seconds=10)
+
+    rail_lines_gdf = gpd.read_file("./processed_data/all_lines.shp")
+    north_bound_line = rail_lines_gdf[
+        rail_lines_gdf["Name"] == "NorthBound"
+    ].geometry.iloc[0]
+    df = add_coordinates(df, LineLookup.from_geometry(north_bound_line))
 
-# Optionally, convert back to time_in_seconds relative to 7:00 AM, April 1, 2023
-df["time_in_seconds"] = (df["adjusted_time"] - origin_timestamp).dt.total_seconds()
+    # Save the resampled DataFrame, and the frames of every replication
+    df.to_csv("./preprocessed_data.csv", index=False)
+    for replication_id, replication_df in df.groupby("replication_id"):
+        write_frame_file(
+            f"./processed_data/frames_{replication_id}.bin",
+            replication_df,
+            frame_seconds=10,
+        )
 
-# Drop the 'adjusted_time' column as it's no longer needed
-df.drop(columns=["adjusted_time"], inplace=True)
 
-# Save the resampled DataFrame
-df.to_csv("./preprocessed_data.csv", index=False)
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from dash import Input, Output
+from dash import Input, Output, ctx
+
+from transit_lab_simmetro.dash_app.helpers.downsampling import get_x_range
 
 if TYPE_CHECKING:
     from dash import Dash
@@ -13,6 +15,14 @@ if TYPE_CHECKING:
     )
 
 
+def zoom_window(graph_id: str, relayout_data):
+    # A new replication or train resets the zoom of the graph; only its own
+    # relayout events refine the drawn window.
+    if ctx.triggered_id != graph_id:
+        return None
+    return get_x_range(relayout_data)
+
+
 def callbacks(
     app: Dash,
     plot_creator: PlotCreator,
@@ -26,7 +36,6 @@ def callbacks(
     )
     def update_replication_id(replication_id):
         replication_id = int(replication_id)
-        plot_creator._generate_hover_texts(replication_id)
         # print(f"Replication ID: {type(replication_id)} {replication_id}")
         return replication_id
 
@@ -35,10 +44,13 @@ def callbacks(
         [
             # Input("dummy_input", component_property="data"),
             Input("replication_id", "data"),
+            Input("distances_graph", "relayoutData"),
         ],  # Use the dummy_input as a trigger
     )
-    def update_distances_graph(replication_id):
-        return plot_creator.visualize_trajectories_for_all_trains(replication_id)
+    def update_distances_graph(replication_id, relayout_data):
+        return plot_creator.visualize_trajectories_for_all_trains(
+            replication_id, x_range=zoom_window("distances_graph", relayout_data)
+        )
 
     @app.callback(
         Output("profile_graph", "figure"),
@@ -46,9 +58,10 @@ def callbacks(
             Input("train_id_dropdown", "value"),
             Input("profile_dropdown", "value"),
             Input("replication_id", "data"),
+            Input("profile_graph", "relayoutData"),
         ],
     )
-    def update_graph(train_id, profile, replication_id):
+    def update_graph(train_id, profile, replication_id, relayout_data):
         if profile in ["speed", "acceleration"]:
             title = profile.capitalize()
 
@@ -63,6 +76,7 @@ def callbacks(
             train_ids=[train_id],
             profile_column=profile,
             title=title,
+            x_range=zoom_window("profile_graph", relayout_data),
         )
 
     # @app.callback(
@@ -89,9 +103,10 @@ def callbacks(
             Input("train_id_dropdown", "value"),
             Input("profile_dropdown", "value"),
             Input("replication_id", "data"),
+            Input("distance_profile_graph", "relayoutData"),
         ],
     )
-    def update_distance_profile_graph(train_id, profile, replication_id):
+    def update_distance_profile_graph(train_id, profile, replication_id, relayout_data):
         # if profile in ["speed", "acceleration", "total_travelled_distance"]:
         if profile in ["speed", "acceleration"]:
             title = profile.capitalize()
@@ -106,6 +121,7 @@ def callbacks(
             train_ids=[train_id],
             profile_column=profile,
             title=title,
+            x_range=zoom_window("distance_profile_graph", relayout_data),
         )
 
     @app.callback(
@@ -1,5 +1,4 @@
 import json
-import os
 from pathlib import Path
 
 import click
@@ -12,8 +11,9 @@ from transit_lab_simmetro.dash_app.helpers import (
     ArrivalRatePlotCreator,
     HeadwayAnalysis,
     PlotCreator,
+    ResultsAccess,
 )
-from transit_lab_simmetro.dash_app.helpers.data_helpers import load_data
+from transit_lab_simmetro.dash_app.helpers.data_helpers import load_stations_dict
 from transit_lab_simmetro.dash_app.layout import generate_layout
 from transit_lab_simmetro.utils import find_free_port
 
@@ -25,11 +25,11 @@ app = dash.Dash(
 
 
 def check_files_exist(directory):
-    required_files = ["train_test.csv", "station_test.csv", "passenger_test.csv"]
-    for filename in required_files:
-        if not os.path.exists(os.path.join(directory, filename)):
+    results = ResultsAccess(directory)
+    for log in ["train", "station", "passenger"]:
+        if not results.has_log(log):
             raise ValueError(
-                f"File {filename} does not exist in the directory {directory}"
+                f"File {log}_test.csv does not exist in the directory {directory}"
             )
 
 
@@ -44,13 +44,8 @@ def check_files_exist(directory):
 def main(results_dir):
     check_files_exist(results_dir)
 
-    (
-        train_data,
-        station_data,
-        passenger_data,
-        stations_dict,
-        travel_times_data,
-    ) = load_data(results_dir)
+    results = ResultsAccess(results_dir)
+    stations_dict = load_stations_dict()
 
     with open("transit_lab_simmetro/dash_app/templates/sophisticated.json") as f:
         template_dict = json.load(f)
@@ -64,9 +59,7 @@ def main(results_dir):
         f"{results_dir}/station_test.csv",
     )
 
-    plot_creator = PlotCreator(
-        train_data, station_data, travel_times_data, passenger_data, stations_dict
-    )
+    plot_creator = PlotCreator(results, stations_dict)
 
     arrival_rate_plot_creator = ArrivalRatePlotCreator(
         "data/arrival_rates.csv", stations_dict
@@ -2,6 +2,8 @@ from .arrival_rates_helper import ArrivalRatePlotCreator
 from .data_helpers import calculate_travel_times, get_color, load_data
 from .figure_helpers import PlotCreator
 from .headway_analysis_helper import HeadwayAnalysis
+from .od_travel_times import ODTravelTimes
+from .results_access import ResultsAccess
 from .travel_times_analysis_helper import TravelTimeAnalysis
 
 __all__ = [
@@ -10,6 +12,8 @@ __all__ = [
     "load_data",
     "PlotCreator",
     "HeadwayAnalysis",
+    "ODTravelTimes",
+    "ResultsAccess",
     "ArrivalRatePlotCreator",
     "TravelTimeAnalysis",
 ]
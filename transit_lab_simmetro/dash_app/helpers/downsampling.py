@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Above this many points per drawn point, min-max replaces LTTB: it is a single
+# vectorised pass and still keeps every peak of the window.
+MIN_MAX_RATIO = 8
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points picked by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # The first and last points are kept; the others are split in n_out - 2
+    # buckets, each contributing the point that forms the largest triangle
+    # with the previous pick and the mean of the next bucket.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def min_max(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the smallest and largest point of n_out / 2 buckets of
+    consecutive points, with the first and last points."""
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+
+    bucket_size = -(-n // n_buckets)
+    buckets = np.full(n_buckets * bucket_size, np.nan)
+    buckets[:n] = y
+    buckets = buckets.reshape(n_buckets, bucket_size)
+    filled = ~np.isnan(buckets).all(axis=1)
+
+    offsets = np.arange(n_buckets)[filled] * bucket_size
+    selected = np.concatenate(
+        [
+            [0, n - 1],
+            offsets + np.nanargmin(buckets[filled], axis=1),
+            offsets + np.nanargmax(buckets[filled], axis=1),
+        ]
+    )
+    return np.unique(selected)
+
+
+def select_points(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_out: int,
+    x_range: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """Indices of at most about n_out points of a trace to draw.
+
+    Only the points within ``x_range`` are considered, with one point beyond
+    each edge so that lines reach the border of the plot.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    positions = np.arange(len(x))
+    if x_range is not None:
+        inside = (x >= x_range[0]) & (x <= x_range[1])
+        drawn = inside.copy()
+        drawn[1:] |= inside[:-1]
+        drawn[:-1] |= inside[1:]
+        positions = positions[drawn]
+
+    if len(positions) <= n_out:
+        return positions
+
+    if len(positions) > MIN_MAX_RATIO * n_out:
+        return positions[min_max(y[positions], n_out)]
+
+    return positions[lttb(x[positions], y[positions], n_out)]
+
+
+def get_axis_range(
+    relayout_data: Optional[Dict[str, Any]], axis: str = "xaxis"
+) -> Optional[Tuple[float, float]]:
+    """The window of an axis in a ``relayoutData`` event, None when autoranged."""
+    if not relayout_data or relayout_data.get(f"{axis}.autorange"):
+        return None
+
+    if f"{axis}.range[0]" in relayout_data and f"{axis}.range[1]" in relayout_data:
+        return (
+            float(relayout_data[f"{axis}.range[0]"]),
+            float(relayout_data[f"{axis}.range[1]"]),
+        )
+
+    if f"{axis}.range" in relayout_data:
+        start, end = relayout_data[f"{axis}.range"]
+        return float(start), float(end)
+
+    return None
+
+
+def get_x_range(
+    relayout_data: Optional[Dict[str, Any]],
+) -> Optional[Tuple[float, float]]:
+    return get_axis_range(relayout_data, "xaxis")
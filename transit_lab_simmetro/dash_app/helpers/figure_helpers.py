@@ -1,66 +1,82 @@
-from typing import Dict, List
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
 import plotly.graph_objs as go
 from plotly import express as px
 
-from transit_lab_simmetro.dash_app.helpers import get_color
+from transit_lab_simmetro.dash_app.helpers import calculate_travel_times, get_color
+from transit_lab_simmetro.dash_app.helpers.downsampling import select_points
+from transit_lab_simmetro.dash_app.helpers.results_access import ResultsAccess
+
+TRAVEL_TIME_COLUMNS = ["replication_id", "station_name", "train_id", "time_in_seconds"]
+PASSENGER_COLUMNS = [
+    "origin",
+    "destination",
+    "direction",
+    "waiting_time",
+    "travel_time",
+]
+
+
+HOVER_SEPARATOR = "<br> ---------------------------------------------------------------------------------------"
 
 
 class PlotCreator:
     def __init__(
-        self,
-        train_data: pd.DataFrame,
-        station_data: pd.DataFrame,
-        travel_times_data: pd.DataFrame,
-        passenger_data: pd.DataFrame,
-        stations_dict: Dict,
+        self, results: ResultsAccess, stations_dict: Dict, plot_width: int = 1500
     ):
-        self.replication_train_data = train_data
-        self.replication_station_data = station_data
-        self.travel_times_data = travel_times_data
-        self.replications_passenger_data = passenger_data
-        self.replications_hover_texts_dict: Dict[int, Dict[str, pd.DataFrame]] = {}
+        self.results = results
         self.stations_dict = stations_dict
+        # Points drawn per trace: the traces are downsampled to about one
+        # point per pixel of the plot, within the visible x-axis window.
+        self.plot_width = plot_width
 
         self.replication_id: int
 
-        self.replication_ids: List[int] = (
-            self.replication_station_data["replication_id"].unique().tolist()
-        )
+        self.replication_ids: List[int] = self.results.replication_ids("station")
 
         self.station_names: List[str] = list(self.stations_dict.keys())
 
-    def _generate_hover_texts(self, replication_id: int):
-        if replication_id in self.replications_hover_texts_dict:
-            return self.replications_hover_texts_dict[replication_id]
-
-        replication_train_data = self.replication_train_data.loc[
-            self.replication_train_data["replication_id"] == replication_id
+    @cached_property
+    def train_ids(self) -> List[str]:
+        station_frame = self.results.frame("station", None, ["train_id"])
+        return sorted(station_frame.positions["train_id"])
+
+    @cached_property
+    def travel_times_data(self) -> pd.DataFrame:
+        station_data = self.results.replication("station", None, TRAVEL_TIME_COLUMNS)
+        return calculate_travel_times(station_data.astype({"time_in_seconds": int}))
+
+    @property
+    def replications_passenger_data(self) -> pd.DataFrame:
+        return self.results.replication("passenger", None, PASSENGER_COLUMNS).copy()
+
+    def _generate_hover_texts(self, train_df: pd.DataFrame) -> pd.Series:
+        # Making column title bold and adding horizontal lines
+        column_texts = [
+            f"<b>{col}:</b>" + train_df[col].astype(str) + HOVER_SEPARATOR
+            for col in train_df.columns
         ]
+        hover_texts = column_texts[0]
+        for column_text in column_texts[1:]:
+            hover_texts = hover_texts + "<br>" + column_text
+        return hover_texts
 
-        unique_train_ids = replication_train_data["train_id"].unique()
-
-        hover_texts_dict = {}
-        for train_id in unique_train_ids:
-            train_df = replication_train_data[
-                replication_train_data["train_id"] == train_id
-            ]
-
-            # Making column title bold and adding horizontal lines
-            hover_texts_dict[train_id] = train_df.apply(
-                lambda row: "<br>".join(
-                    [
-                        f"<b>{col}:</b>{row[col]}<br>"
-                        " ---------------------------------------------------------------------------------------"
-                        for col in train_df.columns
-                    ]
-                ),
-                axis=1,
-            )
-        self.replications_hover_texts_dict[replication_id] = hover_texts_dict
-
-        return hover_texts_dict
+    def _visible_rows(
+        self,
+        train_data: pd.DataFrame,
+        x_column: str,
+        y_column: str,
+        x_range: Optional[Tuple[float, float]],
+    ) -> pd.DataFrame:
+        positions = select_points(
+            train_data[x_column].to_numpy(),
+            train_data[y_column].to_numpy(),
+            self.plot_width,
+            x_range,
+        )
+        return train_data.iloc[positions]
 
     def create_scatter_trace(
         self,
@@ -117,18 +133,19 @@ class PlotCreator:
         """
         return dict(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
 
-    def visualize_trajectories_for_all_trains(self, replication_id: int):
-        replication_subset_train_data = self.replication_train_data[
-            self.replication_train_data["replication_id"] == replication_id
-        ]
+    def visualize_trajectories_for_all_trains(
+        self, replication_id: int, x_range: Optional[Tuple[float, float]] = None
+    ):
+        replication_frame = self.results.frame("train", replication_id)
         fig = go.Figure()
 
-        hover_texts_dict = self._generate_hover_texts(replication_id)
-
-        for train_id in replication_subset_train_data["train_id"].unique():
-            train_data = replication_subset_train_data[
-                replication_subset_train_data["train_id"] == train_id
-            ]
+        for train_id in replication_frame.positions["train_id"]:
+            train_data = self._visible_rows(
+                replication_frame.rows("train_id", train_id),
+                "time_in_seconds",
+                "location_from_terminal",
+                x_range,
+            )
             times = train_data["time_in_seconds"]
             positions = train_data["location_from_terminal"]
 
@@ -149,7 +166,7 @@ class PlotCreator:
                     y=positions,
                     mode="lines",
                     name=f"{train_id}",
-                    text=hover_texts_dict[train_id],
+                    text=self._generate_hover_texts(train_data),
                     hoverinfo="text",
                 )
             )
@@ -187,6 +204,8 @@ class PlotCreator:
 
         fig.update_layout(
             self.create_layout("Trajectories", "Time (sec)", "Position (ft)"),
+            # Keeps the zoom when the figure is refined for a new window.
+            uirevision=replication_id,
         )
         return fig
 
@@ -196,26 +215,22 @@ class PlotCreator:
         train_ids: List[str],
         profile_column: str,
         title: str = "",
+        x_range: Optional[Tuple[float, float]] = None,
     ):
-        replication_subset_train_data = self.replication_train_data[
-            self.replication_train_data["replication_id"] == replication_id
-        ]
-
-        replication_subset_station_data = self.replication_station_data[
-            self.replication_station_data["replication_id"] == replication_id
-        ]
-
-        hover_texts_dict = self._generate_hover_texts(replication_id)
+        replication_station_frame = self.results.frame("station", replication_id)
 
         fig = go.Figure()
 
         for train_id in train_ids:
-            train_data = replication_subset_train_data[
-                replication_subset_train_data["train_id"] == train_id
-            ]
+            train_data = self._visible_rows(
+                self.results.train_rows("train", replication_id, train_id),
+                "time_in_seconds",
+                profile_column,
+                x_range,
+            )
             times = train_data["time_in_seconds"]
             profile = train_data[profile_column]
-            hover_text = hover_texts_dict[train_id]
+            hover_text = self._generate_hover_texts(train_data)
 
             fig.add_trace(
                 self.create_scatter_trace(
@@ -272,13 +287,12 @@ class PlotCreator:
                 )
             )
 
-            if replication_subset_station_data is not None:
-                station_times = replication_subset_station_data[
-                    replication_subset_station_data["train_id"] == train_id
-                ]["time_in_seconds"]
-                station_names = replication_subset_station_data[
-                    replication_subset_station_data["train_id"] == train_id
-                ]["station_name"]
+            if replication_station_frame is not None:
+                train_station_data = replication_station_frame.rows(
+                    "train_id", train_id
+                )
+                station_times = train_station_data["time_in_seconds"]
+                station_names = train_station_data["station_name"]
 
                 for station_time, station_name in zip(station_times, station_names):
                     fig.add_shape(
@@ -315,20 +329,15 @@ class PlotCreator:
         fig.update_layout(
             **self.create_layout(
                 f"{title} vs Time", "Time (sec)", f"{title} ({unit_dict.get(title)})"
-            )
+            ),
+            uirevision=f"{replication_id}-{train_ids}-{profile_column}",
         )
         return fig
 
     def create_headway_scatter(
         self, replication_id: int, station_name: str
     ) -> go.Figure:
-        replication_subset_station_data = self.replication_station_data[
-            self.replication_station_data["replication_id"] == replication_id
-        ]
-
-        station_data = replication_subset_station_data[
-            replication_subset_station_data["station_name"] == station_name
-        ]
+        station_data = self.results.station_rows(replication_id, station_name)
         fig = go.Figure()
 
         fig.add_trace(
@@ -366,12 +375,11 @@ class PlotCreator:
         return fig
 
     def create_headway_histogram(self, station_name: str, direction: str) -> go.Figure:
+        station_data = self.results.station_rows(
+            None, station_name, ["direction", "headway"]
+        )
         station_data = (
-            self.replication_station_data[
-                (self.replication_station_data["station_name"] == station_name)
-                & (self.replication_station_data["direction"] == direction)
-            ]["headway"]
-            / 60
+            station_data.loc[station_data["direction"] == direction, "headway"] / 60
         )  # Convert to minutes
 
         mean_headway = station_data.mean()
@@ -422,22 +430,20 @@ class PlotCreator:
         train_ids: List[str],
         profile_column: str,
         title: str = "",
+        x_range: Optional[Tuple[float, float]] = None,
     ):
-        replication_subset_train_data = self.replication_train_data[
-            self.replication_train_data["replication_id"] == replication_id
-        ]
-
         fig = go.Figure()
 
-        hover_texts_dict = self._generate_hover_texts(replication_id)
-
         for train_id in train_ids:
-            train_data = replication_subset_train_data[
-                replication_subset_train_data["train_id"] == train_id
-            ]
+            train_data = self._visible_rows(
+                self.results.train_rows("train", replication_id, train_id),
+                "location_from_terminal",
+                profile_column,
+                x_range,
+            )
             distances = train_data["location_from_terminal"]
             profile = train_data[profile_column]
-            hover_text = hover_texts_dict[train_id]
+            hover_text = self._generate_hover_texts(train_data)
 
             fig.add_trace(
                 self.create_scatter_trace(
@@ -531,7 +537,8 @@ class PlotCreator:
                 f"{title} vs Distance",
                 "Distance (ft)",
                 f"{title} ({unit_dict.get(title)})",
-            )
+            ),
+            uirevision=f"{replication_id}-{train_ids}-{profile_column}",
         )
 
         return fig
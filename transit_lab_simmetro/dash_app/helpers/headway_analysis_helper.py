@@ -1,6 +1,8 @@
 import pandas as pd
 import plotly.graph_objects as go
 
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import read_log
+
 
 class HeadwayAnalysis:
     def __init__(self, cleaned_events_path, train_test_path, station_test_path):
@@ -47,8 +49,14 @@ class HeadwayAnalysis:
 
     def load_and_clean_data(self):
         # Load datasets
-        self.train_test = pd.read_csv(self.train_test_path)
-        self.station_test = pd.read_csv(self.station_test_path)
+        self.train_test = read_log(
+            self.train_test_path,
+            usecols=["replication_id", "train_id", "starting_block_index"],
+        )
+        self.station_test = read_log(
+            self.station_test_path,
+            usecols=["replication_id", "train_id", "station_name", "headway"],
+        )
         self.cleaned_events = pd.read_csv(self.cleaned_events_path)
 
         # Clean cleaned_events data
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _seconds(times: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return (times - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+    return times.to_numpy(dtype=float)
+
+
+def _nanquantile(values: np.ndarray, q) -> np.ndarray:
+    """np.nanquantile along the first axis (linear interpolation), from a
+    single sort of the values rather than one call per column."""
+    sorted_values = np.sort(values, axis=0)  # NaN last
+    counts = np.isfinite(values).sum(axis=0)
+
+    positions = np.multiply.outer(q, np.maximum(counts - 1, 0))
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    fraction = positions - lower
+
+    columns = np.arange(counts.size).reshape(counts.shape)
+    flat_values = sorted_values.reshape(len(sorted_values), -1)
+
+    quantiles = (
+        flat_values[lower, columns] * (1 - fraction)
+        + flat_values[upper, columns] * fraction
+    )
+    return np.where(counts > 0, quantiles, np.nan)
+
+
+def filter_outliers(
+    travel_times: np.ndarray,
+    iqr_fence: Optional[float] = None,
+    quantile_range: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """Replace by NaN the travel times outside the fences of every column.
+
+    ``iqr_fence`` keeps [q1 - k * iqr, q3 + k * iqr] and ``quantile_range``
+    keeps the values between two quantiles, given as fractions.
+    """
+    travel_times = np.array(travel_times, dtype=float)
+    if not np.isfinite(travel_times).any():
+        return travel_times
+
+    if quantile_range is not None:
+        lower, upper = _nanquantile(travel_times, quantile_range)
+        travel_times[(travel_times < lower) | (travel_times > upper)] = np.nan
+
+    if iqr_fence is not None:
+        q1, q3 = _nanquantile(travel_times, [0.25, 0.75])
+        iqr = q3 - q1
+        travel_times[
+            (travel_times < q1 - iqr_fence * iqr)
+            | (travel_times > q3 + iqr_fence * iqr)
+        ] = np.nan
+
+    return travel_times
+
+
+class ODTravelTimes:
+    """Travel times between all pairs of stations, from station visits.
+
+    The visits are split into trips: by ``trip_columns`` (replication and
+    train, or date and run), when ``split_column`` changes, after gaps longer
+    than ``max_gap`` seconds and, with ``split_turns``, when a train turns
+    back along the order of ``stations``; the station where it turns back
+    belongs to both trips. The first and last
+    visit of every trip at every station are kept in dense trip x station
+    matrices, so the travel times from an origin to all destinations are the
+    difference of a column with the whole matrix.
+
+    Times may be seconds or datetimes; travel times are in seconds.
+    """
+
+    def __init__(
+        self,
+        visits: pd.DataFrame,
+        trip_columns: Sequence[str],
+        stations: Sequence[str],
+        station_column: str = "station_name",
+        time_column: str = "time_in_seconds",
+        split_column: Optional[str] = None,
+        max_gap: Optional[float] = None,
+        split_turns: bool = True,
+    ):
+        self.stations: List[str] = list(stations)
+        self.station_index = {station: i for i, station in enumerate(self.stations)}
+
+        visits = visits[
+            visits[station_column].isin(self.stations) & visits[time_column].notna()
+        ]
+        positions = pd.Categorical(
+            visits[station_column], categories=self.stations
+        ).codes.astype(np.int64)
+        times = _seconds(visits[time_column])
+        keys = visits.groupby(list(trip_columns), sort=False).ngroup().to_numpy()
+
+        order = np.lexsort((times, keys))
+        positions, times, keys = positions[order], times[order], keys[order]
+        trip_keys = visits[list(trip_columns)].iloc[order].reset_index(drop=True)
+
+        new_trip = np.ones(len(order), dtype=bool)
+        new_trip[1:] = keys[1:] != keys[:-1]
+        if split_column is not None:
+            split_values = visits[split_column].to_numpy()[order]
+            new_trip[1:] |= split_values[1:] != split_values[:-1]
+        if max_gap is not None:
+            new_trip[1:] |= np.diff(times) > max_gap
+
+        # Turning back: a move along the station order against the previous
+        # move of the same trip. The visit of the station where the train
+        # turned, from the move into it, starts the next trip as well.
+        moves = np.flatnonzero(~new_trip[1:] & (np.diff(positions) != 0)) + 1
+        signs = np.sign(positions[moves] - positions[moves - 1])
+        trip_of_moves = np.cumsum(new_trip)[moves]
+        turned = (
+            split_turns
+            & (signs[1:] != signs[:-1])
+            & (trip_of_moves[1:] == trip_of_moves[:-1])
+        )
+        turn_starts, turn_ends = moves[:-1][turned], moves[1:][turned]
+        new_trip[turn_ends] = True
+        trip_ids = np.cumsum(new_trip) - 1
+
+        shared_lengths = turn_ends - turn_starts
+        shared = np.repeat(turn_starts, shared_lengths) + (
+            np.arange(shared_lengths.sum())
+            - np.repeat(np.cumsum(shared_lengths) - shared_lengths, shared_lengths)
+        )
+        shared_trip_ids = np.repeat(trip_ids[turn_ends], shared_lengths)
+
+        visit_times = pd.DataFrame(
+            {
+                "trip": np.concatenate([trip_ids, shared_trip_ids]),
+                "station": np.concatenate([positions, positions[shared]]),
+                "time": np.concatenate([times, times[shared]]),
+            }
+        ).groupby(["trip", "station"])["time"]
+        first_visits = visit_times.min()
+        last_visits = visit_times.max()
+
+        n_trips = trip_ids[-1] + 1 if len(trip_ids) else 0
+        self.first_visits = np.full((n_trips, len(self.stations)), np.nan)
+        self.last_visits = np.full((n_trips, len(self.stations)), np.nan)
+        rows = first_visits.index.get_level_values("trip")
+        columns = first_visits.index.get_level_values("station")
+        self.first_visits[rows, columns] = first_visits.to_numpy()
+        self.last_visits[rows, columns] = last_visits.to_numpy()
+
+        self.trips = trip_keys[new_trip].reset_index(drop=True)
+
+    def _visits(self, visit: str) -> np.ndarray:
+        if visit not in ("first", "last"):
+            raise ValueError(f"Visit must be 'first' or 'last', not {visit}")
+        return self.first_visits if visit == "first" else self.last_visits
+
+    def from_origin(
+        self,
+        origin: str,
+        trip_mask: Optional[np.ndarray] = None,
+        time_window: Optional[Tuple[float, float]] = None,
+        origin_visit: str = "last",
+        destination_visit: str = "first",
+    ) -> np.ndarray:
+        """Trips x stations travel times from the origin, NaN where a trip
+        does not reach a station after the origin.
+
+        ``time_window`` selects the trips by the time of day, in seconds, of
+        their visit of the origin.
+        """
+        origin_times = self._visits(origin_visit)[:, self.station_index[origin]]
+        travel_times = self._visits(destination_visit) - origin_times[:, np.newaxis]
+        travel_times[~(travel_times > 0)] = np.nan
+        travel_times[:, self.station_index[origin]] = np.nan
+
+        selected = np.isfinite(origin_times)
+        if trip_mask is not None:
+            selected &= np.asarray(trip_mask, dtype=bool)
+        if time_window is not None:
+            time_of_day = origin_times % SECONDS_PER_DAY
+            selected &= (time_of_day >= time_window[0]) & (
+                time_of_day <= time_window[1]
+            )
+
+        travel_times[~selected] = np.nan
+        return travel_times
+
+    def travel_times(
+        self,
+        origin: str,
+        destination: str,
+        iqr_fence: Optional[float] = None,
+        quantile_range: Optional[Tuple[float, float]] = None,
+        **kwargs,
+    ) -> np.ndarray:
+        travel_times = self.from_origin(origin, **kwargs)[
+            :, self.station_index[destination]
+        ]
+        travel_times = filter_outliers(travel_times, iqr_fence, quantile_range)
+        return travel_times[np.isfinite(travel_times)]
+
+    def all_pairs(
+        self,
+        iqr_fence: Optional[float] = None,
+        quantile_range: Optional[Tuple[float, float]] = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Travel times of all pairs of stations, one row per trip and pair,
+        with the trip columns."""
+        pairs = []
+        for origin in self.stations:
+            travel_times = filter_outliers(
+                self.from_origin(origin, **kwargs), iqr_fence, quantile_range
+            )
+            trips, destinations = np.nonzero(np.isfinite(travel_times))
+            pair = self.trips.iloc[trips].reset_index(drop=True)
+            pair["origin"] = origin
+            pair["destination"] = np.asarray(self.stations, dtype=object)[destinations]
+            pair["travel_time"] = travel_times[trips, destinations]
+            pairs.append(pair)
+
+        return pd.concat(pairs, ignore_index=True)
+
+    def quantiles(
+        self,
+        q: float,
+        iqr_fence: Optional[float] = None,
+        quantile_range: Optional[Tuple[float, float]] = None,
+        **kwargs,
+    ) -> pd.DataFrame:
+        """Origin x destination matrix of the q quantile (a fraction) of the
+        travel times."""
+        matrix = np.full((len(self.stations), len(self.stations)), np.nan)
+        for i, origin in enumerate(self.stations):
+            travel_times = filter_outliers(
+                self.from_origin(origin, **kwargs), iqr_fence, quantile_range
+            )
+            matrix[i] = _nanquantile(travel_times, q)
+
+        return pd.DataFrame(matrix, index=self.stations, columns=self.stations)
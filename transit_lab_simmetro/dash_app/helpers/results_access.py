@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import (
+    ensure_index,
+    find_log_file,
+    read_log,
+)
+
+# Columns whose row positions are precomputed for every loaded frame.
+INDEXED_COLUMNS = ("train_id", "station_name")
+
+
+class ReplicationFrame:
+    """Rows of one replication of a log, with the row positions of every
+    train and station."""
+
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        self.positions: Dict[str, Dict[str, np.ndarray]] = {
+            column: data.groupby(column, sort=False).indices
+            for column in INDEXED_COLUMNS
+            if column in data.columns
+        }
+
+    def rows(self, column: str, value) -> pd.DataFrame:
+        positions = self.positions[column].get(value, np.empty(0, dtype=int))
+        return self.data.iloc[positions]
+
+
+class ResultsAccess:
+    """Lazy access to the logs of a results directory.
+
+    Logs are read one replication at a time, through their frame index, and
+    with only the requested columns. The decoded frames are kept in a bounded
+    LRU cache. A replication id of None stands for all replications.
+    """
+
+    def __init__(self, results_dir: Union[str, Path], cache_size: int = 16):
+        self.results_dir = Path(results_dir)
+        self._indexes: Dict[str, Optional[Dict]] = {}
+        self._read_frame = lru_cache(maxsize=cache_size)(self._read_frame_uncached)
+
+    def log_file_path(self, log: str) -> Path:
+        return self.results_dir / f"{log}_test.csv"
+
+    def has_log(self, log: str) -> bool:
+        try:
+            find_log_file(self.log_file_path(log))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _index(self, log: str) -> Optional[Dict]:
+        if log not in self._indexes:
+            self._indexes[log] = ensure_index(self.log_file_path(log))
+        return self._indexes[log]
+
+    def replication_ids(self, log: str = "station") -> List[int]:
+        index = self._index(log)
+        if index is None:
+            data = self.replication(log, None, ["replication_id"])
+            return sorted(data["replication_id"].unique().tolist())
+
+        return sorted(
+            {
+                frame["replication_id"]
+                for frame in index["frames"]
+                if frame["replication_id"] is not None
+            }
+        )
+
+    def _read_frame_uncached(
+        self,
+        log: str,
+        replication_id: Optional[int],
+        columns: Optional[Tuple[str, ...]],
+    ) -> ReplicationFrame:
+        if replication_id is not None:
+            # Builds the index of a plain CSV log on first use.
+            self._index(log)
+
+        data = read_log(
+            self.log_file_path(log),
+            replication_ids=None if replication_id is None else [replication_id],
+            usecols=None if columns is None else list(columns),
+        )
+        return ReplicationFrame(data.reset_index(drop=True))
+
+    def frame(
+        self,
+        log: str,
+        replication_id: Optional[int],
+        columns: Optional[Sequence[str]] = None,
+    ) -> ReplicationFrame:
+        if columns is not None:
+            columns = tuple(dict.fromkeys(["replication_id", *columns]))
+        return self._read_frame(log, replication_id, columns)
+
+    def replication(
+        self,
+        log: str,
+        replication_id: Optional[int],
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        return self.frame(log, replication_id, columns).data
+
+    def train_rows(
+        self,
+        log: str,
+        replication_id: Optional[int],
+        train_id: str,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        if columns is not None:
+            columns = ["train_id", *columns]
+        return self.frame(log, replication_id, columns).rows("train_id", train_id)
+
+    def station_rows(
+        self,
+        replication_id: Optional[int],
+        station_name: str,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        if columns is not None:
+            columns = ["station_name", *columns]
+        return self.frame("station", replication_id, columns).rows(
+            "station_name", station_name
+        )
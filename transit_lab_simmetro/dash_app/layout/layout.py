@@ -86,11 +86,7 @@ def generate_layout(
                                         id="train_id_dropdown",
                                         options=[
                                             {"label": train_id, "value": train_id}
-                                            for train_id in sorted(
-                                                plot_creator.replication_station_data[
-                                                    "train_id"
-                                                ].unique()
-                                            )
+                                            for train_id in plot_creator.train_ids
                                         ],
                                         value="train_0",
                                     ),
@@ -183,19 +183,8 @@ class MovingBlock(AbstractBlock):
     def register_moving_block_control_center(self, moving_block_control) -> None:
         self.moving_block_control_center = moving_block_control
 
-    @property
-    def sorted_current_train_list(self) -> List[Train]:
-        return sorted(
-            self.current_train_list,
-            key=lambda t: (
-                t.distance_traveled_from_the_start_of_block(self),
-                -t.dispatching_time,
-            ),
-        )
-
     def next_train(self, requesting_train: Train) -> Optional[Train]:
         if self.current_train_list:
-            # sorted_current_train_list = self.sorted_current_train_list
             next_train_index = self.current_train_list.index(requesting_train) - 1
             if 0 <= next_train_index < len(self.current_train_list):
                 return self.current_train_list[next_train_index]
@@ -203,7 +192,9 @@ class MovingBlock(AbstractBlock):
 
     @property
     def current_train(self) -> Optional[Train]:
-        return self.sorted_current_train_list[-1] if self.current_train_list else None
+        # Trains enter at the start of the block and cannot pass each other, so
+        # the first one to enter is the furthest ahead.
+        return self.current_train_list[0] if self.current_train_list else None
 
     @property
     def is_occupied(self) -> bool:
@@ -214,6 +205,7 @@ class MovingBlock(AbstractBlock):
 
     def activate(self, entering_train: Train) -> None:
         self.current_train_list.append(entering_train)
+        self.moving_block_control_center.train_entered_block(entering_train, self)
 
     def deactivate(self, exiting_train: Train) -> None:
         try:
@@ -222,6 +214,7 @@ class MovingBlock(AbstractBlock):
             raise ReleasingNotOccupiedBlock(
                 "The block is being released by a train that is not in this block."
             )
+        self.moving_block_control_center.train_left_block(exiting_train, self)
 
     @property
     def civil_speed_limit(self) -> float:
@@ -1,50 +1,238 @@
 from __future__ import annotations
 
 import math
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+import numpy as np
 
 from transit_lab_simmetro.simulation_engine.infrastructure import MovingBlock
 from transit_lab_simmetro.simulation_engine.train import Train
 
+if TYPE_CHECKING:
+    from transit_lab_simmetro.simulation_engine.infrastructure import Path
+
+
+MPH_TO_FPS = 5280 / 3600
+
+
+def braking_envelope(
+    positions: np.ndarray,
+    lengths: np.ndarray,
+    speeds: np.ndarray,
+    decelerations: np.ndarray,
+    safety_margin: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Gaps to the leader, braking distances and braking-limited speeds of the
+    trains of one alignment, ordered from the front train backwards.
+
+    Positions and lengths are in feet, speeds in mph and decelerations in
+    ft/s^2. The permitted speed is 0 for a train within the safety margin of
+    its leader and infinite for one that can stop in the remaining distance
+    at its current speed.
+    """
+    gaps = np.full(len(positions), np.inf)
+    gaps[1:] = positions[:-1] - lengths[:-1] - positions[1:]
+
+    needed_braking_distances = gaps - safety_margin
+    braking_distances = (speeds * MPH_TO_FPS) ** 2 / (2 * decelerations)
+
+    permitted_speeds = np.where(
+        braking_distances < needed_braking_distances,
+        np.inf,
+        np.sqrt(np.maximum(needed_braking_distances, 0) * 2 * decelerations)
+        / MPH_TO_FPS,
+    )
+    permitted_speeds[needed_braking_distances < 0] = 0
+
+    return gaps, braking_distances, permitted_speeds
+
 
 class MovingBlockControl:
+    """Keeps the trains of every alignment in a linked list ordered by
+    position, so that the leader of a train and the gap to it are found in
+    constant time.
+
+    An alignment is the sequence of moving blocks of a path, identified by its
+    first block; the short-turning path shares the alignment of the southbound
+    path. The order only changes when a train enters an alignment, on
+    dispatch or after short-turning, and when it leaves it, since trains
+    cannot pass each other.
+
+    The braking-limited speeds of all trains are computed together once per
+    time step, from the positions and speeds at the first speed-code request
+    of the step, and every later request in the step reads them.
+    """
+
     def __init__(self, blocks: List[MovingBlock], safety_margin: float = 200) -> None:
         self.safety_margin = safety_margin
         for block in blocks:
             block.register_moving_block_control_center(self)
 
+        self._registered_paths: Set[Path] = set()
+        self._alignment_blocks: Dict[MovingBlock, List[MovingBlock]] = {}
+        # Alignment, index in the alignment and distance from its start.
+        self._block_positions: Dict[MovingBlock, Tuple[MovingBlock, int, float]] = {}
+
+        self._alignments: Dict[Train, MovingBlock] = {}
+        self._leaders: Dict[Train, Optional[Train]] = {}
+        self._followers: Dict[Train, Optional[Train]] = {}
+        self._front_trains: Dict[MovingBlock, Optional[Train]] = {}
+        self._occupied_block_counts: Dict[Train, int] = {}
+
+        self._envelope_time: Optional[float] = None
+        self._permitted_speeds: Dict[Train, float] = {}
+
+    def _register_path(self, path: Path) -> None:
+        alignment = path.blocks[0]
+        alignment_blocks = self._alignment_blocks.setdefault(alignment, [])
+
+        distance = 0.0
+        for index, block in enumerate(path.blocks):
+            if not isinstance(block, MovingBlock):
+                break
+            if block not in self._block_positions:
+                self._block_positions[block] = (alignment, index, distance)
+                alignment_blocks.append(block)
+            distance += block.length
+
+        self._registered_paths.add(path)
+
+    def train_entered_block(self, train: Train, block: MovingBlock) -> None:
+        if train.path not in self._registered_paths:
+            self._register_path(train.path)
+
+        alignment = self._block_positions[block][0]
+        if self._alignments.get(train) is alignment:
+            self._occupied_block_counts[train] += 1
+            return
+
+        self._remove(train)
+        self._insert(train, block, alignment)
+
+    def train_left_block(self, train: Train, block: MovingBlock) -> None:
+        position = self._block_positions.get(block)
+        if position is None or self._alignments.get(train) is not position[0]:
+            return
+
+        self._occupied_block_counts[train] -= 1
+        if not self._occupied_block_counts[train]:
+            self._remove(train)
+
+    def _find_leader(
+        self, train: Train, block: MovingBlock, alignment: MovingBlock
+    ) -> Optional[Train]:
+        # Trains enter a block at its start, so the ones that entered earlier
+        # are ahead; in the blocks ahead, the last to enter is the nearest.
+        index = self._block_positions[block][1]
+        for block_ahead in self._alignment_blocks[alignment][index:]:
+            for candidate in reversed(block_ahead.current_train_list):
+                if (
+                    candidate is not train
+                    and self._alignments.get(candidate) is alignment
+                ):
+                    return candidate
+        return None
+
+    def _insert(self, train: Train, block: MovingBlock, alignment: MovingBlock) -> None:
+        leader = self._find_leader(train, block, alignment)
+        follower = (
+            self._front_trains.get(alignment)
+            if leader is None
+            else self._followers[leader]
+        )
+
+        self._alignments[train] = alignment
+        self._occupied_block_counts[train] = 1
+        self._leaders[train] = leader
+        self._followers[train] = follower
+
+        if leader is None:
+            self._front_trains[alignment] = train
+        else:
+            self._followers[leader] = train
+        if follower is not None:
+            self._leaders[follower] = train
+
+    def _remove(self, train: Train) -> None:
+        alignment = self._alignments.pop(train, None)
+        if alignment is None:
+            return
+
+        del self._occupied_block_counts[train]
+        leader = self._leaders.pop(train)
+        follower = self._followers.pop(train)
+
+        if leader is None:
+            self._front_trains[alignment] = follower
+        else:
+            self._followers[leader] = follower
+        if follower is not None:
+            self._leaders[follower] = leader
+
+    def _position(self, train: Train, alignment: MovingBlock) -> Optional[float]:
+        position = self._block_positions.get(train.current_block)
+        if position is None or position[0] is not alignment:
+            return None
+        return position[2] + train.distance_travelled_in_current_block
+
+    def get_leader(self, asking_train: Train) -> Optional[Train]:
+        return self._leaders.get(asking_train)
+
     def get_distance_to_next_train(self, asking_train: Train) -> float:
-        next_blocks_list = asking_train.path.blocks[
-            asking_train.current_block_index + 1 : asking_train.current_block_index + 10
-        ]
-        next_train = asking_train.current_block.next_train(asking_train)
-        while next_train is None and next_blocks_list:
-            block = next_blocks_list.pop(0)
-            if block.current_train:
-                next_train = block.current_train
-
-        if next_train is None:
+        alignment = self._alignments.get(asking_train)
+        if alignment is None:
             return float("inf")
 
-        distance_to_next_train = (
-            (
-                sum(
-                    block.length
-                    for block in asking_train.path.blocks[
-                        asking_train.current_block_index : next_train.current_block_index
-                    ]
-                )
-                + next_train.distance_travelled_in_current_block
-            )
-            - next_train.length
-        ) - asking_train.distance_travelled_in_current_block
+        position = self._position(asking_train, alignment)
+        if position is None:
+            return float("inf")
+
+        # A leader that has moved off the alignment, onto the short-turning
+        # tracks or the other direction, no longer constrains the train.
+        leader = self._leaders[asking_train]
+        while leader is not None:
+            leader_position = self._position(leader, alignment)
+            if leader_position is not None:
+                return leader_position - leader.length - position
+            leader = self._leaders[leader]
 
-        return distance_to_next_train
+        return float("inf")
 
     def needed_braking_distance(self, asking_train: Train) -> float:
         return self.get_distance_to_next_train(asking_train) - self.safety_margin
 
-    def get_speed_code(self, asking_train: Train, asking_block: MovingBlock) -> float:
+    def update_braking_envelope(self) -> None:
+        self._permitted_speeds = {}
+
+        for alignment, front_train in self._front_trains.items():
+            trains = []
+            positions = []
+            train = front_train
+            while train is not None:
+                position = self._position(train, alignment)
+                if position is not None:
+                    trains.append(train)
+                    positions.append(position)
+                train = self._followers[train]
+
+            if not trains:
+                continue
+
+            _, _, permitted_speeds = braking_envelope(
+                np.array(positions),
+                np.array([train.length for train in trains], dtype=float),
+                np.array([train.speed for train in trains], dtype=float),
+                np.array(
+                    [
+                        train.train_speed_regulator.normal_decceleration_in_fps2
+                        for train in trains
+                    ]
+                ),
+                self.safety_margin,
+            )
+            self._permitted_speeds.update(zip(trains, permitted_speeds.tolist()))
+
+    def _braking_limited_speed(self, asking_train: Train) -> float:
         needed_braking_distance = self.needed_braking_distance(asking_train)
 
         if needed_braking_distance < 0:
@@ -54,15 +242,28 @@ class MovingBlockControl:
             asking_train.train_speed_regulator.braking_distance
             < needed_braking_distance
         ):
-            return asking_block.civil_speed_limit
+            return float("inf")
 
-        return min(
+        return (
             math.sqrt(
                 needed_braking_distance
                 * 2
                 * asking_train.train_speed_regulator.normal_decceleration_in_fps2
             )
             / 5280
-            * 3600,
-            asking_block.civil_speed_limit,
+            * 3600
         )
+
+    def get_speed_code(self, asking_train: Train, asking_block: MovingBlock) -> float:
+        current_time = asking_train.simulation.current_time
+        if current_time != self._envelope_time:
+            self.update_braking_envelope()
+            self._envelope_time = current_time
+
+        # Trains that entered an alignment during this time step are not part
+        # of the envelope yet.
+        permitted_speed = self._permitted_speeds.get(asking_train)
+        if permitted_speed is None:
+            permitted_speed = self._braking_limited_speed(asking_train)
+
+        return min(permitted_speed, asking_block.civil_speed_limit)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import json
-import random
 from copy import deepcopy
 from typing import TYPE_CHECKING, List, Optional
 
+import numpy as np
 from scipy import stats
 from scipy.stats import truncnorm
 
@@ -34,6 +34,7 @@ from transit_lab_simmetro.simulation_engine.train.train_state import (
 
 if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.infrastructure.station import Station
+    from transit_lab_simmetro.simulation_engine.simulation.variates import VariatePools
     from transit_lab_simmetro.simulation_engine.train import Train
 
 
@@ -50,7 +51,7 @@ def load_params():
             PARAMS_DICT = json.load(f)
 
 
-def get_high_inspection_time():
+def sample_high_inspection_times(rng: np.random.Generator, size: int) -> np.ndarray:
     load_params()
 
     # Get the distribution name and parameters
@@ -60,15 +61,19 @@ def get_high_inspection_time():
     # Get the distribution from scipy.stats
     distribution = getattr(stats, distribution_name)
 
-    return float(distribution.rvs(*params) * 60)
+    return distribution.rvs(*params, size=size, random_state=rng) * 60
 
 
-def get_medium_inspection_time():
-    return min(4 * 60, get_high_inspection_time())
+def get_high_inspection_time(variates: VariatePools) -> float:
+    return variates.draw("inspection_time", sample_high_inspection_times)
 
 
-def get_low_inspection_time():
-    return min(1 * 60, get_high_inspection_time())
+def get_medium_inspection_time(variates: VariatePools) -> float:
+    return min(4 * 60, get_high_inspection_time(variates))
+
+
+def get_low_inspection_time(variates: VariatePools) -> float:
+    return min(1 * 60, get_high_inspection_time(variates))
 
 
 class SlowZone:
@@ -369,20 +374,22 @@ class ShortTurningPath(Path):
     #     else:
     #         return random.uniform(4 * 60, 6 * 60)
 
-    def get_inspection_time(self):
+    def get_inspection_time(self, train: Train):
+        variates = train.simulation.variates
+
         if cfg := get_config():
             inspection = cfg.inspection_time
 
             # Define mean and standard deviation for each case
             if inspection == "Low":
-                return get_low_inspection_time()
+                return get_low_inspection_time(variates)
             elif inspection == "Medium":
-                return get_medium_inspection_time()
+                return get_medium_inspection_time(variates)
             elif inspection == "High":
-                return get_high_inspection_time()
+                return get_high_inspection_time(variates)
 
         else:
-            return get_high_inspection_time()
+            return get_high_inspection_time(variates)
 
     def short_turn(self, train: Train):
         train.speed = 0.0
@@ -396,7 +403,9 @@ class ShortTurningPath(Path):
         train.current_block_index = train.starting_block_index
         train.distance_travelled_in_current_block = 0.0
 
-        train.state = SettingUpForShortTurning(train, random.uniform(2 * 60, 3 * 60))
+        train.state = SettingUpForShortTurning(
+            train, train.simulation.variates.uniform("set_up_time", 2 * 60, 3 * 60)
+        )
 
         train.has_been_short_turned = True
 
@@ -519,7 +528,7 @@ class ShortTurningAtWestern(Path):
 
         train.state = SettingUpForShortTurningAtStation(
             train,
-            random.uniform(4 * 60, 5 * 60),
+            train.simulation.variates.uniform("set_up_time_at_western", 4 * 60, 5 * 60),
             station=self.short_turning_station(),
             blocks=blocks,
         )
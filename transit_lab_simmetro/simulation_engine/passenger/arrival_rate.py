@@ -1,47 +1,61 @@
 import csv
-from typing import List
+from typing import Dict, List, Mapping, Optional
+
+# Blue Line stations from O'Hare to Forest Park.
+STATION_NAMES = [
+    "O-Hare",
+    "Rosemont",
+    "Cumberland",
+    "Harlem (O-Hare Branch)",
+    "Jefferson Park",
+    "Montrose",
+    "Irving Park",
+    "Addison",
+    "Belmont",
+    "Logan Square",
+    "California",
+    "Western (O-Hare Branch)",
+    "Damen",
+    "Division",
+    "Chicago",
+    "Grand",
+    "Clark/Lake",
+    "Washington",
+    "Monroe",
+    "Jackson",
+    "LaSalle",
+    "Clinton",
+    "UIC-Halsted",
+    "Racine",
+    "Illinois Medical District",
+    "Western (Forest Park Branch)",
+    "Kedzie-Homan",
+    "Pulaski",
+    "Cicero",
+    "Austin",
+    "Oak Park",
+    "Harlem (Forest Park Branch)",
+    "Forest Park",
+]
 
 
 class ArrivalRate:
-    def __init__(self, filename, demand_factor: int = 1):
-        self._rates = self._load_rates_from_csv(filename)
+    def __init__(
+        self,
+        filename,
+        demand_factor: int = 1,
+        station_names: Optional[List[str]] = None,
+        rates: Optional[Mapping[float, Dict]] = None,
+    ):
+        # Rates compiled ahead of time, e.g. by the input cache, in the layout
+        # of ``_load_rates_from_csv``.
+        self._rates = self._load_rates_from_csv(filename) if rates is None else rates
         self.demand_factor = demand_factor
 
-        self.station_names = [
-            "O-Hare",
-            "Rosemont",
-            "Cumberland",
-            "Harlem (O-Hare Branch)",
-            "Jefferson Park",
-            "Montrose",
-            "Irving Park",
-            "Addison",
-            "Belmont",
-            "Logan Square",
-            "California",
-            "Western (O-Hare Branch)",
-            "Damen",
-            "Division",
-            "Chicago",
-            "Grand",
-            "Clark/Lake",
-            "Washington",
-            "Monroe",
-            "Jackson",
-            "LaSalle",
-            "Clinton",
-            "UIC-Halsted",
-            "Racine",
-            "Illinois Medical District",
-            "Western (Forest Park Branch)",
-            "Kedzie-Homan",
-            "Pulaski",
-            "Cicero",
-            "Austin",
-            "Oak Park",
-            "Harlem (Forest Park Branch)",
-            "Forest Park",
-        ]
+        # Stations in southbound order.
+        self.station_names = list(
+            STATION_NAMES if station_names is None else station_names
+        )
 
     def sort_stations_by_direction(self, direction) -> List[str]:
         if direction == "Southbound":
@@ -57,7 +71,8 @@ class ArrivalRate:
 
         return destination_index > origin_index
 
-    def _load_rates_from_csv(self, filename):
+    @staticmethod
+    def _load_rates_from_csv(filename):
         rates = {}
         try:
             with open(filename, newline="", encoding="utf-8") as csvfile:
@@ -1,6 +1,7 @@
 import json
-from typing import List, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from transit_lab_simmetro.simulation_engine.schedule_refactored import BaseSchedule
@@ -10,14 +11,49 @@ from transit_lab_simmetro.simulation_engine.schedule_refactored import (
 from transit_lab_simmetro.simulation_engine.train import Train
 
 
+class ScheduleTables(NamedTuple):
+    empirical_schedule: pd.DataFrame
+    blue_line_schedule: pd.DataFrame
+
+
+def prepare_schedule_tables(data: Dict[str, List[Dict]]) -> ScheduleTables:
+    """Tables of a schedule file, with the short-turning flag of the nearest
+    scheduled departure attached to every empirical dispatch."""
+    empirical_schedule = pd.DataFrame(data["empirical_schedule"])
+    blue_line_schedule = pd.DataFrame(data["blue_line_schedule"])
+
+    merged_data = pd.merge_asof(
+        empirical_schedule,
+        blue_line_schedule,
+        on="time_in_sec",
+        # by="runid",
+        direction="nearest",
+    )
+
+    empirical_schedule["short_turned"] = merged_data["short_turned"]
+
+    return ScheduleTables(empirical_schedule, blue_line_schedule)
+
+
 class OHareEmpiricalSchedule(BaseSchedule):
-    def __init__(self, file_path, start_time_of_day: int, end_time_of_day: int):
+    def __init__(
+        self,
+        file_path,
+        start_time_of_day: int,
+        end_time_of_day: int,
+        tables: Optional[ScheduleTables] = None,
+    ):
         super().__init__(file_path, start_time_of_day, end_time_of_day)
 
-        with open(self.file_path, "r") as file:
-            self.data = json.load(file)
+        # Precompiled tables, e.g. from the input cache, skip parsing the file.
+        if tables is None:
+            with open(self.file_path, "r") as file:
+                self.data = json.load(file)
 
-        self.validate_params()
+            self.validate_params()
+            tables = prepare_schedule_tables(self.data)
+
+        self.tables = tables
 
         self.dispatch_strategy = self.get_strategy()
 
@@ -35,20 +71,29 @@ class OHareEmpiricalSchedule(BaseSchedule):
         return OHareEmpiricalDispatchStrategy(self)
 
     def generate_random_dispatch_info(self):
+        blue_line_schedule = self.tables.blue_line_schedule
+        forest_park_departures = blue_line_schedule[
+            blue_line_schedule["terminal"] == "Forest Park"
+        ]
         self.scheduled_forest_park_departures: List[Tuple[float, int, str, str]] = [
             (
-                scheduled_dispatch["time_in_sec"],
+                time_in_sec,
                 0,
-                "Northbound"
-                if not scheduled_dispatch["short_turned"]
-                else "Notimplemented",
-                scheduled_dispatch["runid"],
+                "Northbound" if not short_turned else "Notimplemented",
+                runid,
+            )
+            for time_in_sec, short_turned, runid in zip(
+                forest_park_departures["time_in_sec"].tolist(),
+                forest_park_departures["short_turned"].tolist(),
+                forest_park_departures["runid"].tolist(),
             )
-            for scheduled_dispatch in self.data["blue_line_schedule"]
-            if scheduled_dispatch["terminal"] == "Forest Park"
         ]
 
-        self.dispatch_info = self.dispatch_strategy.generate_random_dispatch_info()
+        # Headways are drawn from a generator seeded with the replication, so a
+        # replication gets the same dispatches every time it runs.
+        self.dispatch_info = self.dispatch_strategy.generate_random_dispatch_info(
+            np.random.default_rng(self.replication_id)
+        )
         return self.dispatch_info
 
     def remove_all_northbound_trains(self) -> None:
@@ -86,92 +131,177 @@ class OHareEmpiricalSchedule(BaseSchedule):
             )
 
 
+# Headways are sampled from the dispatches of the next 15 minutes, without
+# the ones beyond 3 interquartile ranges of the quartiles.
+HEADWAY_WINDOW = 900
+HEADWAY_IQR_FENCE = 3.0
+
+
+class EmpiricalHeadwayIndex:
+    """Sampling pools of the empirical headways of one direction for every
+    possible start of the 15-minute window.
+
+    The dispatches in ``[t, t + 900)`` only change when ``t`` passes a
+    dispatch time or a dispatch time minus 900 s, so these breakpoints split
+    the day into intervals with the same window. The outlier-free pool of
+    every distinct window is computed once, and a draw is a lookup of the
+    interval followed by an index into the pool.
+    """
+
+    def __init__(self, times: np.ndarray, headways: np.ndarray, runids: np.ndarray):
+        # Rows without a headway never pass the outlier fences.
+        has_headway = ~np.isnan(headways)
+        times, headways, runids = (
+            times[has_headway],
+            headways[has_headway],
+            runids[has_headway],
+        )
+
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        self.headways = headways[order]
+        self.runids = runids[order].tolist()
+
+        self.breakpoints = np.unique(np.concatenate([times, times - HEADWAY_WINDOW]))
+        # Interval i is (breakpoints[i - 1], breakpoints[i]]; its window is the
+        # one of its right end.
+        right_ends = np.append(self.breakpoints, np.inf)
+        bounds = np.stack(
+            [
+                np.searchsorted(times, right_ends),
+                np.searchsorted(times, right_ends + HEADWAY_WINDOW),
+            ],
+            axis=1,
+        )
+        windows, interval_windows = np.unique(bounds, axis=0, return_inverse=True)
+        self.interval_windows = interval_windows.reshape(-1)
+
+        pools = []
+        self.pool_sizes = np.zeros(len(windows), dtype=int)
+        for window, (lower, upper) in enumerate(windows):
+            window_headways = self.headways[lower:upper]
+            if not len(window_headways):
+                continue
+
+            q1, q3 = np.quantile(window_headways, [0.25, 0.75])
+            iqr = q3 - q1
+            pool = lower + np.flatnonzero(
+                (window_headways >= q1 - HEADWAY_IQR_FENCE * iqr)
+                & (window_headways <= q3 + HEADWAY_IQR_FENCE * iqr)
+            )
+            pools.append(pool)
+            self.pool_sizes[window] = len(pool)
+
+        self.pool_offsets = np.concatenate([[0], np.cumsum(self.pool_sizes)[:-1]])
+        # The trailing entry keeps the offsets of empty windows in bounds.
+        self.pool = np.concatenate(pools + [np.array([-1])]).astype(int)
+
+    def sample(self, current_times: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Sampled row of the window starting at each of the times, or -1 when
+        the window has no dispatches."""
+        windows = self.interval_windows[
+            np.searchsorted(self.breakpoints, current_times)
+        ]
+        pool_sizes = self.pool_sizes[windows]
+        draws = (rng.random(len(current_times)) * pool_sizes).astype(int)
+
+        return np.where(
+            pool_sizes > 0, self.pool[self.pool_offsets[windows] + draws], -1
+        )
+
+
 class OHareEmpiricalDispatchStrategy(EmpiricalDispatchStrategy):
     def __init__(self, schedule: OHareEmpiricalSchedule) -> None:
         self.start_time_of_day = schedule.start_time_of_day
         self.end_time_of_day = schedule.end_time_of_day
 
-        self.empirical_schedule_data = pd.DataFrame(schedule.data["empirical_schedule"])
-        self.blue_line_schedule_data = pd.DataFrame(schedule.data["blue_line_schedule"])
-
-        merged_data = pd.merge_asof(
-            self.empirical_schedule_data,
-            self.blue_line_schedule_data,
-            on="time_in_sec",
-            # by="runid",
-            direction="nearest",
-        )
-
-        self.empirical_schedule_data["short_turned"] = merged_data["short_turned"]
+        empirical_schedule_data, blue_line_schedule_data = schedule.tables
 
-        self.empirical_schedule_data = self.empirical_schedule_data[
-            self.empirical_schedule_data["time_in_sec"].between(
+        self.empirical_schedule_data = empirical_schedule_data[
+            empirical_schedule_data["time_in_sec"].between(
                 self.start_time_of_day, self.end_time_of_day
             )
         ]
 
-        self.blue_line_schedule_data = self.blue_line_schedule_data[
-            self.blue_line_schedule_data["time_in_sec"].between(
+        self.blue_line_schedule_data = blue_line_schedule_data[
+            blue_line_schedule_data["time_in_sec"].between(
                 self.start_time_of_day, self.end_time_of_day
             )
         ]
 
-    def generate_random_dispatch_info(self) -> List[Tuple[int, int, str, str]]:
-        dispatch_info = []
+        self.directions = self.empirical_schedule_data["direction"].unique().tolist()
+        self.headway_indices: Dict[str, EmpiricalHeadwayIndex] = {}
+        # Whether the n-th scheduled departure from the terminal of a
+        # direction is short-turned.
+        self.scheduled_short_turns: Dict[str, List[bool]] = {}
 
-        for direction in self.empirical_schedule_data["direction"].unique():
-            i = 0
-            schedule = self.blue_line_schedule_data[
-                self.blue_line_schedule_data["terminal"]
-                == ("O-Hare" if direction == "Southbound" else "Forest Park")
-            ]
-            current_time = self.start_time_of_day
+        for direction in self.directions:
             data = self.empirical_schedule_data[
                 self.empirical_schedule_data["direction"] == direction
             ]
-            while current_time < self.end_time_of_day:
-                # Filter empirical data for the current 15-minute interval
-                current_interval_data = data[
-                    (data["time_in_sec"] >= current_time)
-                    & (
-                        data["time_in_sec"] < current_time + 900
-                    )  # 900 seconds = 15 minutes
-                ]
-
-                # Calculate the IQR for headway in the current interval
-                q1 = current_interval_data["headway"].quantile(0.25)
-                q3 = current_interval_data["headway"].quantile(0.75)
-                iqr = q3 - q1
-                lower_bound = q1 - 3.0 * iqr
-                upper_bound = q3 + 3.0 * iqr
-
-                # Filter out outliers based on the IQR
-                current_interval_data = current_interval_data[
-                    (current_interval_data["headway"] >= lower_bound)
-                    & (current_interval_data["headway"] <= upper_bound)
-                ]
-
-                if not current_interval_data.empty:
-                    # Sample a headway from the current interval
-                    sample_dispatch = current_interval_data.sample(n=1)
-
-                    current_time += sample_dispatch["headway"].values[0]
-                    runid = sample_dispatch["runid"].values[0]
-                    short_turned = sample_dispatch["short_turned"].values[0]
-
-                    try:
-                        path = (
-                            "ShortTurning"
-                            if schedule.iloc[i]["short_turned"]
-                            else direction
-                        )
-                        i += 1
-                    except IndexError:
-                        path = direction
-
-                    dispatch_info.append((current_time, 0, path, runid))
-                else:
-                    current_time += 900  # Move to the next 15-minute interval
+            self.headway_indices[direction] = EmpiricalHeadwayIndex(
+                data["time_in_sec"].to_numpy(dtype=float),
+                data["headway"].to_numpy(dtype=float),
+                data["runid"].to_numpy(),
+            )
+
+            schedule_data = self.blue_line_schedule_data[
+                self.blue_line_schedule_data["terminal"]
+                == ("O-Hare" if direction == "Southbound" else "Forest Park")
+            ]
+            self.scheduled_short_turns[direction] = schedule_data[
+                "short_turned"
+            ].tolist()
+
+    def sample_dispatch_sequences(
+        self, direction: str, rng: np.random.Generator, num_replications: int
+    ) -> List[List[Tuple[float, str]]]:
+        """Dispatch times and run ids of a direction for several replications
+        at once, drawing the next headway of every replication together."""
+        headway_index = self.headway_indices[direction]
+        current_times = np.full(num_replications, float(self.start_time_of_day))
+        sequences: List[List[Tuple[float, str]]] = [[] for _ in range(num_replications)]
+
+        active = np.arange(num_replications)
+        while len(active):
+            rows = headway_index.sample(current_times[active], rng)
+            sampled = rows >= 0
+
+            # Windows without dispatches move on to the next 15 minutes.
+            current_times[active] += np.where(
+                sampled, headway_index.headways[rows], HEADWAY_WINDOW
+            )
+
+            for replication, row in zip(
+                active[sampled].tolist(), rows[sampled].tolist()
+            ):
+                sequences[replication].append(
+                    (float(current_times[replication]), headway_index.runids[row])
+                )
+
+            active = active[current_times[active] < self.end_time_of_day]
+
+        return sequences
+
+    def generate_random_dispatch_info(
+        self, rng: Optional[np.random.Generator] = None
+    ) -> List[Tuple[int, int, str, str]]:
+        if rng is None:
+            rng = np.random.default_rng()
+
+        dispatch_info = []
+
+        for direction in self.directions:
+            short_turns = self.scheduled_short_turns[direction]
+            (sequence,) = self.sample_dispatch_sequences(direction, rng, 1)
+
+            for i, (current_time, runid) in enumerate(sequence):
+                path = (
+                    "ShortTurning"
+                    if i < len(short_turns) and short_turns[i]
+                    else direction
+                )
+                dispatch_info.append((current_time, 0, path, runid))
 
         dispatch_info.sort(key=lambda x: x[0])
 
@@ -196,8 +326,9 @@ class OHareEmpiricalScheduleWithHolding(OHareEmpiricalSchedule):
         end_time_of_day: int,
         max_holding=180,
         min_holding=60,
+        tables: Optional[ScheduleTables] = None,
     ):
-        super().__init__(file_path, start_time_of_day, end_time_of_day)
+        super().__init__(file_path, start_time_of_day, end_time_of_day, tables)
         self.max_holding = max_holding
         self.min_holding = min_holding
 
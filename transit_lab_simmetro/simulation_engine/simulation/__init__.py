@@ -4,8 +4,16 @@ isort:skip_file
 """
 
 from .simulation import Simulation, SimulationContext
+from .snapshot import SimulationSnapshot
+from .lockstep import LockstepSimulation
 from .replication_manager import ReplicationManager
 
 # from .simulation_context import SimulationContext
 
-__all__ = ["Simulation", "ReplicationManager", "SimulationContext"]
+__all__ = [
+    "Simulation",
+    "ReplicationManager",
+    "SimulationContext",
+    "SimulationSnapshot",
+    "LockstepSimulation",
+]
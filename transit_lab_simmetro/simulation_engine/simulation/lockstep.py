@@ -0,0 +1,644 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from transit_lab_simmetro.simulation_engine.infrastructure import Terminal
+from transit_lab_simmetro.simulation_engine.infrastructure.station import douglas_model
+from transit_lab_simmetro.simulation_engine.simulation.simulation import (
+    EMERGENCY_DECELERATION,
+    NORMAL_DECELERATION,
+    TRAIN_CAPACITY,
+)
+from transit_lab_simmetro.simulation_engine.train.acceleration_profile_function import (
+    DEFAULT_ACCELERATION_BREAKPOINTS,
+)
+from transit_lab_simmetro.simulation_engine.train.train import TRAIN_LENGTH
+from transit_lab_simmetro.simulation_engine.train.train_passenger_manager import (
+    TrainPassengerManager,
+)
+from transit_lab_simmetro.simulation_engine.train.train_speed_regulator_CTA import (
+    DESIRED_SPEED_RANGE,
+    NORMAL_ACCELERATION_SHARE,
+)
+
+if TYPE_CHECKING:
+    from transit_lab_simmetro.simulation_engine.infrastructure import Path
+
+MPH_TO_FPS = 5280 / 3600
+
+# Trains aim to stop this far before a red signal and snap onto the platform
+# once they are closer to the stopping point than the tolerance.
+SIGNAL_STOPPING_MARGIN = 30.0
+STATION_STOPPING_TOLERANCE = 1.0
+DEMAND_TIME_BIN = 900
+
+WAITING, RUNNING, DWELLING, FINISHED = range(4)
+
+_ACCELERATION_SPEEDS = np.array(
+    [speed for speed, _ in DEFAULT_ACCELERATION_BREAKPOINTS]
+)
+_ACCELERATION_FACTORS = np.array(
+    [factor for _, factor in DEFAULT_ACCELERATION_BREAKPOINTS]
+)
+
+
+class LockstepNetwork:
+    """Static arrays describing a fixed-block path, read once from its blocks."""
+
+    def __init__(self, path: Path):
+        blocks = [block for block in path.blocks if not isinstance(block, Terminal)]
+        if not all(hasattr(block, "speed_codes_to_communicate") for block in blocks):
+            raise ValueError("Lock-step lanes only support fixed-block paths")
+
+        self.direction = path.direction
+        self.block_names = [block.block_alt_name for block in blocks]
+        self.lengths = np.array([block.length for block in blocks], dtype=float)
+        self.ends = np.cumsum(self.lengths)
+        self.starts = self.ends - self.lengths
+        self.total_length = float(self.ends[-1])
+        self.speed_limits = np.array(
+            [
+                min(block.default_speed_code, block.slow_zone_reduced_speed_limit)
+                for block in blocks
+            ],
+            dtype=float,
+        )
+
+        block_indices = {block.block_id: i for i, block in enumerate(blocks)}
+        signals = sorted(
+            (block_indices[upstream_block_id], i, speed_code)
+            for i, block in enumerate(blocks)
+            for upstream_block_id, speed_code in block.speed_codes_to_communicate.items()
+            if upstream_block_id in block_indices
+        )
+        self.signal_receivers = np.array([s[0] for s in signals], dtype=int)
+        self.signal_senders = np.array([s[1] for s in signals], dtype=int)
+        self.signal_codes = np.array([s[2] for s in signals], dtype=float)
+        self.receivers, self.receiver_offsets = np.unique(
+            self.signal_receivers, return_index=True
+        )
+
+        station_blocks = [i for i, block in enumerate(blocks) if block.station]
+        self.stations = [blocks[i].station for i in station_blocks]
+        self.station_names = [station.name for station in self.stations]
+        self.station_positions = np.array(
+            [
+                self.starts[i] + blocks[i].station.location_relative_to_block
+                for i in station_blocks
+            ],
+            dtype=float,
+        )
+        # Indexed by the next station of a train; past the last one it never stops.
+        self.stopping_positions = np.append(self.station_positions, np.inf)
+
+        max_speed_in_fps = self.speed_limits.max() * MPH_TO_FPS
+        sight_distance = max_speed_in_fps**2 / (
+            2 * NORMAL_DECELERATION * MPH_TO_FPS
+        ) + 2 * (SIGNAL_STOPPING_MARGIN + TRAIN_LENGTH)
+        self.lookahead_blocks = int(
+            np.max(
+                np.searchsorted(self.starts, self.ends + sight_distance, side="right")
+                - np.arange(len(blocks))
+            )
+        )
+
+    @property
+    def number_of_blocks(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def number_of_stations(self) -> int:
+        return len(self.stations)
+
+    def speed_codes(self, occupancy: np.ndarray) -> np.ndarray:
+        """Speed code of every block in every lane, given the occupying trains.
+
+        Mirrors ``Block.current_speed_code``: the minimum of the default code,
+        the slow zone limit and the codes communicated by occupied blocks.
+        """
+        codes = np.broadcast_to(self.speed_limits, occupancy.shape).copy()
+        if self.signal_codes.size == 0:
+            return codes
+
+        communicated = np.where(
+            occupancy[:, self.signal_senders] >= 0, self.signal_codes, np.inf
+        )
+        codes[:, self.receivers] = np.minimum(
+            codes[:, self.receivers],
+            np.minimum.reduceat(communicated, self.receiver_offsets, axis=1),
+        )
+        return codes
+
+    def demand_tables(
+        self, start_time: float, total_time: float, is_weekday: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Per 15-minute bin, the hourly boarding demand at each station and the
+        share of through passengers alighting there."""
+        number_of_bins = int(np.ceil(total_time / DEMAND_TIME_BIN)) + 1
+        arrival_rates = np.zeros((number_of_bins, self.number_of_stations))
+        alighting_shares = np.zeros((number_of_bins, self.number_of_stations))
+        if not self.stations:
+            return arrival_rates, alighting_shares
+
+        arrival_rate = self.stations[0].passenger_generator.arrival_rate
+        for time_bin in range(number_of_bins):
+            hour = (start_time + time_bin * DEMAND_TIME_BIN) / 3600
+            od_rates = np.array(
+                [
+                    [
+                        (
+                            arrival_rate.get_smoothed_rate(
+                                hour, is_weekday, origin, destination
+                            )
+                            if j > i
+                            else 0.0
+                        )
+                        for j, destination in enumerate(self.station_names)
+                    ]
+                    for i, origin in enumerate(self.station_names)
+                ]
+            )
+            arrival_rates[time_bin] = od_rates.sum(axis=1)
+
+            on_board = np.cumsum(od_rates.sum(axis=1) - od_rates.sum(axis=0))
+            arriving_load = np.concatenate([[0.0], on_board[:-1]])
+            alighting_shares[time_bin] = np.divide(
+                od_rates.sum(axis=0),
+                arriving_load,
+                out=np.zeros(self.number_of_stations),
+                where=arriving_load > 0,
+            ).clip(0, 1)
+
+        return arrival_rates, alighting_shares
+
+
+class LockstepSimulation:
+    """Advances many replications of one fixed-block path in lock-step.
+
+    Every replication is a lane of the state arrays, so one time step moves
+    the trains of all replications with a handful of numpy operations: speed
+    codes, the acceleration profile, braking to red signals and stations and
+    the kinematics are evaluated for all lanes at once. Only the discrete
+    events (dispatches, block entries and station stops) touch subsets of
+    the lanes.
+
+    The trains, regulator parameters and dwell times are those of the object
+    engine, but the passengers are aggregated into platform and on-board
+    counts, so holding, short-turning and per-passenger records are not
+    reproduced. Every lane draws from its own generator, seeded from
+    ``seeds``, so a replication does not depend on the lanes run beside it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        dispatches: Sequence[Sequence[Tuple[float, int]]],
+        replication_ids: Optional[Sequence[int]] = None,
+        time_step: float = 0.5,
+        start_hour: float = 5.0,
+        is_weekday: bool = True,
+        total_time: float = 14400,
+        seeds: Optional[Sequence[Any]] = None,
+        train_id_offsets: Optional[Sequence[int]] = None,
+    ):
+        self.network = LockstepNetwork(path)
+        self.time_step = round(time_step, 2)
+        self.current_time = start_hour * 3600
+        self._start_time = self.current_time
+        self._total_time = total_time + self.current_time
+
+        number_of_lanes = len(dispatches)
+        self._rngs = [
+            np.random.default_rng(None if seeds is None else seeds[lane])
+            for lane in range(number_of_lanes)
+        ]
+        self._train_id_offsets = np.zeros(number_of_lanes, dtype=int)
+        if train_id_offsets is not None:
+            self._train_id_offsets[:] = train_id_offsets
+
+        passenger_manager = TrainPassengerManager(train_capacity=TRAIN_CAPACITY)
+        self._number_of_doors = (
+            passenger_manager.num_cars * passenger_manager.num_doors_per_car
+        )
+        self._number_of_seats_per_door = passenger_manager.num_seats_per_door
+        number_of_trains = max([len(lane) for lane in dispatches] + [1])
+        number_of_blocks = self.network.number_of_blocks
+        number_of_stations = self.network.number_of_stations
+        shape = (number_of_lanes, number_of_trains)
+
+        self.replication_ids = np.array(
+            list(range(number_of_lanes)) if replication_ids is None else replication_ids
+        )
+
+        self.dispatching_times = np.full(shape, np.inf)
+        self.starting_blocks = np.zeros(shape, dtype=int)
+        for lane, lane_dispatches in enumerate(dispatches):
+            for train, (dispatching_time, starting_block_index) in enumerate(
+                sorted(lane_dispatches)
+            ):
+                self.dispatching_times[lane, train] = dispatching_time
+                self.starting_blocks[lane, train] = starting_block_index
+        self.number_of_dispatches = np.array([len(lane) for lane in dispatches])
+        self.next_dispatch = np.zeros(number_of_lanes, dtype=int)
+
+        self.status = np.full(shape, WAITING, dtype=np.int8)
+        self.position = np.zeros(shape)
+        self.speed = np.zeros(shape)
+        self.acceleration = np.zeros(shape)
+        self.desired_speed_fraction = np.ones(shape)
+        self.current_block = np.zeros(shape, dtype=int)
+        self.next_station = np.zeros(shape, dtype=int)
+        self.remaining_dwell_time = np.zeros(shape)
+        self.passengers_on_board = np.zeros(shape)
+
+        self.occupancy = np.full((number_of_lanes, number_of_blocks), -1)
+        self.last_block_visit = np.full((number_of_lanes, number_of_blocks), np.nan)
+        self.last_station_visit = np.full((number_of_lanes, number_of_stations), np.nan)
+        self.passengers_on_platform = np.zeros((number_of_lanes, number_of_stations))
+
+        self._arrival_rates, self._alighting_shares = self.network.demand_tables(
+            self.current_time, total_time, is_weekday
+        )
+
+        self._block_events: List[Dict[str, np.ndarray]] = []
+        self._station_events: List[Dict[str, np.ndarray]] = []
+
+    @property
+    def number_of_lanes(self) -> int:
+        return self.status.shape[0]
+
+    def run(self, until: Optional[float] = None) -> None:
+        end_time = self._total_time if until is None else min(until, self._total_time)
+        while self.current_time <= end_time:
+            self.step()
+
+    def is_finished(self) -> bool:
+        return self.current_time > self._total_time
+
+    def step(self) -> None:
+        self._dispatch_trains()
+        self._update_occupancy()
+        self._update_dwelling_trains()
+        self._update_running_trains()
+        self.current_time += self.time_step
+
+    def _dispatch_trains(self) -> None:
+        lanes = np.arange(self.number_of_lanes)
+        trains = np.minimum(self.next_dispatch, self.status.shape[1] - 1)
+        blocks = self.starting_blocks[lanes, trains]
+        due = (
+            (self.next_dispatch < self.number_of_dispatches)
+            & (self.dispatching_times[lanes, trains] <= self.current_time)
+            & (self.occupancy[lanes, blocks] < 0)
+        )
+        lanes, trains, blocks = lanes[due], trains[due], blocks[due]
+        if lanes.size == 0:
+            return
+
+        self.status[lanes, trains] = RUNNING
+        self.position[lanes, trains] = self.network.starts[blocks]
+        self.current_block[lanes, trains] = blocks
+        self.next_station[lanes, trains] = np.searchsorted(
+            self.network.station_positions, self.network.starts[blocks]
+        )
+        self._draw_desired_speed_fractions(lanes, trains)
+        self.occupancy[lanes, blocks] = trains
+        self.next_dispatch[lanes] += 1
+        self._record_block_activations(lanes, trains, blocks)
+
+    def _update_occupancy(self) -> None:
+        self.occupancy.fill(-1)
+        lanes, trains = np.nonzero((self.status == RUNNING) | (self.status == DWELLING))
+        if lanes.size == 0:
+            return
+
+        origins = self.network.starts[self.starting_blocks[lanes, trains]]
+        rear_positions = np.maximum(
+            self.position[lanes, trains] - TRAIN_LENGTH, origins
+        )
+        rear_blocks = np.searchsorted(self.network.starts, rear_positions, "right") - 1
+        spans = self.current_block[lanes, trains] - rear_blocks
+        for k in range(spans.max() + 1):
+            covered = spans >= k
+            self.occupancy[lanes[covered], rear_blocks[covered] + k] = trains[covered]
+
+    def _update_dwelling_trains(self) -> None:
+        dwelling = self.status == DWELLING
+        self.remaining_dwell_time[dwelling] -= self.time_step
+        self.status[dwelling & (self.remaining_dwell_time <= 0)] = RUNNING
+
+    def _update_running_trains(self) -> None:
+        network = self.network
+        lanes, trains = np.nonzero(self.status == RUNNING)
+        if lanes.size == 0:
+            return
+
+        position = self.position[lanes, trains]
+        speed = self.speed[lanes, trains]
+        blocks = self.current_block[lanes, trains]
+        speed_codes = network.speed_codes(self.occupancy)
+
+        deceleration_in_fps2 = NORMAL_DECELERATION * MPH_TO_FPS
+        # Distance left to each block boundary once this step has been travelled.
+        planning_position = position + speed * MPH_TO_FPS * self.time_step
+
+        # A zero code on the current block is a red signal at its end; further
+        # ahead, blocks with a zero code or another train are red, and lower
+        # codes are reached at no more than the code.
+        speed_code = speed_codes[lanes, blocks]
+        stopping_point = np.where(speed_code == 0, network.ends[blocks], np.inf)
+        speed_code = np.where(speed_code == 0, network.speed_limits[blocks], speed_code)
+        braking_speed = np.full(lanes.size, np.inf)
+        for k in range(1, network.lookahead_blocks + 1):
+            is_on_path = blocks + k < network.number_of_blocks
+            ahead = np.minimum(blocks + k, network.number_of_blocks - 1)
+            code_ahead = speed_codes[lanes, ahead]
+            occupying_train = self.occupancy[lanes, ahead]
+            is_red = (
+                is_on_path
+                & np.isinf(stopping_point)
+                & (
+                    (code_ahead == 0)
+                    | ((occupying_train >= 0) & (occupying_train != trains))
+                )
+            )
+            stopping_point = np.where(is_red, network.starts[ahead], stopping_point)
+
+            distance_to_block = np.maximum(network.starts[ahead] - planning_position, 0)
+            braking_speed = np.where(
+                is_on_path & (code_ahead > 0),
+                np.minimum(
+                    braking_speed,
+                    np.sqrt(
+                        (code_ahead * MPH_TO_FPS) ** 2
+                        + 2 * deceleration_in_fps2 * distance_to_block
+                    ),
+                ),
+                braking_speed,
+            )
+
+        stations = self.next_station[lanes, trains]
+        has_station_ahead = stations < network.number_of_stations
+        station_position = network.stopping_positions[stations]
+
+        signal_speed = np.sqrt(
+            2
+            * deceleration_in_fps2
+            * np.maximum(stopping_point - SIGNAL_STOPPING_MARGIN - position, 0)
+        )
+        station_speed = np.sqrt(
+            2 * 0.5 * deceleration_in_fps2 * np.maximum(station_position - position, 0)
+        )
+        target_speed = np.minimum(
+            speed_code * self.desired_speed_fraction[lanes, trains],
+            np.minimum(np.minimum(signal_speed, station_speed), braking_speed)
+            / MPH_TO_FPS,
+        )
+
+        normal_acceleration = NORMAL_ACCELERATION_SHARE * np.interp(
+            speed, _ACCELERATION_SPEEDS, _ACCELERATION_FACTORS
+        )
+        acceleration = np.where(
+            speed < target_speed,
+            np.minimum(normal_acceleration, (target_speed - speed) / self.time_step),
+            -np.minimum(
+                (speed - target_speed) / self.time_step, EMERGENCY_DECELERATION
+            ),
+        )
+
+        new_speed = np.maximum(speed + acceleration * self.time_step, 0)
+        distance = np.maximum(
+            speed * MPH_TO_FPS * self.time_step
+            + 0.5 * acceleration * MPH_TO_FPS * self.time_step**2,
+            0,
+        )
+        new_position = np.minimum(
+            position + distance, np.maximum(stopping_point - 1, position)
+        )
+        new_speed = np.where(new_position >= stopping_point - 1, 0, new_speed)
+
+        arrived = has_station_ahead & (
+            new_position >= station_position - STATION_STOPPING_TOLERANCE
+        )
+        new_position = np.where(arrived, station_position, new_position)
+        new_speed = np.where(arrived, 0, new_speed)
+        acceleration = np.where(arrived, 0, acceleration)
+
+        self.position[lanes, trains] = new_position
+        self.speed[lanes, trains] = new_speed
+        self.acceleration[lanes, trains] = acceleration
+
+        finished = new_position >= network.total_length
+        self.status[lanes[finished], trains[finished]] = FINISHED
+
+        new_blocks = np.minimum(
+            np.searchsorted(network.starts, new_position, "right") - 1,
+            network.number_of_blocks - 1,
+        )
+        entered = (new_blocks != blocks) & ~finished
+        if entered.any():
+            self.current_block[lanes[entered], trains[entered]] = new_blocks[entered]
+            self._draw_desired_speed_fractions(lanes[entered], trains[entered])
+            self._record_block_activations(
+                lanes[entered], trains[entered], new_blocks[entered]
+            )
+
+        if arrived.any():
+            self._stop_at_stations(lanes[arrived], trains[arrived], stations[arrived])
+
+    def _stop_at_stations(
+        self, lanes: np.ndarray, trains: np.ndarray, stations: np.ndarray
+    ) -> None:
+        time_bin = min(
+            int((self.current_time - self._start_time) // DEMAND_TIME_BIN),
+            len(self._arrival_rates) - 1,
+        )
+        headway = self.current_time - self.last_station_visit[lanes, stations]
+        # Like ``Station.last_train_visit_time``, the first visit of a station
+        # comes after a random headway
+        first_visit = np.isnan(headway)
+        headway[first_visit] = self._draw(lanes[first_visit], "uniform", 340, 2 * 340)
+
+        arriving_passengers = self._draw(
+            lanes,
+            "poisson",
+            self._arrival_rates[time_bin, stations] * np.maximum(headway, 0) / 3600,
+        )
+        self.passengers_on_platform[lanes, stations] += arriving_passengers
+        platform_before_stop = self.passengers_on_platform[lanes, stations].copy()
+
+        on_board = self.passengers_on_board[lanes, trains]
+        alighting = self._draw(
+            lanes,
+            "binomial",
+            on_board.astype(int),
+            self._alighting_shares[time_bin, stations],
+        )
+        through = on_board - alighting
+        boarding = np.minimum(platform_before_stop, TRAIN_CAPACITY - through)
+
+        self.passengers_on_platform[lanes, stations] -= boarding
+        self.passengers_on_board[lanes, trains] = through + boarding
+        self.last_station_visit[lanes, stations] = self.current_time
+
+        dwell_time = douglas_model(
+            alighting_passengers_per_door=alighting / self._number_of_doors,
+            boarding_passengers_per_door=boarding / self._number_of_doors,
+            standing_through_passengers_per_door=np.maximum(
+                through / self._number_of_doors - self._number_of_seats_per_door, 0
+            ),
+        )
+        self.status[lanes, trains] = DWELLING
+        self.remaining_dwell_time[lanes, trains] = dwell_time
+        self.next_station[lanes, trains] = stations + 1
+
+        self._station_events.append(
+            {
+                "lane": lanes,
+                "time_in_seconds": np.full(lanes.size, self.current_time),
+                "station": stations,
+                "headway": headway,
+                "dwell_time": dwell_time,
+                "train": trains,
+                "number_of_passengers_boarded": boarding,
+                "number_of_passengers_alighted": alighting,
+                "number_of_passengers_on_train_after_stop": through + boarding,
+                "number_of_passengers_on_platform_after_stop": (
+                    platform_before_stop - boarding
+                ),
+                "number_of_passengers_on_platform_before_stop": platform_before_stop,
+                "denied_boarding": platform_before_stop - boarding,
+            }
+        )
+
+    def _draw_desired_speed_fractions(
+        self, lanes: np.ndarray, trains: np.ndarray
+    ) -> None:
+        self.desired_speed_fraction[lanes, trains] = self._draw(
+            lanes, "uniform", *DESIRED_SPEED_RANGE
+        )
+
+    def _draw(self, lanes: np.ndarray, distribution: str, *parameters) -> np.ndarray:
+        """One draw per lane from the generator of the lane, with the
+        parameters of that lane."""
+        parameters = [np.broadcast_to(p, lanes.shape) for p in parameters]
+        return np.array(
+            [
+                getattr(self._rngs[lane], distribution)(*(p[i] for p in parameters))
+                for i, lane in enumerate(lanes)
+            ],
+            dtype=float,
+        )
+
+    def _record_block_activations(
+        self, lanes: np.ndarray, trains: np.ndarray, blocks: np.ndarray
+    ) -> None:
+        self._block_events.append(
+            {
+                "lane": lanes,
+                "time_in_seconds": np.full(lanes.size, self.current_time),
+                "train": trains,
+                "block": blocks,
+                "headway": self.current_time - self.last_block_visit[lanes, blocks],
+                "passengers_on_board": self.passengers_on_board[lanes, trains],
+            }
+        )
+        self.last_block_visit[lanes, blocks] = self.current_time
+
+    def _train_ids(self, lanes: np.ndarray, trains: np.ndarray) -> List[str]:
+        return [f"train_{train}" for train in trains + self._train_id_offsets[lanes]]
+
+    def station_visit_rows(self) -> List[Dict[str, Any]]:
+        """Station visits in the column order of ``StationLogger``."""
+        events = _concatenate_events(self._station_events)
+        if not events:
+            return []
+
+        return [
+            {
+                "replication_id": int(self.replication_ids[lane]),
+                "time_in_seconds": time_in_seconds,
+                "station_name": self.network.station_names[station],
+                "direction": self.network.direction,
+                "headway": headway,
+                "dwell_time": dwell_time,
+                "applied_holding": 0.0,
+                "train_id": train_id,
+                "number_of_passengers_boarded": int(boarded),
+                "number_of_passengers_alighted": int(alighted),
+                "number_of_passengers_on_train_after_stop": int(on_train),
+                "number_of_passengers_on_platform_after_stop": int(platform_after),
+                "number_of_passengers_on_platform_before_stop": int(platform_before),
+                "is_short_turning": False,
+                "denied_boarding": int(denied),
+            }
+            for (
+                lane,
+                time_in_seconds,
+                station,
+                headway,
+                dwell_time,
+                train_id,
+                boarded,
+                alighted,
+                on_train,
+                platform_after,
+                platform_before,
+                denied,
+            ) in zip(
+                events["lane"],
+                events["time_in_seconds"],
+                events["station"],
+                events["headway"],
+                events["dwell_time"],
+                self._train_ids(events["lane"], events["train"]),
+                events["number_of_passengers_boarded"],
+                events["number_of_passengers_alighted"],
+                events["number_of_passengers_on_train_after_stop"],
+                events["number_of_passengers_on_platform_after_stop"],
+                events["number_of_passengers_on_platform_before_stop"],
+                events["denied_boarding"],
+            )
+        ]
+
+    def block_activation_rows(self) -> List[Dict[str, Any]]:
+        """Block activations in the column order of ``BlockActivationLogger``."""
+        events = _concatenate_events(self._block_events)
+        if not events:
+            return []
+
+        return [
+            {
+                "replication_id": int(self.replication_ids[lane]),
+                "time_in_seconds": time_in_seconds,
+                "train_id": train_id,
+                "block_id": self.network.block_names[block],
+                "headway": headway,
+                "direction": self.network.direction,
+                "passengers_on_board": int(passengers_on_board),
+            }
+            for (
+                lane,
+                time_in_seconds,
+                train_id,
+                block,
+                headway,
+                passengers_on_board,
+            ) in zip(
+                events["lane"],
+                events["time_in_seconds"],
+                self._train_ids(events["lane"], events["train"]),
+                events["block"],
+                events["headway"],
+                events["passengers_on_board"],
+            )
+        ]
+
+
+def _concatenate_events(events: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not events:
+        return {}
+
+    return {key: np.concatenate([event[key] for event in events]) for key in events[0]}
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import math
+import random
+import warnings
+from contextlib import contextmanager
+from copy import deepcopy
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from transit_lab_simmetro.simulation_engine.infrastructure import Block, Station
+from transit_lab_simmetro.simulation_engine.passenger import Passenger
+from transit_lab_simmetro.simulation_engine.simulation.snapshot import (
+    PICKLE_RECURSION_LIMIT,
+    _recursion_limit,
+)
+from transit_lab_simmetro.simulation_engine.simulation.variates import VariatePools
+from transit_lab_simmetro.simulation_engine.train import DummyTrainDecorator, Train
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    AwaitingHoldingDecisionState,
+    DwellingAtStationState,
+)
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import NullTrainLogger
+
+if TYPE_CHECKING:
+    from transit_lab_simmetro.simulation_engine.simulation.simulation import Simulation
+
+# Schedule attributes that are only read while the simulation runs.
+SHARED_SCHEDULE_ATTRIBUTES = ["file_path", "data", "tables", "dispatch_strategy"]
+
+
+def _shared_objects(simulation: Simulation) -> List[Any]:
+    shared: List[Any] = []
+
+    for path in simulation.paths.values():
+        for block in path.blocks:
+            for attribute in ("speed_codes_to_communicate", "upstream_blocks"):
+                if (static_table := getattr(block, attribute, None)) is not None:
+                    shared.append(static_table)
+            if block.station is not None:
+                shared.append(block.station.passenger_generator)
+
+    for attribute in SHARED_SCHEDULE_ATTRIBUTES:
+        if hasattr(simulation.schedule, attribute):
+            shared.append(getattr(simulation.schedule, attribute))
+
+    return shared
+
+
+def clone_simulation(simulation: Simulation, shared: Sequence[Any] = ()) -> Simulation:
+    """Copy the mutable state of a simulation while sharing its static inputs.
+
+    The topology tables of the blocks (the speed codes they send and the
+    blocks upstream of them), the demand model of the stations and the
+    schedule tables are never written during a run, so they go into the
+    deepcopy memo and the clone references the originals. The blocks and
+    stations themselves hold the occupancy and the waiting passengers, so
+    they are copied along with the trains. ``shared`` adds objects the
+    caller replaces in the clone anyway.
+    """
+    memo = {id(static): static for static in [*_shared_objects(simulation), *shared]}
+
+    with _recursion_limit(PICKLE_RECURSION_LIMIT):
+        return deepcopy(simulation, memo)
+
+
+class RolloutStationRecorder:
+    """In-memory stand-in for the station logger inside a rollout."""
+
+    def __init__(self):
+        self.visits: List[Dict[str, Any]] = []
+
+    def log_train_visit(
+        self,
+        station: Station,
+        current_time: float,
+        train_id: str,
+        dwell_time: float,
+        number_of_passengers_boarded: int,
+        number_of_passengers_alighted: int,
+        number_of_passengers_on_train_after_stop: int,
+        number_of_passengers_on_platform_before_stop: int,
+        is_short_turning: bool,
+        denied_boarding: int,
+        applied_holding: float = 0.0,
+    ) -> None:
+        self.visits.append(
+            {
+                "time_in_seconds": current_time,
+                "station_name": station.name,
+                "direction": station.direction,
+                "headway": current_time - station.last_train_visit_time,
+                "train_id": train_id,
+                "number_of_passengers_boarded": number_of_passengers_boarded,
+                "denied_boarding": denied_boarding,
+            }
+        )
+
+
+def expected_waiting_time(visits: List[Dict[str, Any]]) -> float:
+    """Mean passenger waiting time implied by the observed headways, E[H^2] / 2E[H]."""
+    headways = [
+        visit["headway"]
+        for visit in visits
+        if visit["headway"] > 0 and math.isfinite(visit["headway"])
+    ]
+    if not headways:
+        return 0.0
+
+    return sum(headway**2 for headway in headways) / (2 * sum(headways))
+
+
+def total_denied_boardings(visits: List[Dict[str, Any]]) -> float:
+    return float(sum(visit["denied_boarding"] for visit in visits))
+
+
+class LookaheadEvaluator:
+    """Estimates the effect of holding a stopped train by simulating ahead.
+
+    Every candidate holding time is evaluated on the same random streams
+    (common random numbers), so differences between candidates are not
+    masked by sampling noise. ``rollout_budget`` caps the simulated seconds
+    of all rollouts of an evaluation, by running fewer than ``num_rollouts``
+    per candidate, but always one.
+
+    The train must be awaiting its holding decision, which the simulation
+    takes between two time steps, so every rollout starts on a tick boundary.
+    """
+
+    in_rollout = False
+
+    def __init__(
+        self,
+        horizon: float = 1200,
+        num_rollouts: int = 4,
+        kpi: Callable[[List[Dict[str, Any]]], float] = expected_waiting_time,
+        seed: Optional[int] = None,
+        rollout_budget: Optional[float] = None,
+    ):
+        self.horizon = horizon
+        self.num_rollouts = num_rollouts
+        self.kpi = kpi
+        self.seed = seed
+        self.rollout_budget = rollout_budget
+
+    def rollouts_per_candidate(self, num_candidates: int) -> int:
+        if self.rollout_budget is None:
+            return self.num_rollouts
+
+        affordable = int(self.rollout_budget // (self.horizon * num_candidates))
+        return max(1, min(self.num_rollouts, affordable))
+
+    def evaluate(
+        self,
+        train: Train,
+        station: Station,
+        candidate_holdings: Sequence[float],
+    ) -> Dict[float, float]:
+        if not isinstance(train.state, AwaitingHoldingDecisionState):
+            raise ValueError(
+                f"Train {train.train_id} is not awaiting a holding decision"
+            )
+
+        simulation = train.simulation
+        train_index = simulation.trains.index(train)
+        seeds = self._rollout_seeds(
+            simulation, self.rollouts_per_candidate(len(candidate_holdings))
+        )
+
+        expected_kpis: Dict[float, float] = {}
+        for holding_time in candidate_holdings:
+            kpis = []
+            for seed in seeds:
+                # The random streams of the clone are replaced for the rollout
+                rollout = clone_simulation(simulation, shared=[simulation.variates])
+                recorder = RolloutStationRecorder()
+                try:
+                    with _isolated_rollout(simulation, rollout, recorder, seed):
+                        self._run_rollout(rollout, train_index, holding_time)
+                except Exception as e:
+                    warnings.warn(
+                        f"Exception {e} raised during lookahead rollout at time {simulation.current_time}"
+                    )
+                    continue
+
+                kpis.append(
+                    self.kpi(
+                        [
+                            visit
+                            for visit in recorder.visits
+                            if visit["direction"] == station.direction
+                        ]
+                    )
+                )
+            expected_kpis[holding_time] = (
+                sum(kpis) / len(kpis) if kpis else float("inf")
+            )
+
+        return expected_kpis
+
+    def _rollout_seeds(self, simulation: Simulation, num_rollouts: int) -> List[int]:
+        base_seed = (
+            self.seed
+            if self.seed is not None
+            else hash((simulation.replication_id, simulation.current_time))
+        )
+        return [(base_seed + k * 7919) % 2**32 for k in range(num_rollouts)]
+
+    def _run_rollout(
+        self, rollout: Simulation, train_index: int, holding_time: float
+    ) -> None:
+        held_train = rollout.trains[train_index]
+        held_train.state = DwellingAtStationState(
+            held_train, held_train.state.station, holding_time=holding_time
+        )
+
+        rollout.run(until=rollout.current_time + self.horizon)
+
+
+@contextmanager
+def _isolated_rollout(
+    simulation: Simulation,
+    rollout: Simulation,
+    recorder: RolloutStationRecorder,
+    seed: int,
+):
+    saved_random_state = random.getstate()
+    saved_numpy_random_state = np.random.get_state()
+    saved_ids = (Train._last_id, Passenger._last_id)
+    saved_loggers = (
+        Train.train_logger,
+        Passenger.passenger_logger,
+        Station.station_logger,
+        Block.block_logger,
+    )
+
+    random.seed(seed)
+    np.random.seed(seed)
+    rollout.variates = VariatePools(seed)
+    for cls in (Train, DummyTrainDecorator, Passenger, Station):
+        cls.simulation = rollout
+    Train.train_logger = NullTrainLogger()
+    Passenger.passenger_logger = None
+    Station.station_logger = recorder
+    Block.block_logger = None
+    LookaheadEvaluator.in_rollout = True
+
+    try:
+        yield
+    finally:
+        LookaheadEvaluator.in_rollout = False
+        for cls in (Train, DummyTrainDecorator, Passenger, Station):
+            cls.simulation = simulation
+        (
+            Train.train_logger,
+            Passenger.passenger_logger,
+            Station.station_logger,
+            Block.block_logger,
+        ) = saved_loggers
+        Train._last_id, Passenger._last_id = saved_ids
+        np.random.set_state(saved_numpy_random_state)
+        random.setstate(saved_random_state)
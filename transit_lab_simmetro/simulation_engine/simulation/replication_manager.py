@@ -2,12 +2,20 @@ from __future__ import annotations
 
 import random
 import warnings
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
+from transit_lab_simmetro import config_handler
 from transit_lab_simmetro.simulation_engine.simulation import (
+    LockstepSimulation,
     Simulation,
     SimulationContext,
+    SimulationSnapshot,
 )
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    HoldingStrategyFactory,
+    NoHoldingStrategy,
+)
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import BaseLogger
 
 if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.utils.logger_context import (
@@ -48,24 +56,15 @@ class ReplicationManager:
             for seed_number in (
                 self.seed_numbers if seed_numbers is None else seed_numbers
             ):
-                random.seed(seed_number)
-                schedule.set_replication_id(seed_number)
-                schedule.generate_random_dispatch_info()
-
-                path, signal_control_center = path_initializer_function(
-                    data, slow_zones
-                )
-
-                simulation = Simulation(
-                    schedule=schedule,
-                    path=path,
-                    signal_control_center=signal_control_center,
-                    train_speed_regulator=self.train_speed_regulator,
-                    total_time=total_time,
-                    start_hour=start_hour,
+                simulation = self._create_simulation(
+                    seed_number,
+                    schedule,
+                    path_initializer_function,
+                    data,
+                    slow_zones,
+                    total_time,
+                    start_hour,
                 )
-
-                simulation.replication_id = seed_number
                 simulation_context = SimulationContext(simulation)
 
                 try:
@@ -78,3 +77,203 @@ class ReplicationManager:
                     self.logger_context.add_unsuccessful_replication(seed_number)
                     self.seed_numbers.append(random.randint(0, 2**32 - 1))
                     continue
+
+    def warm_up_replications(
+        self,
+        schedule,
+        path_initializer_function,
+        data,
+        slow_zones,
+        total_time: float,
+        snapshot_time: float,
+        start_hour: int = 5,
+        seed_numbers: Optional[List[int]] = None,
+    ) -> Dict[int, SimulationSnapshot]:
+        """Run each replication up to ``snapshot_time`` (seconds of the day) and
+        return the captured states keyed by seed number.
+
+        A replication failing during the warm-up is replaced by one with a new
+        seed, so there is a snapshot for every seed number asked for."""
+        snapshots: Dict[int, SimulationSnapshot] = {}
+        seed_numbers = list(self.seed_numbers if seed_numbers is None else seed_numbers)
+
+        with self.logger_context:
+            for seed_number in seed_numbers:
+                simulation = self._create_simulation(
+                    seed_number,
+                    schedule,
+                    path_initializer_function,
+                    data,
+                    slow_zones,
+                    total_time,
+                    start_hour,
+                )
+
+                try:
+                    with SimulationContext(simulation):
+                        simulation.run(until=snapshot_time)
+                        snapshots[seed_number] = simulation.snapshot()
+                except Exception as e:
+                    warnings.warn(
+                        f"Exception {e} raised during warm-up of replication {seed_number}"
+                    )
+                    seed_numbers.append(random.randint(0, 2**32 - 1))
+                    continue
+
+        return snapshots
+
+    def run_replications_from_snapshots(
+        self, snapshots: Dict[int, SimulationSnapshot]
+    ) -> None:
+        with self.logger_context:
+            for seed_number, snapshot in snapshots.items():
+                simulation = snapshot.fork()
+
+                try:
+                    with SimulationContext(simulation):
+                        snapshot.restore_global_state()
+                        simulation.run()
+                except Exception as e:
+                    warnings.warn(
+                        f"Exception {e} raised during replication {seed_number}"
+                    )
+                    self.logger_context.add_unsuccessful_replication(seed_number)
+                    continue
+
+    def run_lockstep_replications(
+        self,
+        schedule,
+        path_initializer_function,
+        data,
+        slow_zones,
+        total_time: float,
+        start_hour: int = 5,
+        seed_numbers: Optional[List[int]] = None,
+    ) -> None:
+        """Run all replications at once as lanes of a ``LockstepSimulation``
+        per direction, each lane seeded from its seed number.
+
+        Raises ``ValueError`` for the holding, headway management and
+        short-turning the lanes do not reproduce.
+        """
+        seed_numbers = self.seed_numbers if seed_numbers is None else seed_numbers
+        self._check_lockstep_support()
+        dispatches: Dict[str, List[List[tuple]]] = {
+            "Northbound": [],
+            "Southbound": [],
+        }
+
+        for seed_number in seed_numbers:
+            random.seed(seed_number)
+            schedule.set_replication_id(seed_number)
+            schedule.generate_random_dispatch_info()
+
+            for lane_dispatches in dispatches.values():
+                lane_dispatches.append([])
+            for (
+                dispatching_time,
+                starting_block_index,
+                path,
+                *_,
+            ) in schedule.dispatch_info:
+                if path not in dispatches:
+                    raise ValueError(
+                        f"The lock-step engine does not run {path} trips, "
+                        f"found in replication {seed_number}"
+                    )
+                dispatches[path][-1].append((dispatching_time, starting_block_index))
+
+        paths, _ = path_initializer_function(data, slow_zones)
+
+        with self.logger_context:
+            # Southbound trains are numbered after the northbound ones of their lane
+            train_id_offsets = [len(lane) for lane in dispatches["Northbound"]]
+            for k, (direction, lane_dispatches) in enumerate(dispatches.items()):
+                simulation = LockstepSimulation(
+                    path=paths[direction],
+                    dispatches=lane_dispatches,
+                    replication_ids=seed_numbers,
+                    start_hour=start_hour,
+                    total_time=total_time,
+                    seeds=[[seed_number, k] for seed_number in seed_numbers],
+                    train_id_offsets=train_id_offsets if k else None,
+                )
+                simulation.run()
+
+                self._write_rows(
+                    self.logger_context.station_logger,
+                    simulation.station_visit_rows(),
+                )
+                self._write_rows(
+                    self.logger_context.block_logger,
+                    simulation.block_activation_rows(),
+                )
+
+    def _check_lockstep_support(self) -> None:
+        unsupported = [
+            f"the {name} log"
+            for name, logger in [
+                ("train", self.logger_context.train_logger),
+                ("passenger", self.logger_context.passenger_logger),
+                (
+                    "O'Hare terminal holding",
+                    self.logger_context.ohare_terminal_holding_logger,
+                ),
+            ]
+            # The null loggers write nothing
+            if hasattr(logger, "logger_strategy")
+        ]
+
+        cfg = config_handler.get_config() or {}
+        holding_strategy = cfg.get("holding_strategy")
+        if not isinstance(
+            HoldingStrategyFactory.create_strategy(holding_strategy),
+            NoHoldingStrategy,
+        ):
+            unsupported.append(f"holding_strategy={holding_strategy}")
+        for option in ["ohare_holding", "headway_management"]:
+            if cfg.get(option):
+                unsupported.append(option)
+
+        if unsupported:
+            raise ValueError(
+                "The lock-step engine does not support "
+                f"{', '.join(unsupported)}; run the object engine instead"
+            )
+
+    @staticmethod
+    def _write_rows(logger: Any, rows: List[Dict[str, Any]]) -> None:
+        if not isinstance(logger, BaseLogger):
+            return
+
+        for row in rows:
+            if row["time_in_seconds"] >= logger.warmup_time:
+                logger.logger_strategy.write_row(logger.log_file_path, row)
+
+    def _create_simulation(
+        self,
+        seed_number: int,
+        schedule,
+        path_initializer_function,
+        data,
+        slow_zones,
+        total_time: float,
+        start_hour: int,
+    ) -> Simulation:
+        random.seed(seed_number)
+        schedule.set_replication_id(seed_number)
+        schedule.generate_random_dispatch_info()
+
+        path, signal_control_center = path_initializer_function(data, slow_zones)
+
+        simulation = Simulation(
+            schedule=schedule,
+            path=path,
+            signal_control_center=signal_control_center,
+            train_speed_regulator=self.train_speed_regulator,
+            total_time=total_time,
+            start_hour=start_hour,
+        )
+
+        simulation.replication_id = seed_number
+        return simulation
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.infrastructure import Path
@@ -17,6 +17,10 @@ if TYPE_CHECKING:
 
 from transit_lab_simmetro.simulation_engine.infrastructure import Station
 from transit_lab_simmetro.simulation_engine.passenger import Passenger
+from transit_lab_simmetro.simulation_engine.simulation.snapshot import (
+    SimulationSnapshot,
+)
+from transit_lab_simmetro.simulation_engine.simulation.variates import VariatePools
 from transit_lab_simmetro.simulation_engine.train import (
     DummyTrainDecorator,
     Train,
@@ -24,6 +28,15 @@ from transit_lab_simmetro.simulation_engine.train import (
     TrainSpeedRegulator,
     TrainSpeedRegulatorCTA,
 )
+from transit_lab_simmetro.simulation_engine.train.train_state import (
+    DwellingAtStationState,
+)
+
+# Train and regulator parameters of every dispatched train
+MAX_ACCELERATION = 4
+NORMAL_DECELERATION = 1 * 2.17
+EMERGENCY_DECELERATION = 1 * 4.10
+TRAIN_CAPACITY = 960
 
 
 class Simulation:
@@ -48,6 +61,7 @@ class Simulation:
         self.replication_id: int = -1
         self._start_hour = start_hour
         self._is_weekday = is_weekday
+        self.variates = VariatePools()
 
         self.train_speed_regulator = (
             TrainSpeedRegulatorCTA
@@ -66,19 +80,38 @@ class Simulation:
 
         self._total_time = total_time + self.current_time
 
+        # Trains stopped at a station until their holding is decided, with
+        # the station and the regulator deciding it.
+        self.holding_decisions: List[Tuple[Train, Station, Any]] = []
+
     def is_weekday(self) -> bool:
         return self._is_weekday
 
     def get_current_hour(self) -> float:
         return self.current_time / 3600
 
-    def run(self) -> None:
-        while self.current_time <= self._total_time:
+    def run(self, until: Optional[float] = None) -> None:
+        end_time = self._total_time if until is None else min(until, self._total_time)
+        while self.current_time <= end_time:
+            self._take_holding_decisions()
             self._dispatch_trains()
             self._update_trains()
             self.current_time += self.time_step
         return
 
+    def is_finished(self) -> bool:
+        return self.current_time > self._total_time
+
+    def snapshot(self) -> SimulationSnapshot:
+        return SimulationSnapshot.capture(self)
+
+    def clone(self) -> Simulation:
+        from transit_lab_simmetro.simulation_engine.simulation.lookahead import (
+            clone_simulation,
+        )
+
+        return clone_simulation(self)
+
     def _create_train(
         self,
         starting_block_index: int,
@@ -88,11 +121,13 @@ class Simulation:
     ) -> Train:
         return Train(
             train_speed_regulator=self.train_speed_regulator(
-                max_acceleration=4,
-                normal_deceleration=1 * 2.17,
-                emergency_deceleration=1 * 4.10,
+                max_acceleration=MAX_ACCELERATION,
+                normal_deceleration=NORMAL_DECELERATION,
+                emergency_deceleration=EMERGENCY_DECELERATION,
+            ),
+            train_passenger_manager=TrainPassengerManager(
+                train_capacity=TRAIN_CAPACITY
             ),
-            train_passenger_manager=TrainPassengerManager(train_capacity=960),
             path=path,
             starting_block_index=starting_block_index,
             dispatching_time=dispatching_time,
@@ -112,6 +147,20 @@ class Simulation:
             )
             self.trains.append(new_train)
 
+    def request_holding_decision(
+        self, train: Train, station: Station, regulator
+    ) -> None:
+        self.holding_decisions.append((train, station, regulator))
+
+    def _take_holding_decisions(self) -> None:
+        # Taken before any train moves, so lookahead rollouts are cloned from
+        # a state where every train has moved for the same time.
+        while self.holding_decisions:
+            train, station, regulator = self.holding_decisions.pop(0)
+            train.state = DwellingAtStationState(
+                train, station, holding_time=regulator.suggested_holding(train)
+            )
+
     def _update_trains(self) -> None:
         for train in self.trains:
             train.update()
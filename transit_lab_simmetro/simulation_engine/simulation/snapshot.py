@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import pickle
+import random
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import numpy as np
+
+from transit_lab_simmetro.simulation_engine.passenger import Passenger
+from transit_lab_simmetro.simulation_engine.train import Train
+
+if TYPE_CHECKING:
+    from transit_lab_simmetro.simulation_engine.simulation.simulation import Simulation
+
+
+# Paths, blocks, trains and passengers reference each other, so pickling a
+# warmed-up network recurses deeper than the interpreter default.
+PICKLE_RECURSION_LIMIT = 100_000
+
+
+class SimulationSnapshot:
+    """Serialized mutable state of a running simulation.
+
+    Captures trains and their regulator states, block occupancy, platform
+    queues, the remaining dispatch schedule, the id counters and the states
+    of the ``random`` and numpy global generators, so that many scenarios can
+    be forked from one warmed-up state.
+    """
+
+    def __init__(
+        self,
+        payload: bytes,
+        current_time: float,
+        replication_id: int,
+        global_state: Dict[str, Any],
+    ):
+        self.payload = payload
+        self.current_time = current_time
+        self.replication_id = replication_id
+        self.global_state = global_state
+
+    @classmethod
+    def capture(cls, simulation: Simulation) -> SimulationSnapshot:
+        global_state = {
+            "random_state": random.getstate(),
+            "numpy_random_state": np.random.get_state(),
+            "last_train_id": Train._last_id,
+            "last_passenger_id": Passenger._last_id,
+        }
+
+        with _recursion_limit(PICKLE_RECURSION_LIMIT):
+            payload = pickle.dumps(simulation, protocol=pickle.HIGHEST_PROTOCOL)
+
+        return cls(
+            payload=payload,
+            current_time=simulation.current_time,
+            replication_id=simulation.replication_id,
+            global_state=global_state,
+        )
+
+    def fork(self) -> Simulation:
+        """Return an independent copy of the captured simulation."""
+        with _recursion_limit(PICKLE_RECURSION_LIMIT):
+            return pickle.loads(self.payload)
+
+    def restore_global_state(self) -> None:
+        """Restore the random generators and id counters to the captured values.
+
+        Must be called after entering the ``SimulationContext`` of the forked
+        simulation, since entering the context resets the id counters.
+        """
+        random.setstate(self.global_state["random_state"])
+        np.random.set_state(self.global_state["numpy_random_state"])
+        Train._last_id = self.global_state["last_train_id"]
+        Passenger._last_id = self.global_state["last_passenger_id"]
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, "wb") as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path: str) -> SimulationSnapshot:
+        with open(file_path, "rb") as file:
+            snapshot = pickle.load(file)
+
+        if not isinstance(snapshot, cls):
+            raise TypeError(f"{file_path} does not contain a simulation snapshot")
+
+        return snapshot
+
+
+class _recursion_limit:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._previous_limit: Optional[int] = None
+
+    def __enter__(self):
+        self._previous_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(self.limit, self._previous_limit))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        sys.setrecursionlimit(self._previous_limit)
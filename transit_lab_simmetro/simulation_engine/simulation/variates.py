@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+import zlib
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+# Draws a block of variates of one distribution from a generator. Samplers are
+# module-level functions so that the pools of a simulation can be pickled.
+Sampler = Callable[[np.random.Generator, int], np.ndarray]
+
+BLOCK_SIZE = 256
+
+
+def standard_uniform(rng: np.random.Generator, size: int) -> np.ndarray:
+    return rng.random(size)
+
+
+class VariatePool:
+    """Variates of one distribution drawn in blocks and served one at a time."""
+
+    def __init__(
+        self, sampler: Sampler, rng: np.random.Generator, block_size: int = BLOCK_SIZE
+    ):
+        self.sampler = sampler
+        self.rng = rng
+        self.block_size = block_size
+        self._values: list = []
+        self._index = 0
+
+    def draw(self) -> float:
+        if self._index == len(self._values):
+            self._values = self.sampler(self.rng, self.block_size).tolist()
+            self._index = 0
+
+        value = self._values[self._index]
+        self._index += 1
+        return value
+
+
+class VariatePools:
+    """Per-replication pools of the stochastic parameters of a simulation.
+
+    Every named pool draws from its own generator, seeded from the replication
+    seed and the name, so adding draws of one kind does not shift the others.
+    Without a seed, the seed is taken from ``random``, which the replication
+    manager seeds per replication.
+    """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.block_size = block_size
+        self._pools: Dict[str, VariatePool] = {}
+
+    def draw(self, name: str, sampler: Sampler) -> float:
+        pool = self._pools.get(name)
+        if pool is None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+            pool = self._pools[name] = VariatePool(sampler, rng, self.block_size)
+
+        return pool.draw()
+
+    def uniform(self, name: str, low: float, high: float) -> float:
+        return low + (high - low) * self.draw(name, standard_uniform)
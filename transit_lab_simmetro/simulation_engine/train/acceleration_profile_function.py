@@ -2,20 +2,22 @@ from __future__ import annotations
 
 from typing import List, Optional, Tuple
 
+DEFAULT_ACCELERATION_BREAKPOINTS: List[Tuple[float, float]] = [
+    (22, 3.94),
+    (29.3, 3.85),
+    (37.7, 3.69),
+    (44, 2.9),
+    (51.3, 2.35),
+    (58.7, 1.71),
+    (66, 1.22),
+]
+
 
 def get_acceleration_factor(
     speed: float, breakpoints: Optional[List[Tuple[float, float]]] = None
 ) -> float:
     if breakpoints is None:
-        breakpoints = [
-            (22, 3.94),
-            (29.3, 3.85),
-            (37.7, 3.69),
-            (44, 2.9),
-            (51.3, 2.35),
-            (58.7, 1.71),
-            (66, 1.22),
-        ]
+        breakpoints = DEFAULT_ACCELERATION_BREAKPOINTS
     # speed /= 1.467  # Convert the input speed from ft/s to mph
 
     if speed <= breakpoints[0][0]:
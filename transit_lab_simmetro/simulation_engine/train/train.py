@@ -25,11 +25,14 @@ if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.simulation.simulation import Simulation
 
 from transit_lab_simmetro.simulation_engine.train.train_state import (
+    AwaitingHoldingDecisionState,
     DwellingAtStationState,
     WaitingToBeDispatched,
+    station_holding_regulator,
 )
 
 SIGHT_DISTANCE = 2000
+TRAIN_LENGTH = 48 * 8
 
 
 class Train:
@@ -50,6 +53,8 @@ class Train:
         self.train_id = runid if runid else Train.generate_train_id()
 
         self.steps_since_last_log: int = 0  # Added steps_since_last_log attribute
+        # What the event logger last logged: motion state and acceleration.
+        self.last_logged_event: Optional[Tuple[tuple, float]] = None
 
         self.train_speed_regulator = train_speed_regulator
         self.train_speed_regulator.register_train(self)
@@ -71,7 +76,7 @@ class Train:
 
         self.state: TrainState = WaitingToBeDispatched(self)
 
-        self.length = 48 * 8
+        self.length = TRAIN_LENGTH
 
         self._should_log = True
 
@@ -259,7 +264,12 @@ class Train:
         return self.current_block.current_speed_code(self)
 
     def set_state_to_dwelling_at_station(self, station: Station) -> None:
-        self.state = DwellingAtStationState(self, station)
+        head_reg = station_holding_regulator(self, station)
+        if head_reg is not None and head_reg.decides_between_time_steps():
+            self.state = AwaitingHoldingDecisionState(self, station)
+            self.simulation.request_holding_decision(self, station, head_reg)
+        else:
+            self.state = DwellingAtStationState(self, station)
 
     def delete(self) -> None:
         for block in self.path.blocks[self.current_block_index - 1 :: -1]:
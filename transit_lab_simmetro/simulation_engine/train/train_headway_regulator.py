@@ -1,8 +1,7 @@
 from __future__ import annotations
 
 import math
-from typing import TYPE_CHECKING
-
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.train import Train
@@ -47,10 +46,16 @@ class TrainHeadwayRegulatorAtStation:
         self.max_holding = max_holding
         self.min_holding = min_holding
 
+    def decides_between_time_steps(self) -> bool:
+        """Whether the holding is decided once every train has moved for the
+        time step, rather than when the train stops."""
+        return False
+
     def suggested_holding(self, train: Train) -> float:
         leading_train_id = train.next_block.id_of_last_train
         time_to_leading_train = (
-            train.simulation.current_time - train.next_block.last_train_visit_time
+            train.simulation.current_time
+            - train.next_block.last_train_visit_time
             # train.next_block.headway
         )
         try:
@@ -351,3 +356,63 @@ class TrainHeadwayRegulatorWithEstimatedLoads(TrainHeadwayRegulatorAtStation):
             )
 
         return L_0_n_plus_1
+
+
+class TrainHeadwayRegulatorWithLookahead(TrainHeadwayRegulatorAtStation):
+    def __init__(
+        self,
+        max_holding=120,
+        min_holding=30,
+        horizon: float = 1200,
+        num_rollouts: int = 4,
+        num_candidates: int = 4,
+        rollout_budget: Optional[float] = 4800,
+    ):
+        super().__init__(max_holding, min_holding)
+        self.horizon = horizon
+        self.num_rollouts = num_rollouts
+        self.num_candidates = num_candidates
+        self.rollout_budget = rollout_budget
+
+    @property
+    def candidate_holdings(self) -> list[float]:
+        if self.num_candidates <= 2 or self.max_holding <= self.min_holding:
+            return [0.0, float(self.max_holding)]
+
+        step = (self.max_holding - self.min_holding) / (self.num_candidates - 2)
+        return [0.0] + [
+            float(self.min_holding + i * step) for i in range(self.num_candidates - 1)
+        ]
+
+    def decides_between_time_steps(self) -> bool:
+        from transit_lab_simmetro.simulation_engine.simulation.lookahead import (
+            LookaheadEvaluator,
+        )
+
+        # Rollouts are cloned from the state between two time steps
+        return not LookaheadEvaluator.in_rollout
+
+    def suggested_holding(self, train: Train) -> float:
+        from transit_lab_simmetro.simulation_engine.simulation.lookahead import (
+            LookaheadEvaluator,
+        )
+
+        # Trains reaching the control station inside a rollout fall back to the
+        # headway rule, otherwise every rollout would spawn rollouts of its own.
+        if LookaheadEvaluator.in_rollout:
+            return super().suggested_holding(train)
+
+        evaluator = LookaheadEvaluator(
+            horizon=self.horizon,
+            num_rollouts=self.num_rollouts,
+            rollout_budget=self.rollout_budget,
+        )
+        expected_kpis = evaluator.evaluate(
+            train, train.state.station, self.candidate_holdings
+        )
+
+        print(
+            f"for Train: {train.train_id} expected KPI by holding time: {expected_kpis}"
+        )
+
+        return min(expected_kpis, key=expected_kpis.get)
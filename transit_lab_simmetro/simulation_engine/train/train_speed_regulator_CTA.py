@@ -22,6 +22,10 @@ if TYPE_CHECKING:
     )
     from transit_lab_simmetro.simulation_engine.train import Train
 
+DESIRED_SPEED_RANGE = (0.8, 1.0)
+# Share of the acceleration profile used when accelerating normally
+NORMAL_ACCELERATION_SHARE = 0.50
+
 
 class TrainSpeedRegulatorCTA:
     def __init__(
@@ -29,7 +33,7 @@ class TrainSpeedRegulatorCTA:
         max_acceleration: float,
         normal_deceleration: float,
         emergency_deceleration: float,
-        desired_speed_range: tuple[float, float] = (0.8, 1.0),
+        desired_speed_range: tuple[float, float] = DESIRED_SPEED_RANGE,
     ):
         self._train: Optional[Train] = None
         self.max_acceleration = max_acceleration
@@ -48,7 +52,9 @@ class TrainSpeedRegulatorCTA:
         return self._train
 
     def update_desired_speed(self) -> None:
-        self.desired_speed_fraction = random.uniform(*self.desired_speed_range)
+        self.desired_speed_fraction = self.train.simulation.variates.uniform(
+            "desired_speed_fraction", *self.desired_speed_range
+        )
 
     def register_train(self, train: Train) -> None:
         # if self._train is not None:
@@ -74,7 +80,7 @@ class TrainSpeedRegulatorCTA:
 
         acceleration_factor = get_acceleration_factor(speed)
 
-        return 0.50 * acceleration_factor * max_acceleration
+        return NORMAL_ACCELERATION_SHARE * acceleration_factor * max_acceleration
 
     @property
     def planning_distance(self) -> float:
@@ -203,6 +203,9 @@ class DecelerateAndWaitForClearanceStateCTA(TrainSpeedRegulatorStateCTA):
         )
 
         self.regulator.train.acceleration = self.target_decceleration
+        # Entered after the acceleration of this step was checked, and a red
+        # signal just beyond the margin asks for more than the train can brake
+        self.check_the_validity_of_the_acceleration()
 
     @property
     def distance_to_block_with_red_signal(self) -> float:
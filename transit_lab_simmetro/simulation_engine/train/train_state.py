@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 from transit_lab_simmetro import config_handler
 from transit_lab_simmetro.simulation_engine.infrastructure import (
@@ -15,6 +15,7 @@ from transit_lab_simmetro.simulation_engine.train.train_headway_regulator import
     TrainHeadwayRegulatorAtStation,
     TrainHeadwayRegulatorWithLoadBalancingAndExactKnowledge,
     TrainHeadwayRegulatorWithEstimatedLoads,
+    TrainHeadwayRegulatorWithLookahead,
 )
 
 if TYPE_CHECKING:
@@ -97,19 +98,39 @@ class LoadEqualizingEstimatedLoadStrategyOnlyShortTurning(
         return train.has_been_short_turned
 
 
+class LookaheadHoldingStrategy(HoldingStrategy):
+    def should_hold(self, train, station):
+        return True
+
+    def get_holding_regulator(self, cfg):
+        lookahead_cfg = cfg.get("lookahead", {})
+        return TrainHeadwayRegulatorWithLookahead(
+            max_holding=cfg.max_holding,
+            min_holding=cfg.min_holding,
+            horizon=lookahead_cfg.get("horizon", 1200),
+            num_rollouts=lookahead_cfg.get("num_rollouts", 4),
+            num_candidates=lookahead_cfg.get("num_candidates", 4),
+            rollout_budget=lookahead_cfg.get("rollout_budget", 4800),
+        )
+
+
 class HoldingStrategyFactory:
+    strategies = {
+        "no_holding": NoHoldingStrategy,
+        "hold_all_trains": HoldAllTrainsStrategy,
+        "hold_short_turning_only": HoldShortTurningOnlyStrategy,
+        "load_equalizing_exact_knowledge": LoadEqualizingExactKnowledgeStrategy,
+        "load_equalizing_estimated_load": LoadEqualizingEstimatedLoadStrategy,
+        "load_equalizing_exact_knowledge_only_short_turning": LoadEqualizingExactKnowledgeStrategyOnlyShortTurning,
+        "load_equalizing_estimated_load_only_short_turning": LoadEqualizingEstimatedLoadStrategyOnlyShortTurning,
+        "lookahead": LookaheadHoldingStrategy,
+    }
+
     @staticmethod
     def create_strategy(holding_scenario):
-        strategies = {
-            "no_holding": NoHoldingStrategy(),
-            "hold_all_trains": HoldAllTrainsStrategy(),
-            "hold_short_turning_only": HoldShortTurningOnlyStrategy(),
-            "load_equalizing_exact_knowledge": LoadEqualizingExactKnowledgeStrategy(),
-            "load_equalizing_estimated_load": LoadEqualizingEstimatedLoadStrategy(),
-            "load_equalizing_exact_knowledge_only_short_turning": LoadEqualizingExactKnowledgeStrategyOnlyShortTurning(),
-            "load_equalizing_estimated_load_only_short_turning": LoadEqualizingEstimatedLoadStrategyOnlyShortTurning(),
-        }
-        return strategies.get(holding_scenario, NoHoldingStrategy())
+        return HoldingStrategyFactory.strategies.get(
+            holding_scenario, NoHoldingStrategy
+        )()
 
 
 class TrainState(ABC):
@@ -124,6 +145,23 @@ class TrainState(ABC):
         return self.__class__.__name__
 
 
+def station_holding_regulator(train: Train, station: Station):
+    """The regulator of the holding of a train stopping at a station, if the
+    holding strategy holds it there."""
+    if not (cfg := config_handler.get_config()):
+        return None
+
+    holding_strategy = HoldingStrategyFactory.create_strategy(cfg.holding_strategy)
+    if holding_strategy.should_hold(train, station):
+        if station.name == cfg.station:
+            if station.direction == (
+                "Northbound" if cfg.schd == "PM" else "Southbound"
+            ):
+                return holding_strategy.get_holding_regulator(cfg)
+
+    return None
+
+
 # Update MovingBetweenStationsState class
 class MovingBetweenStationsState(TrainState):
     def handle(self) -> None:
@@ -134,7 +172,9 @@ class MovingBetweenStationsState(TrainState):
 
 
 class DwellingAtStationState(TrainState):
-    def __init__(self, train: Train, station: Station):
+    def __init__(
+        self, train: Train, station: Station, holding_time: Optional[float] = None
+    ):
         self.dwell_elapsed_time = 0.0
         self.station = station
         self.train = train
@@ -142,23 +182,14 @@ class DwellingAtStationState(TrainState):
         self.denied_boardings = 0
         self.rec_holding = 0.0
 
-        if cfg := config_handler.get_config():
-            holding_strategy = HoldingStrategyFactory.create_strategy(
-                cfg.holding_strategy
+        if holding_time is not None:
+            self.rec_holding = holding_time
+        elif head_reg := station_holding_regulator(self.train, self.station):
+            self.rec_holding = head_reg.suggested_holding(self.train)
+            print(
+                f"Holding for {self.rec_holding} at {self.station.name}-{self.station.direction}"
             )
 
-            if holding_strategy.should_hold(self.train, self.station):
-                if self.station.name == cfg.station:
-                    if self.station.direction == (
-                        "Northbound" if cfg.schd == "PM" else "Southbound"
-                    ):
-                        head_reg = holding_strategy.get_holding_regulator(cfg)
-                        if head_reg:
-                            self.rec_holding = head_reg.suggested_holding(self.train)
-                            print(
-                                f"Holding for {self.rec_holding} at {cfg.station}-{self.station.direction}"
-                            )
-
         if self.train.path.is_short_turned_at_this_station(self.station):
             alighting_counts = self.train.passenger_manager.alight_all_passengers(
                 current_station=self.station,
@@ -168,7 +199,7 @@ class DwellingAtStationState(TrainState):
             number_of_passengers_to_board = 0
 
             if self.train.path.is_inspected():
-                self.dwell_time += self.train.path.get_inspection_time()
+                self.dwell_time += self.train.path.get_inspection_time(self.train)
 
         else:
             alighting_counts = self.train.passenger_manager.alight_passengers(
@@ -269,6 +300,21 @@ class DwellingAtStationState(TrainState):
         return f"DwellingAtStation:{self.station.name}"
 
 
+class AwaitingHoldingDecisionState(TrainState):
+    """Stopped at a station until the simulation decides the holding, once
+    every train has moved for the time step."""
+
+    def __init__(self, train: Train, station: Station):
+        super().__init__(train)
+        self.station = station
+
+    def handle(self) -> None:
+        pass
+
+    def __str__(self) -> str:
+        return f"AwaitingHoldingDecision:{self.station.name}"
+
+
 class WaitingToBeDispatched(TrainState):
     def __init__(self, train: Train, blocks_to_deactivate=[]):
         super().__init__(train)
@@ -0,0 +1,309 @@
+"""Streaming compression of the CSV logs.
+
+A compressed log is a sequence of independent gzip members or zstd frames: one
+with the header, then the rows of every replication. The rows are buffered per
+replication and compressed into a frame of their own once the buffer of the
+replication fills or the log is closed, so rows of replications written
+interleaved, as by the lock-step engine, still make a few large frames.
+Concatenated members are a valid gzip (or zstd) file, so ``zcat`` and
+``pd.read_csv`` read the whole log. The index written next to the log when it
+is closed, ``<log>.index.json``, holds the offset and length of every frame,
+so ``read_log`` decompresses only the frames of the replications it is asked
+for.
+
+Plain CSV logs get the same index, with the byte ranges of the rows of every
+replication, from ``ensure_index``; it records the size of the log, so an
+index is rebuilt once the log changes.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# Uncompressed text of a replication compressed into one frame.
+BUFFER_SIZE = 2**20
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("zstandard is required for zstd compressed logs") from e
+
+    return zstandard
+
+
+def compressed_path(log_file_path: Union[str, Path], compression: str) -> Path:
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown log compression: {compression}")
+
+    return Path(f"{log_file_path}{COMPRESSION_SUFFIXES[compression]}")
+
+
+def index_path(path: Union[str, Path]) -> Path:
+    return Path(f"{path}.index.json")
+
+
+def find_log_file(log_file_path: Union[str, Path]) -> Path:
+    """The log file, or its compressed version if only that exists."""
+    for path in [Path(log_file_path)] + [
+        compressed_path(log_file_path, compression)
+        for compression in COMPRESSION_SUFFIXES
+    ]:
+        if path.exists():
+            return path
+
+    raise FileNotFoundError(log_file_path)
+
+
+def get_compression(path: Union[str, Path]) -> Optional[str]:
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if str(path).endswith(suffix):
+            return compression
+
+    return None
+
+
+def _compressor(compression: str, level: Optional[int]):
+    if compression == "gzip":
+        # wbits 31: a gzip member rather than a raw zlib stream.
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+
+    zstandard = _import_zstandard()
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+
+
+def decompress_frame(compression: str, data: bytes) -> bytes:
+    if compression == "gzip":
+        return zlib.decompress(data, 31)
+
+    # Streamed frames do not record their size, which ZstdDecompressor.decompress
+    # requires.
+    return _import_zstandard().ZstdDecompressor().decompressobj().decompress(data)
+
+
+def load_index(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    try:
+        with open(index_path(path), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_index(path: Path, index: Dict[str, Any]) -> None:
+    temp_path = Path(f"{index_path(path)}.tmp")
+    with open(temp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(temp_path, index_path(path))
+
+
+def _load_current_index(path: Path) -> Optional[Dict[str, Any]]:
+    index = load_index(path)
+    if index is not None and index.get("size") not in (None, path.stat().st_size):
+        return None
+    return index
+
+
+def index_csv_log(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """Index the rows of a plain CSV log by replication; the replication id
+    must be the first column. The index is saved next to the log if the
+    folder is writable."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        if header.split(b",", 1)[0].strip() != b"replication_id":
+            return None
+
+        frames = [{"replication_id": None, "offset": 0, "length": len(header)}]
+        offset = start = len(header)
+        current = None
+        for line in f:
+            replication_id = line[: line.find(b",")]
+            if replication_id != current:
+                if current is not None:
+                    frames.append(
+                        {
+                            "replication_id": int(current),
+                            "offset": start,
+                            "length": offset - start,
+                        }
+                    )
+                current, start = replication_id, offset
+            offset += len(line)
+
+        if current is not None:
+            frames.append(
+                {
+                    "replication_id": int(current),
+                    "offset": start,
+                    "length": offset - start,
+                }
+            )
+
+    index = {"compression": None, "size": offset, "frames": frames}
+    try:
+        _save_index(path, index)
+    except OSError:
+        pass
+
+    return index
+
+
+def ensure_index(log_file_path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """The frame index of a log, built for plain CSV logs without a current one."""
+    path = find_log_file(log_file_path)
+    index = _load_current_index(path)
+    if index is None and get_compression(path) is None:
+        index = index_csv_log(path)
+    return index
+
+
+class CompressedLogFile:
+    """Appends CSV rows to a compressed log, in frames of one replication."""
+
+    def __init__(
+        self, path: Union[str, Path], compression: str, level: Optional[int] = None
+    ):
+        self.path = Path(path)
+        self.compression = compression
+        self.level = level
+        self._index = load_index(self.path) or {"compression": compression}
+        self._index.setdefault("frames", [])
+        self._file = open(self.path, "ab")
+        self._buffers: Dict[Any, Tuple[io.StringIO, Any]] = {}
+
+    def write_row(self, values: Iterable[Any], replication_id: Any = None) -> None:
+        if replication_id not in self._buffers:
+            buffer = io.StringIO()
+            self._buffers[replication_id] = (buffer, csv.writer(buffer))
+
+        buffer, csv_writer = self._buffers[replication_id]
+        csv_writer.writerow(values)
+        if buffer.tell() >= BUFFER_SIZE:
+            self._write_frame(replication_id)
+
+    def _write_frame(self, replication_id: Any) -> None:
+        buffer, _ = self._buffers.pop(replication_id)
+        compressor = _compressor(self.compression, self.level)
+        offset = self._file.tell()
+        self._file.write(compressor.compress(buffer.getvalue().encode()))
+        self._file.write(compressor.flush())
+
+        if hasattr(replication_id, "item"):
+            replication_id = replication_id.item()
+        self._index["frames"].append(
+            {
+                "replication_id": replication_id,
+                "offset": offset,
+                "length": self._file.tell() - offset,
+            }
+        )
+
+    def end_frames(self) -> None:
+        """Write the buffered rows of every replication as frames."""
+        for replication_id in list(self._buffers):
+            self._write_frame(replication_id)
+        self._file.flush()
+
+    def close(self) -> None:
+        self.end_frames()
+        self._file.close()
+        _save_index(self.path, self._index)
+
+
+def create_log_file(
+    path: Union[str, Path],
+    headers: Sequence[str],
+    compression: str,
+    level: Optional[int] = None,
+) -> CompressedLogFile:
+    """Start a new log, with its header in a frame of its own."""
+    open(path, "wb").close()
+    index_path(path).unlink(missing_ok=True)
+
+    log_file = CompressedLogFile(path, compression, level)
+    log_file.write_row(headers)
+    log_file.end_frames()
+    return log_file
+
+
+def remove_replications(path: Union[str, Path], replication_ids: List[int]) -> None:
+    """Drop the frames of the replications by copying the other frames."""
+    index = load_index(path)
+    path = Path(path)
+    if index is None:
+        raise ValueError(f"{path} has no frame index")
+
+    frames = []
+    temp_path = Path(f"{path}.tmp")
+    with open(path, "rb") as source, open(temp_path, "wb") as target:
+        for frame in index["frames"]:
+            if frame["replication_id"] in replication_ids:
+                continue
+
+            source.seek(frame["offset"])
+            frames.append({**frame, "offset": target.tell()})
+            target.write(source.read(frame["length"]))
+
+    os.replace(temp_path, path)
+    _save_index(path, {**index, "frames": frames})
+
+
+def read_log(
+    log_file_path: Union[str, Path],
+    replication_ids: Optional[Iterable[int]] = None,
+    **read_csv_kwargs,
+) -> pd.DataFrame:
+    """Read a CSV log, compressed or not.
+
+    With ``replication_ids``, only the rows of those replications are
+    returned; for an indexed log, only their frames are read.
+    """
+    path = find_log_file(log_file_path)
+    compression = get_compression(path)
+    index = (
+        _load_current_index(path)
+        if compression or replication_ids is not None
+        else None
+    )
+    if replication_ids is not None:
+        replication_ids = set(replication_ids)
+
+    if index is None:
+        if compression == "zstd":
+            reader = _import_zstandard().ZstdDecompressor()
+            with open(path, "rb") as f, reader.stream_reader(
+                f, read_across_frames=True
+            ) as stream:
+                df = pd.read_csv(io.BytesIO(stream.read()), **read_csv_kwargs)
+        else:
+            df = pd.read_csv(path, compression=compression, **read_csv_kwargs)
+
+        if replication_ids is None:
+            return df
+        return df[df["replication_id"].isin(replication_ids)]
+
+    text = io.BytesIO()
+    with open(path, "rb") as f:
+        for frame in index["frames"]:
+            if (
+                frame["replication_id"] is None
+                or replication_ids is None
+                or frame["replication_id"] in replication_ids
+            ):
+                f.seek(frame["offset"])
+                data = f.read(frame["length"])
+                text.write(decompress_frame(compression, data) if compression else data)
+
+    text.seek(0)
+    return pd.read_csv(text, **read_csv_kwargs)
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 
-from .logger_utils import OHareTerminalHoldingLogger
+from .logger_utils import (
+    BackgroundLoggerStrategy,
+    BackgroundLogWriter,
+    OHareTerminalHoldingLogger,
+)
 
 from ..schedule_refactored.ohare_empirical_schedule import (
     OHareEmpiricalScheduleWithHolding,
@@ -36,6 +40,7 @@ class LoggerContext:
         ohare_terminal_holding_logger: OHareTerminalHoldingLogger,
         warmup_time=0,
         start_hour_of_day: int = None,
+        background_writer: Optional[BackgroundLogWriter] = None,
     ):
         warmup_time = warmup_time + start_hour_of_day * 3600
         self.train_logger = train_logger.set_warmup_time(warmup_time)
@@ -50,6 +55,25 @@ class LoggerContext:
 
         self.unsuccessful_replications: List[int] = []
 
+        # Rows are written on the writer's thread and drained on exit.
+        self.background_writer = background_writer
+        if background_writer is not None:
+            for logger in self._loggers():
+                if hasattr(logger, "logger_strategy"):
+                    logger.logger_strategy = BackgroundLoggerStrategy(
+                        logger.logger_strategy, background_writer
+                    )
+
+    def _loggers(self) -> list:
+        return [
+            self.train_logger,
+            self.passenger_logger,
+            self.station_logger,
+            self.simulation_logger,
+            self.block_logger,
+            self.ohare_terminal_holding_logger,
+        ]
+
     def add_unsuccessful_replication(self, replication_id: int) -> None:
         self.unsuccessful_replications.append(replication_id)
 
@@ -74,6 +98,13 @@ class LoggerContext:
         )
 
     def __exit__(self, exc_type, exc_value, traceback):
+        if self.background_writer is not None:
+            self.background_writer.close()
+
+        for logger in self._loggers():
+            if hasattr(logger, "logger_strategy"):
+                logger.flush()
+
         self.filter_logs_by_unsuccessful_replications()
         Train.train_logger = None
         Passenger.passenger_logger = None
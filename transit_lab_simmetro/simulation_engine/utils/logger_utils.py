@@ -3,10 +3,21 @@ from __future__ import annotations
 import csv
 import json
 import os
-from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Optional, Union
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Coroutine, Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
+from .compressed_logs import (
+    CompressedLogFile,
+    compressed_path,
+    create_log_file,
+    read_log,
+    remove_replications,
+)
+
 if TYPE_CHECKING:
     from transit_lab_simmetro.simulation_engine.infrastructure import Block
     from transit_lab_simmetro.simulation_engine.train import Train
@@ -26,6 +37,18 @@ class LoggerStrategy(ABC):
     def write_row(self, log_file_path: str, data: Dict[str, Any]) -> None:
         pass
 
+    def write_rows(self, log_file_path: str, rows: List[Dict[str, Any]]) -> None:
+        for data in rows:
+            self.write_row(log_file_path, data)
+
+    def flush(self) -> None:
+        pass
+
+    def filter_out_replications(
+        self, log_file_path: str, replication_ids: List[int]
+    ) -> None:
+        pass
+
 
 class CSVLoggerStrategy(LoggerStrategy):
     def __init__(
@@ -44,6 +67,184 @@ class CSVLoggerStrategy(LoggerStrategy):
             csv_writer = csv.writer(log_file)
             csv_writer.writerow(data.values())
 
+    def write_rows(self, log_file_path: str, rows: List[Dict[str, Any]]) -> None:
+        with open(log_file_path, mode="a", newline="", encoding="utf-8") as log_file:
+            csv_writer = csv.writer(log_file)
+            csv_writer.writerows(data.values() for data in rows)
+
+    def filter_out_replications(
+        self, log_file_path: str, replication_ids: List[int]
+    ) -> None:
+        try:
+            df = pd.read_csv(log_file_path)
+            filtered_df = df[~df["replication_id"].isin(replication_ids)]
+            filtered_df.to_csv(log_file_path, index=False)
+        except FileNotFoundError:
+            pass
+
+
+class CompressedCSVLoggerStrategy(CSVLoggerStrategy):
+    """Writes the CSV log compressed, to ``<log>.gz`` or ``<log>.zst``, one
+    replication per frame; see ``compressed_logs``."""
+
+    def __init__(
+        self,
+        headers: Optional[Dict] = None,
+        compression: str = "gzip",
+        level: Optional[int] = None,
+    ):
+        super().__init__(headers)
+        self.compression = compression
+        self.level = level
+        self._log_files: Dict[str, CompressedLogFile] = {}
+
+    def _log_file(self, log_file_path: str) -> CompressedLogFile:
+        log_file = self._log_files.get(log_file_path)
+        if log_file is None:
+            log_file = self._log_files[log_file_path] = CompressedLogFile(
+                compressed_path(log_file_path, self.compression),
+                self.compression,
+                self.level,
+            )
+        return log_file
+
+    def write_header(self, log_file_path: str) -> None:
+        if log_file_path in self._log_files:
+            self._log_files.pop(log_file_path).close()
+
+        self._log_files[log_file_path] = create_log_file(
+            compressed_path(log_file_path, self.compression),
+            list(self.headers),
+            self.compression,
+            self.level,
+        )
+
+    def write_row(self, log_file_path: str, data: Dict[str, Any]) -> None:
+        self._log_file(log_file_path).write_row(
+            data.values(), data.get("replication_id")
+        )
+
+    def write_rows(self, log_file_path: str, rows: List[Dict[str, Any]]) -> None:
+        log_file = self._log_file(log_file_path)
+        for data in rows:
+            log_file.write_row(data.values(), data.get("replication_id"))
+
+    def flush(self) -> None:
+        # Closing ends the current frames; later rows reopen the logs.
+        for log_file in self._log_files.values():
+            log_file.close()
+        self._log_files.clear()
+
+    def filter_out_replications(
+        self, log_file_path: str, replication_ids: List[int]
+    ) -> None:
+        self.flush()
+        if replication_ids:
+            remove_replications(
+                compressed_path(log_file_path, self.compression), replication_ids
+            )
+
+
+class BackgroundLogWriter:
+    """Writes the rows of several loggers on a dedicated thread.
+
+    The simulation thread only puts rows on a bounded queue; when the queue is
+    full, it waits for the writer to catch up. The writer takes the queued
+    rows in batches and appends each batch to its file in one go.
+    """
+
+    def __init__(self, max_queued_rows: int = 100_000, batch_size: int = 1000):
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued_rows)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def put(
+        self, strategy: LoggerStrategy, log_file_path: str, data: Dict[str, Any]
+    ) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="log-writer", daemon=True
+            )
+            self._thread.start()
+
+        self._queue.put((strategy, log_file_path, data))
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = items[-1] is None
+            rows: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+            strategies = {}
+            for item in items:
+                if item is None:
+                    continue
+                strategy, log_file_path, data = item
+                rows.setdefault((id(strategy), log_file_path), []).append(data)
+                strategies[id(strategy)] = strategy
+
+            try:
+                if self._error is None:
+                    for (strategy_id, log_file_path), batch in rows.items():
+                        strategies[strategy_id].write_rows(log_file_path, batch)
+            except BaseException as error:
+                # Raised on the simulation thread at the next flush.
+                self._error = error
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def flush(self) -> None:
+        """Wait until every queued row is written."""
+        self._queue.join()
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self) -> None:
+        """Drain the queue and stop the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+
+class BackgroundLoggerStrategy(LoggerStrategy):
+    """Hands the rows of a logger strategy to a ``BackgroundLogWriter``."""
+
+    def __init__(self, strategy: LoggerStrategy, writer: BackgroundLogWriter):
+        self.strategy = strategy
+        self.writer = writer
+
+    def write_header(self, log_file_path: str) -> None:
+        self.writer.flush()
+        self.strategy.write_header(log_file_path)
+
+    def write_row(self, log_file_path: str, data: Dict[str, Any]) -> None:
+        self.writer.put(self.strategy, log_file_path, data)
+
+    def flush(self) -> None:
+        self.writer.flush()
+        self.strategy.flush()
+
+    def filter_out_replications(
+        self, log_file_path: str, replication_ids: List[int]
+    ) -> None:
+        self.writer.flush()
+        self.strategy.filter_out_replications(log_file_path, replication_ids)
+
 
 class BaseLogger(ABC):
     def __init__(
@@ -57,6 +258,9 @@ class BaseLogger(ABC):
 
         if logger_strategy is None:
             logger_strategy = CSVLoggerStrategy(headers)
+        elif getattr(logger_strategy, "headers", ...) is None:
+            # Strategies created before their logger, e.g. by a results store.
+            logger_strategy.headers = headers
 
         self.logger_strategy = logger_strategy
         os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
@@ -69,13 +273,13 @@ class BaseLogger(ABC):
         self.warmup_time = warmup_time
         return self
 
+    def flush(self) -> None:
+        self.logger_strategy.flush()
+
     def filter_out_replications(self, replication_ids: List[int]) -> None:
-        try:
-            df = pd.read_csv(self.log_file_path)
-            filtered_df = df[~df["replication_id"].isin(replication_ids)]
-            filtered_df.to_csv(self.log_file_path, index=False)
-        except FileNotFoundError:
-            pass
+        self.logger_strategy.filter_out_replications(
+            self.log_file_path, replication_ids
+        )
 
 
 class TrainLogger(BaseLogger):
@@ -165,6 +369,118 @@ class TrainLogger(BaseLogger):
         return None
 
 
+class EventTrainLogger(TrainLogger):
+    """Logs a train only when its motion changes: on a new train state, which
+    covers station arrivals and departures, a new regulator state, block or
+    received speed code, when the acceleration changes sign and when it
+    drifts by more than ``acceleration_tolerance`` (mph/s) from the last row.
+
+    The acceleration is about constant between two rows, so
+    ``reconstruct_trajectories`` recovers the dense trajectory by integrating
+    from each row.
+    """
+
+    def __init__(
+        self,
+        log_file_path: str,
+        acceleration_tolerance: float = 0.05,
+        logger_strategy: Optional[LoggerStrategy] = None,
+    ):
+        super().__init__(log_file_path, 1, logger_strategy)
+        self.acceleration_tolerance = acceleration_tolerance
+
+    def update(self, train: Train) -> Union[None, Coroutine[Any, Any, None]]:
+        current_time = train.simulation.current_time
+        if current_time < self.warmup_time:
+            return None
+
+        event = (
+            type(train.state),
+            type(train.train_speed_regulator.state),
+            train.current_block,
+            train.current_block.current_speed_code(train),
+        )
+        acceleration = train.acceleration
+
+        if train.last_logged_event is not None:
+            last_event, last_acceleration = train.last_logged_event
+            if (
+                event == last_event
+                and (acceleration > 0) == (last_acceleration > 0)
+                and (acceleration < 0) == (last_acceleration < 0)
+                and abs(acceleration - last_acceleration) <= self.acceleration_tolerance
+            ):
+                return None
+
+        train_data = self._collect_train_data(train, current_time)
+        self.logger_strategy.write_row(self.log_file_path, train_data)
+        train.last_logged_event = (event, acceleration)
+
+        return None
+
+
+def reconstruct_trajectories(events: pd.DataFrame, time_step: float) -> pd.DataFrame:
+    """Trajectories with a row every ``time_step`` seconds from the rows of an
+    ``EventTrainLogger``, integrating the speed and the distances from the
+    last row at constant acceleration. The other columns keep the values of
+    the last row."""
+    keys = ["replication_id", "train_id"]
+    columns = list(events.columns)
+    bounds = events.groupby(keys)["time_in_seconds"].agg(["min", "max"])
+    counts = (
+        np.floor((bounds["max"] - bounds["min"]) / time_step + 1e-9).astype(int) + 1
+    ).to_numpy()
+    first_row_of_train = np.repeat(np.cumsum(counts) - counts, counts)
+
+    grid = pd.DataFrame(
+        {key: np.repeat(bounds.index.get_level_values(key), counts) for key in keys}
+    )
+    grid["time_in_seconds"] = (
+        np.repeat(bounds["min"].to_numpy(), counts)
+        + (np.arange(counts.sum()) - first_row_of_train) * time_step
+    )
+
+    events = events.rename(columns={"time_in_seconds": "event_time"})
+    trajectories = pd.merge_asof(
+        grid.sort_values("time_in_seconds"),
+        events.sort_values("event_time"),
+        left_on="time_in_seconds",
+        right_on="event_time",
+        by=keys,
+        direction="backward",
+    )
+
+    elapsed = (trajectories["time_in_seconds"] - trajectories["event_time"]).to_numpy()
+    speed = trajectories["speed"].to_numpy(dtype=float)
+    acceleration = trajectories["acceleration"].to_numpy(dtype=float)
+
+    # A decelerating train stops instead of reversing.
+    time_to_stop = np.divide(
+        speed, -acceleration, out=np.full_like(speed, np.inf), where=acceleration < 0
+    )
+    moving_time = np.minimum(elapsed, time_to_stop)
+    distance = (speed * moving_time + 0.5 * acceleration * moving_time**2) * (
+        5280 / 3600
+    )
+
+    trajectories["speed"] = speed + acceleration * moving_time
+    trajectories["total_travelled_distance"] += distance
+    trajectories["distance_travelled_in_current_block"] += distance
+    trajectories["location_from_terminal"] += np.where(
+        trajectories["direction"] == "Southbound", -distance, distance
+    )
+
+    return (
+        trajectories[columns]
+        .sort_values(keys + ["time_in_seconds"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def read_event_trajectories(log_file_path: str, time_step: float) -> pd.DataFrame:
+    return reconstruct_trajectories(read_log(log_file_path), time_step)
+
+
 class PassengerLogger(BaseLogger):
     def __init__(
         self, log_file_path: str, logger_strategy: Optional[LoggerStrategy] = None
@@ -265,13 +581,16 @@ class StationLogger(BaseLogger):
         self.logger_strategy.write_row(self.log_file_path, station_data)
 
 
-class NullPassengerLogger:
+class NullPassengerLogger(PassengerLogger):
     def __init__(self, *args, **kwargs):
         pass
 
     def log_passenger(self, passenger: Passenger) -> None:
         pass
 
+    def filter_out_replications(self, replication_ids: List[int]) -> None:
+        pass
+
 
 class NullTrainLogger(TrainLogger):
     def __init__(self, *args, **kwargs):
@@ -360,6 +679,17 @@ class OHareTerminalHoldingLogger(BaseLogger):
         self.logger_strategy.write_row(self.log_file_path, terminal_holding_data)
 
 
+class NullOHareTerminalHoldingLogger(OHareTerminalHoldingLogger):
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def log_terminal_holding(self, *args, **kwargs) -> None:
+        pass
+
+    def filter_out_replications(self, replication_ids: List[int]) -> None:
+        pass
+
+
 class BlockActivationLogger(BaseLogger):
     def __init__(
         self, log_file_path: str, logger_strategy: Optional[LoggerStrategy] = None
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import importlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Methods timed for each subsystem, as (module, class, method). Nested calls
+# within a subsystem are only counted once, at the outermost call.
+PROFILED_SUBSYSTEMS: Dict[str, List[Tuple[str, str, str]]] = {
+    "run": [
+        (
+            "transit_lab_simmetro.simulation_engine.simulation.simulation",
+            "Simulation",
+            "run",
+        ),
+    ],
+    "tick": [
+        (
+            "transit_lab_simmetro.simulation_engine.simulation.simulation",
+            "Simulation",
+            "_update_trains",
+        ),
+    ],
+    "dispatch": [
+        (
+            "transit_lab_simmetro.simulation_engine.simulation.simulation",
+            "Simulation",
+            "_dispatch_trains",
+        ),
+    ],
+    "train_update": [
+        ("transit_lab_simmetro.simulation_engine.train.train", "Train", "update"),
+    ],
+    "speed_regulator": [
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_speed_regulator_CTA",
+            "TrainSpeedRegulatorCTA",
+            "regulate_acceleration",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_speed_regulator",
+            "TrainSpeedRegulator",
+            "regulate_acceleration",
+        ),
+    ],
+    "passenger_generation": [
+        (
+            "transit_lab_simmetro.simulation_engine.infrastructure.station",
+            "Station",
+            "generate_and_add_passengers",
+        ),
+    ],
+    "boarding": [
+        (
+            "transit_lab_simmetro.simulation_engine.infrastructure.station",
+            "Station",
+            "board_passengers_onto_train",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.infrastructure.station",
+            "Station",
+            "board_passengers_based_on_destiations_and_probability",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_passenger_manager",
+            "TrainPassengerManager",
+            "board_passengers",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_passenger_manager",
+            "TrainPassengerManager",
+            "alight_passengers",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_passenger_manager",
+            "TrainPassengerManager",
+            "alight_all_passengers",
+        ),
+    ],
+    "logger_io": [
+        (
+            "transit_lab_simmetro.simulation_engine.utils.logger_utils",
+            "TrainLogger",
+            "update",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.utils.logger_utils",
+            "CSVLoggerStrategy",
+            "write_row",
+        ),
+        (
+            "transit_lab_simmetro.simulation_engine.utils.logger_utils",
+            "JSONLoggerStrategy",
+            "write_row",
+        ),
+    ],
+    "holding_regulator": [
+        (
+            "transit_lab_simmetro.simulation_engine.train.train_headway_regulator",
+            class_name,
+            "suggested_holding",
+        )
+        for class_name in [
+            "TrainHeadwayRegulator",
+            "TrainHeadwayRegulatorAtStation",
+            "TrainHeadwayRegulatorAtStationInformedByCrowding",
+            "TrainHeadwayRegulatorWithLoadBalancingAndExactKnowledge",
+            "TrainHeadwayRegulatorWithEstimatedLoads",
+            "TrainHeadwayRegulatorWithLookahead",
+        ]
+    ],
+}
+
+PROFILE_DUMPS = ["cprofile", "pyinstrument"]
+
+
+class SubsystemStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.depth = 0
+
+
+class SubsystemProfiler:
+    """Counts calls and times the simulation hot paths while active.
+
+    The methods listed in ``PROFILED_SUBSYSTEMS`` are wrapped on entering the
+    context and restored on exit, so the simulation runs uninstrumented
+    outside of it. Optionally records a cProfile or pyinstrument profile of
+    the whole block as well.
+    """
+
+    def __init__(
+        self,
+        subsystems: Optional[Dict[str, List[Tuple[str, str, str]]]] = None,
+        dump: Optional[str] = None,
+    ):
+        if dump is not None and dump not in PROFILE_DUMPS:
+            raise ValueError(
+                f"Unknown profile dump {dump}, expected one of {PROFILE_DUMPS}"
+            )
+
+        self.subsystems = PROFILED_SUBSYSTEMS if subsystems is None else subsystems
+        self.dump = dump
+        self.stats: Dict[str, SubsystemStats] = {
+            subsystem: SubsystemStats() for subsystem in self.subsystems
+        }
+        self.wall_time = 0.0
+
+        self._originals: List[Tuple[type, str, Optional[Callable]]] = []
+        self._start_time: Optional[float] = None
+        self._dump_profiler = None
+
+        if dump == "pyinstrument":
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "pyinstrument is required for profile_dump=pyinstrument"
+                ) from e
+
+    def __enter__(self) -> SubsystemProfiler:
+        for subsystem, methods in self.subsystems.items():
+            for module_name, class_name, method_name in methods:
+                cls = getattr(importlib.import_module(module_name), class_name)
+                self._instrument(cls, method_name, self.stats[subsystem])
+
+        if self.dump == "cprofile":
+            self._dump_profiler = cProfile.Profile()
+            self._dump_profiler.enable()
+        elif self.dump == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._dump_profiler = Profiler()
+            self._dump_profiler.start()
+
+        self._start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time += time.perf_counter() - self._start_time
+
+        if self.dump == "cprofile":
+            self._dump_profiler.disable()
+        elif self.dump == "pyinstrument":
+            self._dump_profiler.stop()
+
+        for cls, method_name, original in reversed(self._originals):
+            if original is None:
+                delattr(cls, method_name)
+            else:
+                setattr(cls, method_name, original)
+        self._originals = []
+
+    def _instrument(self, cls: type, method_name: str, stats: SubsystemStats) -> None:
+        original = cls.__dict__.get(method_name)
+        method = getattr(cls, method_name)
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            if stats.depth:
+                return method(*args, **kwargs)
+
+            stats.depth += 1
+            start_time = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.total_time += time.perf_counter() - start_time
+                stats.calls += 1
+                stats.depth -= 1
+
+        self._originals.append((cls, method_name, original))
+        setattr(cls, method_name, timed)
+
+    @property
+    def ticks(self) -> int:
+        return self.stats["tick"].calls if "tick" in self.stats else 0
+
+    def report(self) -> Dict:
+        ticks = self.ticks
+        run_time = (
+            self.stats["run"].total_time if "run" in self.stats else self.wall_time
+        )
+
+        return {
+            "wall_time": self.wall_time,
+            "ticks": ticks,
+            "ticks_per_second": ticks / run_time if run_time > 0 else None,
+            "subsystems": {
+                subsystem: {
+                    "calls": stats.calls,
+                    "total_time": stats.total_time,
+                    "time_per_call": (
+                        stats.total_time / stats.calls if stats.calls else None
+                    ),
+                    "calls_per_tick": stats.calls / ticks if ticks else None,
+                    "share_of_wall_time": (
+                        stats.total_time / self.wall_time
+                        if self.wall_time > 0
+                        else None
+                    ),
+                }
+                for subsystem, stats in self.stats.items()
+            },
+        }
+
+    def write_report(self, log_folder_path: str) -> None:
+        os.makedirs(log_folder_path, exist_ok=True)
+        with open(os.path.join(log_folder_path, "profile_report.json"), "w") as file:
+            json.dump(self.report(), file, indent=4)
+
+        if self.dump == "cprofile":
+            self._dump_profiler.dump_stats(
+                os.path.join(log_folder_path, "profile.prof")
+            )
+        elif self.dump == "pyinstrument":
+            with open(os.path.join(log_folder_path, "profile.html"), "w") as file:
+                file.write(self._dump_profiler.output_html())
@@ -0,0 +1,279 @@
+"""OD arrival rates from ODX journeys, built chunk by chunk.
+
+Journeys are added in chunks, e.g. one month of the ODX table at a time, and
+each chunk is reduced at once to the number of journeys by service date,
+15-minute bin, origin and destination. Only these counts are kept, so the
+memory of a refresh depends on the number of days, not of journeys.
+
+Journeys without a complete first leg are imputed, as in the original
+scripts, from the complete journeys boarding at the same station in the same
+hour and type of day. Drawing the destination of every such journey from the
+complete ones is a multinomial draw of their number, which is done once on
+the counts, for all groups at once.
+
+The rates are written as the demand CSV read by ``ArrivalRate`` and, given
+an input cache, as its compiled entry, so the first simulation does not parse
+the CSV again.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+from transit_lab_simmetro.simulation_runner.input_cache import WEEKDAYS, InputCache
+
+SEQUENCE_COLUMNS = [
+    "route_sequence",
+    "direction_sequence",
+    "boarding_platform_sequence",
+    "alighting_platform_sequence",
+]
+
+BIN_MINUTES = 15
+
+# Destination codes besides the stations: a complete journey alighting at a
+# platform of no station, and a journey to impute.
+UNMAPPED = -2
+MISSING = -1
+
+
+def day_types(dates: pd.Series) -> np.ndarray:
+    """0 for weekdays, 1 for Saturdays and 2 for Sundays."""
+    return np.maximum(dates.dt.dayofweek.to_numpy() - 4, 0)
+
+
+def first_leg(sequences: pd.Series) -> pd.Series:
+    # The sequences start with their separator
+    return sequences.str.split("|").str[1]
+
+
+def impute_within_groups(
+    df: pd.DataFrame,
+    group_columns: Sequence[str],
+    fill_columns: Sequence[str],
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Fill the rows missing any of ``fill_columns`` with the values of a
+    random complete row of the same group, when the group has one."""
+    rng = np.random.default_rng(seed)
+    complete = df[list(fill_columns)].notna().all(axis=1).to_numpy()
+    groups = df.groupby(list(group_columns), sort=False).ngroup().to_numpy()
+
+    donors = np.flatnonzero(complete & (groups >= 0))
+    donors = donors[np.argsort(groups[donors], kind="stable")]
+    donor_counts = np.bincount(groups[donors], minlength=groups.max() + 1)
+    donor_starts = np.cumsum(donor_counts) - donor_counts
+
+    missing = np.flatnonzero(~complete & (groups >= 0))
+    missing = missing[donor_counts[groups[missing]] > 0]
+    picks = donors[
+        donor_starts[groups[missing]]
+        + (rng.random(len(missing)) * donor_counts[groups[missing]]).astype(np.int64)
+    ]
+
+    df = df.copy()
+    columns = [df.columns.get_loc(column) for column in fill_columns]
+    df.iloc[missing, columns] = df.iloc[picks, columns].to_numpy()
+    return df
+
+
+class DemandBuilder:
+    def __init__(
+        self,
+        stations: pd.DataFrame,
+        seed: Optional[int] = None,
+        bin_minutes: int = BIN_MINUTES,
+    ):
+        """``stations`` maps the ``MAP_ID`` of the boarding stops and the
+        ``STOP_ID`` of the alighting platforms to ``STATION_NAME_IN_SIM``."""
+        self.station_names: List[str] = list(
+            dict.fromkeys(stations["STATION_NAME_IN_SIM"])
+        )
+        self.origins = dict(
+            zip(stations["MAP_ID"].astype(str), stations["STATION_NAME_IN_SIM"])
+        )
+        self.destinations = dict(
+            zip(stations["STOP_ID"].astype(str), stations["STATION_NAME_IN_SIM"])
+        )
+        self.rng = np.random.default_rng(seed)
+        self.bin_minutes = bin_minutes
+        self._counts: List[pd.DataFrame] = []
+
+    def _station_codes(self, names: pd.Series) -> np.ndarray:
+        return pd.Categorical(names, categories=self.station_names).codes.astype(
+            np.int64
+        )
+
+    def add(self, journeys: pd.DataFrame) -> None:
+        """Count a chunk of journeys, with ``transaction_dtm``, ``boarding_stop``
+        and the ``SEQUENCE_COLUMNS``."""
+        times = pd.to_datetime(journeys["transaction_dtm"])
+        origins = self._station_codes(
+            journeys["boarding_stop"].astype(str).map(self.origins)
+        )
+
+        first_legs = {
+            column: first_leg(journeys[column]) for column in SEQUENCE_COLUMNS
+        }
+        complete = np.logical_and.reduce(
+            [legs.notna().to_numpy() for legs in first_legs.values()]
+        )
+        destinations = self._station_codes(
+            first_legs["alighting_platform_sequence"].map(self.destinations)
+        )
+        destinations[destinations < 0] = UNMAPPED
+        destinations[~complete] = MISSING
+
+        counts = (
+            pd.DataFrame(
+                {
+                    "date": times.dt.normalize(),
+                    "time_bin": (times.dt.hour * 60 + times.dt.minute)
+                    // self.bin_minutes,
+                    "origin": origins,
+                    "destination": destinations,
+                }
+            )[origins >= 0]
+            .value_counts()
+            .rename("count")
+            .reset_index()
+        )
+        self._counts.append(counts)
+
+    def counts(self) -> pd.DataFrame:
+        """Journeys by date, time bin, origin and destination code, with the
+        incomplete journeys imputed."""
+        columns = ["date", "time_bin", "origin", "destination"]
+        counts = (
+            pd.concat(self._counts, ignore_index=True)
+            .groupby(columns, as_index=False)["count"]
+            .sum()
+        )
+        # The counts of the added chunks are replaced by their total
+        self._counts = [counts]
+
+        # Imputation groups: origin, hour and type of day
+        bins_per_hour = 60 // self.bin_minutes
+        groups = pd.MultiIndex.from_arrays(
+            [
+                counts["origin"].to_numpy(),
+                counts["time_bin"].to_numpy() // bins_per_hour,
+                day_types(counts["date"]),
+            ]
+        )
+        missing = (counts["destination"] == MISSING).to_numpy()
+        complete = counts[~missing]
+
+        # Destination frequencies of the complete journeys of every group,
+        # with the platforms of no station in the last column
+        n_destinations = len(self.station_names) + 1
+        group_index, complete_groups = groups[~missing].factorize()
+        frequencies = np.zeros((len(complete_groups), n_destinations))
+        np.add.at(
+            frequencies,
+            (
+                group_index,
+                np.where(
+                    complete["destination"] == UNMAPPED,
+                    n_destinations - 1,
+                    complete["destination"],
+                ),
+            ),
+            complete["count"].to_numpy(),
+        )
+
+        # Journeys of groups without any complete journey are left out
+        to_impute = counts[missing].copy()
+        to_impute["group"] = complete_groups.get_indexer(groups[missing])
+        to_impute = to_impute[to_impute["group"] >= 0]
+
+        pvals = frequencies[to_impute["group"].to_numpy()]
+        draws = self.rng.multinomial(
+            to_impute["count"].to_numpy(), pvals / pvals.sum(axis=1, keepdims=True)
+        )
+        rows, destinations = np.nonzero(draws)
+        imputed = to_impute.iloc[rows][["date", "time_bin", "origin"]].assign(
+            destination=destinations, count=draws[rows, destinations]
+        )
+        imputed.loc[imputed["destination"] == n_destinations - 1, "destination"] = (
+            UNMAPPED
+        )
+
+        counts = (
+            pd.concat([complete, imputed], ignore_index=True)
+            .groupby(columns, as_index=False)["count"]
+            .sum()
+        )
+        return counts[counts["destination"] >= 0].reset_index(drop=True)
+
+    def rates(self) -> pd.DataFrame:
+        """Arrival rates per hour of every OD pair, time bin and day type, in
+        the layout of the demand CSV.
+
+        The rate of a bin is its number of journeys per hour, averaged over
+        the days with a journey of the pair in the bin.
+        """
+        counts = self.counts()
+        dates = counts["date"]
+        holidays = USFederalHolidayCalendar().holidays(
+            start=dates.min(), end=dates.max()
+        )
+        counts["weekday"] = (dates.dt.dayofweek < 5) & ~dates.isin(holidays)
+
+        rates = counts.groupby(
+            ["time_bin", "weekday", "origin", "destination"], as_index=False
+        ).agg(count=("count", "sum"), days=("date", "nunique"))
+        names = np.asarray(self.station_names, dtype=object)
+        return pd.DataFrame(
+            {
+                "time_bin": rates["time_bin"] * self.bin_minutes / 60,
+                "weekday": rates["weekday"],
+                "Origin": names[rates["origin"]],
+                "Destination": names[rates["destination"]],
+                "arrival_rate": rates["count"] / rates["days"] * 60 / self.bin_minutes,
+            }
+        )
+
+    def tensor(self, rates: pd.DataFrame) -> Tuple[List[float], np.ndarray]:
+        """The time bins and the dense (time bin, weekday, origin,
+        destination) array of rates, in the layout of the input cache."""
+        time_bins, bin_index = np.unique(rates["time_bin"], return_inverse=True)
+        station_index = {station: i for i, station in enumerate(self.station_names)}
+        tensor = np.full(
+            (
+                len(time_bins),
+                len(WEEKDAYS),
+                len(self.station_names),
+                len(self.station_names),
+            ),
+            np.nan,
+        )
+        tensor[
+            bin_index,
+            rates["weekday"].astype(int).to_numpy(),
+            rates["Origin"].map(station_index).to_numpy(),
+            rates["Destination"].map(station_index).to_numpy(),
+        ] = rates["arrival_rate"].to_numpy()
+        return [float(time_bin) for time_bin in time_bins], tensor
+
+    def write(
+        self,
+        file_path: Union[str, Path],
+        input_cache_dir: Optional[Union[str, Path]] = None,
+    ) -> pd.DataFrame:
+        """Write the demand CSV and, given an input cache, its compiled entry."""
+        rates = self.rates()
+        rates.to_csv(file_path, index=False)
+
+        if input_cache_dir is not None:
+            time_bins, tensor = self.tensor(rates)
+            InputCache(input_cache_dir).add_demand(
+                file_path, time_bins, self.station_names, tensor
+            )
+
+        return rates
@@ -0,0 +1,211 @@
+"""On-disk cache of the demand and schedule inputs in compiled form.
+
+Parsing the demand CSV and merging the schedule tables take a noticeable part
+of the start-up of every job of a sweep, although every job reads the same
+files. The cache stores the compiled form of each file under the hash of its
+contents, so an edited file gets a new entry and stale entries are never
+read. Entries are built once, in a temporary directory renamed into place,
+so concurrent workers can share a cache directory.
+
+The demand is stored as a dense ``(time bin, weekday, origin, destination)``
+array of rates, with NaN for the pairs missing from the file, and is
+memory-mapped read-only by the workers. The schedule tables are stored as
+one array per column.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from collections.abc import Mapping
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Union
+
+import numpy as np
+import pandas as pd
+
+from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
+from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_schedule import (
+    ScheduleTables,
+    prepare_schedule_tables,
+)
+
+# Bump when the layout of an entry changes, so old entries are not read.
+FORMAT_VERSION = 1
+
+WEEKDAYS = (False, True)
+
+
+class DemandRates(Mapping):
+    """Compiled demand in the nested layout read by ``ArrivalRate``: hour,
+    weekday, origin and destination to rate.
+
+    The nested dictionaries of an hour are built on first access, so only the
+    hours a simulation reaches are expanded.
+    """
+
+    def __init__(self, time_bins: List[float], stations: List[str], rates: np.ndarray):
+        self.stations = stations
+        self.rates = rates
+        self._hour_indices = {hour: index for index, hour in enumerate(time_bins)}
+        self._expanded_hours: Dict[float, Dict] = {}
+
+    def __getitem__(self, hour: float) -> Dict[bool, Dict[str, Dict[str, float]]]:
+        if hour not in self._expanded_hours:
+            self._expanded_hours[hour] = self._expand(self._hour_indices[hour])
+        return self._expanded_hours[hour]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._hour_indices)
+
+    def __len__(self) -> int:
+        return len(self._hour_indices)
+
+    def _expand(self, hour_index: int) -> Dict[bool, Dict[str, Dict[str, float]]]:
+        hour_rates = {}
+        for weekday_index, weekday in enumerate(WEEKDAYS):
+            rates = self.rates[hour_index, weekday_index]
+            present = ~np.isnan(rates)
+            if not present.any():
+                continue
+
+            hour_rates[weekday] = {
+                self.stations[origin]: {
+                    self.stations[destination]: float(rates[origin, destination])
+                    for destination in np.flatnonzero(present[origin])
+                }
+                for origin in np.flatnonzero(present.any(axis=1))
+            }
+
+        return hour_rates
+
+
+def compile_demand(file_path: Union[str, Path], entry_dir: Path) -> None:
+    nested_rates = ArrivalRate._load_rates_from_csv(file_path)
+
+    stations: Dict[str, int] = {}
+    for weekday_rates in nested_rates.values():
+        for origin_rates in weekday_rates.values():
+            for origin, destination_rates in origin_rates.items():
+                stations.setdefault(origin, len(stations))
+                for destination in destination_rates:
+                    stations.setdefault(destination, len(stations))
+
+    time_bins = list(nested_rates)
+    rates = np.full(
+        (len(time_bins), len(WEEKDAYS), len(stations), len(stations)), np.nan
+    )
+    for hour_index, hour in enumerate(time_bins):
+        for weekday, origin_rates in nested_rates[hour].items():
+            for origin, destination_rates in origin_rates.items():
+                for destination, rate in destination_rates.items():
+                    rates[
+                        hour_index,
+                        WEEKDAYS.index(weekday),
+                        stations[origin],
+                        stations[destination],
+                    ] = rate
+
+    save_demand(entry_dir, time_bins, list(stations), rates)
+
+
+def save_demand(
+    entry_dir: Path, time_bins: List[float], stations: List[str], rates: np.ndarray
+) -> None:
+    np.save(entry_dir / "rates.npy", rates)
+    with open(entry_dir / "index.json", "w") as f:
+        json.dump({"time_bins": time_bins, "stations": stations}, f)
+
+
+def compile_schedule(file_path: Union[str, Path], entry_dir: Path) -> None:
+    with open(file_path, "r") as file:
+        tables = prepare_schedule_tables(json.load(file))
+
+    for name, table in zip(ScheduleTables._fields, tables):
+        columns = {}
+        for column in table.columns:
+            values = table[column].to_numpy()
+            columns[column] = values.astype(str) if values.dtype == object else values
+        np.savez(entry_dir / f"{name}.npz", **columns)
+
+
+def load_table(file_path: Path) -> pd.DataFrame:
+    with np.load(file_path) as columns:
+        return pd.DataFrame({column: columns[column] for column in columns.files})
+
+
+class InputCache:
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+
+    def _entry_dir(self, kind: str, file_path: Union[str, Path]) -> Path:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(partial(f.read, 2**20), b""):
+                digest.update(chunk)
+
+        return self.cache_dir / f"{kind}-v{FORMAT_VERSION}-{digest.hexdigest()[:16]}"
+
+    def _get_or_build(
+        self,
+        kind: str,
+        file_path: Union[str, Path],
+        build: Callable[[Union[str, Path], Path], None],
+    ) -> Path:
+        entry_dir = self._entry_dir(kind, file_path)
+        if entry_dir.is_dir():
+            return entry_dir
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        build_dir = Path(
+            tempfile.mkdtemp(prefix=f"{entry_dir.name}.", dir=self.cache_dir)
+        )
+        try:
+            build(file_path, build_dir)
+            os.rename(build_dir, entry_dir)
+        except OSError:
+            # Another worker published the same entry first.
+            if not entry_dir.is_dir():
+                raise
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+        return entry_dir
+
+    def demand_rates(self, file_path: Union[str, Path]) -> DemandRates:
+        entry_dir = self._get_or_build("demand", file_path, compile_demand)
+
+        with open(entry_dir / "index.json", "r") as f:
+            index = json.load(f)
+
+        return DemandRates(
+            index["time_bins"],
+            index["stations"],
+            np.load(entry_dir / "rates.npy", mmap_mode="r"),
+        )
+
+    def add_demand(
+        self,
+        file_path: Union[str, Path],
+        time_bins: List[float],
+        stations: List[str],
+        rates: np.ndarray,
+    ) -> Path:
+        """Store demand already compiled, e.g. by the demand builder, as the
+        entry of the demand file it wrote."""
+        return self._get_or_build(
+            "demand",
+            file_path,
+            lambda _, entry_dir: save_demand(entry_dir, time_bins, stations, rates),
+        )
+
+    def schedule_tables(self, file_path: Union[str, Path]) -> ScheduleTables:
+        entry_dir = self._get_or_build("schedule", file_path, compile_schedule)
+
+        return ScheduleTables(
+            *(load_table(entry_dir / f"{name}.npz") for name in ScheduleTables._fields)
+        )
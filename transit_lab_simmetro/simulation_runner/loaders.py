@@ -1,6 +1,6 @@
 import json
 from random import randint
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 
 from transit_lab_simmetro import config_handler
 from transit_lab_simmetro.simulation_engine.infrastructure import (
@@ -9,6 +9,8 @@ from transit_lab_simmetro.simulation_engine.infrastructure import (
     SignalControlCenter,
     Station,
     Block,
+    MovingBlock,
+    MovingBlockControl,
 )
 from transit_lab_simmetro.simulation_engine.infrastructure.path import (
     ShortTurningPath,
@@ -64,25 +66,7 @@ def create_path_from_data_with_offscan_symptom(
             default_speed_code = min(block_data["SPEED"], 55)
             speed_codes_to_communicate = block_data["SPEED_CODES_TO_COMMUNICATE"]
 
-            if "STATION" in block_data:
-                station_data = block_data["STATION"]
-                end_of_platform_milepost = int(station_data["END_OF_PLATFORM_MILEPOST"])
-                start_stn = block_data["STARTSTN"]
-
-                location_relative_to_block = abs(start_stn - end_of_platform_milepost)
-
-                if location_relative_to_block < 0:
-                    print(station_data["STATION_NAME"])
-
-                station = Station(
-                    station_name=station_data["STATION_NAME"],
-                    location_relative_to_block=location_relative_to_block,
-                    direction=direction,
-                    arrival_rates=arrival_rates,
-                )
-
-            else:
-                station = None
+            station = _create_station(block_data, direction, arrival_rates)
 
             block = Block(
                 block_id=block_id,
@@ -101,6 +85,74 @@ def create_path_from_data_with_offscan_symptom(
 
     signal_control_center = SignalControlCenter(blocks)
 
+    _add_dispatching_blocks_and_short_turning_path(paths, path_config_loader, cfg)
+
+    return paths, signal_control_center
+
+
+def create_moving_block_path_from_data(
+    data: Dict,
+    slow_zones: List[SlowZone],
+    arrival_rates: ArrivalRate,
+    path_config_loader: PathConfigLoader,
+) -> Tuple[Dict[str, Path], MovingBlockControl]:
+    """Same alignment and stations as ``create_path_from_data_with_offscan_symptom``
+    under moving-block control instead of fixed-block signals."""
+    blocks = []
+    paths = {}
+
+    cfg = config_handler.get_config()
+
+    for direction in path_config_loader.get_directions():
+        path_blocks = []
+        for block_data in data[direction]:
+            block = MovingBlock(
+                block_id=block_data["BLOCK"],
+                block_alt_name=block_data["BLOCK_ALT"],
+                visible_distance=randint(50, 1000),
+                length=int(block_data["DISTANCE"]),
+                default_speed_code=min(block_data["SPEED"], 55),
+                station=_create_station(block_data, direction, arrival_rates),
+            )
+
+            blocks.append(block)
+            path_blocks.append(block)
+
+        paths[direction] = Path(direction, path_blocks, slow_zones=slow_zones)
+
+    moving_block_control = MovingBlockControl(blocks)
+
+    _add_dispatching_blocks_and_short_turning_path(paths, path_config_loader, cfg)
+
+    return paths, moving_block_control
+
+
+def _create_station(
+    block_data: Dict, direction: str, arrival_rates: ArrivalRate
+) -> Optional[Station]:
+    if "STATION" not in block_data:
+        return None
+
+    station_data = block_data["STATION"]
+    end_of_platform_milepost = int(station_data["END_OF_PLATFORM_MILEPOST"])
+    start_stn = block_data["STARTSTN"]
+
+    location_relative_to_block = abs(start_stn - end_of_platform_milepost)
+
+    if location_relative_to_block < 0:
+        print(station_data["STATION_NAME"])
+
+    return Station(
+        station_name=station_data["STATION_NAME"],
+        location_relative_to_block=location_relative_to_block,
+        direction=direction,
+        arrival_rates=arrival_rates,
+    )
+
+
+def _add_dispatching_blocks_and_short_turning_path(
+    paths: Dict[str, Path], path_config_loader: PathConfigLoader, cfg
+) -> None:
     for dispatching_block in path_config_loader.get_dispatching_blocks():
         paths[dispatching_block["direction"]].make_dispatching_block(
             block_id=dispatching_block["block_id"],
@@ -127,5 +179,3 @@ def create_path_from_data_with_offscan_symptom(
         )
     else:
         raise Exception("Invalid short turning type")
-
-    return paths, signal_control_center
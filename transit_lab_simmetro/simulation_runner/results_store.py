@@ -0,0 +1,311 @@
+"""One SQLite database holding the logs of every job of a sweep.
+
+Every job registers itself in the ``jobs`` table, with one column per entry of
+its flattened config, and appends its log rows to one table per logger, keyed
+by the ``job_id`` of the job. Cross-run questions become a join, e.g. the
+denied boardings by maximum holding and station::
+
+    SELECT jobs."max_holding", station.station_name,
+           SUM(station.denied_boarding) AS denied_boarding
+    FROM station JOIN jobs USING (job_id)
+    GROUP BY 1, 2
+
+The jobs of a joblib sweep write to the same database concurrently. SQLite
+serialises the writers, so the rows are buffered and inserted in batches, one
+transaction each.
+
+Sweeps logged to CSV files can be collected into a database afterwards::
+
+    python -m transit_lab_simmetro.simulation_runner.results_store SWEEP_DIR
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from omegaconf import OmegaConf
+
+from transit_lab_simmetro.simulation_engine.utils.compressed_logs import (
+    find_log_file,
+    read_log,
+)
+from transit_lab_simmetro.simulation_engine.utils.logger_utils import LoggerStrategy
+
+JOBS_TABLE = "jobs"
+
+# Log files of a job and the tables their rows go to.
+LOG_TABLES = {
+    "train_test.csv": "train",
+    "passenger_test.csv": "passenger",
+    "station_test.csv": "station",
+    "block_test.csv": "block",
+    "ohare_terminal_holding_test.csv": "ohare_terminal_holding",
+}
+
+INDEXED_COLUMNS = [
+    "job_id",
+    "replication_id",
+    "station_name",
+    "train_id",
+    "time_in_seconds",
+]
+
+BATCH_SIZE = 10_000
+
+# Logged values are often numpy scalars, which sqlite3 does not bind as they are.
+for numpy_type in [np.int32, np.int64, np.uint32, np.uint64]:
+    sqlite3.register_adapter(numpy_type, int)
+sqlite3.register_adapter(np.float32, float)
+sqlite3.register_adapter(np.bool_, bool)
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def flatten_config(config: Mapping, prefix: str = "") -> Dict[str, Any]:
+    """Config entries by their dotted key, with lists stored as JSON."""
+    values = {}
+    for key, value in config.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, Mapping):
+            values.update(flatten_config(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            values[name] = json.dumps(value, default=str)
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            values[name] = value
+        else:
+            values[name] = str(value)
+
+    return values
+
+
+class ResultsStore:
+    def __init__(self, database_path: Union[str, Path], timeout: float = 600):
+        self.database_path = Path(database_path)
+        self.database_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Transactions are opened explicitly, see _write_transaction. The
+        # connection is used by the background log writer thread as well.
+        self.connection = sqlite3.connect(
+            self.database_path,
+            timeout=timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # Readers, e.g. a notebook following the sweep, do not block the jobs.
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._columns: Dict[str, List[str]] = {}
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[sqlite3.Connection]:
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def _ensure_columns(
+        self, table: str, columns: Sequence[str], key_definition: str
+    ) -> None:
+        """Create the table, or add the columns it lacks, under the write lock
+        of the current transaction."""
+        if set(columns) <= set(self._columns.get(table, [])):
+            return
+
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {quote(table)} ({key_definition})"
+        )
+        existing = [
+            row[1]
+            for row in self.connection.execute(f"PRAGMA table_info({quote(table)})")
+        ]
+        for column in columns:
+            if column not in existing:
+                self.connection.execute(
+                    f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column)}"
+                )
+                existing.append(column)
+
+        for column in INDEXED_COLUMNS:
+            if column in existing and table != JOBS_TABLE:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote(f'{table}_{column}')} "
+                    f"ON {quote(table)} ({quote(column)})"
+                )
+
+        self._columns[table] = existing
+
+    def register_job(self, config: Mapping, name: Optional[str] = None) -> int:
+        values = {"name": name, **flatten_config(config)}
+        with self._write_transaction() as connection:
+            self._ensure_columns(JOBS_TABLE, list(values), "job_id INTEGER PRIMARY KEY")
+            cursor = connection.execute(
+                f"INSERT INTO {JOBS_TABLE} ({', '.join(map(quote, values))}) "
+                f"VALUES ({', '.join('?' * len(values))})",
+                list(values.values()),
+            )
+
+        return cursor.lastrowid
+
+    def insert_rows(
+        self,
+        table: str,
+        job_id: int,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+    ) -> None:
+        with self._write_transaction() as connection:
+            self._ensure_columns(table, columns, "job_id INTEGER")
+            connection.executemany(
+                f"INSERT INTO {quote(table)} "
+                f"(job_id, {', '.join(map(quote, columns))}) "
+                f"VALUES (?, {', '.join('?' * len(columns))})",
+                ((job_id, *row) for row in rows),
+            )
+
+    def delete_replications(
+        self, table: str, job_id: int, replication_ids: List[int]
+    ) -> None:
+        if not replication_ids or table not in self.tables():
+            return
+
+        with self._write_transaction() as connection:
+            connection.execute(
+                f"DELETE FROM {quote(table)} WHERE job_id = ? "
+                f"AND replication_id IN ({', '.join('?' * len(replication_ids))})",
+                [job_id, *replication_ids],
+            )
+
+    def tables(self) -> List[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        ]
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.connection, params=params)
+
+    def logger_strategy(self, table: str, job_id: int) -> SQLiteLoggerStrategy:
+        return SQLiteLoggerStrategy(self, table, job_id)
+
+    def import_job_folder(self, job_folder: Union[str, Path]) -> int:
+        """Copy the CSV logs of a finished job, compressed or not, with its
+        config, into the store."""
+        job_folder = Path(job_folder)
+        config = OmegaConf.load(job_folder / ".hydra" / "config.yaml")
+        # Hydra interpolations cannot be resolved outside of the job.
+        job_id = self.register_job(
+            OmegaConf.to_container(config, resolve=False), name=job_folder.name
+        )
+
+        for file_name, table in LOG_TABLES.items():
+            try:
+                log_file = find_log_file(job_folder / file_name)
+            except FileNotFoundError:
+                continue
+            if log_file.stat().st_size == 0:
+                continue
+
+            for chunk in read_log(log_file, chunksize=BATCH_SIZE):
+                chunk = chunk.astype(object).where(chunk.notna(), None)
+                self.insert_rows(
+                    table, job_id, list(chunk.columns), chunk.itertuples(index=False)
+                )
+
+        return job_id
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class SQLiteLoggerStrategy(LoggerStrategy):
+    """Buffers the rows of a logger and inserts them into a ``ResultsStore``
+    table. The column names are the headers of the logger."""
+
+    def __init__(
+        self,
+        store: ResultsStore,
+        table: str,
+        job_id: int,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.store = store
+        self.table = table
+        self.job_id = job_id
+        self.batch_size = batch_size
+        self.headers: Optional[Dict] = None
+        self._rows: List[tuple] = []
+
+    def write_header(self, log_file_path: str) -> None:
+        # The table is created with the first batch of rows.
+        self._rows = []
+
+    def write_row(self, log_file_path: str, data: Dict[str, Any]) -> None:
+        self._rows.append(tuple(data.values()))
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, log_file_path: str, rows: List[Dict[str, Any]]) -> None:
+        self._rows.extend(tuple(data.values()) for data in rows)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+
+        rows, self._rows = self._rows, []
+        self.store.insert_rows(self.table, self.job_id, list(self.headers), rows)
+
+    def filter_out_replications(
+        self, log_file_path: str, replication_ids: List[int]
+    ) -> None:
+        self.flush()
+        self.store.delete_replications(self.table, self.job_id, replication_ids)
+
+
+def collect_sweep(
+    sweep_dir: Union[str, Path], database_path: Union[str, Path]
+) -> List[int]:
+    """Import every job folder of a sweep, i.e. every folder with a
+    ``.hydra/config.yaml``, into one database."""
+    store = ResultsStore(database_path)
+    try:
+        return [
+            store.import_job_folder(config_file.parent.parent)
+            for config_file in sorted(Path(sweep_dir).glob("**/.hydra/config.yaml"))
+        ]
+    finally:
+        store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sweep_dir")
+    parser.add_argument(
+        "--database", help="defaults to results.sqlite in the sweep folder"
+    )
+    args = parser.parse_args(argv)
+
+    database_path = args.database or Path(args.sweep_dir) / "results.sqlite"
+    job_ids = collect_sweep(args.sweep_dir, database_path)
+    print(f"Collected {len(job_ids)} jobs into {database_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
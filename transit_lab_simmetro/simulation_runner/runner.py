@@ -1,7 +1,14 @@
+import hashlib
+import json
 import os
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
 
 import hydra
-from omegaconf import DictConfig
+from omegaconf import DictConfig, OmegaConf
 
 from transit_lab_simmetro import config_handler
 from transit_lab_simmetro.simulation_engine.passenger import ArrivalRate
@@ -12,10 +19,18 @@ from transit_lab_simmetro.simulation_engine.schedule_refactored.ohare_empirical_
 )
 
 # Import necessary modules from transit_lab_simmetro
-from transit_lab_simmetro.simulation_engine.simulation import ReplicationManager
+from transit_lab_simmetro.simulation_engine.simulation import (
+    ReplicationManager,
+    SimulationSnapshot,
+)
 from transit_lab_simmetro.simulation_engine.utils import LoggerContext
 from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
+    BackgroundLogWriter,
     BlockActivationLogger,
+    CompressedCSVLoggerStrategy,
+    EventTrainLogger,
+    NullOHareTerminalHoldingLogger,
+    NullPassengerLogger,
     NullTrainLogger,
     OHareTerminalHoldingLogger,
     PassengerLogger,
@@ -23,6 +38,9 @@ from transit_lab_simmetro.simulation_engine.utils.logger_utils import (
     StationLogger,
     TrainLogger,
 )
+from transit_lab_simmetro.simulation_engine.utils.profiling import SubsystemProfiler
+from transit_lab_simmetro.simulation_runner.input_cache import InputCache
+from transit_lab_simmetro.simulation_runner.results_store import ResultsStore
 from transit_lab_simmetro.simulation_runner.loaders import (
     PathConfigLoader,
     read_slow_zones_from_json,
@@ -52,28 +70,74 @@ def main(cfg: DictConfig) -> None:
     print("Current working directory:", os.getcwd())
     print("Log folder path:", cfg.log_folder_path)
 
-    train_logger = (
-        TrainLogger(
+    results_store_cfg = cfg.get("results_store")
+    results_store = None
+    if results_store_cfg and results_store_cfg.enabled:
+        results_store = ResultsStore(results_store_cfg.path)
+        job_id = results_store.register_job(
+            OmegaConf.to_container(cfg, resolve=True),
+            name=os.path.basename(log_folder_path),
+        )
+
+    compression = cfg.logger.get("compression")
+
+    def log_strategy(table):
+        # None keeps the plain CSV files in the job folder.
+        if results_store:
+            return results_store.logger_strategy(table, job_id)
+        if compression:
+            return CompressedCSVLoggerStrategy(compression=compression)
+        return None
+
+    if not cfg.logger.should_log_trajectories:
+        train_logger = NullTrainLogger()
+    elif cfg.logger.get("trajectory_mode", "interval") == "events":
+        train_logger = EventTrainLogger(
+            log_file_path=f"{log_folder_path}/train_test.csv",
+            logger_strategy=log_strategy("train"),
+        )
+    else:
+        train_logger = TrainLogger(
             log_file_path=f"{log_folder_path}/train_test.csv",
             log_interval=cfg.logger.log_interval,
+            logger_strategy=log_strategy("train"),
         )
-        if cfg.logger.should_log_trajectories
-        else NullTrainLogger()
-    )
 
-    passenger_logger = PassengerLogger(
-        log_file_path=f"{log_folder_path}/passenger_test.csv"
+    # The lock-step engine aggregates the passengers and never holds at the
+    # terminal, so it has no rows for these logs
+    is_lockstep = cfg.simulation.get("engine", "object") == "lockstep"
+    if is_lockstep:
+        passenger_logger = NullPassengerLogger()
+    else:
+        passenger_logger = PassengerLogger(
+            log_file_path=f"{log_folder_path}/passenger_test.csv",
+            logger_strategy=log_strategy("passenger"),
+        )
+    station_logger = StationLogger(
+        log_file_path=f"{log_folder_path}/station_test.csv",
+        logger_strategy=log_strategy("station"),
     )
-    station_logger = StationLogger(log_file_path=f"{log_folder_path}/station_test.csv")
     simulation_logger = SimulationLogger(
         log_file_path=f"{log_folder_path}/simulation_test.json"
     )
     block_logger = BlockActivationLogger(
-        log_file_path=f"{log_folder_path}/block_test.csv"
+        log_file_path=f"{log_folder_path}/block_test.csv",
+        logger_strategy=log_strategy("block"),
     )
 
-    ohare_terminal_holding_logger = OHareTerminalHoldingLogger(
-        log_file_path=f"{log_folder_path}/ohare_terminal_holding_test.csv"
+    if is_lockstep:
+        ohare_terminal_holding_logger = NullOHareTerminalHoldingLogger()
+    else:
+        ohare_terminal_holding_logger = OHareTerminalHoldingLogger(
+            log_file_path=f"{log_folder_path}/ohare_terminal_holding_test.csv",
+            logger_strategy=log_strategy("ohare_terminal_holding"),
+        )
+
+    input_cache_cfg = cfg.get("input_cache")
+    input_cache = (
+        InputCache(input_cache_cfg.dir)
+        if input_cache_cfg and input_cache_cfg.enabled
+        else None
     )
 
     arrival_rates = ArrivalRate(
@@ -85,6 +149,7 @@ def main(cfg: DictConfig) -> None:
         # ),
         filename=cfg.demand_file,
         demand_factor=cfg.demand_level,
+        rates=input_cache.demand_rates(cfg.demand_file) if input_cache else None,
     )
 
     data = load_data(project_root / "inputs" / "infra.json")
@@ -99,6 +164,13 @@ def main(cfg: DictConfig) -> None:
         ohare_terminal_holding_logger=ohare_terminal_holding_logger,
         warmup_time=3600 * 1.5,
         start_hour_of_day=cfg.simulation.start_time_of_day,
+        background_writer=(
+            BackgroundLogWriter() if cfg.logger.get("background_writer") else None
+        ),
+    )
+
+    schedule_tables = (
+        input_cache.schedule_tables(cfg.schedule_file) if input_cache else None
     )
 
     # schedule = OHareEmpiricalSchedule(
@@ -110,12 +182,14 @@ def main(cfg: DictConfig) -> None:
             end_time_of_day=cfg.simulation.end_time_of_day * 3600,
             max_holding=cfg.max_holding,
             min_holding=cfg.min_holding,
+            tables=schedule_tables,
         )
     else:
         schedule = OHareEmpiricalSchedule(
             file_path=cfg.schedule_file,
             start_time_of_day=cfg.simulation.start_time_of_day * 3600,
             end_time_of_day=cfg.simulation.end_time_of_day * 3600,
+            tables=schedule_tables,
         )
     # if schd := cfg.schd:
     #     if schd == "PM":
@@ -171,7 +245,7 @@ def main(cfg: DictConfig) -> None:
         path_config_loader=path_config_laod,
     )
 
-    replication_manager.run_replications(
+    run_kwargs = dict(
         schedule=schedule,
         path_initializer_function=fixed_arrival_rates_function,
         data=data,
@@ -181,6 +255,163 @@ def main(cfg: DictConfig) -> None:
         start_hour=cfg.simulation.start_time_of_day,
     )
 
+    profiler = (
+        SubsystemProfiler(dump=cfg.get("profile_dump"))
+        if cfg.get("profile", False)
+        else None
+    )
+
+    with profiler or nullcontext():
+        snapshot_cfg = cfg.get("snapshot")
+        if is_lockstep:
+            replication_manager.run_lockstep_replications(**run_kwargs)
+        elif snapshot_cfg and snapshot_cfg.enabled:
+            snapshots = load_or_warm_up_snapshots(cfg, replication_manager, run_kwargs)
+            replication_manager.run_replications_from_snapshots(snapshots)
+        else:
+            replication_manager.run_replications(**run_kwargs)
+
+    if profiler:
+        profiler.write_report(log_folder_path)
+
+    if results_store:
+        results_store.close()
+
+
+# Config entries that shape the simulation before the snapshot time. Sweeps that
+# only vary the remaining (post-fork) entries share the same warmed-up snapshots.
+PRE_FORK_CONFIG_KEYS = [
+    "schd",
+    "period",
+    "demand_file",
+    "schedule_file",
+    "demand_level",
+    "short_turning",
+    "inspection_time",
+    "headway_management",
+    "ohare_holding",
+    "passenger",
+    "simulation",
+]
+
+
+def get_snapshot_dir(cfg: DictConfig) -> Path:
+    pre_fork_config = {
+        key: OmegaConf.to_container(cfg, resolve=True).get(key)
+        for key in PRE_FORK_CONFIG_KEYS
+    }
+    if cfg.ohare_holding:
+        pre_fork_config["terminal_holding"] = [cfg.max_holding, cfg.min_holding]
+    pre_fork_config["snapshot_time"] = cfg.snapshot.warmup_time
+
+    config_hash = hashlib.sha1(
+        json.dumps(pre_fork_config, sort_keys=True, default=str).encode()
+    ).hexdigest()[:12]
+
+    return Path(cfg.snapshot.dir) / config_hash
+
+
+# Seconds between the checks of a job waiting for another job's warm-up, and
+# the wait after which its lock is taken to be left over by a killed job.
+SNAPSHOT_POLL_INTERVAL = 10
+SNAPSHOT_LOCK_TIMEOUT = 3 * 3600
+
+
+def read_snapshots(snapshot_dir: Path, number_of_replications: int):
+    snapshot_files = sorted(snapshot_dir.glob("*.pkl"))
+    if len(snapshot_files) != number_of_replications:
+        raise RuntimeError(
+            f"{snapshot_dir} holds {len(snapshot_files)} snapshots, "
+            f"expected {number_of_replications}"
+        )
+
+    print(f"Forking {len(snapshot_files)} replications from {snapshot_dir}")
+    return {
+        int(snapshot_file.stem): SimulationSnapshot.load(snapshot_file)
+        for snapshot_file in snapshot_files
+    }
+
+
+def warm_up_snapshots(
+    cfg: DictConfig, replication_manager, run_kwargs, snapshot_dir: Path
+):
+    # The warm-up is shared by every scenario of the sweep, so it runs without
+    # mid-route holding; the scenario's own controls take over after the fork.
+    holding_strategy = cfg.holding_strategy
+    cfg.holding_strategy = "no_holding"
+    try:
+        snapshots = replication_manager.warm_up_replications(
+            **run_kwargs,
+            snapshot_time=cfg.simulation.start_time_of_day * 3600
+            + cfg.snapshot.warmup_time,
+        )
+    finally:
+        cfg.holding_strategy = holding_strategy
+
+    # Written aside and renamed into place, so other jobs never see a partial set
+    snapshot_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(
+        tempfile.mkdtemp(prefix=f"{snapshot_dir.name}.", dir=snapshot_dir.parent)
+    )
+    try:
+        for seed_number, snapshot in snapshots.items():
+            snapshot.save(build_dir / f"{seed_number}.pkl")
+        os.rename(build_dir, snapshot_dir)
+    except OSError:
+        # Another job published the same snapshots first.
+        if not snapshot_dir.is_dir():
+            raise
+    finally:
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+    print(f"Saved {len(snapshots)} warm-up snapshots to {snapshot_dir}")
+
+
+def acquire_lock(lock_path: Path) -> bool:
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        return False
+    return True
+
+
+def load_or_warm_up_snapshots(cfg: DictConfig, replication_manager, run_kwargs):
+    # Rows logged between the logger warm-up and the snapshot would only be
+    # logged by the job that runs the warm-up.
+    snapshot_time = cfg.simulation.start_time_of_day * 3600 + cfg.snapshot.warmup_time
+    if snapshot_time > replication_manager.logger_context.station_logger.warmup_time:
+        raise ValueError(
+            f"snapshot.warmup_time ({cfg.snapshot.warmup_time} s) is later than "
+            "the logger warm-up"
+        )
+
+    snapshot_dir = get_snapshot_dir(cfg)
+    number_of_replications = replication_manager.number_of_replications
+    lock_path = snapshot_dir.with_name(f"{snapshot_dir.name}.lock")
+    deadline = time.monotonic() + cfg.snapshot.get(
+        "lock_timeout", SNAPSHOT_LOCK_TIMEOUT
+    )
+
+    # The jobs of a sweep sharing the snapshots wait for the one warming them
+    # up, and every job forks from the published set.
+    while not snapshot_dir.is_dir():
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        if acquire_lock(lock_path):
+            try:
+                if not snapshot_dir.is_dir():
+                    warm_up_snapshots(
+                        cfg, replication_manager, run_kwargs, snapshot_dir
+                    )
+            finally:
+                lock_path.unlink()
+        elif time.monotonic() > deadline:
+            print(f"Ignoring the stale snapshot lock {lock_path}")
+            warm_up_snapshots(cfg, replication_manager, run_kwargs, snapshot_dir)
+        else:
+            time.sleep(SNAPSHOT_POLL_INTERVAL)
+
+    return read_snapshots(snapshot_dir, number_of_replications)
+
 
 if __name__ == "__main__":
     main()
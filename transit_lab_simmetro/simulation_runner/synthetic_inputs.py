@@ -0,0 +1,255 @@
+"""Synthetic lines in the schema of the ``inputs`` files, for scaling studies.
+
+A synthetic line has two directions over the same alignment. Stations are
+named ``Station 0`` to ``Station S-1`` in southbound order, the same order as
+``ArrivalRate.station_names``, so northbound trains run from the last
+station to the first.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import random
+from typing import Dict, List, Optional, Sequence
+
+SYNTHETIC_SPEED_CODES = (25, 35, 45, 55)
+STATION_BLOCK_SPEED_CODE = 25
+# Codes an occupied block sends to its upstream blocks: stop directly behind
+# it, then the restricting code further upstream.
+STOP_SPEED_CODE = 0
+RESTRICTING_SPEED_CODE = 15
+
+DIRECTION_PREFIXES = {"Northbound": "NBS", "Southbound": "SBS"}
+
+
+class SyntheticLine:
+    def __init__(
+        self,
+        num_blocks: int,
+        num_stations: int,
+        speed_code_fan_out: int = 3,
+        block_length_range: Sequence[float] = (150, 900),
+        seed: Optional[int] = None,
+    ):
+        if num_stations < 2:
+            raise ValueError("A synthetic line needs at least two stations")
+        if num_blocks < 2 * num_stations:
+            raise ValueError("A synthetic line needs at least two blocks per station")
+
+        self.num_blocks = num_blocks
+        self.num_stations = num_stations
+        self.speed_code_fan_out = speed_code_fan_out
+
+        rng = random.Random(seed)
+        self.block_lengths = [
+            rng.randint(int(block_length_range[0]), int(block_length_range[1]))
+            for _ in range(num_blocks)
+        ]
+        self.speed_codes = [
+            rng.choice(SYNTHETIC_SPEED_CODES) for _ in range(num_blocks)
+        ]
+        self.station_names = [f"Station {i}" for i in range(num_stations)]
+
+        # Block index of each station on the southbound alignment; the first
+        # and the last block are the terminals.
+        self.station_blocks = [
+            round(i * (num_blocks - 1) / (num_stations - 1))
+            for i in range(num_stations)
+        ]
+
+    def block_id(self, direction: str, index: int) -> str:
+        return f"{DIRECTION_PREFIXES[direction]}-{index}"
+
+    def infra(self) -> Dict[str, List[Dict]]:
+        """Blocks of both directions in the ``infra.json`` schema."""
+        infra = {}
+        stations = dict(zip(self.station_blocks, self.station_names))
+
+        for direction in DIRECTION_PREFIXES:
+            # Southbound runs along the alignment, northbound against it.
+            order = list(range(self.num_blocks))
+            if direction == "Northbound":
+                order.reverse()
+
+            blocks = []
+            milepost = 0
+            for path_index, alignment_index in enumerate(order):
+                length = self.block_lengths[alignment_index]
+                block = {
+                    "BLOCK": self.block_id(direction, path_index),
+                    "STARTSTN": milepost,
+                    "ENDSTN": milepost + length,
+                    "SPEED": self.speed_codes[alignment_index],
+                    "DISTANCE": length,
+                    "SPEED_CODES_TO_COMMUNICATE": {
+                        self.block_id(direction, path_index - k): (
+                            STOP_SPEED_CODE if k == 1 else RESTRICTING_SPEED_CODE
+                        )
+                        for k in range(1, self.speed_code_fan_out + 1)
+                        if path_index - k >= 0
+                    },
+                    "BLOCK_ALT": f"{self.block_id(direction, path_index).lower()}t",
+                }
+                if alignment_index in stations:
+                    block["SPEED"] = STATION_BLOCK_SPEED_CODE
+                    block["STATION"] = {
+                        "STATION_NAME": stations[alignment_index],
+                        "END_OF_PLATFORM_MILEPOST": milepost + length // 2,
+                    }
+
+                blocks.append(block)
+                milepost += length
+
+            infra[direction] = blocks
+
+        return infra
+
+    def path_config(self) -> Dict:
+        """Dispatching blocks and short-turning junctures in the
+        ``path_config.json`` schema, turning back at the middle station."""
+        middle_block = self.station_blocks[self.num_stations // 2]
+        juncture = {
+            "nb_juncture_block_id": self.block_id(
+                "Northbound", self.num_blocks - 1 - middle_block
+            ),
+            "sb_juncture_block_id": self.block_id("Southbound", middle_block),
+        }
+
+        return {
+            "directions": list(DIRECTION_PREFIXES),
+            "dispatching_blocks": [
+                {
+                    "direction": direction,
+                    "block_id": self.block_id(direction, 0),
+                    "dispatch_margin": 0,
+                    "upstream_blocks": [self.block_id(direction, 0)],
+                }
+                for direction in DIRECTION_PREFIXES
+            ],
+            "short_turning": {"UIC": juncture, "Western": juncture},
+        }
+
+    def write(
+        self,
+        folder_path: str,
+        headway: float,
+        start_time_of_day: float,
+        end_time_of_day: float,
+        arrival_rate_per_pair: float,
+        headway_cv: float = 0.1,
+        seed: Optional[int] = None,
+    ) -> Dict[str, str]:
+        """Write the infrastructure, path config, demand and schedule files and
+        return their paths."""
+        os.makedirs(folder_path, exist_ok=True)
+        file_paths = {
+            "infra": os.path.join(folder_path, "infra.json"),
+            "path_config": os.path.join(folder_path, "path_config.json"),
+            "demand": os.path.join(folder_path, "demand.csv"),
+            "schedule": os.path.join(folder_path, "schedule.json"),
+        }
+
+        with open(file_paths["infra"], "w") as f:
+            json.dump(self.infra(), f)
+        with open(file_paths["path_config"], "w") as f:
+            json.dump(self.path_config(), f, indent=4)
+        write_uniform_demand(
+            file_paths["demand"],
+            self.station_names,
+            arrival_rate_per_pair,
+            start_time_of_day,
+            end_time_of_day,
+        )
+        with open(file_paths["schedule"], "w") as f:
+            json.dump(
+                generate_schedule(
+                    headway, start_time_of_day, end_time_of_day, headway_cv, seed
+                ),
+                f,
+            )
+
+        return file_paths
+
+
+def write_uniform_demand(
+    file_path: str,
+    station_names: List[str],
+    arrival_rate_per_pair: float,
+    start_time_of_day: float = 0,
+    end_time_of_day: float = 24 * 3600,
+) -> None:
+    """OD demand CSV with the same hourly rate for every pair and 15-minute bin."""
+    first_bin = int(start_time_of_day // 900) - 1
+    last_bin = int(end_time_of_day // 900) + 1
+
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["Origin", "Destination", "time_bin", "weekday", "arrival_rate"]
+        )
+        for time_bin in range(max(first_bin, 0), last_bin + 1):
+            for origin in station_names:
+                for destination in station_names:
+                    if origin != destination:
+                        writer.writerow(
+                            [
+                                origin,
+                                destination,
+                                time_bin / 4,
+                                True,
+                                arrival_rate_per_pair,
+                            ]
+                        )
+
+
+def generate_schedule(
+    headway: float,
+    start_time_of_day: float,
+    end_time_of_day: float,
+    headway_cv: float = 0.1,
+    seed: Optional[int] = None,
+) -> Dict[str, List[Dict]]:
+    """Dispatches at the given headway in the schema read by
+    ``OHareEmpiricalSchedule``, with normally distributed deviations."""
+    rng = random.Random(seed)
+    empirical_schedule = []
+    blue_line_schedule = []
+
+    for direction, terminal in [
+        ("Northbound", "Forest Park"),
+        ("Southbound", "O-Hare"),
+    ]:
+        time_in_sec = start_time_of_day
+        run_number = 0
+        while time_in_sec < end_time_of_day:
+            sampled_headway = max(rng.gauss(headway, headway_cv * headway), headway / 4)
+            runid = f"S{direction[0]}{run_number:03d}"
+            empirical_schedule.append(
+                {
+                    "time_in_sec": time_in_sec,
+                    "runid": runid,
+                    "headway": sampled_headway,
+                    "deviation": sampled_headway - headway,
+                    "direction": direction,
+                }
+            )
+            blue_line_schedule.append(
+                {
+                    "runid": runid,
+                    "time_in_sec": time_in_sec,
+                    "terminal": terminal,
+                    "short_turned": False,
+                }
+            )
+            time_in_sec += headway
+            run_number += 1
+
+    # Both lists are merged on time by ``prepare_schedule_tables``.
+    empirical_schedule.sort(key=lambda dispatch: dispatch["time_in_sec"])
+    blue_line_schedule.sort(key=lambda dispatch: dispatch["time_in_sec"])
+    return {
+        "empirical_schedule": empirical_schedule,
+        "blue_line_schedule": blue_line_schedule,
+    }
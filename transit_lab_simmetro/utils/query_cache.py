@@ -0,0 +1,215 @@
+"""Local cache of the results of database queries, one file per day.
+
+The results of a query taking ``:start_date`` and ``:end_date`` are stored as
+one file per day, by the date of ``date_column``, in a directory keyed by the
+text of the query and its other parameters. Reading a range of dates only
+queries the days missing from the cache, with one query per run of
+consecutive missing days, and reads the rows in chunks rather than all at
+once. Days from today on may still change, so they are always queried and
+never cached::
+
+    cache = QueryCache(engine)
+    events = cache.read(query, "2023-04-01", "2023-05-01", date_column="event_time")
+
+Queries without dates are cached whole, by their parameters.
+
+Files are pickles by default, which need nothing beyond pandas;
+``file_format="parquet"`` stores them as Parquet, which needs pyarrow.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .root_path import project_root
+
+DEFAULT_CACHE_DIR = project_root / ".query_cache"
+
+FILE_FORMATS = {"parquet": ".parquet", "pickle": ".pkl"}
+
+# Rows read from the database at once.
+CHUNK_SIZE = 100_000
+
+Date = Union[str, datetime.date]
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for the Parquet query cache, "
+            "use the default file_format='pickle' without it"
+        ) from e
+
+    return pyarrow
+
+
+def query_key(query, params: Dict[str, Any]) -> str:
+    """Hash of the text of a query and of its parameters other than the dates."""
+    payload = json.dumps(
+        {"query": str(query), "params": params}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def day_runs(days: List[datetime.date]) -> List[Tuple[datetime.date, datetime.date]]:
+    """First and last day of every run of consecutive days."""
+    runs = []
+    for day in sorted(days):
+        if runs and day - runs[-1][1] == datetime.timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+class QueryCache:
+    def __init__(
+        self,
+        engine,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        file_format: str = "pickle",
+        chunksize: int = CHUNK_SIZE,
+    ):
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unknown query cache format: {file_format}")
+        if file_format == "parquet":
+            _import_pyarrow()
+
+        self.engine = engine
+        self.cache_dir = Path(cache_dir)
+        self.file_format = file_format
+        self.chunksize = chunksize
+
+    def _path(self, key: str, partition: str) -> Path:
+        return self.cache_dir / key / f"{partition}{FILE_FORMATS[self.file_format]}"
+
+    def _write(self, path: Path, df: pd.DataFrame) -> None:
+        # Written aside and renamed, so an interrupted write leaves no partition
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_name(f".{path.name}.tmp")
+        if self.file_format == "parquet":
+            df.to_parquet(temporary_path, index=False)
+        else:
+            df.to_pickle(temporary_path)
+        os.replace(temporary_path, path)
+
+    def _read(self, path: Path) -> pd.DataFrame:
+        if self.file_format == "parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _chunks(self, query, params: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            yield from pd.read_sql(
+                query, connection, params=params, chunksize=self.chunksize
+            )
+
+    def _save_query(self, key: str, query, params: Dict[str, Any]) -> None:
+        # The query next to its results, to tell the cache directories apart
+        query_path = self.cache_dir / key / "query.json"
+        if not query_path.exists():
+            query_path.parent.mkdir(parents=True, exist_ok=True)
+            query_path.write_text(
+                json.dumps(
+                    {"query": str(query), "params": params}, indent=2, default=str
+                )
+            )
+
+    def read(
+        self,
+        query,
+        start_date: Optional[Date] = None,
+        end_date: Optional[Date] = None,
+        date_column: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        end_inclusive: bool = False,
+    ) -> pd.DataFrame:
+        """Results of the query from ``start_date`` to ``end_date``, which is
+        excluded unless ``end_inclusive``, as the query itself treats it."""
+        params = dict(params or {})
+        key = query_key(query, params)
+        self._save_query(key, query, params)
+
+        if start_date is None:
+            path = self._path(key, "all")
+            if not path.exists():
+                chunks = list(self._chunks(query, params))
+                self._write(
+                    path,
+                    pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(),
+                )
+            return self._read(path)
+
+        if date_column is None:
+            raise ValueError("date_column is required to cache a range of dates")
+
+        days = list(
+            pd.date_range(
+                start_date, end_date, inclusive="both" if end_inclusive else "left"
+            ).date
+        )
+        today = datetime.date.today()
+        missing = [
+            day for day in days if day >= today or not self._path(key, day).exists()
+        ]
+
+        partitions = {}
+        for first, last in day_runs(missing):
+            run_partitions = self._query_days(
+                query, params, date_column, first, last, end_inclusive
+            )
+            for day, partition in run_partitions.items():
+                if day < today:
+                    self._write(self._path(key, day), partition)
+            partitions.update(run_partitions)
+
+        frames = [
+            partitions[day] if day in partitions else self._read(self._path(key, day))
+            for day in days
+        ]
+        non_empty = [frame for frame in frames if len(frame)]
+        if not non_empty:
+            return frames[0] if frames else pd.DataFrame()
+        return pd.concat(non_empty, ignore_index=True)
+
+    def _query_days(
+        self,
+        query,
+        params: Dict[str, Any],
+        date_column: str,
+        first: datetime.date,
+        last: datetime.date,
+        end_inclusive: bool,
+    ) -> Dict[datetime.date, pd.DataFrame]:
+        end = last if end_inclusive else last + datetime.timedelta(days=1)
+        day_chunks = defaultdict(list)
+        empty = pd.DataFrame()
+        for chunk in self._chunks(
+            query,
+            {**params, "start_date": first.isoformat(), "end_date": end.isoformat()},
+        ):
+            empty = chunk.iloc[:0]
+            dates = pd.to_datetime(chunk[date_column]).dt.date
+            for day, day_chunk in chunk.groupby(dates, sort=False):
+                day_chunks[day].append(day_chunk)
+
+        # Days without rows are cached as well, with the columns of the query
+        return {
+            day: (
+                pd.concat(day_chunks[day], ignore_index=True)
+                if day in day_chunks
+                else empty
+            )
+            for day in pd.date_range(first, last).date
+        }
@@ -1,19 +1,28 @@
-from datetime import time
-
 import dash
 import numpy as np
 import pandas as pd
 import plotly.express as px
 from dash import dcc, html
 from dash.dependencies import Input, Output
-from validation_dash import (
-    STATION_BLOCK,
-    STATION_ORDER,
-    calculate_real_travel_times,
-    filter_by_time_and_weekday,
-)
+from validation_dash import STATION_BLOCK, STATION_ORDER, day_mask
 
+from transit_lab_simmetro.dash_app.helpers.od_travel_times import ODTravelTimes
 from transit_lab_simmetro.utils import find_free_port, project_root
+from transit_lab_simmetro.validation.summary_cubes import SECONDS_PER_HOUR, hour_range
+
+# Hours of the day of the compared trips, by their visit of the origin
+TIME_RANGE = [7, 11]
+
+
+def week_trip_mask(start_date, end_date):
+    # The weekdays, holidays included, between the two dates
+    dates = pd.to_datetime(od_travel_times.trips["date"])
+    return (
+        day_mask(dates, None, holidays=False)
+        & (dates >= pd.to_datetime(start_date)).to_numpy()
+        & (dates <= pd.to_datetime(end_date)).to_numpy()
+    )
+
 
 app = dash.Dash(__name__)
 
@@ -46,61 +55,23 @@ app.layout = html.Div(
     ],
 )
 def update_heatmap_plot(start_date1, end_date1, start_date2, end_date2):
-    # Convert string dates to datetime objects
-    start_date1 = pd.to_datetime(start_date1).date()
-    end_date1 = pd.to_datetime(end_date1).date()
-    start_date2 = pd.to_datetime(start_date2).date()
-    end_date2 = pd.to_datetime(end_date2).date()
-
-    # Filter your data for the selected weeks
-    week1_data = merged_data[
-        (merged_data["date"] >= start_date1) & (merged_data["date"] <= end_date1)
-    ]
-    week2_data = merged_data[
-        (merged_data["date"] >= start_date2) & (merged_data["date"] <= end_date2)
-    ]
-
-    start_time, end_time = time(7), time(11)
-    week1_data = filter_by_time_and_weekday(week1_data, start_time, end_time)
-    # week1_data = remove_holidays(week1_data)
-
-    week2_data = filter_by_time_and_weekday(week2_data, start_time, end_time)
-    # week2_data = remove_holidays(week2_data)
-
-    # Initializing a 2D array to store the differences between real and simulation travel times
-    diff_matrix = np.zeros((len(STATION_ORDER), len(STATION_ORDER)))
-
-    for i, origin_station in enumerate(STATION_ORDER):
-        for j, destination_station in enumerate(STATION_ORDER):
-            if (
-                j <= i
-            ):  # Only consider stations that come after the origin in STATION_ORDER
-                continue
-
-            # Filtering the filtered_df to get real_travel_times for the current OD pair
-            week_1_travel_times = calculate_real_travel_times(
-                week1_data, week1_data, origin_station, destination_station
-            )
-
-            # Getting the simulated travel times using your existing function
-            week_2_travel_times = calculate_real_travel_times(
-                week2_data, week2_data, origin_station, destination_station
-            )
-
-            if week_1_travel_times.empty or week_2_travel_times.empty:
-                diff_matrix[i, j] = np.nan
-                print(f"Missing data for {origin_station} to {destination_station}")
-                print(f"Week 1 travel times: {week_1_travel_times}")
-                print(f"Week 2 travel times: {week_2_travel_times}")
-                continue
-
-            # Assuming percentile is defined, or set a default value
-            percentile = 50  # set a suitable default value
-            percentile_real = np.percentile(week_1_travel_times, percentile)
-            percentile_sim = np.percentile(week_2_travel_times, percentile)
+    hours = hour_range(TIME_RANGE)
+    time_window = (hours.start * SECONDS_PER_HOUR, hours.stop * SECONDS_PER_HOUR)
+
+    # Median travel times of all pairs, without the values beyond 3 IQR
+    week_1_medians, week_2_medians = (
+        od_travel_times.quantiles(
+            0.5,
+            iqr_fence=3,
+            trip_mask=week_trip_mask(start_date, end_date),
+            time_window=time_window,
+        )
+        / 60
+        for start_date, end_date in [(start_date1, end_date1), (start_date2, end_date2)]
+    )
 
-            # Calculating the difference
-            diff_matrix[i, j] = percentile_real - percentile_sim
+    # Only the stations after the origin in STATION_ORDER
+    diff_matrix = np.triu(week_1_medians.to_numpy() - week_2_medians.to_numpy(), 1)
 
     # Creating the heatmap plot
     fig = px.imshow(
@@ -141,7 +112,6 @@ if __name__ == "__main__":
         parse_dates=["event_time"],
     )
     merged_data["event_datetime"] = pd.to_datetime(merged_data["event_time"])
-    merged_data["weekday"] = merged_data["event_datetime"].dt.weekday
     merged_data["date"] = merged_data["event_datetime"].dt.date
     merged_data.sort_values(by=["event_datetime"], inplace=True)
     merged_data["dwell_arrtodep"] = (
@@ -153,5 +123,13 @@ if __name__ == "__main__":
     merged_data["station"] = merged_data["scada"].map(
         {v: k for k, v in STATION_BLOCK.items()}
     )
+    od_travel_times = ODTravelTimes(
+        merged_data,
+        ["date", "run_id"],
+        STATION_ORDER,
+        station_column="station",
+        time_column="event_datetime",
+        max_gap=180 * 60,
+    )
 
     app.run_server(debug=True, port=find_free_port())
@@ -2,19 +2,11 @@ import json
 
 
 from transit_lab_simmetro.utils import project_root
+from transit_lab_simmetro.validation.trip_matching import station_blocks
 
 # Step 1: Create a list of all blocks associated with stations and the blocks that come immediately after them
 with open(project_root / "alt_file_northbound_updated.json", "r") as f:
     data = json.load(f)
-    scada_next = {}
-    for i, block in enumerate(data[:-1]):
-        if "STATION" in block:
-            try:
-                scada_next[block["STATION"]["STATION_NAME"]] = (
-                    block["BLOCK_ALT"],
-                    data[i + 2]["BLOCK_ALT"],
-                )
-            except IndexError:
-                continue
+    scada_next = station_blocks(data)
 
 print(scada_next)
@@ -1,9 +1,10 @@
 import os
 
-import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from sqlalchemy import create_engine, text
 
+from transit_lab_simmetro.utils.query_cache import QueryCache
+
 load_dotenv(find_dotenv())
 
 USERNAME = os.getenv("USERNAME")
@@ -15,9 +16,7 @@ DATABASE = os.getenv("DATABASE")
 start_date = os.getenv("start_date")
 end_date = os.getenv("end_date")
 
-engine = create_engine(
-    f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
-).connect()
+engine = create_engine(f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}")
 
 station_trackid = {
     "Forest Park": 11020,
@@ -72,9 +71,10 @@ query_text1 = text(
     " run_id, event_time;"
 )
 
-pd.read_sql(
-    query_text1, engine, params={"start_date": start_date, "end_date": end_date}
-).to_csv(
+# Only the days missing from the local cache are queried
+QueryCache(engine).read(
+    query_text1, start_date, end_date, date_column="event_time"
+).sort_values(["run_id", "event_time"], kind="stable").to_csv(
     "./data/events.csv",
     index=False,
 )
@@ -0,0 +1,266 @@
+"""Rasterised string charts.
+
+Rather than one plotly trace per train, the time-distance lines of all trains
+(of any number of replications or AVL days) are drawn into a pixel grid which
+counts the lines crossing every pixel. The grid is sent as a single heatmap,
+so the cost of the figure depends on its size rather than on the number of
+events, and zooming only needs the visible window to be drawn again.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from transit_lab_simmetro.utils import project_root
+
+# Consecutive events of a train further apart than this are not joined.
+TIME_GAP_THRESHOLD = 60 * 40
+DIST_GAP_THRESHOLD = 10_000
+
+# Segments drawn at once, which bounds the memory of the pixel samples.
+CHUNK_SIZE = 1_000_000
+
+
+def load_track_distances(
+    infra_path: Union[str, Path] = project_root / "inputs" / "infra.json",
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """Distance of every block along the line, northbound blocks first and
+    southbound blocks back down, and the distance of every station."""
+    with open(infra_path, "r") as f:
+        data = json.load(f)
+
+    track_dist = {}
+    station_dict = {}
+    distance = 0
+    for block in data["Northbound"]:
+        distance += block["DISTANCE"]
+        track_dist[block["BLOCK_ALT"]] = distance
+        if "STATION" in block:
+            station_dict[block["STATION"]["STATION_NAME"]] = (
+                distance - block["DISTANCE"] / 2
+            )
+
+    for block in data["Southbound"]:
+        distance -= block["DISTANCE"]
+        track_dist[block["BLOCK_ALT"]] = distance
+
+    return track_dist, station_dict
+
+
+def line_segments(
+    events: pd.DataFrame,
+    run_columns: Sequence[str],
+    time_column: str = "time_in_seconds",
+    distance_column: str = "track_dist",
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Start and end points of the segments joining the consecutive events of
+    every run, leaving out the gaps."""
+    events = events.dropna(subset=[time_column, distance_column])
+    runs = events.groupby(list(run_columns), sort=False).ngroup().to_numpy()
+    times = events[time_column].to_numpy(dtype=float)
+    distances = events[distance_column].to_numpy(dtype=float)
+
+    order = np.lexsort((times, runs))
+    runs, times, distances = runs[order], times[order], distances[order]
+
+    joined = (
+        (runs[1:] == runs[:-1])
+        & (np.diff(times) <= TIME_GAP_THRESHOLD)
+        & (np.abs(np.diff(distances)) <= DIST_GAP_THRESHOLD)
+    )
+    return (
+        times[:-1][joined],
+        distances[:-1][joined],
+        times[1:][joined],
+        distances[1:][joined],
+    )
+
+
+def _clip_segments(x0, y0, x1, y1, width, height):
+    # Liang-Barsky clipping of the segments to the [0, width] x [0, height] box
+    dx, dy = x1 - x0, y1 - y0
+    t_min = np.zeros(len(x0))
+    t_max = np.ones(len(x0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in [(-dx, x0), (dx, width - x0), (-dy, y0), (dy, height - y0)]:
+            t = q / p
+            t_min = np.where(p < 0, np.maximum(t_min, t), t_min)
+            t_max = np.where(p > 0, np.minimum(t_max, t), t_max)
+            # Parallel to this edge and outside of it
+            t_max = np.where((p == 0) & (q < 0), -1, t_max)
+
+    inside = t_min <= t_max
+    t_min, t_max = t_min[inside], t_max[inside]
+    x0, y0, dx, dy = x0[inside], y0[inside], dx[inside], dy[inside]
+    return (
+        x0 + t_min * dx,
+        y0 + t_min * dy,
+        x0 + t_max * dx,
+        y0 + t_max * dy,
+    )
+
+
+def rasterize_segments(
+    x0: np.ndarray,
+    y0: np.ndarray,
+    x1: np.ndarray,
+    y1: np.ndarray,
+    x_range: Tuple[float, float],
+    y_range: Tuple[float, float],
+    width: int = 1600,
+    height: int = 600,
+) -> np.ndarray:
+    """Number of segments crossing every pixel of a height x width grid."""
+    counts = np.zeros(width * height, dtype=np.int64)
+    x_scale = width / (x_range[1] - x_range[0])
+    y_scale = height / (y_range[1] - y_range[0])
+
+    for start in range(0, len(x0), CHUNK_SIZE):
+        chunk = slice(start, start + CHUNK_SIZE)
+        px0, py0, px1, py1 = _clip_segments(
+            (x0[chunk] - x_range[0]) * x_scale,
+            (y0[chunk] - y_range[0]) * y_scale,
+            (x1[chunk] - x_range[0]) * x_scale,
+            (y1[chunk] - y_range[0]) * y_scale,
+            width,
+            height,
+        )
+
+        # One sample per pixel crossed along the longer axis of every segment;
+        # the end point is left to the next segment of the line.
+        steps = np.maximum(
+            np.maximum(
+                np.abs(np.floor(px1) - np.floor(px0)),
+                np.abs(np.floor(py1) - np.floor(py0)),
+            ),
+            1,
+        ).astype(np.int64)
+        segments = np.repeat(np.arange(len(steps)), steps)
+        offsets = np.arange(len(segments)) - np.repeat(np.cumsum(steps) - steps, steps)
+        t = offsets / steps[segments]
+
+        xs = np.minimum(px0[segments] + t * (px1 - px0)[segments], width - 1)
+        ys = np.minimum(py0[segments] + t * (py1 - py0)[segments], height - 1)
+        counts += np.bincount(
+            ys.astype(np.int64) * width + xs.astype(np.int64),
+            minlength=width * height,
+        )
+
+    return counts.reshape(height, width)
+
+
+def data_range(start: np.ndarray, end: np.ndarray) -> Tuple[float, float]:
+    low = min(start.min(), end.min())
+    high = max(start.max(), end.max())
+    return float(low), float(high if high > low else low + 1)
+
+
+def raster_figure(
+    events: pd.DataFrame,
+    run_columns: Sequence[str],
+    station_dict: Dict[str, float],
+    time_column: str = "time_in_seconds",
+    x_range: Optional[Tuple[float, float]] = None,
+    y_range: Optional[Tuple[float, float]] = None,
+    width: int = 1600,
+    height: int = 600,
+) -> go.Figure:
+    """String chart of the density of the train lines, with the stations as
+    horizontal lines."""
+    x0, y0, x1, y1 = line_segments(events, run_columns, time_column=time_column)
+    if len(x0) == 0:
+        return go.Figure()
+
+    x_range = x_range or data_range(x0, x1)
+    y_range = y_range or data_range(y0, y1)
+    counts = rasterize_segments(x0, y0, x1, y1, x_range, y_range, width, height)
+
+    fig = go.Figure(
+        go.Heatmap(
+            x=np.linspace(*x_range, width, endpoint=False)
+            + (x_range[1] - x_range[0]) / width / 2,
+            y=np.linspace(*y_range, height, endpoint=False)
+            + (y_range[1] - y_range[0]) / height / 2,
+            # Empty pixels are left transparent
+            z=np.where(counts > 0, np.log1p(counts), np.nan),
+            customdata=counts,
+            hovertemplate="Time: %{x:.0f}<br>Lines: %{customdata}<extra></extra>",
+            colorscale="Blues",
+            zmin=0,
+            colorbar=dict(title="Lines (log)"),
+        )
+    )
+
+    for station_name, distance in station_dict.items():
+        fig.add_hline(
+            y=distance,
+            line_width=1,
+            line_dash="dash",
+            line_color="black",
+            annotation_text=station_name,
+            annotation=dict(
+                font_size=8,
+                font_color="black",
+                showarrow=False,
+                xref="x",
+                yref="y",
+                x=x_range[0],
+                yanchor="middle",
+                yshift=0,
+                xanchor="right",
+            ),
+        )
+
+    fig.update_yaxes(tickvals=[], ticktext=[])
+    fig.update_layout(
+        autosize=True,
+        margin=dict(l=100, b=50, t=10, r=50),
+        showlegend=False,
+        # Keeps the zoom when the figure is drawn again for a new window
+        uirevision="string_chart",
+    )
+    return fig
+
+
+def add_run_traces(
+    fig: go.Figure,
+    events: pd.DataFrame,
+    run_column: str,
+    run_ids: Sequence[str],
+    time_column: str = "time_in_seconds",
+    distance_column: str = "track_dist",
+) -> go.Figure:
+    """Overlay the lines of the selected runs on a rasterised string chart."""
+    for run_id in run_ids:
+        run_data = events[events[run_column] == run_id]
+        for direction, group_data in run_data.groupby("direction"):
+            group_data = group_data.sort_values(time_column)
+            times = group_data[time_column].to_numpy(dtype=float)
+            distances = group_data[distance_column].to_numpy(dtype=float)
+            # A NaN point ahead of every gap breaks the line, keeping the
+            # event after the gap
+            gaps = (
+                np.flatnonzero(
+                    (np.diff(times) > TIME_GAP_THRESHOLD)
+                    | (np.abs(np.diff(distances)) > DIST_GAP_THRESHOLD)
+                )
+                + 1
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=np.insert(times, gaps, np.nan),
+                    y=np.insert(distances, gaps, np.nan),
+                    mode="lines",
+                    name=f"{run_id} ({direction})",
+                    line=dict(width=2),
+                )
+            )
+
+    fig.update_layout(showlegend=True)
+    return fig
@@ -1,5 +1,5 @@
 import datetime
-import json
+import functools
 
 import dash
 
@@ -7,10 +7,16 @@ import dash
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.io as pio
-from dash import dcc, html
+from dash import ctx, dcc, html
 from dash.dependencies import Input, Output
 
-from transit_lab_simmetro.utils import engine, find_free_port, project_root, text
+from transit_lab_simmetro.dash_app.helpers.downsampling import get_axis_range
+from transit_lab_simmetro.utils import engine, find_free_port, text
+from transit_lab_simmetro.validation.string_chart_raster import (
+    add_run_traces,
+    load_track_distances,
+    raster_figure,
+)
 
 pio.templates.default = "simple_white"
 
@@ -33,12 +39,13 @@ color_mapping = {
     "SB": "red",  # Example color for Southbound
 }
 
-# @functools.lru_cache(maxsize=100, typed=False)
 # Create a disk cache instance
 # cache = dc.Cache(project_root / "transit_lab_simmetro" / "validation")
 
 
 # @cache.memoize(expire=86400)
+# Zooming the density chart draws it again from the same day of events
+@functools.lru_cache(maxsize=8)
 def query_from_aws(selected_date):
     query_text = text(
         """
@@ -73,28 +80,27 @@ def query_from_aws(selected_date):
 
 
 # Loading static data
-with open(project_root / "inputs" / "infra.json", "r") as f:
-    data = json.load(f)
-    track_dist = {}
-    station_dict = {}
-    distance = 0
-    for block in data["Northbound"]:
-        distance += block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
-        if "STATION" in block:
-            station_dict[block["STATION"]["STATION_NAME"]] = (
-                distance - block["DISTANCE"] / 2
-            )
-
-    for block in data["Southbound"]:
-        distance -= block["DISTANCE"]
-        track_dist[block["BLOCK_ALT"]] = distance
+track_dist, station_dict = load_track_distances()
 
 # Layout of the app
 two_days_before_today = datetime.date.today() - datetime.timedelta(days=2)
 app.layout = html.Div(
     [
         dcc.DatePickerSingle(id="date-picker-single", date=str(two_days_before_today)),
+        dcc.RadioItems(
+            id="chart-mode",
+            options=[
+                {"label": "Lines", "value": "lines"},
+                {"label": "Density", "value": "density"},
+            ],
+            value="lines",
+            inline=True,
+        ),
+        dcc.Dropdown(
+            id="overlay-runs",
+            multi=True,
+            placeholder="Runs drawn over the density chart",
+        ),
         dcc.Graph(
             id="graph", config=config, style={"height": "100vh", "width": "100vw"}
         ),
@@ -103,9 +109,22 @@ app.layout = html.Div(
 
 
 # Callback to update the graph based on the selected date
-@app.callback(Output("graph", "figure"), [Input("date-picker-single", "date")])
-def update_figure(selected_date):
-    df = query_from_aws(selected_date)
+@app.callback(
+    [Output("graph", "figure"), Output("overlay-runs", "options")],
+    [
+        Input("date-picker-single", "date"),
+        Input("chart-mode", "value"),
+        Input("overlay-runs", "value"),
+        Input("graph", "relayoutData"),
+    ],
+)
+def update_figure(selected_date, chart_mode, overlay_run_ids, relayout_data):
+    zoomed = ctx.triggered_id == "graph"
+    if zoomed and chart_mode != "density":
+        # Only the density chart is drawn again for the zoomed window
+        return dash.no_update, dash.no_update
+
+    df = query_from_aws(selected_date).copy()
 
     print(df.head())
     print(df.info())
@@ -122,6 +141,22 @@ def update_figure(selected_date):
     sorted_run_ids = sorted_run_ids[
         pd.Series(sorted_run_ids).str.extract(r"(\d+)")[0].astype(int).argsort()
     ]
+    run_options = [{"label": run_id, "value": run_id} for run_id in sorted_run_ids]
+
+    if chart_mode == "density":
+        fig = raster_figure(
+            df,
+            ["run_id", "direction"],
+            station_dict,
+            time_column="event_seconds",
+            x_range=get_axis_range(relayout_data, "xaxis") if zoomed else None,
+            y_range=get_axis_range(relayout_data, "yaxis") if zoomed else None,
+        )
+        add_run_traces(
+            fig, df, "run_id", overlay_run_ids or [], time_column="event_seconds"
+        )
+        fig.update_layout(title=f"{selected_date}", margin=dict(l=200))
+        return fig, run_options
 
     # Create custom hover text
     hover_columns = df.columns
@@ -257,7 +292,7 @@ def update_figure(selected_date):
         tickangle=-45,
     )
 
-    return fig
+    return fig, run_options
 
 
 if __name__ == "__main__":
@@ -0,0 +1,227 @@
+"""Summary cubes of the validation dashboard.
+
+The AVL and simulation events are aggregated once, when the dashboard starts,
+by station, service date and hour of the day. The callbacks then answer a new
+time range, station or set of days by slicing and summing the cubes rather
+than filtering and pairing the events again, and only the binned histograms
+are sent to the browser.
+
+A histogram cube keeps, for every cell of its dimensions and every bin of
+values, the number, sum and sum of squares of the values, so the mean and
+standard deviation of any selection are exact and its quantiles are exact to
+a bin.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+SECONDS_PER_HOUR = 3600
+
+# Width of the bins of the run time, dwell time and headway cubes, in minutes.
+BIN_WIDTH = 0.1
+
+
+class Histogram:
+    """Binned values with the number, sum and sum of squares of every bin."""
+
+    def __init__(
+        self,
+        edges: np.ndarray,
+        counts: np.ndarray,
+        sums: np.ndarray,
+        squares: np.ndarray,
+    ):
+        self.edges = edges
+        self.counts = counts
+        self.sums = sums
+        self.squares = squares
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def count(self) -> float:
+        return self.counts.sum()
+
+    def mean(self) -> float:
+        return self.sums.sum() / self.count if self.count else np.nan
+
+    def std(self, ddof: int = 1) -> float:
+        if self.count <= ddof:
+            return np.nan
+        variance = (self.squares.sum() - self.count * self.mean() ** 2) / (
+            self.count - ddof
+        )
+        return np.sqrt(max(variance, 0))
+
+    def quantile(self, q: float) -> float:
+        """Quantile (a fraction) of the values, interpolated within its bin."""
+        if not self.count:
+            return np.nan
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        return float(np.interp(q * self.count, cumulative, self.edges))
+
+    def fence(self, k: float) -> Histogram:
+        """The bins within [q1 - k * iqr, q3 + k * iqr]."""
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        inside = (self.centers >= q1 - k * (q3 - q1)) & (
+            self.centers <= q3 + k * (q3 - q1)
+        )
+        return Histogram(
+            self.edges,
+            np.where(inside, self.counts, 0),
+            np.where(inside, self.sums, 0),
+            np.where(inside, self.squares, 0),
+        )
+
+    def percent(self) -> np.ndarray:
+        return self.counts / self.count * 100 if self.count else self.counts
+
+
+class HistogramCube:
+    """Histograms of a column of values in every cell of a set of dimensions.
+
+    Only the non-empty (cell, bin) pairs are kept, as parallel arrays of the
+    codes of the labels of every dimension, the bin, and its totals.
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        dimensions: Sequence[str],
+        value_column: str,
+        bin_width: float = BIN_WIDTH,
+    ):
+        frame = frame.dropna(subset=list(dimensions) + [value_column])
+        values = frame[value_column].to_numpy(dtype=float)
+
+        self.dimensions = list(dimensions)
+        self.labels: Dict[str, pd.Index] = {}
+        codes = []
+        for dimension in self.dimensions:
+            categorical = pd.Categorical(frame[dimension])
+            self.labels[dimension] = pd.Index(categorical.categories)
+            codes.append(categorical.codes.astype(np.int64))
+
+        lower = np.floor(values.min() / bin_width) * bin_width if len(values) else 0
+        bins = np.floor((values - lower) / bin_width).astype(np.int64)
+        n_bins = int(bins.max()) + 1 if len(values) else 1
+        self.edges = lower + bin_width * np.arange(n_bins + 1)
+
+        shape = [len(self.labels[dimension]) for dimension in self.dimensions]
+        cells, inverse = np.unique(
+            np.ravel_multi_index(codes + [bins], shape + [n_bins]),
+            return_inverse=True,
+        )
+        *cell_codes, self.bins = np.unravel_index(cells, shape + [n_bins])
+        self.codes = dict(zip(self.dimensions, cell_codes))
+        self.counts = np.bincount(inverse, minlength=len(cells))
+        self.sums = np.bincount(inverse, weights=values, minlength=len(cells))
+        self.squares = np.bincount(inverse, weights=values**2, minlength=len(cells))
+
+    def select(self, **selections: Optional[Iterable]) -> Histogram:
+        """Histogram of the cells with the given labels of some dimensions,
+        all labels of the others."""
+        selected = np.ones(len(self.bins), dtype=bool)
+        for dimension, labels in selections.items():
+            if labels is None:
+                continue
+            positions = self.labels[dimension].get_indexer(list(labels))
+            selected &= np.isin(self.codes[dimension], positions[positions >= 0])
+
+        n_bins = len(self.edges) - 1
+        bins = self.bins[selected]
+        return Histogram(
+            self.edges,
+            np.bincount(bins, weights=self.counts[selected], minlength=n_bins),
+            np.bincount(bins, weights=self.sums[selected], minlength=n_bins),
+            np.bincount(bins, weights=self.squares[selected], minlength=n_bins),
+        )
+
+
+def add_hour(
+    df: pd.DataFrame, time_column: str = "event_datetime", hour_column: str = "hour"
+) -> pd.DataFrame:
+    """Add the hour of the day of datetimes, or of times in seconds."""
+    df = df.copy()
+    if pd.api.types.is_datetime64_any_dtype(df[time_column]):
+        df[hour_column] = df[time_column].dt.hour
+    else:
+        df[hour_column] = np.floor(df[time_column] / SECONDS_PER_HOUR)
+    return df
+
+
+def delay_cube(
+    event_delay: pd.DataFrame, category_column: str = "drqbe"
+) -> pd.DataFrame:
+    """Total delay by date, hour and delay category."""
+    event_delay = add_hour(event_delay)
+    event_delay["date"] = event_delay["event_datetime"].dt.date
+    return (
+        event_delay.groupby(["date", "hour", category_column])["delay"]
+        .sum()
+        .reset_index()
+    )
+
+
+def hour_range(time_range: Sequence[int]) -> range:
+    """The hours of a [start, end] range of the time slider."""
+    return range(time_range[0], time_range[1])
+
+
+def pair_block_events(
+    events: pd.DataFrame,
+    blocks: Dict[str, tuple],
+    block_column: str,
+    by: Sequence[str],
+    time_column: str,
+    tolerance=None,
+) -> pd.DataFrame:
+    """The time between the activations of the two blocks of every station,
+    in minutes, with the station and the origin event."""
+    events = events.dropna(subset=[time_column])
+    pairs = []
+    for station, (origin_block, destination_block) in blocks.items():
+        if origin_block is None:
+            continue
+        origin = events[events[block_column] == origin_block]
+        destination = events[events[block_column] == destination_block]
+        pair = pd.merge_asof(
+            left=origin.sort_values(time_column),
+            right=destination[list(by) + [time_column]]
+            .assign(destination_time=destination[time_column])
+            .sort_values(time_column),
+            by=list(by),
+            on=time_column,
+            direction="forward",
+            tolerance=tolerance,
+        )
+        elapsed = pair["destination_time"] - pair[time_column]
+        if pd.api.types.is_timedelta64_dtype(elapsed):
+            elapsed = elapsed.dt.total_seconds()
+        pair["minutes"] = elapsed / 60
+        pair["station"] = station
+        pairs.append(pair)
+
+    return pd.concat(pairs, ignore_index=True)
+
+
+def histogram_traces(
+    real: Histogram, sim: Histogram, names=("Real-World Data", "Simulation Data")
+) -> list:
+    return [
+        go.Bar(
+            x=histogram.centers,
+            y=histogram.percent(),
+            width=histogram.edges[1] - histogram.edges[0],
+            name=name,
+            opacity=0.75,
+        )
+        for histogram, name in zip([real, sim], names)
+    ]
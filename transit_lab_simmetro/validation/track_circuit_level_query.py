@@ -1,9 +1,10 @@
 import os
 
-import pandas as pd
 from dotenv import find_dotenv, load_dotenv
 from sqlalchemy import create_engine, text
 
+from transit_lab_simmetro.utils.query_cache import QueryCache
+
 # Load environment variables
 load_dotenv(find_dotenv())
 USERNAME = os.getenv("USERNAME")
@@ -15,9 +16,7 @@ start_date = os.getenv("start_date")
 end_date = os.getenv("end_date")
 
 # Connect to the database
-engine = create_engine(
-    f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}"
-).connect()
+engine = create_engine(f"postgresql://{USERNAME}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}")
 
 # Query to fetch event data
 query_text1 = text(
@@ -27,8 +26,9 @@ query_text1 = text(
 )
 
 
-events_df = pd.read_sql(
-    query_text1, engine, params={"start_date": start_date, "end_date": "2023-04-02"}
+# Only the days missing from the local cache are queried
+events_df = QueryCache(engine).read(
+    query_text1, start_date, "2023-04-02", date_column="event_time"
 )
 
 events_df.to_csv("./data/track_events_south.csv", index=False)
@@ -0,0 +1,232 @@
+"""Trips of the track circuit events, by run id.
+
+The events of a run id are one trip until the train jumps along the line,
+e.g. when the run id is reused for another train. The events are sorted
+once, by run id and time, and split into trips wherever the run id changes
+or the milepost jumps, so the trips of months of events are found without a
+loop over the run ids.
+
+A trip that does not start at a terminal, or at the start of the service day,
+is a fragment of a trip whose run id changed on the way. It is joined to the
+fragment ending closest before it, in time and along the line, among the
+fragments ending within the tolerances. The candidates of all fragments are
+found at once from the sorted ends of the fragments, and every fragment
+joins at most one predecessor and one successor.
+
+Mileposts are the distance along the line at the end of every block of an
+infrastructure file, and positions map back to their block through the
+sorted mileposts.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class MilepostIndex:
+    """Mileposts of the blocks of an infrastructure file, in their order."""
+
+    def __init__(self, blocks: List[Dict], block_key: str = "BLOCK_ALT"):
+        self.blocks = pd.Index([block[block_key] for block in blocks])
+        self.ends = np.cumsum([block["DISTANCE"] for block in blocks])
+
+    def mileposts(self, blocks: pd.Series) -> pd.Series:
+        """Milepost of the end of every block, NaN for unknown blocks."""
+        positions = self.blocks.get_indexer(blocks)
+        return pd.Series(
+            np.where(positions >= 0, self.ends[positions], np.nan),
+            index=blocks.index,
+        )
+
+    def blocks_at(self, distances: Sequence[float]) -> np.ndarray:
+        """Block containing every distance along the line, None beyond it."""
+        positions = np.searchsorted(self.ends, distances, side="left")
+        known = positions < len(self.ends)
+        names = np.full(len(positions), None, dtype=object)
+        names[known] = self.blocks.to_numpy()[positions[known]]
+        return names
+
+
+def station_blocks(blocks: List[Dict], offset: int = 2) -> Dict[str, Tuple]:
+    """The block of every station and the block ``offset`` blocks after it."""
+    return {
+        block["STATION"]["STATION_NAME"]: (
+            block["BLOCK_ALT"],
+            blocks[i + offset]["BLOCK_ALT"],
+        )
+        for i, block in enumerate(blocks[: len(blocks) - offset])
+        if "STATION" in block
+    }
+
+
+def segment_trips(
+    events: pd.DataFrame,
+    max_jump: float = 5000,
+    run_column: str = "run_id",
+    time_column: str = "event_time",
+    distance_column: str = "track_dist",
+) -> pd.DataFrame:
+    """The events sorted by run id and time, with the ``trip_id`` of every
+    event: its run id and the number of jumps of the run before it."""
+    events = events.sort_values([run_column, time_column], kind="stable")
+    runs = events[run_column].to_numpy()
+
+    new_run = np.ones(len(events), dtype=bool)
+    new_run[1:] = runs[1:] != runs[:-1]
+    jump = np.abs(events[distance_column].diff().to_numpy()) > max_jump
+    # Jumps counted over all runs, less those of the runs before
+    segment = pd.Series(np.cumsum(jump & ~new_run), index=events.index)
+    segment -= segment.where(new_run).ffill().astype(np.int64)
+
+    return events.assign(
+        trip_id=events[run_column].astype(str) + "_" + segment.astype(str)
+    ).reset_index(drop=True)
+
+
+def trip_ends(
+    events: pd.DataFrame,
+    trip_column: str = "trip_id",
+    time_column: str = "event_time",
+    distance_column: str = "track_dist",
+) -> pd.DataFrame:
+    """Time and milepost of the first and last event of every trip of events
+    sorted by trip and time."""
+    trips = events.groupby(trip_column, sort=False)
+    return pd.DataFrame(
+        {
+            "start_time": trips[time_column].first(),
+            "start_dist": trips[distance_column].first(),
+            "end_time": trips[time_column].last(),
+            "end_dist": trips[distance_column].last(),
+        }
+    )
+
+
+def fragment_links(
+    ends: pd.DataFrame,
+    time_tolerance: pd.Timedelta = pd.Timedelta(seconds=80),
+    distance_tolerance: float = 1000,
+    max_cost: float = 1000,
+) -> pd.Series:
+    """The predecessor of the fragments with one, by trip id.
+
+    A predecessor of a fragment without a valid start is a fragment without
+    both valid ends, ending before its start within the tolerances. Its cost
+    is the distance from its end plus the seconds since; the cheapest is
+    taken, and a fragment claimed by several successors goes to the one it
+    is cheapest for.
+    """
+    successors = ends[~ends["valid_start"]]
+    candidates = ends[~(ends["valid_start"] & ends["valid_end"])].sort_values(
+        "end_time"
+    )
+    candidate_times = candidates["end_time"].to_numpy()
+
+    # Every successor against the candidates ending in the time window before it
+    first = np.searchsorted(
+        candidate_times,
+        (successors["start_time"] - time_tolerance).to_numpy(),
+        side="right",
+    )
+    last = np.searchsorted(
+        candidate_times, successors["start_time"].to_numpy(), side="left"
+    )
+    n_candidates = np.maximum(last - first, 0)
+    successor_positions = np.repeat(np.arange(len(successors)), n_candidates)
+    candidate_positions = np.repeat(first, n_candidates) + (
+        np.arange(n_candidates.sum())
+        - np.repeat(np.cumsum(n_candidates) - n_candidates, n_candidates)
+    )
+
+    pairs = pd.DataFrame(
+        {
+            "trip_id": successors.index.to_numpy()[successor_positions],
+            "predecessor": candidates.index.to_numpy()[candidate_positions],
+            "distance": successors["start_dist"].to_numpy()[successor_positions]
+            - candidates["end_dist"].to_numpy()[candidate_positions],
+            "seconds": (
+                successors["start_time"].to_numpy()[successor_positions]
+                - candidate_times[candidate_positions]
+            )
+            / np.timedelta64(1, "s"),
+        }
+    )
+    pairs["cost"] = pairs["distance"] + pairs["seconds"]
+    pairs = pairs[
+        (pairs["trip_id"] != pairs["predecessor"])
+        & (pairs["distance"].abs() <= distance_tolerance)
+        & (pairs["cost"] < max_cost)
+    ]
+
+    pairs = (
+        pairs.sort_values("cost", kind="stable")
+        .drop_duplicates("trip_id")
+        .drop_duplicates("predecessor")
+    )
+    return pairs.set_index("trip_id")["predecessor"]
+
+
+def chain_roots(links: pd.Series, trip_ids: pd.Index) -> pd.Series:
+    """The first fragment of the chain of predecessors of every trip."""
+    positions = pd.Series(np.arange(len(trip_ids)), index=trip_ids)
+    parents = positions.to_numpy().copy()
+    parents[positions[links.index].to_numpy()] = positions[links].to_numpy()
+
+    # Pointer jumping: every pass doubles the length of the followed chains
+    while True:
+        grandparents = parents[parents]
+        if np.array_equal(grandparents, parents):
+            break
+        parents = grandparents
+
+    return pd.Series(trip_ids[parents], index=trip_ids)
+
+
+def match_trips(
+    events: pd.DataFrame,
+    is_start_valid,
+    is_end_valid,
+    max_jump: float = 5000,
+    time_tolerance: pd.Timedelta = pd.Timedelta(seconds=80),
+    distance_tolerance: float = 1000,
+    max_cost: float = 1000,
+    run_column: str = "run_id",
+) -> pd.DataFrame:
+    """The events with the ``trip_id`` of their trip, after joining its
+    fragments; a joined trip keeps the id of its first fragment.
+
+    ``is_start_valid`` and ``is_end_valid`` take the time and milepost of
+    the ends of all trips and return whether each is a genuine end.
+    """
+    events = segment_trips(events, max_jump, run_column=run_column)
+    ends = trip_ends(events)
+    ends["valid_start"] = np.asarray(
+        is_start_valid(ends["start_time"], ends["start_dist"]), dtype=bool
+    )
+    ends["valid_end"] = np.asarray(
+        is_end_valid(ends["end_time"], ends["end_dist"]), dtype=bool
+    )
+
+    links = fragment_links(ends, time_tolerance, distance_tolerance, max_cost)
+    roots = chain_roots(links, ends.index)
+    events["trip_id"] = events["trip_id"].map(roots)
+    return events
+
+
+def near(
+    distances: pd.Series, mileposts: Sequence[float], threshold: float
+) -> np.ndarray:
+    """Whether every distance is within the threshold of one of the mileposts."""
+    return np.logical_or.reduce(
+        [np.abs(distances.to_numpy() - milepost) <= threshold for milepost in mileposts]
+    )
+
+
+def after_day_start(times: pd.Series, window: Optional[pd.Timedelta]) -> np.ndarray:
+    """Whether every time is within the window after the start of its day."""
+    if window is None:
+        return np.zeros(len(times), dtype=bool)
+    return ((times - times.dt.normalize()) <= window).to_numpy()
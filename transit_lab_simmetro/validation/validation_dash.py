@@ -1,4 +1,4 @@
-from datetime import datetime, time
+from datetime import datetime
 
 import dash_bootstrap_components as dbc
 import numpy as np
@@ -8,7 +8,16 @@ import plotly.graph_objects as go
 from dash import Dash, Input, Output, dcc, html
 from pandas.tseries.holiday import USFederalHolidayCalendar
 
+from transit_lab_simmetro.dash_app.helpers.od_travel_times import ODTravelTimes
 from transit_lab_simmetro.utils import find_free_port, project_root
+from transit_lab_simmetro.validation.summary_cubes import (
+    HistogramCube,
+    add_hour,
+    delay_cube,
+    histogram_traces,
+    hour_range,
+    pair_block_events,
+)
 
 # pio.templates.default = "plotly_dark"
 
@@ -197,20 +206,29 @@ DWELL_BLOCK = {
 
 
 # Utility Functions
-def filter_by_time_and_weekday(df, start_time, end_time):
-    return df[
-        (df["event_datetime"].dt.time >= start_time)
-        & (df["event_datetime"].dt.time <= end_time)
-        & (df["weekday"] < 5)
-    ].copy()
-
-
-def remove_holidays(df):
-    cal = USFederalHolidayCalendar()
-    holidays = cal.holidays(
-        start=df["event_datetime"].min(), end=df["event_datetime"].max()
-    )
-    return df[~df["event_datetime"].dt.date.isin(holidays)].copy()
+def day_mask(dates, stored_data, holidays=True):
+    # The weekday, optionally non-holiday, and if stored non-delayed days
+    dates = pd.to_datetime(pd.Series(dates))
+    mask = dates.dt.weekday < 5
+    if holidays:
+        mask &= ~dates.isin(
+            USFederalHolidayCalendar().holidays(start=dates.min(), end=dates.max())
+        )
+
+    if stored_data:
+        non_delayed_days = pd.to_datetime(stored_data["non_delayed_days"])
+        mask &= dates.isin(non_delayed_days)
+
+    return mask.to_numpy()
+
+
+def selected_days(cube, stored_data, holidays=True):
+    dates = cube.labels["date"]
+    return dates[day_mask(dates, stored_data, holidays)]
+
+
+def real_trip_mask(stored_data):
+    return day_mask(real_od_travel_times.trips["date"], stored_data)
 
 
 # Dash App
@@ -332,45 +350,22 @@ app.layout = dbc.Container(
     ],
 )
 def update_bar_plot(time_range, delay_threshold):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
+    filtered_delay = delay_summary[delay_summary["hour"].isin(hour_range(time_range))]
 
-    filtered_event_delay = event_delay[
-        (event_delay["event_datetime"].dt.time >= start_time)
-        & (event_delay["event_datetime"].dt.time <= end_time)
-    ]
-
-    grouped_delays = (
-        filtered_event_delay.groupby(filtered_event_delay["event_datetime"].dt.date)
-        .agg({"delay": "sum"})
-        .reset_index()
-    )
-
-    # Find the minimum and maximum dates from the grouped data
-    min_date = filtered_event_delay["event_datetime"].min().date()
-    max_date = filtered_event_delay["event_datetime"].max().date()
-
-    # Generate a full date range between min and max dates
-    full_date_range = pd.date_range(min_date, max_date)
-
-    # Reindex the DataFrame
-    grouped_delays.set_index("event_datetime", inplace=True)
-    grouped_delays = grouped_delays.reindex(full_date_range).fillna(0).reset_index()
-    grouped_delays.rename(columns={"index": "event_datetime"}, inplace=True)
-
-    grouped_delays["event_datetime"] = pd.to_datetime(grouped_delays["event_datetime"])
+    # Total delay of every day between the first and the last, including the
+    # days without any delay
+    daily_delays = filtered_delay.groupby("date")["delay"].sum()
+    full_date_range = pd.date_range(daily_delays.index.min(), daily_delays.index.max())
+    daily_delays = daily_delays.reindex(full_date_range.date, fill_value=0)
 
     # Filter dates where the total delay is below the threshold
-    non_delayed_days = grouped_delays[grouped_delays["delay"] <= delay_threshold][
-        "event_datetime"
-    ].dt.date.tolist()
+    non_delayed_days = daily_delays.index[daily_delays <= delay_threshold].tolist()
 
     delay_grouped = (
-        filtered_event_delay.groupby(
-            [filtered_event_delay["event_datetime"].dt.date, "drqbe"]
-        )["delay"]
+        filtered_delay.groupby(["date", "drqbe"])["delay"]
         .sum()
         .reset_index()
+        .rename(columns={"date": "event_datetime"})
     )
 
     fig_bar = px.bar(
@@ -434,101 +429,23 @@ def update_bar_plot(time_range, delay_threshold):
     ],
 )
 def update_run_time_histogram(selected_station, time_range, stored_data):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
-
-    filtered_df = track_df[
-        track_df["scada"].isin(RUN_TIME_BLOCKS[selected_station])
-    ].copy()
-    filtered_df = filter_by_time_and_weekday(filtered_df, start_time, end_time)
-    filtered_df = remove_holidays(filtered_df)
-
-    # Filter simulation data by time and selected station
-    filtered_sim = block_test[
-        block_test["block_id"].isin(RUN_TIME_BLOCKS[selected_station])
-    ].copy()
-    filtered_sim = filtered_sim[
-        (filtered_sim["time_in_seconds"] >= time_range[0] * 3600)
-        & (filtered_sim["time_in_seconds"] <= time_range[1] * 3600)
-    ]
-
-    filtered_sim.sort_values(by=["time_in_seconds"], inplace=True)
-    filtered_sim["time"] = filtered_sim["time_in_seconds"]
-
-    if stored_data:
-        non_delayed_days = stored_data["non_delayed_days"]
-        # Convert back to datetime.date from str
-        non_delayed_days = [
-            datetime.strptime(date_str, "%Y-%m-%d").date()
-            for date_str in non_delayed_days
-        ]
-        filtered_df = filtered_df[
-            filtered_df["event_datetime"].dt.date.isin(non_delayed_days)
-        ]
-
-    avl = pd.merge_asof(
-        left=filtered_df[filtered_df["scada"] == RUN_TIME_BLOCKS[selected_station][0]],
-        right=filtered_df[filtered_df["scada"] == RUN_TIME_BLOCKS[selected_station][1]],
-        by=["date", "run_id"],
-        left_on="event_datetime",
-        right_on="event_datetime",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
-        tolerance=pd.Timedelta(minutes=20),
-    )
-
-    sim = pd.merge_asof(
-        left=filtered_sim[
-            filtered_sim["block_id"] == RUN_TIME_BLOCKS[selected_station][0]
-        ],
-        right=filtered_sim[
-            filtered_sim["block_id"] == RUN_TIME_BLOCKS[selected_station][1]
-        ],
-        by=["replication_id", "train_id"],
-        left_on="time",
-        right_on="time",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
+    hours = hour_range(time_range)
+    real_histogram = real_cubes["run_time"].select(
+        station=[selected_station],
+        date=selected_days(real_cubes["run_time"], stored_data),
+        hour=hours,
     )
+    # Filter the real-world run times with the IQR fence
+    real_histogram = real_histogram.fence(3)
+    sim_histogram = sim_cubes["run_time"].select(station=[selected_station], hour=hours)
 
-    real_run_times = (
-        avl["event_time_destination"] - avl["event_time_origin"]
-    ).dt.total_seconds() / 60
-
-    sim_run_times = (
-        sim["time_in_seconds_destination"] - sim["time_in_seconds_origin"]
-    ) / 60
-
-    real_run_times = real_run_times.dropna(inplace=False)
-
-    # # filter real_run_times with IQR in one line
-    q1 = real_run_times.quantile(0.25)
-    q3 = real_run_times.quantile(0.75)
-    iqr = q3 - q1
-    real_run_times = real_run_times[
-        (real_run_times >= q1 - 3 * iqr) & (real_run_times <= q3 + 3 * iqr)
-    ]
-
-    sim_run_times = sim_run_times.dropna(inplace=False)
-
-    fig = go.Figure()
-
-    # Add real-world data
-    fig.add_trace(
-        go.Histogram(
-            x=real_run_times.values, name="Real-World Data", histnorm="percent"
-        )
-    )
-
-    # Add simulation data
-    fig.add_trace(
-        go.Histogram(x=sim_run_times.values, name="Simulation Data", histnorm="percent")
-    )
+    fig = go.Figure(histogram_traces(real_histogram, sim_histogram))
 
     fig.update_layout(
         title=f"Run-Time Histogram for {selected_station} to Next Station",
         xaxis_title="Run-Time (min)",
         yaxis_title="Frequency",
+        barmode="overlay",
     )
 
     # Add real-world annotation
@@ -536,8 +453,8 @@ def update_run_time_histogram(selected_station, time_range, stored_data):
         x=0.05,
         y=0.95,
         text=(
-            f"<b>Real-world</b><br>Mean: {real_run_times.mean():.2f} min<br>Std Dev:"
-            f" {real_run_times.std():.2f} min"
+            f"<b>Real-world</b><br>Mean: {real_histogram.mean():.2f} min<br>Std Dev:"
+            f" {real_histogram.std():.2f} min"
         ),
         showarrow=False,
         font=dict(size=12, color="black"),
@@ -558,8 +475,8 @@ def update_run_time_histogram(selected_station, time_range, stored_data):
         x=0.95,
         y=0.95,
         text=(
-            f"<b>Simulation</b><br>Mean: {sim_run_times.mean():.2f} min<br>Std Dev:"
-            f" {sim_run_times.std():.2f} min"
+            f"<b>Simulation</b><br>Mean: {sim_histogram.mean():.2f} min<br>Std Dev:"
+            f" {sim_histogram.std():.2f} min"
         ),
         showarrow=False,
         font=dict(size=12, color="black"),
@@ -587,97 +504,23 @@ def update_run_time_histogram(selected_station, time_range, stored_data):
     ],
 )
 def update_dwell_time_histogram(selected_station, time_range, stored_data):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
-
-    filtered_df = track_df[track_df["scada"].isin(DWELL_BLOCK[selected_station])].copy()
-    filtered_df = filter_by_time_and_weekday(filtered_df, start_time, end_time)
-    # filtered_df = remove_holidays(filtered_df)
-
-    # Filter simulation data by time and selected station
-    filtered_sim = block_test[
-        block_test["block_id"].isin(DWELL_BLOCK[selected_station])
-    ].copy()
-    filtered_sim = filtered_sim[
-        (filtered_sim["time_in_seconds"] >= time_range[0] * 3600)
-        & (filtered_sim["time_in_seconds"] <= time_range[1] * 3600)
-    ]
-
-    filtered_sim.sort_values(by=["time_in_seconds"], inplace=True)
-    filtered_sim["time"] = filtered_sim["time_in_seconds"]
-
-    if stored_data:
-        non_delayed_days = stored_data["non_delayed_days"]
-        # Convert back to datetime.date from str
-        non_delayed_days = [
-            datetime.strptime(date_str, "%Y-%m-%d").date()
-            for date_str in non_delayed_days
-        ]
-        filtered_df = filtered_df[
-            filtered_df["event_datetime"].dt.date.isin(non_delayed_days)
-        ]
-
-    avl = pd.merge_asof(
-        left=filtered_df[filtered_df["scada"] == DWELL_BLOCK[selected_station][0]],
-        right=filtered_df[filtered_df["scada"] == DWELL_BLOCK[selected_station][1]],
-        by=["date", "run_id"],
-        left_on="event_datetime",
-        right_on="event_datetime",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
-        tolerance=pd.Timedelta(minutes=20),
+    hours = hour_range(time_range)
+    real_histogram = real_cubes["dwell_time"].select(
+        station=[selected_station],
+        date=selected_days(real_cubes["dwell_time"], stored_data, holidays=False),
+        hour=hours,
     )
-
-    sim = pd.merge_asof(
-        left=filtered_sim[filtered_sim["block_id"] == DWELL_BLOCK[selected_station][0]],
-        right=filtered_sim[
-            filtered_sim["block_id"] == DWELL_BLOCK[selected_station][1]
-        ],
-        by=["replication_id", "train_id"],
-        left_on="time",
-        right_on="time",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
+    sim_histogram = sim_cubes["dwell_time"].select(
+        station=[selected_station], hour=hours
     )
 
-    real_run_times = (
-        avl["event_time_destination"] - avl["event_time_origin"]
-    ).dt.total_seconds() / 60
-
-    sim_run_times = (
-        sim["time_in_seconds_destination"] - sim["time_in_seconds_origin"]
-    ) / 60
-
-    real_run_times = real_run_times.dropna(inplace=False)
-
-    # # filter real_run_times with IQR in one line
-    # q1 = real_run_times.quantile(0.25)
-    # q3 = real_run_times.quantile(0.75)
-    # iqr = q3 - q1
-    # real_run_times = real_run_times[
-    #     (real_run_times >= q1 - 3 * iqr) & (real_run_times <= q3 + 3 * iqr)
-    # ]
-
-    sim_run_times = sim_run_times.dropna(inplace=False)
-
-    fig = go.Figure()
-
-    # Add real-world data
-    fig.add_trace(
-        go.Histogram(
-            x=real_run_times.values, name="Real-World Data", histnorm="percent"
-        )
-    )
-
-    # Add simulation data
-    fig.add_trace(
-        go.Histogram(x=sim_run_times.values, name="Simulation Data", histnorm="percent")
-    )
+    fig = go.Figure(histogram_traces(real_histogram, sim_histogram))
 
     fig.update_layout(
         title=f"Dwell-Time Histogram for {selected_station}",
         xaxis_title="Dwell Time (min)",
         yaxis_title="Frequency",
+        barmode="overlay",
     )
 
     # Add real-world annotation
@@ -685,8 +528,8 @@ def update_dwell_time_histogram(selected_station, time_range, stored_data):
         x=0.05,
         y=0.95,
         text=(
-            f"<b>Real-world</b><br>Mean: {real_run_times.mean():.2f} min<br>Std Dev:"
-            f" {real_run_times.std():.2f} min"
+            f"<b>Real-world</b><br>Mean: {real_histogram.mean():.2f} min<br>Std Dev:"
+            f" {real_histogram.std():.2f} min"
         ),
         showarrow=False,
         font=dict(size=12, color="black"),
@@ -707,8 +550,8 @@ def update_dwell_time_histogram(selected_station, time_range, stored_data):
         x=0.95,
         y=0.95,
         text=(
-            f"<b>Simulation</b><br>Mean: {sim_run_times.mean():.2f} min<br>Std Dev:"
-            f" {sim_run_times.std():.2f} min"
+            f"<b>Simulation</b><br>Mean: {sim_histogram.mean():.2f} min<br>Std Dev:"
+            f" {sim_histogram.std():.2f} min"
         ),
         showarrow=False,
         font=dict(size=12, color="black"),
@@ -739,50 +582,7 @@ def update_dwell_time_histogram(selected_station, time_range, stored_data):
     ],
 )
 def update_histograms(selected_station, time_range, stored_data):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
-
-    filtered_df = filter_by_time_and_weekday(merged_data, start_time, end_time)
-    filtered_df = remove_holidays(filtered_df)
-
-    # Filter simulation data by time and selected station
-    filtered_sim = simulation_results[
-        (simulation_results["station_name"] == selected_station)
-    ]
-    filtered_sim = filtered_sim[
-        (filtered_sim["time_in_seconds"] >= time_range[0] * 3600)
-        & (filtered_sim["time_in_seconds"] <= time_range[1] * 3600)
-    ]
-
-    if stored_data:
-        non_delayed_days = stored_data["non_delayed_days"]
-        # Convert back to datetime.date from str
-        non_delayed_days = [
-            datetime.strptime(date_str, "%Y-%m-%d").date()
-            for date_str in non_delayed_days
-        ]
-        filtered_df = filtered_df[
-            filtered_df["event_datetime"].dt.date.isin(non_delayed_days)
-        ]
-
-    station_df = filtered_df[filtered_df["station"] == selected_station].copy()
-
-    # filter station_df with IQR on headway and dwell_time
-    q1 = station_df["headway"].quantile(0.25)
-    q3 = station_df["headway"].quantile(0.75)
-    iqr = q3 - q1
-    station_df = station_df[
-        (station_df["headway"] >= q1 - 3 * iqr)
-        & (station_df["headway"] <= q3 + 3 * iqr)
-    ]
-
-    q1 = station_df["dwell_arrtodep"].quantile(0.25)
-    q3 = station_df["dwell_arrtodep"].quantile(0.75)
-    iqr = q3 - q1
-    station_df = station_df[
-        (station_df["dwell_arrtodep"] >= q1 - 3 * iqr)
-        & (station_df["dwell_arrtodep"] <= q3 + 3 * iqr)
-    ]
+    hours = hour_range(time_range)
 
     figs = []
     for column, sim_column, title in zip(
@@ -790,31 +590,32 @@ def update_histograms(selected_station, time_range, stored_data):
         ["headway", "difference_in_activation"],
         ["Headway", "Dwell Time"],
     ):
-        data = station_df[column].dropna()
-        sim_data = filtered_sim[sim_column].dropna()
-
-        # Calculate mean and std_dev for real-world data
-        mean_real = np.mean(data)
-        std_dev_real = np.std(data)
-
-        # Calculate mean and std_dev for simulation data
-        mean_sim = np.mean(sim_data)
-        std_dev_sim = np.std(sim_data)
-
-        fig = go.Figure()
+        # Filter the real-world data with the IQR fence
+        real_histogram = (
+            real_cubes[column]
+            .select(
+                station=[selected_station],
+                date=selected_days(real_cubes[column], stored_data),
+                hour=hours,
+            )
+            .fence(3)
+        )
+        sim_histogram = sim_cubes[sim_column].select(
+            station=[selected_station], hour=hours
+        )
 
-        # Add real-world data
-        fig.add_trace(go.Histogram(x=data, name="Real-World Data", histnorm="percent"))
+        mean_real = real_histogram.mean()
+        std_dev_real = real_histogram.std(ddof=0)
+        mean_sim = sim_histogram.mean()
+        std_dev_sim = sim_histogram.std(ddof=0)
 
-        # Add simulation data
-        fig.add_trace(
-            go.Histogram(x=sim_data, name="Simulation Data", histnorm="percent")
-        )
+        fig = go.Figure(histogram_traces(real_histogram, sim_histogram))
 
         fig.update_layout(
             title=f"{title} Histogram for {selected_station}",
             xaxis_title=f"{title} (min)",
             yaxis_title="Frequency",
+            barmode="overlay",
         )
 
         # Add real-world annotation
@@ -862,98 +663,6 @@ def update_histograms(selected_station, time_range, stored_data):
     return figs
 
 
-def calculate_real_travel_times(df, dest_df, origin_station, destination_station):
-    # Sort df by 'event_time' for merge_asof to work
-    df = df[["date", "run_id", "event_time", "event_datetime", "station"]].copy()
-    df = df.sort_values("event_time")
-
-    dest_df = dest_df[
-        ["date", "run_id", "event_time", "event_datetime", "station"]
-    ].copy()
-    dest_df = dest_df.sort_values("event_time")
-
-    # Separate origin and destination stations
-    origin_df = df[df["station"] == origin_station].copy()
-    destination_df = dest_df[dest_df["station"] == destination_station].copy()
-
-    # Create a column to store the maximum possible time for a valid trip
-    origin_df["max_time"] = origin_df["event_time"] + pd.Timedelta(minutes=180)
-    # Merge_asof to find closest matching destination row for each origin row
-    merged_df = pd.merge_asof(
-        origin_df,
-        destination_df,
-        by=["date", "run_id"],
-        left_on="event_datetime",
-        right_on="event_datetime",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
-    )
-    # Filter rows where destination event_time is within the valid trip time window
-    merged_df = merged_df[
-        (merged_df["event_time_destination"] >= merged_df["event_time_origin"])
-        & (merged_df["event_time_destination"] <= merged_df["max_time"])
-    ]
-
-    # Calculate travel times
-    travel_times = (
-        (
-            merged_df["event_time_destination"] - merged_df["event_time_origin"]
-        ).dt.total_seconds()
-        / 60
-    ).dropna()
-
-    # # Filter travel times between the 5th and 95th percentiles
-    # lower_bound = travel_times.quantile(0.05)
-    # upper_bound = travel_times.quantile(0.95)
-    # travel_times = travel_times[(travel_times >= lower_bound) & (travel_times <= upper_bound)]
-
-    # Filter by fence method
-    q1 = travel_times.quantile(0.25)
-    q3 = travel_times.quantile(0.75)
-    iqr = q3 - q1
-    travel_times = travel_times[
-        (travel_times >= q1 - 3 * iqr) & (travel_times <= q3 + 3 * iqr)
-    ]
-
-    return travel_times
-
-
-def calculate_sim_travel_times(df, dest_df, origin_station, destination_station):
-    # Sort DataFrame by necessary keys
-    df = df[["replication_id", "time_in_seconds", "station_name", "train_id"]].copy()
-    df = df.sort_values(by="time_in_seconds")
-    df["time"] = df["time_in_seconds"]
-
-    dest_df = dest_df[
-        ["replication_id", "time_in_seconds", "station_name", "train_id"]
-    ].copy()
-    dest_df = dest_df.sort_values(by="time_in_seconds")
-    dest_df["time"] = dest_df["time_in_seconds"]
-
-    # Split DataFrame into origin and destination stations
-    origin_df = df[df["station_name"] == origin_station]
-    destination_df = dest_df[dest_df["station_name"] == destination_station]
-
-    # Merge DataFrames on replication_id, train_id, and find the closest time_in_seconds
-    merged_df = pd.merge_asof(
-        origin_df,
-        destination_df,
-        by=["replication_id", "train_id"],
-        on="time",
-        direction="forward",
-        suffixes=("_origin", "_destination"),
-    )
-
-    # print(merged_df.head(5))
-    # Calculate the travel times
-    sim_travel_times = (
-        (merged_df["time_in_seconds_destination"] - merged_df["time_in_seconds_origin"])
-        / 60
-    ).dropna()
-
-    return sim_travel_times
-
-
 # New callback for station-pair histograms
 @app.callback(
     Output("travel-time-histogram", "figure"),
@@ -965,36 +674,32 @@ def calculate_sim_travel_times(df, dest_df, origin_station, destination_station)
     ],
 )
 def update_travel_time_histogram(start_station, end_station, time_range, stored_data):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
-
-    filtered_df = filter_by_time_and_weekday(merged_data, start_time, end_time)
-    filtered_df = remove_holidays(filtered_df)
-
-    if stored_data:
-        non_delayed_days = stored_data["non_delayed_days"]
-        non_delayed_days = [
-            datetime.strptime(date_str, "%Y-%m-%d").date()
-            for date_str in non_delayed_days
-        ]
-        filtered_df = filtered_df[
-            filtered_df["event_datetime"].dt.date.isin(non_delayed_days)
-        ]
-
-    real_travel_times = calculate_real_travel_times(
-        filtered_df, merged_data, start_station, end_station
+    time_window = (time_range[0] * 3600, time_range[1] * 3600)
+
+    real_travel_times = (
+        pd.Series(
+            real_od_travel_times.travel_times(
+                start_station,
+                end_station,
+                iqr_fence=3,
+                trip_mask=real_trip_mask(stored_data),
+                time_window=time_window,
+            )
+        )
+        / 60
     )
     fig = go.Figure()
     fig.add_trace(
         go.Histogram(x=real_travel_times, name="Travel Time", histnorm="percent")
     )
 
-    filtered_sim = simulation_results[
-        (simulation_results["time_in_seconds"] >= time_range[0] * 3600)
-        & (simulation_results["time_in_seconds"] <= time_range[1] * 3600)
-    ]
-    sim_travel_times = calculate_sim_travel_times(
-        filtered_sim, simulation_results, start_station, end_station
+    sim_travel_times = (
+        pd.Series(
+            sim_od_travel_times.travel_times(
+                start_station, end_station, time_window=time_window
+            )
+        )
+        / 60
     )
 
     fig.add_trace(
@@ -1118,66 +823,6 @@ def update_passenger_boxplots(time_range, delay_threshold):
     return fig_boarded, fig_alighted, fig_on_train
 
 
-# def calculate_sim_travel_times_all_pairs(df):
-#     # Sort DataFrame by necessary keys
-#     df = df[["replication_id", "train_id", "time_in_seconds", "station_name"]].copy()
-#     df = df.sort_values(by="time_in_seconds")
-#     df["time"] = df["time_in_seconds"]
-
-#     # Merge DataFrames on replication_id, train_id, and find the closest time_in_seconds
-#     merged_df = pd.merge_asof(
-#         df,
-#         df,
-#         by=["replication_id", "train_id"],
-#         on="time",
-#         direction="forward",
-#         allow_exact_matches=False,
-#         suffixes=("_origin", "_destination"),
-#     )
-
-#     merged_df["travel_time"] = (
-#         merged_df["time_in_seconds_destination"] - merged_df["time_in_seconds_origin"]
-#     ) / 60
-
-#     # print(merged_df.head(50))
-#     return merged_df[["station_name_origin", "station_name_destination", "travel_time"]]
-
-
-# def calculate_real_travel_times_all_pairs(df):
-#     # Sort df by 'event_time' for merge_asof to work
-#     df = df[["date", "run_id", "event_time", "event_datetime", "station"]].copy()
-#     df = df.sort_values("event_time")
-
-#     # Merge the DataFrame with itself to get OD pairs
-#     merged_df = pd.merge_asof(
-#         df,
-#         df,
-#         by=["date", "run_id"],
-#         left_on="event_time",
-#         right_on="event_time",
-#         direction="forward",
-#         suffixes=("_origin", "_destination"),
-#     )
-
-#     # print(merged_df.head(5))
-
-#     # Add a max_time column for asof merge
-#     # df["max_time"] = df["event_datetime_origin"] + pd.Timedelta(minutes=180)
-
-#     # Filter rows where the destination station is different from the origin station
-#     # and within the 180-minute window
-#     merged_df = merged_df[(merged_df["station_origin"] != merged_df["station_destination"])]
-
-#     # Calculate travel time
-#     merged_df["travel_time"] = (
-#         merged_df["event_datetime_destination"] - merged_df["event_datetime_origin"]
-#     ).dt.total_seconds() / 60
-
-#     # merged_df = merged_df[merged_df["travel_time"] < 180]
-
-#     return merged_df[["station_origin", "station_destination", "travel_time"]]
-
-
 @app.callback(
     Output("heatmap-plot", "figure"),
     [
@@ -1187,70 +832,21 @@ def update_passenger_boxplots(time_range, delay_threshold):
     ],
 )
 def update_heatmap_plot(percentile, time_range, stored_data):
-    start_time = time(time_range[0])
-    end_time = time(time_range[1])
-
-    filtered_df = filter_by_time_and_weekday(merged_data, start_time, end_time)
-    filtered_df = remove_holidays(filtered_df)
-
-    if stored_data:
-        non_delayed_days = stored_data["non_delayed_days"]
-        non_delayed_days = [
-            datetime.strptime(date_str, "%Y-%m-%d").date()
-            for date_str in non_delayed_days
-        ]
-        filtered_df = filtered_df[
-            filtered_df["event_datetime"].dt.date.isin(non_delayed_days)
-        ]
-
-    filtered_sim = simulation_results[
-        (simulation_results["time_in_seconds"] >= time_range[0] * 3600)
-        & (simulation_results["time_in_seconds"] <= time_range[1] * 3600)
-    ]
-    # Use the new function to get travel times for all OD pairs
-    # all_pair_real_travel_times = calculate_real_travel_times_all_pairs(filtered_df)
-    # all_pair_sim_travel_times = calculate_sim_travel_times_all_pairs(simulation_results)
-
-    # Initialize a 2D array to store the differences between real and simulation travel times
-    diff_matrix = np.zeros((len(STATION_ORDER), len(STATION_ORDER)))
-
-    for i, origin_station in enumerate(STATION_ORDER):
-        for j, destination_station in enumerate(STATION_ORDER):
-            if (
-                j <= i
-            ):  # Only consider stations that come after the origin in STATION_ORDER
-                continue
-
-            # Filter the all_pair_real_travel_times for the current OD pair
-            real_travel_times = calculate_real_travel_times(
-                filtered_df, merged_data, origin_station, destination_station
-            )
-            # all_pair_real_travel_times[
-            #     (all_pair_real_travel_times["station_origin"] == origin_station)
-            #     & (all_pair_real_travel_times["station_destination"] == destination_station)
-            # ]["travel_time"]
-
-            # Calculate simulated travel times using your existing function
-            sim_travel_times = calculate_sim_travel_times(
-                filtered_sim, simulation_results, origin_station, destination_station
-            )
-            # all_pair_sim_travel_times[
-            #     (all_pair_sim_travel_times["station_name_origin"] == origin_station)
-            #     & (all_pair_sim_travel_times["station_name_destination"] == destination_station)
-            # ]["travel_time"]
-
-            if real_travel_times.empty or sim_travel_times.empty:
-                diff_matrix[i, j] = np.nan
-                print(f"Missing data for {origin_station} to {destination_station}")
-                print(f"Real travel times: {real_travel_times}")
-                print(f"Sim travel times: {sim_travel_times}")
-                continue
-
-            percentile_real = np.percentile(real_travel_times, percentile)
-            percentile_sim = np.percentile(sim_travel_times, percentile)
+    time_window = (time_range[0] * 3600, time_range[1] * 3600)
+
+    # Travel time percentiles of all OD pairs at once
+    real_percentiles = real_od_travel_times.quantiles(
+        percentile / 100,
+        iqr_fence=3,
+        trip_mask=real_trip_mask(stored_data),
+        time_window=time_window,
+    )
+    sim_percentiles = sim_od_travel_times.quantiles(
+        percentile / 100, time_window=time_window
+    )
 
-            # Calculate the difference
-            diff_matrix[i, j] = percentile_real - percentile_sim
+    # Only consider stations that come after the origin in STATION_ORDER
+    diff_matrix = np.triu((real_percentiles - sim_percentiles).to_numpy() / 60, k=1)
 
     # Create the heatmap plot
     fig = px.imshow(
@@ -1353,10 +949,78 @@ if __name__ == "__main__":
         index=False,
     )
     print("saved")
+    real_od_travel_times = ODTravelTimes(
+        merged_data,
+        ["date", "run_id"],
+        STATION_ORDER,
+        station_column="station",
+        time_column="event_datetime",
+        max_gap=180 * 60,
+    )
+    sim_od_travel_times = ODTravelTimes(
+        simulation_results,
+        ["replication_id", "train_id"],
+        STATION_ORDER,
+        split_column="direction",
+    )
+
     simulation_results["headway"] = simulation_results["headway"] / 60
     simulation_results["dwell_time"] = simulation_results["dwell_time"] / 60
     simulation_results["difference_in_activation"] = (
         simulation_results["difference_in_activation"] / 60
     )
 
+    # Summary cubes sliced by the callbacks
+    delay_summary = delay_cube(event_delay)
+    track_df = add_hour(track_df)
+    merged_data = add_hour(merged_data)
+    block_test = add_hour(block_test, "time_in_seconds")
+    simulation_results = add_hour(simulation_results, "time_in_seconds")
+
+    real_cubes = {
+        measure: HistogramCube(
+            pair_block_events(
+                track_df,
+                blocks,
+                "scada",
+                ["date", "run_id"],
+                "event_datetime",
+                tolerance=pd.Timedelta(minutes=20),
+            ),
+            ["station", "date", "hour"],
+            "minutes",
+        )
+        for measure, blocks in [
+            ("run_time", RUN_TIME_BLOCKS),
+            ("dwell_time", DWELL_BLOCK),
+        ]
+    }
+    sim_cubes = {
+        measure: HistogramCube(
+            pair_block_events(
+                block_test,
+                blocks,
+                "block_id",
+                ["replication_id", "train_id"],
+                "time_in_seconds",
+            ),
+            ["station", "hour"],
+            "minutes",
+        )
+        for measure, blocks in [
+            ("run_time", RUN_TIME_BLOCKS),
+            ("dwell_time", DWELL_BLOCK),
+        ]
+    }
+    for column in ["headway", "dwell_arrtodep"]:
+        real_cubes[column] = HistogramCube(
+            merged_data, ["station", "date", "hour"], column
+        )
+    for column in ["headway", "difference_in_activation"]:
+        sim_cubes[column] = HistogramCube(
+            simulation_results.rename(columns={"station_name": "station"}),
+            ["station", "hour"],
+            column,
+        )
+
     app.run_server(debug=True, port=find_free_port())